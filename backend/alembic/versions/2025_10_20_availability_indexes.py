@@ -0,0 +1,27 @@
+"""Index project reservations for window based availability lookups."""
+
+from __future__ import annotations
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "2025_10_20_availability_indexes"
+down_revision = "2025_03_15_add_booking_tables"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_prj_projects_window", "prj_projects", ["start_date", "end_date"]
+    )
+    op.create_index(
+        "ix_prj_project_items_item_project",
+        "prj_project_items",
+        ["item_id", "project_id"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_prj_project_items_item_project", table_name="prj_project_items")
+    op.drop_index("ix_prj_projects_window", table_name="prj_projects")
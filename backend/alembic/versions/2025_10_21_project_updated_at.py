@@ -0,0 +1,31 @@
+"""Track project modification time for incremental planner loads."""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "2025_10_21_project_updated_at"
+down_revision = "2025_10_20_availability_indexes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "prj_projects",
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            nullable=True,
+            server_default=sa.func.now(),
+        ),
+    )
+    op.execute("UPDATE prj_projects SET updated_at = created_at")
+    op.create_index("ix_prj_projects_updated_at", "prj_projects", ["updated_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_prj_projects_updated_at", table_name="prj_projects")
+    op.drop_column("prj_projects", "updated_at")
@@ -0,0 +1,88 @@
+"""Materialize CRM dashboard aggregates and index the windowed lookups."""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "2025_10_22_add_crm_metric_store"
+down_revision = "2025_10_21_project_updated_at"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "crm_metric_tenants",
+        sa.Column("tenant_id", sa.String(length=100), primary_key=True),
+        sa.Column("total_leads", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("leads_with_deals", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("total_deals", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("open_deals", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("closed_cycle_days_sum", sa.Float(), nullable=False, server_default="0"),
+        sa.Column("closed_cycle_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("rebuilt_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+    )
+
+    op.create_table(
+        "crm_metric_stages",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("tenant_id", sa.String(length=100), nullable=False),
+        sa.Column(
+            "stage_id",
+            sa.Integer(),
+            sa.ForeignKey("crm_pipeline_stages.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column("deal_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("total_value", sa.Numeric(16, 2), nullable=False, server_default="0"),
+        sa.Column("weighted_value", sa.Numeric(18, 4), nullable=False, server_default="0"),
+        sa.Column("created_epoch_sum", sa.Float(), nullable=False, server_default="0"),
+        sa.UniqueConstraint("tenant_id", "stage_id", name="uq_metric_stage_tenant_stage"),
+    )
+
+    op.create_table(
+        "crm_metric_sources",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("tenant_id", sa.String(length=100), nullable=False),
+        sa.Column("key", sa.String(length=120), nullable=False),
+        sa.Column("label", sa.String(length=120), nullable=False),
+        sa.Column("dimension_type", sa.String(length=30), nullable=False, server_default="lead_source"),
+        sa.Column("lead_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("deal_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("won_deal_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("pipeline_value", sa.Numeric(16, 2), nullable=False, server_default="0"),
+        sa.Column("won_value", sa.Numeric(16, 2), nullable=False, server_default="0"),
+        sa.UniqueConstraint("tenant_id", "key", name="uq_metric_source_tenant_key"),
+    )
+
+    op.create_table(
+        "crm_metric_workflows",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("tenant_id", sa.String(length=100), nullable=False),
+        sa.Column("workflow_id", sa.String(length=120), nullable=False),
+        sa.Column("run_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("failed_runs", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("duration_minutes_sum", sa.Float(), nullable=False, server_default="0"),
+        sa.Column("duration_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("sla_breaches", sa.Integer(), nullable=False, server_default="0"),
+        sa.UniqueConstraint("tenant_id", "workflow_id", name="uq_metric_workflow_tenant_workflow"),
+    )
+
+    op.create_index("ix_crm_leads_tenant_created", "crm_leads", ["tenant_id", "created_at"])
+    op.create_index("ix_crm_deals_tenant_updated", "crm_deals", ["tenant_id", "updated_at"])
+    op.create_index(
+        "ix_crm_deals_tenant_expected_close", "crm_deals", ["tenant_id", "expected_close"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_crm_deals_tenant_expected_close", table_name="crm_deals")
+    op.drop_index("ix_crm_deals_tenant_updated", table_name="crm_deals")
+    op.drop_index("ix_crm_leads_tenant_created", table_name="crm_leads")
+    op.drop_table("crm_metric_workflows")
+    op.drop_table("crm_metric_sources")
+    op.drop_table("crm_metric_stages")
+    op.drop_table("crm_metric_tenants")
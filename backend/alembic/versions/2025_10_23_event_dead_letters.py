@@ -0,0 +1,35 @@
+"""Persist event bus dead letters for replay."""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "2025_10_23_event_dead_letters"
+down_revision = "2025_10_22_add_crm_metric_store"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "evt_dead_letters",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("event_type", sa.String(length=120), nullable=False),
+        sa.Column("handler", sa.String(length=255), nullable=True),
+        sa.Column("reason", sa.String(length=30), nullable=False, server_default="handler_failed"),
+        sa.Column("error", sa.Text(), nullable=True),
+        sa.Column("payload", sa.Text(), nullable=False),
+        sa.Column("event_class", sa.String(length=255), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+        sa.Column("replayed_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index(
+        "ix_evt_dead_letters_pending", "evt_dead_letters", ["replayed_at", "event_type"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_evt_dead_letters_pending", table_name="evt_dead_letters")
+    op.drop_table("evt_dead_letters")
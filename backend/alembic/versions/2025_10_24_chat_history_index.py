@@ -0,0 +1,46 @@
+"""Index chat messages for keyset pagination of project history."""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "2025_10_24_chat_history_index"
+down_revision = "2025_10_23_event_dead_letters"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # ``chat_messages`` was only ever created through ``Base.metadata``; make
+    # sure migrated databases have it before indexing.
+    if not sa.inspect(op.get_bind()).has_table("chat_messages"):
+        op.create_table(
+            "chat_messages",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("project_id", sa.Integer(), sa.ForeignKey("prj_projects.id"), nullable=False),
+            sa.Column("user_id", sa.Integer(), sa.ForeignKey("auth_users.id"), nullable=False),
+            sa.Column("content", sa.String(), nullable=False),
+            sa.Column(
+                "timestamp",
+                sa.DateTime(timezone=True),
+                server_default=sa.func.now(),
+                nullable=False,
+            ),
+        )
+        op.create_index("ix_chat_messages_id", "chat_messages", ["id"])
+    op.create_index(
+        "ix_chat_messages_project_timestamp_id",
+        "chat_messages",
+        ["project_id", "timestamp", "id"],
+    )
+
+
+def downgrade() -> None:
+    # Deliberately not symmetric: ``chat_messages`` (and ``ix_chat_messages_id``)
+    # may predate this revision via ``Base.metadata.create_all``, and whether
+    # ``upgrade`` created them is not recorded. Dropping the table here could
+    # destroy chat history this revision never owned, so only the index it
+    # always adds is removed.
+    op.drop_index("ix_chat_messages_project_timestamp_id", table_name="chat_messages")
@@ -0,0 +1,31 @@
+"""Index recurring invoices by status and next run for the due-invoice scan."""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "2025_10_25_invoice_due_index"
+down_revision = "2025_10_24_chat_history_index"
+branch_labels = None
+depends_on = None
+
+
+def _has_table() -> bool:
+    return sa.inspect(op.get_bind()).has_table("recurring_invoices")
+
+
+def upgrade() -> None:
+    # Fresh databases get the table, index included, from ``Base.metadata``.
+    if _has_table():
+        op.create_index(
+            "ix_recurring_invoices_status_next_run",
+            "recurring_invoices",
+            ["status", "next_run"],
+        )
+
+
+def downgrade() -> None:
+    if _has_table():
+        op.drop_index("ix_recurring_invoices_status_next_run", table_name="recurring_invoices")
@@ -0,0 +1,22 @@
+"""Store stop coordinates so routes can be sequenced by travel distance."""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "2025_10_26_route_stop_coords"
+down_revision = "2025_10_25_invoice_due_index"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("veh_route_stops", sa.Column("latitude", sa.Float(), nullable=True))
+    op.add_column("veh_route_stops", sa.Column("longitude", sa.Float(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("veh_route_stops", "longitude")
+    op.drop_column("veh_route_stops", "latitude")
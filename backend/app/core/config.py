@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import Any, Callable, Iterable, Sequence, cast
+from typing import Any, Callable, Iterable, Literal, Sequence, cast
 
 from types import NoneType, UnionType
 
@@ -137,6 +137,18 @@ class Settings(BaseSettings):
     DB_POOL_TIMEOUT: int = Field(
         default=30, description="Timeout for acquiring a connection from the pool"
     )
+    AUTH_PRINCIPAL_CACHE_TTL_SECONDS: float = Field(
+        default=30.0,
+        description="Seconds an authenticated user lookup is reused before hitting the database",
+    )
+    AUTH_PRINCIPAL_CACHE_SIZE: int = Field(
+        default=1024,
+        description="Maximum cached principals per worker; 0 disables the cache",
+    )
+    AUTH_TOKEN_CACHE_SIZE: int = Field(
+        default=4096,
+        description="Maximum verified JWT digests kept per worker; 0 disables the cache",
+    )
     SMTP_HOST: str | None = None
     SMTP_PORT: int = 587
     SMTP_USER: str | None = None
@@ -212,6 +224,158 @@ class Settings(BaseSettings):
         default=30,
         description="Default lookback window when syncing blended analytics metrics.",
     )
+    CRM_DASHBOARD_BACKEND: Literal["materialized", "sql", "python"] = Field(
+        default="materialized",
+        description=(
+            "How /crm/analytics/dashboard is computed: 'materialized' reads the per-tenant "
+            "metric store, 'sql' runs grouped aggregate queries and 'python' recomputes "
+            "everything from the tenant's history."
+        ),
+    )
+
+    EVENT_BUS_ASYNC: bool = Field(
+        default=True,
+        description="Dispatch events from per-type queues on the API event loop.",
+    )
+    EVENT_BUS_QUEUE_SIZE: int = Field(
+        default=1000,
+        ge=1,
+        description="Maximum number of queued events per event type.",
+    )
+    EVENT_BUS_WORKERS: int = Field(
+        default=8,
+        ge=1,
+        description="Threads available to synchronous event handlers.",
+    )
+    EVENT_BUS_BACKPRESSURE: Literal["block", "drop_oldest", "reject"] = Field(
+        default="block",
+        description=(
+            "What publishing does when an event queue is full: 'block' waits for space, "
+            "'drop_oldest' dead-letters the oldest queued event and 'reject' raises."
+        ),
+    )
+
+    INVENTORY_STATUS_COALESCE_MS: int = Field(
+        default=250,
+        ge=0,
+        description="Window in which equipment status changes are batched into one broadcast.",
+    )
+
+    CREW_LOCATION_FLUSH_MS: int = Field(
+        default=1000,
+        ge=10,
+        description="How often buffered crew GPS positions are written to the database.",
+    )
+
+    CREW_LOCATION_BROADCAST_HZ: float = Field(
+        default=2.0,
+        gt=0,
+        description="Ticks per second at which batched crew locations are broadcast.",
+    )
+    CREW_LOCATION_MAX_USER_HZ: float = Field(
+        default=1.0,
+        gt=0,
+        description="Maximum broadcast rate of a single crew member's position.",
+    )
+    CREW_LOCATION_MIN_DISTANCE_M: float = Field(
+        default=5.0,
+        ge=0,
+        description="Movement in metres below which a new position is not broadcast.",
+    )
+    CREW_LOCATION_MIN_HEADING_DEG: float = Field(
+        default=15.0,
+        ge=0,
+        description="Heading change in degrees that triggers a broadcast without movement.",
+    )
+    CREW_LOCATION_DELTA_ENCODING: bool = Field(
+        default=False,
+        description="Send crew coordinates as micro-degree deltas between keyframes.",
+    )
+
+    SOCKETIO_MANAGER_URL: str | None = Field(
+        default=None,
+        description=(
+            "Pub/sub backend shared by all API workers for Socket.IO fan-out, e.g. "
+            "'redis://redis:6379/0'. Unset keeps rooms local to one process."
+        ),
+    )
+    SOCKETIO_CHANNEL: str = Field(
+        default="rentguy-socketio",
+        description="Pub/sub channel the Socket.IO workers exchange messages on.",
+    )
+
+    CHAT_ID_BLOCK_SIZE: int = Field(
+        default=100,
+        ge=1,
+        description="Chat message ids reserved per database round trip.",
+    )
+    CHAT_WRITE_QUEUE_SIZE: int = Field(
+        default=1000,
+        ge=1,
+        description="Chat messages that may await persistence before senders are slowed down.",
+    )
+    CHAT_WRITE_BATCH_SIZE: int = Field(
+        default=200,
+        ge=1,
+        description="Maximum chat messages written per multi-row insert.",
+    )
+    CHAT_WRITE_LINGER_MS: int = Field(
+        default=50,
+        ge=0,
+        description="How long the chat writer waits for a batch to fill up.",
+    )
+
+    CHAT_HISTORY_CACHE_SIZE: int = Field(
+        default=50,
+        ge=0,
+        description=(
+            "Recent chat messages kept in memory per project room and replayed on join. "
+            "0 reads the database on every join."
+        ),
+    )
+    CHAT_HISTORY_CACHE_ROOMS: int = Field(
+        default=1000,
+        ge=1,
+        description="Project rooms whose recent chat history is kept in memory.",
+    )
+
+    RECURRING_INVOICE_BATCH_SIZE: int = Field(
+        default=100,
+        ge=1,
+        description="Due recurring invoices claimed and committed per scheduler chunk.",
+    )
+    RECURRING_INVOICE_SCHEDULER_MODE: Literal["poll", "heap"] = Field(
+        default="heap",
+        description=(
+            "'poll' checks for due recurring invoices every minute; 'heap' sleeps until "
+            "the earliest known next_run and is woken by API changes."
+        ),
+    )
+    RECURRING_INVOICE_HEAP_SIZE: int = Field(
+        default=1000,
+        ge=1,
+        description="Upcoming recurring invoice runs kept in memory in heap mode.",
+    )
+    RECURRING_INVOICE_RESYNC_SECONDS: float = Field(
+        default=300.0,
+        gt=0,
+        description="How often heap mode reloads upcoming runs from the database.",
+    )
+
+    TRANSPORT_PDF_CACHE_DIR: str | None = Field(
+        default=None,
+        description="Directory for cached transport PDFs; defaults to a folder in the temp dir.",
+    )
+    TRANSPORT_PDF_CACHE_MAX_MB: int = Field(
+        default=256,
+        ge=1,
+        description="Size limit of the transport PDF cache before LRU eviction.",
+    )
+    TRANSPORT_PDF_WORKERS: int = Field(
+        default=2,
+        ge=0,
+        description="Processes rendering transport PDFs; 0 renders on a worker thread.",
+    )
 
     @field_validator("ALLOWED_ORIGINS", mode="before")
     @classmethod
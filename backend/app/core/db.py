@@ -50,7 +50,9 @@ else:
 def _async_drivername(source: URL) -> str:
     driver = source.drivername
     if driver.startswith("postgresql"):
-        return driver.replace("postgresql", "postgresql+asyncpg", 1)
+        # psycopg 3 ships both the sync and the asyncio driver, so every
+        # PostgreSQL URL (``postgresql``, ``postgresql+psycopg``, ...) maps onto it.
+        return "postgresql+psycopg"
     if driver.startswith("mysql"):
         return driver.replace("mysql", "mysql+aiomysql", 1)
     if driver.startswith("sqlite"):
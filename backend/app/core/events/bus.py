@@ -1,23 +1,96 @@
-"""Simple in-memory event bus used by the API services."""
+"""In-process event bus used by the API services.
+
+Until :meth:`EventBus.start` is awaited the bus delivers synchronously: every
+handler runs on the publisher's thread before ``publish`` returns. Once started
+on an event loop, ``publish`` only enqueues the event and returns. Each event
+type gets its own bounded queue, drained by dispatcher tasks on the loop.
+Coroutine handlers are awaited there, while plain callables run on a thread pool
+so slow subscribers (mail, partner sync) never hold up the request that
+published the event. When a queue is full the configured backpressure policy
+decides whether the publisher waits, the oldest queued event is dropped, or the
+new event is rejected.
+
+High-frequency event types can be given a coalescing window with
+:meth:`EventBus.coalesce`. Handlers subscribed with ``batch=True`` then receive
+lists of events collected over that window, deduplicated by the window's key
+function (the latest event per key wins). ``publish_many`` hands a burst of
+events to the bus in one call.
+
+Failed and dropped deliveries become :class:`DeadLetter` records. The most
+recent ones are kept in memory, and with a :class:`DeadLetterStore` they are
+also persisted so they can be replayed later.
+"""
 
 from __future__ import annotations
 
+import asyncio
+import inspect
 import logging
-from dataclasses import dataclass
-from typing import Any, Callable, Dict, Iterable, List, MutableMapping
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Deque,
+    Dict,
+    Hashable,
+    Iterable,
+    List,
+    Literal,
+    MutableMapping,
+    Tuple,
+    get_args,
+)
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.events.dead_letters import DeadLetterStore, restore_event
 
 logger = logging.getLogger(__name__)
 
-Handler = Callable[[Any], None]
+Handler = Callable[[Any], Any]
+BackpressurePolicy = Literal["block", "drop_oldest", "reject"]
+
+
+class EventBusFull(RuntimeError):
+    """Raised when an event cannot be queued under the backpressure policy."""
 
 
 @dataclass(frozen=True)
 class DeadLetter:
-    """Represents a failed event delivery attempt."""
+    """Represents a failed or dropped event delivery attempt."""
 
     event_type: str
     event: Any
-    error: Exception
+    error: Exception | None
+    handler: str | None = None
+    reason: str = "handler_failed"
+
+
+@dataclass(frozen=True)
+class _Envelope:
+    event: Any
+    # Restricts delivery to one handler; set when replaying a dead letter.
+    handler: str | None = None
+
+
+@dataclass(frozen=True)
+class _Window:
+    interval: float = 0.0
+    key: Callable[[Any], Hashable] | None = None
+    max_batch: int = 1000
+
+
+@dataclass
+class _Batch:
+    events: Dict[Hashable, Any] = field(default_factory=dict)
+    timer: asyncio.TimerHandle | None = None
+
+
+_DEFAULT_WINDOW = _Window()
 
 
 def _resolve_event_type(event: Any) -> str:
@@ -32,63 +105,470 @@ def _resolve_event_type(event: Any) -> str:
     return getattr(event, "event_type", "")
 
 
+def handler_name(handler: Handler) -> str:
+    """Return the stable name used to address ``handler`` in dead letters."""
+
+    qualname = getattr(handler, "__qualname__", None) or repr(handler)
+    module = getattr(handler, "__module__", None)
+    return f"{module}.{qualname}" if module else qualname
+
+
+def _is_coroutine_handler(handler: Handler) -> bool:
+    if inspect.iscoroutinefunction(handler):
+        return True
+    # Instances of classes with ``async def __call__``.
+    return callable(handler) and inspect.iscoroutinefunction(type(handler).__call__)
+
+
+async def _await(awaitable: Awaitable[Any]) -> Any:
+    return await awaitable
+
+
 class EventBus:
-    """Lightweight synchronous event bus with dead-letter tracking."""
+    """Event bus with optional asynchronous dispatch and dead-letter tracking."""
 
-    def __init__(self) -> None:
+    def __init__(
+        self,
+        *,
+        queue_size: int = 1000,
+        workers: int = 4,
+        concurrency: int = 1,
+        backpressure: BackpressurePolicy = "block",
+        dead_letter_store: DeadLetterStore | None = None,
+        dead_letter_limit: int = 1000,
+    ) -> None:
+        if backpressure not in get_args(BackpressurePolicy):
+            raise ValueError(f"Unknown backpressure policy: {backpressure!r}")
+        if queue_size < 1 or workers < 1 or concurrency < 1:
+            raise ValueError("queue_size, workers and concurrency must be positive")
         self._subs: MutableMapping[str, List[Handler]] = {}
-        self._dead_letters: List[DeadLetter] = []
+        self._batch_subs: MutableMapping[str, List[Handler]] = {}
+        self._windows: Dict[str, _Window] = {}
+        self._batches: Dict[Tuple[str, Handler], _Batch] = {}
+        self._dead_letters: Deque[DeadLetter] = deque(maxlen=dead_letter_limit)
+        self._store = dead_letter_store
+        self._queue_size = queue_size
+        self._workers = workers
+        self._concurrency = concurrency
+        self._backpressure: BackpressurePolicy = backpressure
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._executor: ThreadPoolExecutor | None = None
+        self._queues: Dict[str, asyncio.Queue[_Envelope]] = {}
+        self._dispatchers: List[asyncio.Task[None]] = []
+        self._background: set[asyncio.Future[None]] = set()
 
     # ---------------------------------------------------------------------
     # Subscription management
-    def subscribe(self, event_type: str, handler: Handler) -> None:
-        """Register a handler for a specific event type."""
+    def subscribe(self, event_type: str, handler: Handler, *, batch: bool = False) -> None:
+        """Register a handler for a specific event type.
+
+        With ``batch`` the handler receives a list of events per coalescing
+        window of ``event_type`` instead of one call per event.
+        """
 
-        self._subs.setdefault(event_type, []).append(handler)
+        subs = self._batch_subs if batch else self._subs
+        subs.setdefault(event_type, []).append(handler)
 
     def unsubscribe(self, event_type: str, handler: Handler) -> None:
         """Remove a handler for the provided event type if present."""
 
-        handlers = self._subs.get(event_type)
-        if not handlers:
-            return
-        try:
+        for subs in (self._subs, self._batch_subs):
+            handlers = subs.get(event_type)
+            if not handlers or handler not in handlers:
+                continue
             handlers.remove(handler)
-        except ValueError:  # pragma: no cover - defensive guard
-            return
-        if not handlers:
-            self._subs.pop(event_type, None)
+            if not handlers:
+                subs.pop(event_type, None)
+
+    def coalesce(
+        self,
+        event_type: str,
+        *,
+        interval: float,
+        key: Callable[[Any], Hashable] | None = None,
+        max_batch: int = 1000,
+    ) -> None:
+        """Collect ``event_type`` for batch handlers over ``interval`` seconds.
+
+        Events with the same ``key`` within one window are collapsed into the
+        latest one. A batch is delivered early once it holds ``max_batch``
+        events.
+        """
+
+        if interval < 0 or max_batch < 1:
+            raise ValueError("interval must be >= 0 and max_batch positive")
+        self._windows[event_type] = _Window(interval, key, max_batch)
 
     def clear_dead_letters(self) -> None:
-        """Drop all stored dead letters."""
+        """Drop all dead letters held in memory."""
 
         self._dead_letters.clear()
 
     def dead_letters(self) -> Iterable[DeadLetter]:
-        """Expose the collected dead letters."""
+        """Expose the most recent dead letters."""
 
         return tuple(self._dead_letters)
 
+    # ------------------------------------------------------------------
+    # Lifecycle
+    @property
+    def running(self) -> bool:
+        return self._loop is not None
+
+    async def start(self) -> None:
+        """Switch to asynchronous dispatch on the running event loop."""
+
+        if self._loop is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._executor = ThreadPoolExecutor(
+            max_workers=self._workers, thread_name_prefix="event-bus"
+        )
+
+    async def drain(self) -> None:
+        """Wait until every queued event has been handled.
+
+        Open coalescing windows are flushed immediately.
+        """
+
+        while True:
+            for event_type, handler in list(self._batches):
+                self._flush(event_type, handler)
+            queues = list(self._queues.values())
+            await asyncio.gather(*(queue.join() for queue in queues))
+            if self._batches or self._background:
+                await asyncio.gather(*list(self._background), return_exceptions=True)
+                continue
+            if len(queues) == len(self._queues) and all(queue.empty() for queue in queues):
+                return
+
+    async def stop(self, *, drain: bool = True) -> None:
+        """Stop dispatching and fall back to synchronous delivery.
+
+        With ``drain`` the queues are emptied first. Otherwise anything still
+        queued or waiting in a coalescing window is dead-lettered as
+        ``dropped`` so it can be replayed.
+        """
+
+        if self._loop is None:
+            return
+        if drain:
+            await self.drain()
+        for task in self._dispatchers:
+            task.cancel()
+        await asyncio.gather(*self._dispatchers, return_exceptions=True)
+        for event_type, queue in self._queues.items():
+            while not queue.empty():
+                envelope = queue.get_nowait()
+                self._record(
+                    DeadLetter(event_type, envelope.event, None, envelope.handler, "dropped")
+                )
+        for (event_type, handler), batch in list(self._batches.items()):
+            if batch.timer is not None:
+                batch.timer.cancel()
+            for event in batch.events.values():
+                self._record(DeadLetter(event_type, event, None, handler_name(handler), "dropped"))
+        self._batches.clear()
+        if self._background:
+            await asyncio.gather(*list(self._background), return_exceptions=True)
+        self._dispatchers.clear()
+        self._queues.clear()
+        self._loop = None
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            await asyncio.to_thread(executor.shutdown)
+
     # ------------------------------------------------------------------
     # Publishing
     def publish(self, event: Any) -> None:
-        """Publish an event to all subscribed handlers."""
+        """Publish an event to all subscribed handlers.
+
+        Called from a thread other than the bus loop (for example a sync route
+        running in the threadpool), ``block`` waits for queue space. On the
+        loop itself ``publish`` never waits; use :meth:`publish_async` there
+        to get blocking backpressure.
+        """
+
+        event_type = _resolve_event_type(event)
+        if self._subscribed(event_type):
+            self._submit(event_type, [_Envelope(event)])
+
+    def publish_many(self, events: Iterable[Any]) -> None:
+        """Publish a burst of events, handing each event type over in one step.
+
+        Without a started bus, batch handlers receive the whole burst
+        (deduplicated by the type's coalescing key) in a single call.
+        """
+
+        grouped: Dict[str, List[_Envelope]] = {}
+        for event in events:
+            event_type = _resolve_event_type(event)
+            if self._subscribed(event_type):
+                grouped.setdefault(event_type, []).append(_Envelope(event))
+        for event_type, envelopes in grouped.items():
+            self._submit(event_type, envelopes)
+
+    async def publish_async(self, event: Any) -> None:
+        """Publish from a coroutine, awaiting queue space under ``block``."""
 
         event_type = _resolve_event_type(event)
-        for handler in list(self._subs.get(event_type, [])):
+        if not self._subscribed(event_type):
+            return
+        envelopes = [_Envelope(event)]
+        loop = self._loop
+        if loop is None:
+            await self._deliver_inline_async(event_type, envelopes)
+        elif loop is asyncio.get_running_loop():
+            await self._enqueue_all(event_type, envelopes)
+        else:
+            await asyncio.wrap_future(
+                asyncio.run_coroutine_threadsafe(self._enqueue_all(event_type, envelopes), loop)
+            )
+
+    def replay_dead_letters(
+        self,
+        *,
+        event_type: str | None = None,
+        limit: int = 100,
+        session: Session | None = None,
+    ) -> int:
+        """Redeliver persisted dead letters and mark them as replayed.
+
+        A failed delivery is retried against the handler that failed only; a
+        dropped event goes to every current subscriber. Deliveries that fail
+        again produce new dead letters. Returns the number replayed.
+        """
+
+        if self._store is None:
+            return 0
+        records = self._store.pending(event_type=event_type, limit=limit, session=session)
+        for record in records:
+            event = restore_event(record.payload, record.event_class)
+            self._submit(record.event_type, [_Envelope(event, record.handler)])
+        self._store.mark_replayed([record.id for record in records], session=session)
+        return len(records)
+
+    # ------------------------------------------------------------------
+    # Delivery
+    def _subscribed(self, event_type: str) -> bool:
+        return event_type in self._subs or event_type in self._batch_subs
+
+    def _handlers(
+        self, event_type: str, envelope: _Envelope, *, batch: bool = False
+    ) -> List[Handler]:
+        handlers = list((self._batch_subs if batch else self._subs).get(event_type, []))
+        if envelope.handler is None:
+            return handlers
+        return [handler for handler in handlers if handler_name(handler) == envelope.handler]
+
+    def _submit(self, event_type: str, envelopes: List[_Envelope]) -> None:
+        loop = self._loop
+        if loop is None:
+            self._deliver_inline(event_type, envelopes)
+            return
+        try:
+            current = asyncio.get_running_loop()
+        except RuntimeError:
+            current = None
+        if current is loop:
+            for envelope in envelopes:
+                self._enqueue_nowait(event_type, envelope)
+        else:
+            future = asyncio.run_coroutine_threadsafe(
+                self._enqueue_all(event_type, envelopes), loop
+            )
+            future.result()
+
+    def _inline_calls(
+        self, event_type: str, envelopes: List[_Envelope]
+    ) -> List[Tuple[Handler, Any, List[Any]]]:
+        """Return ``(handler, payload, events)`` for synchronous delivery."""
+
+        calls: List[Tuple[Handler, Any, List[Any]]] = [
+            (handler, envelope.event, [envelope.event])
+            for envelope in envelopes
+            for handler in self._handlers(event_type, envelope)
+        ]
+        window = self._windows.get(event_type, _DEFAULT_WINDOW)
+        for handler in list(self._batch_subs.get(event_type, [])):
+            name = handler_name(handler)
+            events = [
+                envelope.event for envelope in envelopes if envelope.handler in (None, name)
+            ]
+            if window.key is not None:
+                events = list({window.key(event): event for event in events}.values())
+            if events:
+                calls.append((handler, events, events))
+        return calls
+
+    def _deliver_inline(self, event_type: str, envelopes: List[_Envelope]) -> None:
+        for handler, payload, events in self._inline_calls(event_type, envelopes):
+            try:
+                result = handler(payload)
+                if inspect.isawaitable(result):
+                    self._run_awaitable(event_type, handler, events, result)
+            except Exception as exc:
+                self._handler_failed(event_type, handler, events, exc)
+
+    async def _deliver_inline_async(self, event_type: str, envelopes: List[_Envelope]) -> None:
+        for handler, payload, events in self._inline_calls(event_type, envelopes):
+            try:
+                result = handler(payload)
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as exc:
+                self._handler_failed(event_type, handler, events, exc)
+
+    def _run_awaitable(
+        self, event_type: str, handler: Handler, events: List[Any], awaitable: Awaitable[Any]
+    ) -> None:
+        """Complete a coroutine handler's result from synchronous delivery."""
+
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            asyncio.run(_await(awaitable))
+            return
+
+        def _done(task: asyncio.Future[Any]) -> None:
+            if task.cancelled():
+                return
+            exc = task.exception()
+            if exc is None:
+                return
+            try:
+                raise exc
+            except Exception as error:
+                self._handler_failed(event_type, handler, events, error)
+
+        asyncio.ensure_future(awaitable).add_done_callback(_done)
+
+    def _queue(self, event_type: str) -> asyncio.Queue[_Envelope]:
+        queue = self._queues.get(event_type)
+        if queue is None:
+            queue = asyncio.Queue(maxsize=self._queue_size)
+            self._queues[event_type] = queue
+            for _ in range(self._concurrency):
+                self._dispatchers.append(
+                    asyncio.create_task(
+                        self._dispatch(event_type, queue), name=f"event-bus:{event_type}"
+                    )
+                )
+        return queue
+
+    def _enqueue_nowait(self, event_type: str, envelope: _Envelope) -> None:
+        queue = self._queue(event_type)
+        try:
+            queue.put_nowait(envelope)
+            return
+        except asyncio.QueueFull:
+            pass
+        if self._backpressure == "drop_oldest":
+            dropped = queue.get_nowait()
+            queue.task_done()
+            logger.warning(
+                "Event queue full, dropping oldest event", extra={"event_type": event_type}
+            )
+            self._record(DeadLetter(event_type, dropped.event, None, dropped.handler, "dropped"))
+            queue.put_nowait(envelope)
+            return
+        hint = "" if self._backpressure == "reject" else "; use publish_async() to wait for space"
+        raise EventBusFull(f"Event queue for {event_type!r} is full{hint}")
+
+    async def _enqueue_all(self, event_type: str, envelopes: List[_Envelope]) -> None:
+        for envelope in envelopes:
+            if self._backpressure == "block":
+                await self._queue(event_type).put(envelope)
+            else:
+                self._enqueue_nowait(event_type, envelope)
+
+    async def _dispatch(self, event_type: str, queue: asyncio.Queue[_Envelope]) -> None:
+        while True:
+            envelope = await queue.get()
             try:
-                handler(event)
-            except Exception as exc:  # pragma: no cover - defensive logging
-                logger.exception(
-                    "Event handler failed",
-                    extra={
-                        "event_type": event_type,
-                        "handler": getattr(handler, "__qualname__", repr(handler)),
-                    },
+                for handler in self._handlers(event_type, envelope, batch=True):
+                    self._add_to_batch(event_type, handler, envelope.event)
+                await asyncio.gather(
+                    *(
+                        self._deliver(event_type, handler, envelope.event, [envelope.event])
+                        for handler in self._handlers(event_type, envelope)
+                    )
                 )
-                self._dead_letters.append(DeadLetter(event_type, event, exc))
+            finally:
+                queue.task_done()
+
+    async def _deliver(
+        self, event_type: str, handler: Handler, payload: Any, events: List[Any]
+    ) -> None:
+        try:
+            if _is_coroutine_handler(handler):
+                await handler(payload)
+                return
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(self._executor, handler, payload)
+            if inspect.isawaitable(result):
+                await result
+        except Exception as exc:
+            self._handler_failed(event_type, handler, events, exc)
+
+    # ------------------------------------------------------------------
+    # Coalescing
+    def _add_to_batch(self, event_type: str, handler: Handler, event: Any) -> None:
+        window = self._windows.get(event_type, _DEFAULT_WINDOW)
+        try:
+            key = window.key(event) if window.key is not None else object()
+        except Exception as exc:
+            self._handler_failed(event_type, handler, [event], exc)
+            return
+        batch = self._batches.setdefault((event_type, handler), _Batch())
+        batch.events[key] = event
+        if len(batch.events) >= window.max_batch:
+            self._flush(event_type, handler)
+        elif batch.timer is None:
+            loop = asyncio.get_running_loop()
+            batch.timer = loop.call_later(window.interval, self._flush, event_type, handler)
+
+    def _flush(self, event_type: str, handler: Handler) -> None:
+        batch = self._batches.pop((event_type, handler), None)
+        if batch is None:
+            return
+        if batch.timer is not None:
+            batch.timer.cancel()
+        events = list(batch.events.values())
+        self._track(asyncio.ensure_future(self._deliver(event_type, handler, events, events)))
+
+    def _track(self, future: asyncio.Future[Any]) -> None:
+        self._background.add(future)
+        future.add_done_callback(self._background.discard)
+
+    # ------------------------------------------------------------------
+    # Dead letters
+    def _handler_failed(
+        self, event_type: str, handler: Handler, events: List[Any], exc: Exception
+    ) -> None:
+        name = handler_name(handler)
+        logger.exception(
+            "Event handler failed",
+            extra={"event_type": event_type, "handler": name},
+        )
+        for event in events:
+            self._record(DeadLetter(event_type, event, exc, name))
 
+    def _record(self, letter: DeadLetter) -> None:
+        self._dead_letters.append(letter)
+        if self._store is None:
+            return
+        loop = self._loop
+        if loop is None:
+            self._store.add(letter)
+            return
+        self._track(loop.run_in_executor(self._executor, self._store.add, letter))
 
-bus = EventBus()
+bus = EventBus(
+    queue_size=settings.EVENT_BUS_QUEUE_SIZE,
+    workers=settings.EVENT_BUS_WORKERS,
+    backpressure=settings.EVENT_BUS_BACKPRESSURE,
+    dead_letter_store=DeadLetterStore(),
+)
 
-__all__ = ["EventBus", "DeadLetter", "bus"]
+__all__ = ["BackpressurePolicy", "DeadLetter", "EventBus", "EventBusFull", "bus", "handler_name"]
@@ -0,0 +1,161 @@
+"""Durable storage for event deliveries that could not be completed."""
+
+from __future__ import annotations
+
+import dataclasses
+import json
+import logging
+from contextlib import contextmanager
+from datetime import datetime
+from importlib import import_module
+from typing import TYPE_CHECKING, Any, Callable, Iterator, Sequence
+
+from pydantic import BaseModel
+from sqlalchemy import DateTime, Index, Integer, String, Text, select, update
+from sqlalchemy.orm import Mapped, Session, mapped_column
+
+from app.core.db import Base
+
+if TYPE_CHECKING:  # pragma: no cover - import cycle guard
+    from app.core.events.bus import DeadLetter
+
+logger = logging.getLogger(__name__)
+
+
+class EventDeadLetter(Base):
+    """A failed or dropped event delivery awaiting replay."""
+
+    __tablename__ = "evt_dead_letters"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    event_type: Mapped[str] = mapped_column(String(120))
+    handler: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    reason: Mapped[str] = mapped_column(String(30), default="handler_failed")
+    error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    payload: Mapped[str] = mapped_column(Text)
+    event_class: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=datetime.utcnow, nullable=False
+    )
+    replayed_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        Index("ix_evt_dead_letters_pending", "replayed_at", "event_type"),
+    )
+
+
+def _class_path(value: object) -> str:
+    cls = type(value)
+    return f"{cls.__module__}:{cls.__qualname__}"
+
+
+def serialize_event(event: Any) -> tuple[str, str | None]:
+    """Return the JSON payload and, for typed events, the class to restore."""
+
+    if isinstance(event, BaseModel):
+        return event.model_dump_json(), _class_path(event)
+    if dataclasses.is_dataclass(event) and not isinstance(event, type):
+        return json.dumps(dataclasses.asdict(event), default=str), _class_path(event)
+    return json.dumps(event, default=str), None
+
+
+def restore_event(payload: str, event_class: str | None) -> Any:
+    """Rebuild an event serialized by :func:`serialize_event`.
+
+    Events whose class can no longer be imported or validated are returned as
+    the decoded JSON payload.
+    """
+
+    data = json.loads(payload)
+    if not event_class:
+        return data
+    module_name, _, qualname = event_class.partition(":")
+    try:
+        target: Any = import_module(module_name)
+        for part in qualname.split("."):
+            target = getattr(target, part)
+        if isinstance(target, type) and issubclass(target, BaseModel):
+            return target.model_validate(data)
+        return target(**data)
+    except Exception:
+        logger.warning("Could not restore dead-lettered event as %s", event_class, exc_info=True)
+        return data
+
+
+class DeadLetterStore:
+    """Persist dead letters to ``evt_dead_letters`` and read them back for replay.
+
+    Writes use their own session from ``session_factory`` so they never join
+    (or roll back with) the transaction of whoever published the event.
+    """
+
+    def __init__(self, session_factory: Callable[[], Session] | None = None) -> None:
+        if session_factory is None:
+            from app.core.db import SessionLocal
+
+            session_factory = SessionLocal
+        self._session_factory = session_factory
+
+    @contextmanager
+    def _session(self, session: Session | None) -> Iterator[Session]:
+        if session is not None:
+            yield session
+            return
+        with self._session_factory() as owned:
+            yield owned
+
+    def add(self, letter: "DeadLetter") -> None:
+        """Store ``letter``; failures are logged rather than raised."""
+
+        try:
+            payload, event_class = serialize_event(letter.event)
+            with self._session_factory() as session:
+                session.add(
+                    EventDeadLetter(
+                        event_type=letter.event_type,
+                        handler=letter.handler,
+                        reason=letter.reason,
+                        error=repr(letter.error) if letter.error is not None else None,
+                        payload=payload,
+                        event_class=event_class,
+                    )
+                )
+                session.commit()
+        except Exception:
+            logger.exception(
+                "Failed to persist dead letter", extra={"event_type": letter.event_type}
+            )
+
+    def pending(
+        self,
+        *,
+        event_type: str | None = None,
+        limit: int = 100,
+        session: Session | None = None,
+    ) -> list[EventDeadLetter]:
+        """Return dead letters that have not been replayed, oldest first."""
+
+        statement = (
+            select(EventDeadLetter)
+            .where(EventDeadLetter.replayed_at.is_(None))
+            .order_by(EventDeadLetter.id)
+            .limit(limit)
+        )
+        if event_type:
+            statement = statement.where(EventDeadLetter.event_type == event_type)
+        with self._session(session) as active:
+            return list(active.scalars(statement))
+
+    def mark_replayed(self, ids: Sequence[int], *, session: Session | None = None) -> None:
+        if not ids:
+            return
+        with self._session(session) as active:
+            active.execute(
+                update(EventDeadLetter)
+                .where(EventDeadLetter.id.in_(ids))
+                .values(replayed_at=datetime.utcnow())
+            )
+            active.commit()
+
+
+__all__ = ["DeadLetterStore", "EventDeadLetter", "restore_event", "serialize_event"]
@@ -8,3 +8,9 @@ class InventoryReserved(BaseModel):
     project_id: int
     item_id: int
     qty: int
+
+class EquipmentStatusChanged(BaseModel):
+    event_type: Literal["EquipmentStatusChanged"] = "EquipmentStatusChanged"
+    occurred_at: datetime = Field(default_factory=datetime.utcnow)
+    item_id: int
+    status: str
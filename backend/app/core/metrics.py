@@ -1,83 +1,328 @@
 from __future__ import annotations
 
-from collections import defaultdict, deque
-from dataclasses import dataclass
-from threading import Lock
+from array import array
+from bisect import bisect_left
+from itertools import accumulate, count
+from threading import Lock, local
 import time
-from typing import Deque, Dict, Iterable, Tuple
+import weakref
+from typing import Dict, List, Sequence, Tuple
 
+# Upper bounds (seconds) of the latency histogram buckets; a final +Inf bucket
+# catches everything slower.
+LATENCY_BUCKETS: Tuple[float, ...] = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.075,
+    0.1,
+    0.25,
+    0.5,
+    0.75,
+    1.0,
+    2.5,
+    5.0,
+    7.5,
+    10.0,
+)
+PERCENTILES: Tuple[float, ...] = (0.5, 0.95, 0.99)
 
-@dataclass
-class _RequestSample:
-    method: str
-    path: str
-    status: int
-    latency: float
-    timestamp: float
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class _RouteSeries:
+    """Latency histogram and status counters of one ``(method, path)`` in one shard."""
+
+    __slots__ = ("buckets", "latency_sum", "statuses")
+
+    def __init__(self, bucket_count: int) -> None:
+        self.buckets = array("q", bytes(8 * bucket_count))
+        self.latency_sum = 0.0
+        self.statuses: Dict[int, int] = {}
+
+
+class _Shard:
+    """Counters written by a single thread; merged with the others on scrape."""
+
+    __slots__ = ("routes", "cache_lookups")
+
+    def __init__(self) -> None:
+        # method -> path -> series; nested dicts avoid building a key tuple per request.
+        self.routes: Dict[str, Dict[str, _RouteSeries]] = {}
+        self.cache_lookups: Dict[str, List[int]] = {}
+
+    def absorb(self, other: "_Shard") -> None:
+        """Add the counters of *other*, whose thread no longer records, to this shard."""
+
+        for method, by_path in other.routes.items():
+            target_paths = self.routes.setdefault(method, {})
+            for path, series in by_path.items():
+                target = target_paths.get(path)
+                if target is None:
+                    target_paths[path] = series
+                    continue
+                for index, value in enumerate(series.buckets):
+                    target.buckets[index] += value
+                target.latency_sum += series.latency_sum
+                for status, value in series.statuses.items():
+                    target.statuses[status] = target.statuses.get(status, 0) + value
+        for cache, counters in other.cache_lookups.items():
+            target_counters = self.cache_lookups.setdefault(cache, [0, 0])
+            target_counters[0] += counters[0]
+            target_counters[1] += counters[1]
+
+
+class _ShardOwner:
+    """Thread-local handle of a shard; collected when its thread exits."""
+
+    __slots__ = ("shard", "__weakref__")
+
+    def __init__(self, shard: _Shard) -> None:
+        self.shard = shard
+
+
+def _retire_shard(tracker_ref: "weakref.ReferenceType[MetricsTracker]", shard: _Shard) -> None:
+    tracker = tracker_ref()
+    if tracker is not None:
+        tracker._retire(shard)
+
+
+def histogram_quantile(quantile: float, bounds: Sequence[float], buckets: Sequence[int]) -> float:
+    """Estimate *quantile* from per-bucket counts like Prometheus' ``histogram_quantile``.
+
+    ``buckets`` holds one non-cumulative count per bound plus a trailing +Inf
+    bucket. Values are interpolated linearly inside the bucket; observations in
+    the +Inf bucket are reported as the highest finite bound.
+    """
+
+    total = sum(buckets)
+    if total == 0:
+        return 0.0
+    rank = quantile * total
+    cumulative = 0
+    for index, bucket in enumerate(buckets):
+        previous = cumulative
+        cumulative += bucket
+        if cumulative >= rank and bucket:
+            if index >= len(bounds):
+                return bounds[-1]
+            lower = bounds[index - 1] if index else 0.0
+            return lower + (bounds[index] - lower) * ((rank - previous) / bucket)
+    return bounds[-1]
 
 
 class MetricsTracker:
-    """In-memory tracker voor uptime, latency en requeststatistieken."""
+    """In-memory tracker voor uptime, latency en requeststatistieken.
+
+    Every thread records into its own shard without taking a lock: per route a
+    fixed-bucket latency histogram in an ``array``, a latency sum and status
+    counters. Recording a request for a route that has been seen before only
+    bumps existing counters. Shards are merged when a snapshot or the Prometheus
+    payload is produced. When a thread exits, its shard is folded into a single
+    retired shard, so short-lived worker threads do not accumulate shards. The
+    most recent requests are kept in a preallocated ring buffer for the
+    observability status page.
+    """
 
     __slots__ = (
         "start_time",
-        "lock",
-        "total_requests",
-        "error_requests",
-        "latency_total",
-        "recent",
-        "per_path_counts",
-        "per_path_latency",
-        "error_counts",
+        "bounds",
+        "max_samples",
+        "_bucket_count",
+        "_local",
+        "_shards",
+        "_shards_lock",
+        "_retired",
+        "_requests",
+        "_errors",
+        "_error_total",
+        "_cursor",
+        "_recorded",
+        "_recent_method",
+        "_recent_path",
+        "_recent_status",
+        "_recent_latency",
+        "_recent_timestamp",
+        "_label_cache",
+        "__weakref__",
     )
 
-    def __init__(self, max_samples: int = 50) -> None:
+    def __init__(self, max_samples: int = 50, buckets: Sequence[float] = LATENCY_BUCKETS) -> None:
         self.start_time = time.time()
-        self.lock = Lock()
-        self.total_requests = 0
-        self.error_requests = 0
-        self.latency_total = 0.0
-        self.recent: Deque[_RequestSample] = deque(maxlen=max_samples)
-        self.per_path_counts: Dict[Tuple[str, str, str], int] = defaultdict(int)
-        self.per_path_latency: Dict[Tuple[str, str], float] = defaultdict(float)
-        self.error_counts: Dict[Tuple[str, str], int] = defaultdict(int)
+        self.bounds: Tuple[float, ...] = tuple(sorted(buckets))
+        self.max_samples = max_samples
+        self._bucket_count = len(self.bounds) + 1
+        self._local = local()
+        self._shards: List[_Shard] = []
+        self._shards_lock = Lock()
+        self._retired = _Shard()
+        # ``next()`` on itertools.count is atomic under the GIL, which keeps the
+        # availability returned per request exact without a lock.
+        self._requests = count(1)
+        self._errors = count(1)
+        self._error_total = 0
+        self._cursor = count()
+        self._recorded = 0
+        self._recent_method: List[str] = [""] * max_samples
+        self._recent_path: List[str] = [""] * max_samples
+        self._recent_status = array("i", bytes(4 * max_samples))
+        self._recent_latency = array("d", bytes(8 * max_samples))
+        self._recent_timestamp = array("d", bytes(8 * max_samples))
+        self._label_cache: Dict[Tuple[str, str], str] = {}
+
+    def _shard(self) -> _Shard:
+        try:
+            return self._local.owner.shard
+        except AttributeError:
+            shard = _Shard()
+            with self._shards_lock:
+                self._shards.append(shard)
+            owner = _ShardOwner(shard)
+            # The thread-local owner is dropped when the thread exits.
+            weakref.finalize(owner, _retire_shard, weakref.ref(self), shard)
+            self._local.owner = owner
+            return shard
+
+    def _retire(self, shard: _Shard) -> None:
+        with self._shards_lock:
+            try:
+                self._shards.remove(shard)
+            except ValueError:
+                return
+            self._retired.absorb(shard)
 
     def record(self, *, method: str, path: str, status_code: int, latency: float) -> float:
-        with self.lock:
-            self.total_requests += 1
-            self.latency_total += latency
-            key = (method, path, str(status_code))
-            self.per_path_counts[key] += 1
-            latency_key = (method, path)
-            self.per_path_latency[latency_key] += latency
-            if status_code >= 500:
-                self.error_requests += 1
-                self.error_counts[latency_key] += 1
-            self.recent.append(
-                _RequestSample(
-                    method=method,
-                    path=path,
-                    status=status_code,
-                    latency=latency,
-                    timestamp=time.time(),
-                )
-            )
+        shard = self._shard()
+        by_path = shard.routes.get(method)
+        if by_path is None:
+            by_path = shard.routes[method] = {}
+        series = by_path.get(path)
+        if series is None:
+            series = by_path[path] = _RouteSeries(self._bucket_count)
+        series.buckets[bisect_left(self.bounds, latency)] += 1
+        series.latency_sum += latency
+        statuses = series.statuses
+        statuses[status_code] = statuses.get(status_code, 0) + 1
+
+        if self.max_samples:
+            position = next(self._cursor)
+            slot = position % self.max_samples
+            self._recent_method[slot] = method
+            self._recent_path[slot] = path
+            self._recent_status[slot] = status_code
+            self._recent_latency[slot] = latency
+            self._recent_timestamp[slot] = time.time()
+            self._recorded = position + 1
+
+        total = next(self._requests)
+        if status_code >= 500:
+            self._error_total = next(self._errors)
+        return 1.0 - (self._error_total / total)
 
-            availability = 1.0 if self.total_requests == 0 else 1.0 - (self.error_requests / self.total_requests)
-            return availability
+    def record_cache_lookup(self, cache: str, *, hit: bool) -> None:
+        lookups = self._shard().cache_lookups
+        counters = lookups.get(cache)
+        if counters is None:
+            counters = lookups[cache] = [0, 0]
+        counters[0 if hit else 1] += 1
 
     def uptime_seconds(self) -> float:
         return time.time() - self.start_time
 
+    # ---- Scraping ----
+    def _merged(self) -> Tuple[Dict[Tuple[str, str], Tuple[List[int], float, Dict[int, int]]], Dict[str, List[int]]]:
+        """Merge all shards into ``(method, path) -> (buckets, latency_sum, statuses)``."""
+
+        routes: Dict[Tuple[str, str], Tuple[List[int], float, Dict[int, int]]] = {}
+        caches: Dict[str, List[int]] = {}
+        # Merging under the lock keeps a shard from being retired, and so
+        # counted twice, halfway through a scrape.
+        with self._shards_lock:
+            self._merge_shards([self._retired, *self._shards], routes, caches)
+        return routes, caches
+
+    @staticmethod
+    def _merge_shards(
+        shards: List[_Shard],
+        routes: Dict[Tuple[str, str], Tuple[List[int], float, Dict[int, int]]],
+        caches: Dict[str, List[int]],
+    ) -> None:
+        for shard in shards:
+            # ``list(dict.items())`` is a single C call, so a recording thread
+            # inserting a new route cannot invalidate the iteration.
+            for method, by_path in list(shard.routes.items()):
+                for path, series in list(by_path.items()):
+                    key = (method, path)
+                    merged = routes.get(key)
+                    if merged is None:
+                        routes[key] = (series.buckets.tolist(), series.latency_sum, dict(series.statuses))
+                        continue
+                    buckets, latency_sum, statuses = merged
+                    for index, value in enumerate(series.buckets):
+                        buckets[index] += value
+                    for status, value in list(series.statuses.items()):
+                        statuses[status] = statuses.get(status, 0) + value
+                    routes[key] = (buckets, latency_sum + series.latency_sum, statuses)
+            for cache, counters in list(shard.cache_lookups.items()):
+                merged_counters = caches.setdefault(cache, [0, 0])
+                merged_counters[0] += counters[0]
+                merged_counters[1] += counters[1]
+
+    def _recent(self) -> List[Dict[str, object]]:
+        recorded = self._recorded
+        size = min(recorded, self.max_samples)
+        first = recorded - size
+        samples = []
+        for position in range(first, recorded):
+            slot = position % self.max_samples
+            samples.append(
+                {
+                    "method": self._recent_method[slot],
+                    "path": self._recent_path[slot],
+                    "status_code": self._recent_status[slot],
+                    "latency_seconds": self._recent_latency[slot],
+                    "timestamp": self._recent_timestamp[slot],
+                }
+            )
+        return samples
+
     def snapshot(self) -> Dict[str, object]:
-        with self.lock:
-            total = self.total_requests
-            errors = self.error_requests
-            latency_total = self.latency_total
-            counts = dict(self.per_path_counts)
-            errors_by_path = dict(self.error_counts)
-            latency_by_path = dict(self.per_path_latency)
-            recent: Iterable[_RequestSample] = list(self.recent)
+        return self._summarize(*self._merged(), percentiles=True)
+
+    def _summarize(
+        self,
+        routes: Dict[Tuple[str, str], Tuple[List[int], float, Dict[int, int]]],
+        caches: Dict[str, List[int]],
+        *,
+        percentiles: bool,
+    ) -> Dict[str, object]:
+        total = 0
+        errors = 0
+        latency_total = 0.0
+        overall = [0] * self._bucket_count
+        counts: Dict[Tuple[str, str, str], int] = {}
+        errors_by_path: Dict[Tuple[str, str], int] = {}
+        latency_by_path: Dict[Tuple[str, str], float] = {}
+        per_path_percentiles: Dict[Tuple[str, str], Dict[str, float]] = {}
+        for (method, path), (buckets, latency_sum, statuses) in routes.items():
+            route_errors = 0
+            for status, value in statuses.items():
+                counts[(method, path, str(status))] = value
+                total += value
+                if status >= 500:
+                    route_errors += value
+            if route_errors:
+                errors_by_path[(method, path)] = route_errors
+                errors += route_errors
+            latency_by_path[(method, path)] = latency_sum
+            latency_total += latency_sum
+            if percentiles:
+                for index, value in enumerate(buckets):
+                    overall[index] += value
+                per_path_percentiles[(method, path)] = self._percentiles(buckets)
 
         avg_latency = (latency_total / total) if total else 0.0
         availability = 1.0 if total == 0 else 1.0 - (errors / total)
@@ -88,23 +333,37 @@ class MetricsTracker:
             "error_count": errors,
             "average_latency_seconds": avg_latency,
             "availability": availability,
+            "latency_percentiles": self._percentiles(overall) if percentiles else {},
             "per_path_counts": counts,
             "per_path_latency": latency_by_path,
+            "per_path_percentiles": per_path_percentiles,
             "error_counts": errors_by_path,
-            "recent_requests": [
-                {
-                    "method": sample.method,
-                    "path": sample.path,
-                    "status_code": sample.status,
-                    "latency_seconds": sample.latency,
-                    "timestamp": sample.timestamp,
-                }
-                for sample in recent
-            ],
+            "cache_lookups": {
+                (cache, result): value
+                for cache, (hits, misses) in caches.items()
+                for result, value in (("hit", hits), ("miss", misses))
+                if value
+            },
+            "recent_requests": self._recent(),
         }
 
+    def _percentiles(self, buckets: Sequence[int]) -> Dict[str, float]:
+        return {
+            f"p{round(quantile * 100)}": histogram_quantile(quantile, self.bounds, buckets)
+            for quantile in PERCENTILES
+        }
+
+    def _labels(self, method: str, path: str) -> str:
+        labels = self._label_cache.get((method, path))
+        if labels is None:
+            labels = f'method="{_escape_label(method)}",path="{_escape_label(path)}"'
+            self._label_cache[(method, path)] = labels
+        return labels
+
     def prometheus_payload(self) -> str:
-        snapshot = self.snapshot()
+        # Percentiles are left to Prometheus; the histogram below carries them.
+        routes, caches = self._merged()
+        snapshot = self._summarize(routes, caches, percentiles=False)
         lines = [
             "# HELP rentguy_request_total Total number of HTTP requests processed by the API.",
             "# TYPE rentguy_request_total counter",
@@ -112,7 +371,7 @@ class MetricsTracker:
 
         for (method, path, status_code), value in sorted(snapshot["per_path_counts"].items()):
             lines.append(
-                f'rentguy_request_total{{method="{method}",path="{path}",status_code="{status_code}"}} {value}'
+                f'rentguy_request_total{{{self._labels(method, path)},status_code="{status_code}"}} {value}'
             )
 
         lines.extend(
@@ -123,7 +382,7 @@ class MetricsTracker:
         )
 
         for (method, path), value in sorted(snapshot["error_counts"].items()):
-            lines.append(f'rentguy_request_error_total{{method="{method}",path="{path}"}} {value}')
+            lines.append(f"rentguy_request_error_total{{{self._labels(method, path)}}} {value}")
 
         lines.extend(
             [
@@ -133,7 +392,33 @@ class MetricsTracker:
         )
 
         for (method, path), value in sorted(snapshot["per_path_latency"].items()):
-            lines.append(f'rentguy_request_latency_seconds_sum{{method="{method}",path="{path}"}} {value}')
+            lines.append(f"rentguy_request_latency_seconds_sum{{{self._labels(method, path)}}} {value}")
+
+        lines.extend(
+            [
+                "# HELP rentguy_request_duration_seconds Request latency per method/path.",
+                "# TYPE rentguy_request_duration_seconds histogram",
+            ]
+        )
+
+        bucket_labels = [f'le="{bound:g}"' for bound in self.bounds] + ['le="+Inf"']
+        for (method, path), (buckets, latency_sum, _) in sorted(routes.items()):
+            labels = self._labels(method, path)
+            cumulative = list(accumulate(buckets))
+            for le, value in zip(bucket_labels, cumulative):
+                lines.append(f"rentguy_request_duration_seconds_bucket{{{labels},{le}}} {value}")
+            lines.append(f"rentguy_request_duration_seconds_sum{{{labels}}} {latency_sum}")
+            lines.append(f"rentguy_request_duration_seconds_count{{{labels}}} {cumulative[-1]}")
+
+        lines.extend(
+            [
+                "# HELP rentguy_cache_lookups_total Cache lookups per cache and result.",
+                "# TYPE rentguy_cache_lookups_total counter",
+            ]
+        )
+
+        for (cache, result), value in sorted(snapshot["cache_lookups"].items()):
+            lines.append(f'rentguy_cache_lookups_total{{cache="{cache}",result="{result}"}} {value}')
 
         lines.extend(
             [
@@ -150,4 +435,3 @@ class MetricsTracker:
         )
 
         return "\n".join(lines) + "\n"
-
@@ -1,30 +1,117 @@
-"""Custom middleware utilities."""
+"""Custom middleware utilities.
+
+Both middlewares are plain ASGI callables rather than ``BaseHTTPMiddleware``
+subclasses: they only touch the ``http.response.start`` message, so response
+bodies (including streaming responses) pass through untouched and no extra task
+or memory stream is created per request.
+"""
 
 from __future__ import annotations
 
-from typing import Callable
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.metrics import MetricsTracker
+
+_SECURITY_HEADERS: tuple[tuple[bytes, bytes], ...] = (
+    (b"x-content-type-options", b"nosniff"),
+    (b"x-frame-options", b"DENY"),
+    (b"referrer-policy", b"no-referrer"),
+    (b"x-xss-protection", b"1; mode=block"),
+)
+_HSTS_HEADER: tuple[bytes, bytes] = (
+    b"strict-transport-security",
+    b"max-age=63072000; includeSubDomains; preload",
+)
+
 
-from fastapi import Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware
+def _set_default_headers(message: Message, defaults: tuple[tuple[bytes, bytes], ...]) -> None:
+    headers = list(message.get("headers", ()))
+    present = {name.lower() for name, _ in headers}
+    headers.extend(header for header in defaults if header[0] not in present)
+    message["headers"] = headers
 
 
-class SecurityHeadersMiddleware(BaseHTTPMiddleware):
+class SecurityHeadersMiddleware:
     """Attach a set of security-focused headers to every response."""
 
-    def __init__(self, app, *, hsts_enabled: bool = False) -> None:  # type: ignore[override]
-        super().__init__(app)
+    def __init__(self, app: ASGIApp, *, hsts_enabled: bool = False) -> None:
+        self.app = app
         self._hsts_enabled = hsts_enabled
 
-    async def dispatch(  # type: ignore[override]
-        self, request: Request, call_next: Callable[[Request], Response]
-    ) -> Response:
-        response = await call_next(request)
-        response.headers.setdefault("X-Content-Type-Options", "nosniff")
-        response.headers.setdefault("X-Frame-Options", "DENY")
-        response.headers.setdefault("Referrer-Policy", "no-referrer")
-        response.headers.setdefault("X-XSS-Protection", "1; mode=block")
-        if self._hsts_enabled and request.url.scheme == "https":
-            response.headers.setdefault(
-                "Strict-Transport-Security", "max-age=63072000; includeSubDomains; preload"
-            )
-        return response
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        defaults = _SECURITY_HEADERS
+        if self._hsts_enabled and scope.get("scheme") == "https":
+            defaults = (*_SECURITY_HEADERS, _HSTS_HEADER)
+
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                _set_default_headers(message, defaults)
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
+
+
+class MetricsMiddleware:
+    """Record per-request latency and availability on the app's ``MetricsTracker``.
+
+    The sample is taken when the response headers are sent, which is also when
+    ``X-Process-Time`` and ``X-Service-Availability`` are attached. Paths are
+    labelled with the matched route template when routing succeeded, so path
+    parameters do not explode the metric cardinality.
+    """
+
+    def __init__(self, app: ASGIApp, *, skip_paths: frozenset[str] = frozenset({"/metrics"})) -> None:
+        self.app = app
+        self._skip_paths = skip_paths
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] in self._skip_paths:
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        response_started = False
+
+        async def send_with_metrics(message: Message) -> None:
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+                duration = time.perf_counter() - start
+                availability = self._record(scope, message["status"], duration)
+                message["headers"] = [
+                    *message.get("headers", ()),
+                    (b"x-process-time", f"{duration:.3f}".encode("latin-1")),
+                    (b"x-service-availability", f"{availability:.4f}".encode("latin-1")),
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_metrics)
+        except Exception:
+            if not response_started:
+                self._record(scope, 500, time.perf_counter() - start)
+            raise
+
+    @staticmethod
+    def _record(scope: Scope, status_code: int, latency: float) -> float:
+        state = scope["app"].state
+        tracker: MetricsTracker = getattr(state, "metrics_tracker", None) or MetricsTracker()
+        state.metrics_tracker = tracker
+        route = scope.get("route")
+        availability = tracker.record(
+            method=scope["method"],
+            path=getattr(route, "path", scope["path"]),
+            status_code=status_code,
+            latency=latency,
+        )
+        state.latest_availability = availability
+        return availability
+
+
+__all__ = ["MetricsMiddleware", "SecurityHeadersMiddleware"]
@@ -0,0 +1,120 @@
+"""Socket.IO client managers for single- and multi-worker deployments.
+
+The default in-memory manager only reaches clients connected to the current
+process. With ``SOCKETIO_MANAGER_URL`` set, every worker publishes its emits
+and room changes on a shared pub/sub channel and replays those of the others,
+so ``emit(..., room="project_1")`` reaches the room's members on every worker:
+
+* ``redis://`` / ``rediss://`` - Redis or a compatible server (needs ``redis``)
+* ``amqp://`` - RabbitMQ (needs ``aio_pika``)
+* ``local://`` - :class:`LocalPubSubBroker`, an in-process stand-in used by
+  tests and single-host development setups with several ASGI apps
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import pickle
+from collections import defaultdict
+from typing import Any, AsyncIterator
+
+import socketio
+from socketio.async_pubsub_manager import AsyncPubSubManager
+
+_Subscriber = tuple[asyncio.AbstractEventLoop, "asyncio.Queue[bytes]"]
+
+
+class LocalPubSubBroker:
+    """Minimal in-process pub/sub broker with Redis-like fan-out semantics.
+
+    Every subscriber of a channel receives each message published after it
+    subscribed. Payloads travel pickled, as with ``AsyncRedisManager``.
+    Subscribers may live on different event loops or threads.
+    """
+
+    def __init__(self) -> None:
+        self._subscribers: dict[str, list[_Subscriber]] = defaultdict(list)
+
+    def subscribe(self, channel: str) -> asyncio.Queue[bytes]:
+        """Subscribe the running loop to ``channel`` and return its inbox."""
+
+        queue: asyncio.Queue[bytes] = asyncio.Queue()
+        self._subscribers[channel].append((asyncio.get_running_loop(), queue))
+        return queue
+
+    def unsubscribe(self, channel: str, queue: asyncio.Queue[bytes]) -> None:
+        self._subscribers[channel] = [
+            entry for entry in self._subscribers[channel] if entry[1] is not queue
+        ]
+
+    def publish(self, channel: str, message: bytes) -> int:
+        """Deliver ``message`` to every subscriber and return how many got it."""
+
+        subscribers = list(self._subscribers.get(channel, ()))
+        for loop, queue in subscribers:
+            if loop.is_closed():
+                continue
+            loop.call_soon_threadsafe(queue.put_nowait, message)
+        return len(subscribers)
+
+
+default_broker = LocalPubSubBroker()
+
+
+class LocalPubSubManager(AsyncPubSubManager):
+    """Pub/sub client manager backed by a :class:`LocalPubSubBroker`."""
+
+    name = "local"
+
+    def __init__(
+        self,
+        broker: LocalPubSubBroker | None = None,
+        channel: str = "socketio",
+        write_only: bool = False,
+        logger: logging.Logger | None = None,
+    ) -> None:
+        super().__init__(channel=channel, write_only=write_only, logger=logger)
+        self.broker = broker or default_broker
+        self._inbox: asyncio.Queue[bytes] | None = None
+
+    def initialize(self) -> None:
+        if not self.write_only:
+            self._inbox = self.broker.subscribe(self.channel)
+        super().initialize()
+
+    async def _publish(self, data: dict[str, Any]) -> int:
+        return self.broker.publish(self.channel, pickle.dumps(data))
+
+    async def _listen(self) -> AsyncIterator[bytes]:
+        if self._inbox is None:
+            self._inbox = self.broker.subscribe(self.channel)
+        while True:
+            yield await self._inbox.get()
+
+
+def create_client_manager(url: str | None, *, channel: str = "socketio") -> socketio.AsyncManager:
+    """Return the client manager configured by ``url``.
+
+    ``None``, an empty string or ``memory://`` keep all state in the current
+    process.
+    """
+
+    if not url or url.startswith("memory://"):
+        return socketio.AsyncManager()
+    scheme = url.split("://", 1)[0].lower()
+    if scheme in {"redis", "rediss"}:
+        return socketio.AsyncRedisManager(url, channel=channel)
+    if scheme in {"amqp", "amqps"}:
+        return socketio.AsyncAioPikaManager(url, channel=channel)
+    if scheme == "local":
+        return LocalPubSubManager(channel=channel)
+    raise ValueError(f"Unsupported Socket.IO manager URL scheme: {scheme!r}")
+
+
+__all__ = [
+    "LocalPubSubBroker",
+    "LocalPubSubManager",
+    "create_client_manager",
+    "default_broker",
+]
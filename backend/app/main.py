@@ -2,9 +2,9 @@ from __future__ import annotations
 
 import time
 from contextlib import asynccontextmanager
-from typing import Callable, Sequence
+from typing import Sequence
 
-from fastapi import FastAPI, HTTPException, Request
+from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from starlette.responses import PlainTextResponse
 from sqlalchemy import text
@@ -15,8 +15,12 @@ from app.core.metrics import MetricsTracker
 from app.core.observability import configure_tracing
 from app.core.config import settings
 from app.core.db import SessionLocal, database_ready
-from app.core.middleware import SecurityHeadersMiddleware
+from app.core.events.bus import bus as event_bus
+from app.core.middleware import MetricsMiddleware, SecurityHeadersMiddleware
 from .realtime import socket_app, sio  # Import from new realtime module
+from app.modules.chat.sockets import chat_pipeline
+from app.modules.crew.sockets import location_broadcaster, location_buffer
+from app.modules.transport.routes import pdf_renderer as transport_pdf_renderer
 from app.modules.recurring_invoices.scheduler import (
     scheduler as recurring_invoice_scheduler,
 )
@@ -31,11 +35,21 @@ async def lifespan(app: FastAPI):
     app.state.start_time = time.time()
     app.state.metrics_tracker = MetricsTracker()
     app.state.sio = sio  # Store sio server in app state
+    if settings.EVENT_BUS_ASYNC:
+        await event_bus.start()
     await recurring_invoice_scheduler.start()
+    await location_buffer.start()
+    await location_broadcaster.start()
+    await chat_pipeline.start()
     try:
         yield
     finally:
+        await chat_pipeline.stop()
+        await location_broadcaster.stop()
+        await location_buffer.stop()
         await recurring_invoice_scheduler.shutdown()
+        await event_bus.stop()
+        transport_pdf_renderer.shutdown()
 
 
 app = FastAPI(title="Rentguyapp API", version="0.1", lifespan=lifespan)
@@ -46,52 +60,14 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"],
     allow_headers=["Authorization", "Content-Type", "Accept", "X-Requested-With"],
+    expose_headers=["X-Total-Count"],
 )
 app.add_middleware(SecurityHeadersMiddleware, hsts_enabled=settings.ENV == "prod")
+app.add_middleware(MetricsMiddleware)
 
 app.add_exception_handler(AppError, app_error_handler)
 
 
-@app.middleware("http")
-async def metrics_middleware(request: Request, call_next: Callable):
-    route = request.scope.get("route")
-    path_template = getattr(route, "path", request.url.path)
-    if path_template == "/metrics":
-        return await call_next(request)
-
-    start = time.perf_counter()
-    method = request.method
-
-    try:
-        response = await call_next(request)
-    except Exception:
-        duration = time.perf_counter() - start
-        tracker: MetricsTracker = getattr(request.app.state, "metrics_tracker", MetricsTracker())
-        request.app.state.metrics_tracker = tracker
-        availability = tracker.record(
-            method=method,
-            path=path_template,
-            status_code=500,
-            latency=duration,
-        )
-        request.app.state.latest_availability = availability
-        raise
-
-    duration = time.perf_counter() - start
-    tracker: MetricsTracker = getattr(request.app.state, "metrics_tracker", MetricsTracker())
-    request.app.state.metrics_tracker = tracker
-    availability = tracker.record(
-        method=method,
-        path=path_template,
-        status_code=response.status_code,
-        latency=duration,
-    )
-    request.app.state.latest_availability = availability
-    response.headers["X-Process-Time"] = f"{duration:.3f}"
-    response.headers["X-Service-Availability"] = f"{availability:.4f}"
-    return response
-
-
 @app.get("/healthz")
 def healthz():
     return {"status": "ok"}
@@ -113,7 +89,7 @@ def readyz():
 def metrics() -> PlainTextResponse:
     tracker: MetricsTracker = getattr(app.state, "metrics_tracker", MetricsTracker())
     app.state.metrics_tracker = tracker
-    payload = tracker.prometheus_payload()
+    payload = tracker.prometheus_payload() + recurring_invoice_scheduler.prometheus_payload()
     return PlainTextResponse(payload, media_type="text/plain; version=0.0.4")
 
 
@@ -0,0 +1,145 @@
+"""In-process read-through cache for authenticated principals."""
+
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from threading import Lock
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from app.core.config import settings
+from .models import User
+
+
+@dataclass(frozen=True)
+class _PrincipalEntry:
+    user: User
+    expires_at: float
+
+
+class PrincipalCache:
+    """TTL + LRU cache of users keyed by token subject and ``iat``.
+
+    Entries hold detached snapshots of :class:`User`. A hit is re-attached to the
+    caller's session with ``merge(load=False)`` so route handlers receive a
+    regular session-bound instance without a database round trip. Entries never
+    outlive the token that produced them and are dropped explicitly through
+    :meth:`invalidate` whenever a user's role or account changes.
+    """
+
+    def __init__(self, *, ttl_seconds: float = 30.0, max_entries: int = 1024) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: OrderedDict[tuple[str, int], _PrincipalEntry] = OrderedDict()
+        self._keys_by_subject: dict[str, set[tuple[str, int]]] = {}
+        self._lock = Lock()
+
+    @staticmethod
+    def _subject(email: str) -> str:
+        return email.strip().lower()
+
+    def get(self, db: Session, subject: str, issued_at: int) -> User | None:
+        """Return the cached user bound to *db*, or ``None`` on a miss."""
+
+        snapshot = self._snapshot(subject, issued_at)
+        if snapshot is None:
+            return None
+        return db.merge(snapshot, load=False)
+
+    async def get_async(self, db: AsyncSession, subject: str, issued_at: int) -> User | None:
+        """:meth:`get` for callers holding an ``AsyncSession``."""
+
+        snapshot = self._snapshot(subject, issued_at)
+        if snapshot is None:
+            return None
+        return await db.merge(snapshot, load=False)
+
+    def _snapshot(self, subject: str, issued_at: int) -> User | None:
+        if self.max_entries <= 0:
+            return None
+        key = (self._subject(subject), issued_at)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.expires_at <= now:
+                self._discard_locked(key)
+                return None
+            self._entries.move_to_end(key)
+        return entry.user
+
+    def put(self, subject: str, issued_at: int, user: User, *, expires_at: float | None = None) -> None:
+        """Store a detached snapshot of *user* for the given token identity.
+
+        ``expires_at`` is the token expiry as a UNIX timestamp; the entry is kept
+        for at most ``ttl_seconds`` and never beyond that moment.
+        """
+
+        if self.max_entries <= 0:
+            return
+        ttl = self.ttl_seconds
+        if expires_at is not None:
+            ttl = min(ttl, expires_at - time.time())
+        if ttl <= 0:
+            return
+
+        snapshot = User(
+            id=user.id,
+            email=user.email,
+            password_hash=user.password_hash,
+            role=user.role,
+            created_at=user.created_at,
+        )
+        make_transient_to_detached(snapshot)
+
+        key = (self._subject(subject), issued_at)
+        with self._lock:
+            self._entries[key] = _PrincipalEntry(user=snapshot, expires_at=time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            self._keys_by_subject.setdefault(key[0], set()).add(key)
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._discard_locked(oldest)
+
+    def invalidate(self, email: str) -> None:
+        """Drop every cached principal for *email*."""
+
+        subject = self._subject(email)
+        with self._lock:
+            for key in self._keys_by_subject.pop(subject, set()):
+                self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_subject.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _discard_locked(self, key: tuple[str, int]) -> None:
+        self._entries.pop(key, None)
+        keys = self._keys_by_subject.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                self._keys_by_subject.pop(key[0], None)
+
+
+principal_cache = PrincipalCache(
+    ttl_seconds=settings.AUTH_PRINCIPAL_CACHE_TTL_SECONDS,
+    max_entries=settings.AUTH_PRINCIPAL_CACHE_SIZE,
+)
+
+
+def invalidate_principal(email: str) -> None:
+    """Invalidation hook for routes that change a user's role or account."""
+
+    principal_cache.invalidate(email)
+
+
+__all__ = ["PrincipalCache", "invalidate_principal", "principal_cache"]
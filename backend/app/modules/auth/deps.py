@@ -1,10 +1,12 @@
-from fastapi import Depends, HTTPException
+from fastapi import Depends, HTTPException, Request
 from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from app.core.config import settings
-from app.core.db import SessionLocal
+from app.core.db import SessionLocal, get_async_session
+from .cache import principal_cache
 from .security import decode_token
-from .repo import UserRepo
+from .repo import AsyncUserRepo, UserRepo
 from .sso import (
     AzureB2CSSOClient,
     SSOStateStore,
@@ -19,25 +21,84 @@ def get_db():
     finally:
         db.close()
 
-def get_current_user(token: str = Depends(oauth2), db: Session = Depends(get_db)):
+def _record_principal_lookup(request: Request, hit: bool) -> None:
+    tracker = getattr(request.app.state, "metrics_tracker", None)
+    if tracker is not None:
+        tracker.record_cache_lookup("auth_principal", hit=hit)
+
+
+def _token_identity(token: str) -> tuple[str, int | None, dict]:
     try:
         payload = decode_token(token)
         email = payload.get("sub")
     except Exception:
         raise HTTPException(status_code=401, detail="Invalid token")
+    if not isinstance(email, str):
+        raise HTTPException(status_code=401, detail="Invalid token")
+    issued_at = payload.get("iat")
+    return email, issued_at if isinstance(issued_at, int) else None, payload
+
+
+def get_current_user(request: Request, token: str = Depends(oauth2), db: Session = Depends(get_db)):
+    email, issued_at, payload = _token_identity(token)
+    if issued_at is not None:
+        cached = principal_cache.get(db, email, issued_at)
+        _record_principal_lookup(request, hit=cached is not None)
+        if cached is not None:
+            return cached
     user = UserRepo(db).by_email(email)
     if not user:
         raise HTTPException(status_code=401, detail="Unknown user")
+    if issued_at is not None:
+        principal_cache.put(email, issued_at, user, expires_at=payload.get("exp"))
     return user
 
-def require_role(*roles: str):
-    def checker(user=Depends(get_current_user)):
+
+async def get_current_user_async(
+    request: Request,
+    token: str = Depends(oauth2),
+    db: AsyncSession = Depends(get_async_session),
+):
+    """:func:`get_current_user` for routes on ``get_async_session``.
+
+    It shares the route's ``AsyncSession``, so authenticating neither takes a
+    threadpool slot nor opens a second connection from the sync pool.
+    """
+
+    email, issued_at, payload = _token_identity(token)
+    if issued_at is not None:
+        cached = await principal_cache.get_async(db, email, issued_at)
+        _record_principal_lookup(request, hit=cached is not None)
+        if cached is not None:
+            return cached
+    user = await AsyncUserRepo(db).by_email(email)
+    if not user:
+        raise HTTPException(status_code=401, detail="Unknown user")
+    if issued_at is not None:
+        principal_cache.put(email, issued_at, user, expires_at=payload.get("exp"))
+    return user
+
+
+def _role_checker(current_user, roles: tuple[str, ...]):
+    # Pure check without I/O: declared async so it runs on the event loop
+    # instead of taking a threadpool slot on every request.
+    async def checker(user=Depends(current_user)):
         if user.role not in roles:
             raise HTTPException(status_code=403, detail="Forbidden")
         return user
     return checker
 
 
+def require_role(*roles: str):
+    return _role_checker(get_current_user, roles)
+
+
+def require_role_async(*roles: str):
+    """:func:`require_role` for routes on ``get_async_session``."""
+
+    return _role_checker(get_current_user_async, roles)
+
+
 _sso_state_store = SSOStateStore()
 
 
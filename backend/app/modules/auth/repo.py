@@ -1,3 +1,4 @@
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from sqlalchemy import select
 from .models import User
@@ -14,3 +15,15 @@ class UserRepo:
         self.db.add(user)
         self.db.flush()
         return user
+
+
+class AsyncUserRepo:
+    """:class:`UserRepo` lookups bound to an ``AsyncSession``."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def by_email(self, email: str) -> User | None:
+        normalized = email.strip().lower()
+        result = await self.db.execute(select(User).where(User.email == normalized))
+        return result.scalar_one_or_none()
@@ -16,6 +16,7 @@ from .schemas import (
     UserOut,
     UserRoleUpdate,
 )
+from .cache import invalidate_principal
 from .models import User
 from .repo import UserRepo
 from .security import create_access_token, hash_password, verify_password
@@ -48,6 +49,7 @@ def register(payload: UserCreate, db: Session = Depends(get_db), user=Depends(re
     u = User(email=payload.email, password_hash=hash_password(payload.password), role=payload.role)
     repo.add(u)
     db.commit()
+    invalidate_principal(u.email)
     return UserOut(id=u.id, email=u.email, role=u.role)
 
 @router.post("/login", response_model=TokenOut)
@@ -77,6 +79,7 @@ def select_role(
     db.add(user)
     db.commit()
     db.refresh(user)
+    invalidate_principal(user.email)
 
     return UserOut(id=user.id, email=user.email, role=user.role)
 
@@ -211,6 +214,7 @@ async def complete_sso_login(
 
     db.commit()
     db.refresh(user)
+    invalidate_principal(user.email)
 
     access_token = create_access_token(user.email)
     redirect_target = payload.return_url or stored.return_url or settings.MRDJ_PLATFORM_REDIRECT_URL
@@ -1,4 +1,8 @@
+import hashlib
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta, timezone
+from threading import Lock
 from typing import Any
 
 import jwt
@@ -24,5 +28,66 @@ def create_access_token(sub: str) -> str:
     payload: dict[str, Any] = {"sub": sub, "exp": exp, "iat": now, "nbf": now}
     return jwt.encode(payload, settings.jwt_secret, algorithm=settings.JWT_ALG)
 
+class VerifiedTokenCache:
+    """Bounded LRU of verified token digests that expire at the token's ``exp``.
+
+    Entries are keyed by a digest of the full token (signature included) and
+    remember the secret and algorithm they were verified with, so a rotated
+    secret never serves a stale verification.
+    """
+
+    def __init__(self, max_entries: int = 4096) -> None:
+        self.max_entries = max_entries
+        self._entries: OrderedDict[bytes, tuple[dict, float, str, str]] = OrderedDict()
+        self._lock = Lock()
+
+    @staticmethod
+    def _digest(token: str) -> bytes:
+        return hashlib.blake2b(token.encode("utf-8"), digest_size=20).digest()
+
+    def get(self, token: str, secret: str, algorithm: str) -> dict | None:
+        if self.max_entries <= 0:
+            return None
+        key = self._digest(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            payload, expires_at, entry_secret, entry_alg = entry
+            if expires_at <= time.time() or entry_secret != secret or entry_alg != algorithm:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+        return dict(payload)
+
+    def put(self, token: str, payload: dict, secret: str, algorithm: str) -> None:
+        expires_at = payload.get("exp")
+        if self.max_entries <= 0 or not isinstance(expires_at, (int, float)):
+            return
+        key = self._digest(token)
+        with self._lock:
+            self._entries[key] = (dict(payload), float(expires_at), secret, algorithm)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+token_cache = VerifiedTokenCache(settings.AUTH_TOKEN_CACHE_SIZE)
+
+
 def decode_token(token: str) -> dict:
-    return jwt.decode(token, settings.jwt_secret, algorithms=[settings.JWT_ALG])
+    secret = settings.jwt_secret
+    algorithm = settings.JWT_ALG
+    cached = token_cache.get(token, secret, algorithm)
+    if cached is not None:
+        return cached
+    payload = jwt.decode(token, secret, algorithms=[algorithm])
+    token_cache.put(token, payload, secret, algorithm)
+    return payload
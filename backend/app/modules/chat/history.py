@@ -0,0 +1,110 @@
+"""In-memory ring buffer of the most recent chat messages per project room.
+
+Joining a room replays the last ``size`` messages from here. The database is
+only read the first time a room is requested after the process started, or
+after the room was evicted to keep at most ``max_rooms`` rooms in memory.
+
+Messages broadcast before a room is loaded are kept too. They may still be
+waiting in the chat writer's queue, so the initial database read cannot be
+relied on to return them.
+
+The buffer belongs to one process. With several Socket.IO workers behind a
+pub/sub manager, each worker only records the messages it accepted itself.
+Those deployments should route a project's sockets to a single worker or set
+``CHAT_HISTORY_CACHE_SIZE`` to ``0``.
+"""
+
+from __future__ import annotations
+
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Iterable
+
+from app.modules.chat.schemas import MessageOut
+
+
+def _sort_key(message: MessageOut) -> tuple[datetime, int]:
+    timestamp = message.timestamp
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    return timestamp, message.id
+
+
+@dataclass
+class _Room:
+    messages: deque[MessageOut]
+    loaded: bool = False
+    ids: set[int] = field(default_factory=set)
+
+
+class RecentMessages:
+    """Keep the last ``size`` messages of up to ``max_rooms`` project rooms."""
+
+    def __init__(self, size: int = 50, *, max_rooms: int = 1000) -> None:
+        self.size = size
+        self.max_rooms = max_rooms
+        self._rooms: OrderedDict[int, _Room] = OrderedDict()
+
+    @property
+    def enabled(self) -> bool:
+        return self.size > 0
+
+    def _room(self, project_id: int) -> _Room:
+        room = self._rooms.get(project_id)
+        if room is None:
+            room = self._rooms[project_id] = _Room(deque(maxlen=self.size))
+            while len(self._rooms) > self.max_rooms:
+                self._rooms.popitem(last=False)
+        else:
+            self._rooms.move_to_end(project_id)
+        return room
+
+    def append(self, message: MessageOut) -> None:
+        """Record a message that was just broadcast to its room."""
+
+        if not self.enabled:
+            return
+        room = self._room(message.project_id)
+        if len(room.messages) == room.messages.maxlen:
+            room.ids.discard(room.messages[0].id)
+        room.messages.append(message)
+        room.ids.add(message.id)
+
+    def discard(self, project_id: int, message_id: int) -> None:
+        """Forget a message, e.g. because it could not be persisted."""
+
+        room = self._rooms.get(project_id)
+        if room is None or message_id not in room.ids:
+            return
+        room.ids.discard(message_id)
+        room.messages = deque(
+            (message for message in room.messages if message.id != message_id),
+            maxlen=self.size,
+        )
+
+    def get(self, project_id: int) -> list[MessageOut] | None:
+        """Return the room's recent messages oldest first, or ``None`` if not loaded."""
+
+        room = self._rooms.get(project_id)
+        if room is None or not room.loaded:
+            return None
+        self._rooms.move_to_end(project_id)
+        return list(room.messages)
+
+    def seed(self, project_id: int, stored: Iterable[MessageOut]) -> list[MessageOut]:
+        """Merge messages read from the database into the room and mark it loaded."""
+
+        if not self.enabled:
+            return []
+        room = self._room(project_id)
+        merged = {message.id: message for message in stored}
+        merged.update((message.id, message) for message in room.messages)
+        latest = sorted(merged.values(), key=_sort_key)[-self.size :]
+        room.messages = deque(latest, maxlen=self.size)
+        room.ids = {message.id for message in latest}
+        room.loaded = True
+        return list(latest)
+
+
+__all__ = ["RecentMessages"]
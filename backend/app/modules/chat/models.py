@@ -1,10 +1,14 @@
-from sqlalchemy import Column, DateTime, ForeignKey, Integer, String
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, String
 from sqlalchemy.sql import func
 
 from app.core.db import Base
 
 class Message(Base):
     __tablename__ = "chat_messages"
+    __table_args__ = (
+        # Serves newest-first history pages and their keyset cursors.
+        Index("ix_chat_messages_project_timestamp_id", "project_id", "timestamp", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     project_id = Column(Integer, ForeignKey("prj_projects.id"), nullable=False)
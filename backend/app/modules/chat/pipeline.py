@@ -0,0 +1,284 @@
+"""Asynchronous chat pipeline: optimistic ids, immediate broadcast, batched writes.
+
+Accepting a message never waits on a commit. The message gets an id from a
+block reserved ahead of time and a server timestamp. It is broadcast, then
+queued for a background writer, which inserts whole batches in one multi-row
+``INSERT`` on a worker thread. A per-project lock covers id assignment,
+broadcast and enqueueing. Within one process, each room therefore sees
+messages in id order, and they are persisted in that same order.
+
+Across processes this order does not hold. Each worker reserves its own id
+blocks, so with several Socket.IO workers ids are unique but not increasing in
+send order. Messages are therefore ordered by ``(timestamp, id)``: in the
+history queries, in the recent-message cache and in clients.
+
+If a batch fails to insert, its rows are retried one by one. Rows that still
+fail are passed to the ``on_failure`` callback, so clients can withdraw the
+message they already displayed.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections import defaultdict, deque
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Sequence
+
+from sqlalchemy import func, insert, select, text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.modules.chat.models import Message
+from app.modules.chat.schemas import MessageIn, MessageOut
+
+logger = logging.getLogger(__name__)
+
+SessionFactory = Callable[[], Session]
+
+
+@dataclass(frozen=True)
+class PendingMessage:
+    """A chat message that has been broadcast but may not be persisted yet."""
+
+    id: int
+    project_id: int
+    user_id: int
+    content: str
+    timestamp: datetime
+    sid: str | None = None
+
+    def to_out(self) -> MessageOut:
+        return MessageOut(
+            id=self.id,
+            project_id=self.project_id,
+            user_id=self.user_id,
+            content=self.content,
+            timestamp=self.timestamp,
+        )
+
+    def row(self) -> dict[str, object]:
+        return {
+            "id": self.id,
+            "project_id": self.project_id,
+            "user_id": self.user_id,
+            "content": self.content,
+            "timestamp": self.timestamp,
+        }
+
+
+FailureCallback = Callable[[Sequence[PendingMessage]], Awaitable[None]]
+BroadcastCallback = Callable[[PendingMessage], Awaitable[None]]
+
+
+class MessageIdAllocator:
+    """Hand out ``chat_messages.id`` values from blocks reserved in one query.
+
+    PostgreSQL blocks come from the column's sequence, so they are unique
+    across workers, though not ordered across them. Other databases reserve the
+    block after ``max(id)``, which is only safe with a single writer process
+    (development and tests).
+    """
+
+    def __init__(self, session_factory: SessionFactory, *, block_size: int = 100) -> None:
+        self._session_factory = session_factory
+        self._block_size = block_size
+        self._ids: deque[int] = deque()
+        self._floor = 0
+        self._lock = asyncio.Lock()
+
+    async def next_id(self) -> int:
+        async with self._lock:
+            if not self._ids:
+                self._ids.extend(await asyncio.to_thread(self._reserve, self._block_size))
+            return self._ids.popleft()
+
+    def _reserve(self, count: int) -> list[int]:
+        with self._session_factory() as db:
+            if db.get_bind().dialect.name == "postgresql":
+                return list(
+                    db.scalars(
+                        text(
+                            "SELECT nextval(pg_get_serial_sequence('chat_messages', 'id')) "
+                            "FROM generate_series(1, :count)"
+                        ),
+                        {"count": count},
+                    )
+                )
+            start = max((db.scalar(select(func.max(Message.id))) or 0) + 1, self._floor)
+        self._floor = start + count
+        return list(range(start, start + count))
+
+
+_STOP = object()
+
+
+class ChatWriter:
+    """Bounded queue drained into multi-row inserts by one background task."""
+
+    def __init__(
+        self,
+        session_factory: SessionFactory,
+        *,
+        maxsize: int = 1000,
+        batch_size: int = 200,
+        linger: float = 0.05,
+        on_failure: FailureCallback | None = None,
+    ) -> None:
+        self._session_factory = session_factory
+        self._maxsize = maxsize
+        self._queue: asyncio.Queue[object] = asyncio.Queue(maxsize=maxsize)
+        self._batch_size = batch_size
+        self._linger = linger
+        self.on_failure = on_failure
+        self._task: asyncio.Task[None] | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    async def put(self, message: PendingMessage) -> None:
+        """Queue ``message``, waiting while the queue is full."""
+
+        await self._queue.put(message)
+
+    async def start(self) -> None:
+        if self._task is not None:
+            return
+        if self._queue.empty():
+            # A queue that waited on a previous event loop cannot be reused.
+            self._queue = asyncio.Queue(maxsize=self._maxsize)
+        self._task = asyncio.create_task(self._run(), name="chat-writer")
+
+    async def stop(self) -> None:
+        """Persist everything queued so far and stop the writer."""
+
+        task, self._task = self._task, None
+        if task is None:
+            await self.flush()
+            return
+        await self._queue.put(_STOP)
+        await task
+
+    async def flush(self) -> None:
+        """Wait until every queued message has been written."""
+
+        if self._task is not None:
+            await self._queue.join()
+            return
+        while not self._queue.empty():
+            batch, _stop, taken = self._take_ready([])
+            await self._write(batch)
+            self._done(taken)
+
+    def _take_ready(
+        self, batch: list[PendingMessage]
+    ) -> tuple[list[PendingMessage], bool, int]:
+        """Move queued messages into ``batch``; report a stop marker and items taken."""
+
+        taken = 0
+        while len(batch) < self._batch_size and not self._queue.empty():
+            item = self._queue.get_nowait()
+            taken += 1
+            if item is _STOP:
+                return batch, True, taken
+            batch.append(item)  # type: ignore[arg-type]
+        return batch, False, taken
+
+    def _done(self, count: int) -> None:
+        for _ in range(count):
+            self._queue.task_done()
+
+    async def _run(self) -> None:
+        while True:
+            item = await self._queue.get()
+            if item is _STOP:
+                self._done(1)
+                return
+            batch, stop, taken = self._take_ready([item])  # type: ignore[list-item]
+            taken += 1
+            if not stop and len(batch) < self._batch_size and self._linger > 0:
+                await asyncio.sleep(self._linger)
+                batch, stop, more = self._take_ready(batch)
+                taken += more
+            try:
+                await self._write(batch)
+            except Exception:
+                logger.exception("Chat writer failed", extra={"size": len(batch)})
+            finally:
+                self._done(taken)
+            if stop:
+                return
+
+    async def _write(self, batch: list[PendingMessage]) -> None:
+        if not batch:
+            return
+        try:
+            await asyncio.to_thread(self._insert, batch)
+            return
+        except SQLAlchemyError:
+            logger.exception(
+                "Batched chat insert failed, retrying per message", extra={"size": len(batch)}
+            )
+
+        failed: list[PendingMessage] = []
+        for message in batch:
+            try:
+                await asyncio.to_thread(self._insert, [message])
+            except SQLAlchemyError:
+                logger.exception(
+                    "Failed to persist chat message",
+                    extra={"message_id": message.id, "project_id": message.project_id},
+                )
+                failed.append(message)
+        if failed and self.on_failure is not None:
+            try:
+                await self.on_failure(failed)
+            except Exception:
+                logger.exception("Chat failure notification failed")
+
+    def _insert(self, batch: Sequence[PendingMessage]) -> None:
+        with self._session_factory() as db:
+            db.execute(insert(Message), [message.row() for message in batch])
+            db.commit()
+
+
+class ChatPipeline:
+    """Accept chat messages without waiting on the database."""
+
+    def __init__(self, allocator: MessageIdAllocator, writer: ChatWriter) -> None:
+        self.allocator = allocator
+        self.writer = writer
+        self._room_locks: defaultdict[int, asyncio.Lock] = defaultdict(asyncio.Lock)
+
+    @property
+    def running(self) -> bool:
+        return self.writer.running
+
+    async def accept(
+        self, payload: MessageIn, broadcast: BroadcastCallback, *, sid: str | None = None
+    ) -> PendingMessage:
+        """Assign an id and timestamp, broadcast, and queue the message for storage."""
+
+        async with self._room_locks[payload.project_id]:
+            message = PendingMessage(
+                id=await self.allocator.next_id(),
+                project_id=payload.project_id,
+                user_id=payload.user_id,
+                content=payload.content,
+                timestamp=datetime.now(timezone.utc),
+                sid=sid,
+            )
+            await broadcast(message)
+            await self.writer.put(message)
+        return message
+
+    async def start(self) -> None:
+        await self.writer.start()
+
+    async def stop(self) -> None:
+        await self.writer.stop()
+
+
+__all__ = ["ChatPipeline", "ChatWriter", "MessageIdAllocator", "PendingMessage"]
@@ -1,3 +1,6 @@
+from datetime import datetime
+
+from sqlalchemy import select, tuple_
 from sqlalchemy.orm import Session
 from .models import Message
 from .schemas import MessageIn
@@ -17,6 +20,35 @@ class ChatRepo:
         self.db.refresh(message)
         return message
 
-    def get_messages_by_project(self, project_id: int, limit: int = 50) -> list[Message]:
-        return self.db.query(Message).filter(Message.project_id == project_id).order_by(Message.timestamp.desc()).limit(limit).all()
+    def get_messages_by_project(
+        self,
+        project_id: int,
+        limit: int = 50,
+        *,
+        before_id: int | None = None,
+        before_ts: datetime | None = None,
+    ) -> list[Message]:
+        """Return up to ``limit`` messages, newest first, older than the cursor.
+
+        The cursor is the ``(timestamp, id)`` of the oldest message already
+        shown. With only ``before_id`` the timestamp is looked up; with only
+        ``before_ts`` every message at or after that instant is skipped. Either
+        way the query walks ``ix_chat_messages_project_timestamp_id`` instead of
+        scanning skipped rows.
+        """
 
+        query = select(Message).where(Message.project_id == project_id)
+        if before_id is not None:
+            if before_ts is None:
+                before_ts = (
+                    select(Message.timestamp)
+                    .where(Message.id == before_id)
+                    .scalar_subquery()
+                )
+            query = query.where(
+                tuple_(Message.timestamp, Message.id) < tuple_(before_ts, before_id)
+            )
+        elif before_ts is not None:
+            query = query.where(Message.timestamp < before_ts)
+        query = query.order_by(Message.timestamp.desc(), Message.id.desc()).limit(limit)
+        return list(self.db.scalars(query))
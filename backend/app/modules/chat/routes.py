@@ -1,4 +1,6 @@
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from app.modules.auth.deps import get_db, require_role, get_current_user
 from app.modules.auth.models import User
@@ -10,13 +12,21 @@ router = APIRouter()
 @router.get("/projects/{project_id}/chat", response_model=list[MessageOut])
 def get_project_chat_history(
     project_id: int,
+    limit: int = Query(50, ge=1, le=200),
+    before_id: int | None = Query(default=None, description="Id of the oldest loaded message"),
+    before_ts: datetime | None = Query(default=None, description="Timestamp of that message"),
     db: Session = Depends(get_db),
     user: User = Depends(require_role("admin", "planner", "crew", "viewer"))
 ):
     """
-    Retrieves the chat history for a specific project.
+    Retrieves the chat history for a specific project, newest first.
+
+    Pass the id and timestamp of the last returned message as ``before_id`` and
+    ``before_ts`` to load the next, older page.
     """
     # Note: A proper check would ensure the user is part of the project
-    messages = ChatRepo(db).get_messages_by_project(project_id)
+    messages = ChatRepo(db).get_messages_by_project(
+        project_id, limit, before_id=before_id, before_ts=before_ts
+    )
     return messages
 
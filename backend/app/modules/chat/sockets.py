@@ -2,21 +2,70 @@
 
 from __future__ import annotations
 
+import asyncio
 import logging
-from typing import Optional
+from typing import Optional, Sequence
 
 from pydantic import ValidationError
 from socketio import AsyncServer
 from sqlalchemy.exc import SQLAlchemyError
 
+from app.core.config import settings
 from app.core.db import SessionLocal
+from app.modules.chat.history import RecentMessages
+from app.modules.chat.pipeline import ChatPipeline, ChatWriter, MessageIdAllocator, PendingMessage
 from app.modules.chat.repo import ChatRepo
 from app.modules.chat.schemas import MessageIn, MessageOut
+from app.modules.crew import sockets as crew_sockets
 
 logger = logging.getLogger(__name__)
 
 _sio: Optional[AsyncServer] = None
 
+# Messages replayed on join when the history cache is disabled.
+DEFAULT_HISTORY_LIMIT = 50
+
+recent_messages = RecentMessages(
+    settings.CHAT_HISTORY_CACHE_SIZE, max_rooms=settings.CHAT_HISTORY_CACHE_ROOMS
+)
+
+
+async def notify_failed_messages(messages: Sequence[PendingMessage]) -> None:
+    """Tell rooms and senders about broadcast messages that could not be stored."""
+
+    sio = _require_server()
+    for message in messages:
+        recent_messages.discard(message.project_id, message.id)
+        await sio.emit(
+            "message_failed",
+            {"id": message.id, "project_id": message.project_id},
+            room=f"project_{message.project_id}",
+        )
+        if message.sid is not None:
+            await sio.emit(
+                "error",
+                {"message": "Failed to persist message", "id": message.id},
+                room=message.sid,
+            )
+
+
+def create_chat_pipeline() -> ChatPipeline:
+    # The factory is looked up per call so tests can swap ``SessionLocal``.
+    session_factory = lambda: SessionLocal()  # noqa: E731
+    return ChatPipeline(
+        MessageIdAllocator(session_factory, block_size=settings.CHAT_ID_BLOCK_SIZE),
+        ChatWriter(
+            session_factory,
+            maxsize=settings.CHAT_WRITE_QUEUE_SIZE,
+            batch_size=settings.CHAT_WRITE_BATCH_SIZE,
+            linger=settings.CHAT_WRITE_LINGER_MS / 1000,
+            on_failure=notify_failed_messages,
+        ),
+    )
+
+
+chat_pipeline = create_chat_pipeline()
+
 
 def register_socket_server(server: AsyncServer) -> None:
     global _sio
@@ -29,8 +78,50 @@ def _require_server() -> AsyncServer:
     return _sio
 
 
+def _load_history(project_id: int, limit: int) -> list[MessageOut]:
+    with SessionLocal() as db:
+        stored = ChatRepo(db).get_messages_by_project(project_id, limit)
+        return [MessageOut.model_validate(message) for message in reversed(stored)]
+
+
+async def recent_history(project_id: int) -> list[MessageOut]:
+    """Return the latest messages of a project, oldest first."""
+
+    cached = recent_messages.get(project_id)
+    if cached is not None:
+        return cached
+    if not recent_messages.enabled:
+        return await asyncio.to_thread(_load_history, project_id, DEFAULT_HISTORY_LIMIT)
+    stored = await asyncio.to_thread(_load_history, project_id, recent_messages.size)
+    return recent_messages.seed(project_id, stored)
+
+
+async def join_project(sid: str, data: dict) -> None:
+    """Join the project room and replay its recent chat history to the socket."""
+
+    await crew_sockets.join_project(sid, data)
+    try:
+        project_id = int(data["project_id"])
+    except (KeyError, TypeError, ValueError):
+        return  # already reported by the crew handler
+
+    try:
+        history = await recent_history(project_id)
+    except SQLAlchemyError:
+        logger.exception("Failed to load chat history", extra={"project_id": project_id})
+        return
+    await _require_server().emit(
+        "chat_history",
+        {
+            "project_id": project_id,
+            "messages": [message.model_dump(mode="json") for message in history],
+        },
+        room=sid,
+    )
+
+
 async def send_message(sid: str, data: dict) -> None:
-    """Persist an incoming message and broadcast it to the project room."""
+    """Broadcast an incoming message to the project room and queue it for storage."""
 
     sio = _require_server()
 
@@ -48,32 +139,22 @@ async def send_message(sid: str, data: dict) -> None:
         )
         return
 
-    with SessionLocal() as db:
-        repo = ChatRepo(db)
-        try:
-            message_model = repo.create_message(
-                project_id=payload.project_id,
-                user_id=payload.user_id,
-                content=payload.content,
-            )
-        except SQLAlchemyError:
-            db.rollback()
-            logger.exception(
-                "Failed to persist chat message",
-                extra={"sid": sid, "project_id": payload.project_id, "user_id": payload.user_id},
-            )
-            await sio.emit(
-                "error",
-                {"message": "Failed to persist message"},
-                room=sid,
-            )
-            return
-
-    message_out = MessageOut.model_validate(message_model).model_dump(mode="json")
+    async def broadcast(message: PendingMessage) -> None:
+        out = message.to_out()
+        recent_messages.append(out)
+        await sio.emit(
+            "new_message",
+            out.model_dump(mode="json"),
+            room=f"project_{message.project_id}",
+        )
 
-    await sio.emit("new_message", message_out, room=f"project_{payload.project_id}")
+    await chat_pipeline.accept(payload, broadcast, sid=sid)
     logger.info(
         "chat message broadcast",
         extra={"project_id": payload.project_id, "user_id": payload.user_id},
     )
 
+    # Without the background writer (e.g. outside the app lifespan) persist
+    # right away, still off the event loop.
+    if not chat_pipeline.running:
+        await chat_pipeline.writer.flush()
@@ -0,0 +1,197 @@
+"""Write-behind buffer for crew GPS positions.
+
+Socket handlers hand every accepted ping to :class:`LocationWriteBehind`, which
+only keeps the newest position per user in memory. A background task flushes
+the buffer every ``interval`` seconds with a single multi-row upsert on a worker
+thread, so the event loop never waits on the database. The pool then sees one
+connection per flush rather than one per ping.
+
+If the batch is rejected, its positions are retried one by one. Positions the
+database refuses, e.g. for an unknown user or project, are logged and dropped,
+so one bad ping cannot block everyone else's writes. Only transient
+``OperationalError`` failures put positions back into the buffer.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Callable, Sequence
+
+from geoalchemy2.elements import WKTElement
+from sqlalchemy import select
+from sqlalchemy.exc import OperationalError, SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.modules.crew.models import Location
+from app.modules.crew.schemas import LocationBroadcast
+
+logger = logging.getLogger(__name__)
+
+_UPSERT_COLUMNS = ("geom", "timestamp", "accuracy", "speed", "heading", "project_id")
+
+
+def _point(latitude: float, longitude: float) -> WKTElement:
+    point_wkt = f"POINT({longitude} {latitude})"
+    try:
+        return WKTElement(point_wkt, srid=4326)
+    except TypeError:
+        return WKTElement(point_wkt)
+
+
+def _row(position: LocationBroadcast) -> dict[str, object]:
+    return {
+        "user_id": position.user_id,
+        "geom": _point(position.latitude, position.longitude),
+        "timestamp": position.timestamp,
+        "accuracy": position.accuracy,
+        "speed": position.speed,
+        "heading": position.heading,
+        "project_id": position.project_id,
+    }
+
+
+def upsert_locations(db: Session, positions: Sequence[LocationBroadcast]) -> None:
+    """Insert or update the stored position of every user in ``positions``.
+
+    PostgreSQL and SQLite get one ``INSERT ... ON CONFLICT (user_id) DO UPDATE``
+    statement; other dialects fall back to updating the ORM rows in one
+    transaction.
+    """
+
+    if not positions:
+        return
+    rows = [_row(position) for position in positions]
+    dialect = db.get_bind().dialect.name
+    if dialect in {"postgresql", "sqlite"}:
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+
+        statement = insert(Location).values(rows)
+        statement = statement.on_conflict_do_update(
+            index_elements=[Location.user_id],
+            set_={column: statement.excluded[column] for column in _UPSERT_COLUMNS},
+        )
+        db.execute(statement)
+        return
+
+    existing = {
+        location.user_id: location
+        for location in db.scalars(
+            select(Location).where(Location.user_id.in_([row["user_id"] for row in rows]))
+        )
+    }
+    for row in rows:
+        location = existing.get(row["user_id"])
+        if location is None:
+            db.add(Location(**row))
+            continue
+        for column in _UPSERT_COLUMNS:
+            setattr(location, column, row[column])
+    db.flush()
+
+
+class LocationWriteBehind:
+    """Coalesce crew positions per user and persist them periodically."""
+
+    def __init__(self, session_factory: Callable[[], Session], *, interval: float = 1.0) -> None:
+        self._session_factory = session_factory
+        self._interval = interval
+        self._pending: dict[int, LocationBroadcast] = {}
+        self._lock = asyncio.Lock()
+        self._task: asyncio.Task[None] | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def put(self, position: LocationBroadcast) -> None:
+        """Remember ``position`` as the latest one for its user."""
+
+        self._pending[position.user_id] = position
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="crew-location-write-behind")
+
+    async def stop(self) -> None:
+        """Stop the background task and persist whatever is still buffered."""
+
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        try:
+            await self.flush()
+        except SQLAlchemyError:
+            logger.exception("Failed to persist buffered crew locations on shutdown")
+
+    async def flush(self) -> int:
+        """Write the buffered positions and return how many were persisted.
+
+        On a transient ``OperationalError`` the unwritten positions go back
+        into the buffer, unless a newer ping for the same user arrived in the
+        meantime, and the error is raised. Positions rejected for any other
+        reason are dropped.
+        """
+
+        async with self._lock:
+            if not self._pending:
+                return 0
+            batch, self._pending = self._pending, {}
+            positions = list(batch.values())
+            try:
+                await asyncio.to_thread(self._write, positions)
+                return len(positions)
+            except OperationalError:
+                self._requeue(positions)
+                raise
+            except SQLAlchemyError:
+                logger.exception(
+                    "Batched crew location upsert failed, retrying per position",
+                    extra={"size": len(positions)},
+                )
+
+            written = 0
+            for index, position in enumerate(positions):
+                try:
+                    await asyncio.to_thread(self._write, [position])
+                except OperationalError:
+                    self._requeue(positions[index:])
+                    raise
+                except SQLAlchemyError:
+                    logger.exception(
+                        "Dropping crew location that cannot be stored",
+                        extra={"user_id": position.user_id, "project_id": position.project_id},
+                    )
+                else:
+                    written += 1
+            return written
+
+    def _requeue(self, positions: Sequence[LocationBroadcast]) -> None:
+        for position in positions:
+            self._pending.setdefault(position.user_id, position)
+
+    def _write(self, positions: list[LocationBroadcast]) -> None:
+        with self._session_factory() as db:
+            upsert_locations(db, positions)
+            db.commit()
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self._interval)
+            try:
+                await self.flush()
+            except SQLAlchemyError:
+                logger.exception(
+                    "Failed to persist crew locations", extra={"buffered": self.pending}
+                )
+
+
+__all__ = ["LocationWriteBehind", "upsert_locations"]
@@ -1,3 +1,4 @@
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from sqlalchemy import select, update
 from typing import List
@@ -36,3 +37,41 @@ class CrewRepo:
 
     def set_status(self, booking_id: int, status: str):
         self.db.execute(update(Booking).where(Booking.id==booking_id).values(status=status))
+
+
+class AsyncCrewRepo:
+    """:class:`CrewRepo` counterpart bound to an ``AsyncSession``."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    # crew members
+    async def list_members(self) -> list[CrewMember]:
+        result = await self.db.execute(select(CrewMember).order_by(CrewMember.name))
+        return list(result.scalars().all())
+
+    async def add_member(self, c: CrewMember) -> CrewMember:
+        self.db.add(c); await self.db.flush(); return c
+
+    async def get_member(self, crew_id: int) -> CrewMember | None:
+        return await self.db.get(CrewMember, crew_id)
+
+    async def find_member_by_email(self, email: str) -> CrewMember | None:
+        result = await self.db.execute(
+            select(CrewMember).where(CrewMember.email == email).limit(1)
+        )
+        return result.scalars().first()
+
+    # bookings
+    async def list_bookings_for_user(self, crew_id: int) -> list[Booking]:
+        result = await self.db.execute(select(Booking).where(Booking.crew_id==crew_id).order_by(Booking.start.desc()))
+        return list(result.scalars().all())
+
+    async def add_booking(self, b: Booking) -> Booking:
+        self.db.add(b); await self.db.flush(); return b
+
+    async def get_booking(self, booking_id: int) -> Booking | None:
+        return await self.db.get(Booking, booking_id)
+
+    async def set_status(self, booking_id: int, status: str):
+        await self.db.execute(update(Booking).where(Booking.id==booking_id).values(status=status))
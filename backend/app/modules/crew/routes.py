@@ -1,52 +1,53 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.modules.auth.deps import get_db, require_role
+from app.core.db import get_async_session
+from app.modules.auth.deps import require_role_async
 from .schemas import CrewMemberIn, CrewMemberOut, BookingIn, BookingOut
-from .usecases import CrewService
+from .usecases import AsyncCrewService
 
 router = APIRouter()
 
 # Crew members
 @router.get("/crew", response_model=list[CrewMemberOut])
-def list_crew(db: Session = Depends(get_db), user=Depends(require_role("admin","planner","warehouse","viewer"))):
-    return CrewService(db).list_members()
+async def list_crew(db: AsyncSession = Depends(get_async_session), user=Depends(require_role_async("admin","planner","warehouse","viewer"))):
+    return await AsyncCrewService(db).list_members()
 
 @router.post("/crew", response_model=CrewMemberOut)
-def add_crew(payload: CrewMemberIn, db: Session = Depends(get_db), user=Depends(require_role("admin","planner"))):
-    return CrewService(db).create_member(payload)
+async def add_crew(payload: CrewMemberIn, db: AsyncSession = Depends(get_async_session), user=Depends(require_role_async("admin","planner"))):
+    return await AsyncCrewService(db).create_member(payload)
 
 # Bookings
 @router.get("/me/bookings", response_model=list[BookingOut])
-def my_bookings(
+async def my_bookings(
     crew_id: int | None = Query(default=None, description="Specifieke crew ID voor planners/admins"),
-    db: Session = Depends(get_db),
-    user=Depends(require_role("crew","planner","admin")),
+    db: AsyncSession = Depends(get_async_session),
+    user=Depends(require_role_async("crew","planner","admin")),
 ):
-    service = CrewService(db)
+    service = AsyncCrewService(db)
     try:
-        return service.list_bookings_for_user(
+        return await service.list_bookings_for_user(
             user_id=user.id, user_role=user.role, user_email=user.email, crew_id=crew_id
         )
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
 
 @router.post("/bookings", response_model=BookingOut)
-def create_booking(payload: BookingIn, db: Session = Depends(get_db), user=Depends(require_role("admin","planner"))):
-    return CrewService(db).create_booking(payload)
+async def create_booking(payload: BookingIn, db: AsyncSession = Depends(get_async_session), user=Depends(require_role_async("admin","planner"))):
+    return await AsyncCrewService(db).create_booking(payload)
 
 @router.post("/bookings/{booking_id}/accept", response_model=BookingOut)
-def accept_booking(booking_id: int, db: Session = Depends(get_db), user=Depends(require_role("crew","planner","admin"))):
-    service = CrewService(db)
+async def accept_booking(booking_id: int, db: AsyncSession = Depends(get_async_session), user=Depends(require_role_async("crew","planner","admin"))):
+    service = AsyncCrewService(db)
     try:
-        return service.update_booking_status(booking_id, "confirmed")
+        return await service.update_booking_status(booking_id, "confirmed")
     except ValueError as exc:
         raise HTTPException(status_code=404, detail=str(exc)) from exc
 
 @router.post("/bookings/{booking_id}/decline", response_model=BookingOut)
-def decline_booking(booking_id: int, db: Session = Depends(get_db), user=Depends(require_role("crew","planner","admin"))):
-    service = CrewService(db)
+async def decline_booking(booking_id: int, db: AsyncSession = Depends(get_async_session), user=Depends(require_role_async("crew","planner","admin"))):
+    service = AsyncCrewService(db)
     try:
-        return service.update_booking_status(booking_id, "declined")
+        return await service.update_booking_status(booking_id, "declined")
     except ValueError as exc:
         raise HTTPException(status_code=404, detail=str(exc)) from exc
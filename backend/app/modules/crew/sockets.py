@@ -2,24 +2,216 @@
 
 from __future__ import annotations
 
+import asyncio
 import logging
+import math
+import time
+from dataclasses import dataclass
 from datetime import datetime, timezone
-from typing import Optional
+from typing import Callable, Optional
 
-from geoalchemy2.elements import WKTElement
 from pydantic import ValidationError
 from socketio import AsyncServer
 from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy.orm import Session
 
+from app.core.config import settings
 from app.core.db import SessionLocal
-from app.modules.crew.models import Location
+from app.modules.crew.location_buffer import LocationWriteBehind
 from app.modules.crew.schemas import LocationBroadcast, LocationUpdateIn
 
 logger = logging.getLogger(__name__)
 
 _sio: Optional[AsyncServer] = None
 
+# The factory is looked up on every flush so tests can swap ``SessionLocal``.
+location_buffer = LocationWriteBehind(
+    lambda: SessionLocal(), interval=settings.CREW_LOCATION_FLUSH_MS / 1000
+)
+
+EARTH_RADIUS_M = 6_371_000.0
+# Delta-encoded coordinates are integer micro-degrees (about 11 cm at the equator).
+COORDINATE_SCALE = 1_000_000
+
+
+def _distance_m(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lon2 - lon1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(math.sqrt(a))
+
+
+def _heading_change(previous: float | None, current: float | None) -> float:
+    if previous is None or current is None:
+        return 0.0
+    change = abs(current - previous) % 360
+    return min(change, 360 - change)
+
+
+def _rooms(position: LocationBroadcast) -> list[str]:
+    rooms = ["managers"]
+    if position.project_id is not None:
+        rooms.insert(0, f"project_{position.project_id}")
+    return rooms
+
+
+@dataclass(frozen=True)
+class _SentPosition:
+    latitude: float
+    longitude: float
+    lat_q: int
+    lon_q: int
+    heading: float | None
+    project_id: int | None
+    sent_at: float
+    since_keyframe: int
+
+
+class LocationBroadcastScheduler:
+    """Throttle, filter and batch crew location broadcasts.
+
+    Accepted pings only replace the user's pending position. Every tick the
+    scheduler sends at most one position per user and never more often than
+    ``max_user_hz``. Positions within ``min_distance_m`` and
+    ``min_heading_deg`` of the last one sent are dropped. The remaining
+    positions go out as a single ``location_batch`` frame per room.
+
+    With ``delta_encoding`` a position carries ``dlat``/``dlon`` (micro-degrees
+    relative to that user's previous broadcast) instead of
+    ``latitude``/``longitude``. A full keyframe is sent for a user's first
+    position, after a project change and every ``keyframe_every`` broadcasts,
+    so clients that join mid-stream resynchronise quickly.
+    """
+
+    def __init__(
+        self,
+        *,
+        tick_hz: float = 2.0,
+        max_user_hz: float = 1.0,
+        min_distance_m: float = 0.0,
+        min_heading_deg: float = 0.0,
+        delta_encoding: bool = False,
+        keyframe_every: int = 20,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if tick_hz <= 0 or max_user_hz <= 0 or keyframe_every < 1:
+            raise ValueError("tick_hz, max_user_hz and keyframe_every must be positive")
+        self._tick_interval = 1 / tick_hz
+        self._min_gap = 1 / max_user_hz
+        self._min_distance_m = min_distance_m
+        self._min_heading_deg = min_heading_deg
+        self._delta_encoding = delta_encoding
+        self._keyframe_every = keyframe_every
+        self._clock = clock
+        self._pending: dict[int, LocationBroadcast] = {}
+        self._sent: dict[int, _SentPosition] = {}
+        self._task: asyncio.Task[None] | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    def offer(self, position: LocationBroadcast) -> None:
+        """Queue ``position`` as the user's next candidate broadcast."""
+
+        self._pending[position.user_id] = position
+
+    def collect(self) -> dict[str, list[dict[str, object]]]:
+        """Return the entries due this tick, grouped by room."""
+
+        now = self._clock()
+        frames: dict[str, list[dict[str, object]]] = {}
+        for user_id, position in list(self._pending.items()):
+            last = self._sent.get(user_id)
+            if last is not None and now - last.sent_at < self._min_gap:
+                continue
+            del self._pending[user_id]
+            if last is not None and not self._significant(last, position):
+                continue
+            entry = self._encode(position, last, now)
+            for room in _rooms(position):
+                frames.setdefault(room, []).append(entry)
+        return frames
+
+    async def tick(self) -> int:
+        """Emit one ``location_batch`` per room and return the positions sent."""
+
+        frames = self.collect()
+        if not frames:
+            return 0
+        sio = _require_server()
+        for room, entries in frames.items():
+            frame: dict[str, object] = {"positions": entries}
+            if self._delta_encoding:
+                frame["encoding"] = "delta"
+                frame["scale"] = COORDINATE_SCALE
+            await sio.emit("location_batch", frame, room=room)
+        return len({entry["user_id"] for entries in frames.values() for entry in entries})
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="crew-location-broadcast")
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+    def _significant(self, last: _SentPosition, position: LocationBroadcast) -> bool:
+        if last.project_id != position.project_id:
+            return True
+        moved = _distance_m(last.latitude, last.longitude, position.latitude, position.longitude)
+        if moved >= self._min_distance_m and moved > 0:
+            return True
+        turned = _heading_change(last.heading, position.heading)
+        return turned >= self._min_heading_deg and turned > 0
+
+    def _encode(
+        self, position: LocationBroadcast, last: _SentPosition | None, now: float
+    ) -> dict[str, object]:
+        entry = position.to_socket_payload()
+        lat_q = round(position.latitude * COORDINATE_SCALE)
+        lon_q = round(position.longitude * COORDINATE_SCALE)
+        keyframe = (
+            not self._delta_encoding
+            or last is None
+            or last.project_id != position.project_id
+            or last.since_keyframe + 1 >= self._keyframe_every
+        )
+        if not keyframe:
+            del entry["latitude"], entry["longitude"]
+            entry["dlat"] = lat_q - last.lat_q
+            entry["dlon"] = lon_q - last.lon_q
+        self._sent[position.user_id] = _SentPosition(
+            latitude=position.latitude,
+            longitude=position.longitude,
+            lat_q=lat_q,
+            lon_q=lon_q,
+            heading=position.heading,
+            project_id=position.project_id,
+            sent_at=now,
+            since_keyframe=0 if keyframe else last.since_keyframe + 1,
+        )
+        return entry
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self._tick_interval)
+            try:
+                await self.tick()
+            except Exception:
+                logger.exception("Failed to broadcast crew locations")
+
+
+location_broadcaster = LocationBroadcastScheduler(
+    tick_hz=settings.CREW_LOCATION_BROADCAST_HZ,
+    max_user_hz=settings.CREW_LOCATION_MAX_USER_HZ,
+    min_distance_m=settings.CREW_LOCATION_MIN_DISTANCE_M,
+    min_heading_deg=settings.CREW_LOCATION_MIN_HEADING_DEG,
+    delta_encoding=settings.CREW_LOCATION_DELTA_ENCODING,
+)
+
 
 def register_socket_server(server: AsyncServer) -> None:
     """Register the Socket.IO server instance used by the event handlers."""
@@ -41,52 +233,6 @@ def _parse_project_id(data: dict) -> int:
         raise ValueError("Invalid project_id") from exc
 
 
-def _update_location_record(
-    db: Session,
-    payload: LocationUpdateIn,
-    event_time: datetime,
-) -> LocationBroadcast:
-    point_wkt = f"POINT({payload.longitude} {payload.latitude})"
-    try:
-        point = WKTElement(point_wkt, srid=4326)
-    except TypeError:
-        point = WKTElement(point_wkt)
-
-    location = db.query(Location).filter(Location.user_id == payload.user_id).one_or_none()
-
-    if location is None:
-        location = Location(
-            user_id=payload.user_id,
-            geom=point,
-            timestamp=event_time,
-            accuracy=payload.accuracy,
-            speed=payload.speed,
-            heading=payload.heading,
-            project_id=payload.project_id,
-        )
-        db.add(location)
-    else:
-        location.geom = point
-        location.timestamp = event_time
-        location.accuracy = payload.accuracy
-        location.speed = payload.speed
-        location.heading = payload.heading
-        location.project_id = payload.project_id
-
-    db.flush()
-
-    return LocationBroadcast(
-        user_id=payload.user_id,
-        latitude=payload.latitude,
-        longitude=payload.longitude,
-        timestamp=event_time,
-        project_id=payload.project_id,
-        accuracy=payload.accuracy,
-        speed=payload.speed,
-        heading=payload.heading,
-    )
-
-
 async def connect(sid: str, environ: dict) -> None:  # pragma: no cover - integration hook
     """Accept incoming socket connections."""
 
@@ -130,7 +276,7 @@ async def leave_project(sid: str, data: dict) -> None:
 
 
 async def update_location(sid: str, data: dict) -> None:
-    """Persist and broadcast crew location updates."""
+    """Broadcast crew location updates and buffer them for persistence."""
 
     sio = _require_server()
 
@@ -148,32 +294,39 @@ async def update_location(sid: str, data: dict) -> None:
         )
         return
 
-    event_time = datetime.now(timezone.utc)
-
-    try:
-        with SessionLocal() as db:
-            broadcast = _update_location_record(db, payload, event_time)
-            db.commit()
-    except SQLAlchemyError:
-        logger.exception(
-            "Failed to persist crew location",
-            extra={"sid": sid, "user_id": payload.user_id},
-        )
-        await sio.emit(
-            "error",
-            {"message": "Failed to persist crew location"},
-            room=sid,
-        )
+    broadcast = LocationBroadcast(
+        user_id=payload.user_id,
+        latitude=payload.latitude,
+        longitude=payload.longitude,
+        timestamp=datetime.now(timezone.utc),
+        project_id=payload.project_id,
+        accuracy=payload.accuracy,
+        speed=payload.speed,
+        heading=payload.heading,
+    )
+    location_buffer.put(broadcast)
+
+    # Without the background flusher (e.g. outside the app lifespan) write
+    # through immediately, still off the event loop.
+    if not location_buffer.running:
+        try:
+            await location_buffer.flush()
+        except SQLAlchemyError:
+            logger.exception(
+                "Failed to persist crew location",
+                extra={"sid": sid, "user_id": payload.user_id},
+            )
+            await sio.emit(
+                "error",
+                {"message": "Failed to persist crew location"},
+                room=sid,
+            )
+            return
+
+    if location_broadcaster.running:
+        location_broadcaster.offer(broadcast)
         return
 
     socket_payload = broadcast.to_socket_payload()
-
-    if payload.project_id is not None:
-        await sio.emit(
-            "location_update",
-            socket_payload,
-            room=f"project_{payload.project_id}",
-        )
-
-    await sio.emit("location_update", socket_payload, room="managers")
-
+    for room in _rooms(broadcast):
+        await sio.emit("location_update", socket_payload, room=room)
@@ -5,18 +5,46 @@ import logging
 import uuid
 from typing import Sequence
 
+from anyio import to_thread
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app.modules.platform.mailer import make_ics, send_email
 
 from .models import Booking, CrewMember
 from .ports import CrewServicePort
-from .repo import CrewRepo
+from .repo import AsyncCrewRepo, CrewRepo
 from .schemas import BookingIn, CrewMemberIn
 
 logger = logging.getLogger(__name__)
 
 
+def _send_booking_notification(member: CrewMember | None, booking: Booking, *, mail_sender, ics_builder) -> None:
+    if not member or not member.email:
+        return
+    try:
+        ics = ics_builder(
+            uid=str(uuid.uuid4()),
+            dtstart=booking.start,
+            dtend=booking.end,
+            summary=f"Boeking project {booking.project_id} ({booking.role})",
+            description=(
+                f"Je bent geboekt voor project {booking.project_id} van"
+                f" {booking.start} tot {booking.end}"
+            ),
+        )
+        mail_sender(
+            member.email,
+            "Nieuwe booking",
+            "Je bent geboekt. Zie bijlage of portal voor details.",
+            ics,
+        )
+    except Exception:  # pragma: no cover - defensive logging
+        # Mailing is best-effort; we log the exception to aid debugging
+        # while deliberately avoiding a rollback of the confirmed booking.
+        logger.exception("Failed to send booking notification for booking %s", booking.id)
+
+
 class CrewService(CrewServicePort):
     """Concrete implementation of :class:`CrewServicePort`."""
 
@@ -78,27 +106,75 @@ class CrewService(CrewServicePort):
     # Internal helpers -------------------------------------------------------------
     def _notify_booking(self, booking: Booking) -> None:
         member = self.db.get(CrewMember, booking.crew_id)
-        if not member or not member.email:
-            return
-        try:
-            ics = self._make_ics(
-                uid=str(uuid.uuid4()),
-                dtstart=booking.start,
-                dtend=booking.end,
-                summary=f"Boeking project {booking.project_id} ({booking.role})",
-                description=(
-                    f"Je bent geboekt voor project {booking.project_id} van"
-                    f" {booking.start} tot {booking.end}"
-                ),
-            )
-            self._send_mail(
-                member.email,
-                "Nieuwe booking",
-                "Je bent geboekt. Zie bijlage of portal voor details.",
-                ics,
+        _send_booking_notification(
+            member, booking, mail_sender=self._send_mail, ics_builder=self._make_ics
+        )
+
+
+class AsyncCrewService:
+    """Async variant of :class:`CrewService` used by the HTTP routes.
+
+    Database access goes through :class:`AsyncCrewRepo`; the blocking SMTP call of
+    the booking notification is handed to a worker thread after the commit.
+    """
+
+    def __init__(self, db: AsyncSession, *, mail_sender=send_email, ics_builder=make_ics) -> None:
+        self.db = db
+        self.repo = AsyncCrewRepo(db)
+        self._send_mail = mail_sender
+        self._make_ics = ics_builder
+
+    # Crew members -----------------------------------------------------------------
+    async def list_members(self) -> Sequence[CrewMember]:
+        return await self.repo.list_members()
+
+    async def create_member(self, payload: CrewMemberIn) -> CrewMember:
+        member = CrewMember(**payload.model_dump())
+        await self.repo.add_member(member)
+        await self.db.commit()
+        await self.db.refresh(member)
+        return member
+
+    # Bookings ---------------------------------------------------------------------
+    async def list_bookings_for_user(
+        self,
+        *,
+        user_id: int,
+        user_role: str,
+        user_email: str,
+        crew_id: int | None = None,
+    ) -> Sequence[Booking]:
+        if crew_id is None:
+            if user_role == "crew":
+                member = await self.repo.find_member_by_email(user_email)
+                if not member:
+                    raise ValueError("Geen crew-profiel gevonden voor deze gebruiker")
+                crew_id = member.id
+            elif user_role in {"planner", "admin"}:
+                raise ValueError("Geef een crew_id op om boekingen te bekijken")
+            else:
+                raise ValueError("Rol heeft geen toegang tot crew boekingen")
+        return await self.repo.list_bookings_for_user(crew_id)
+
+    async def create_booking(self, payload: BookingIn) -> Booking:
+        booking = Booking(**payload.model_dump())
+        await self.repo.add_booking(booking)
+        await self.db.commit()
+        await self.db.refresh(booking)
+        member = await self.repo.get_member(booking.crew_id)
+        await to_thread.run_sync(
+            lambda: _send_booking_notification(
+                member, booking, mail_sender=self._send_mail, ics_builder=self._make_ics
             )
-        except Exception:  # pragma: no cover - defensive logging
-            # Mailing is best-effort; we log the exception to aid debugging
-            # while deliberately avoiding a rollback of the confirmed booking.
-            logger.exception("Failed to send booking notification for booking %s", booking.id)
+        )
+        return booking
+
+    async def update_booking_status(self, booking_id: int, status: str) -> Booking:
+        booking = await self.repo.get_booking(booking_id)
+        if not booking:
+            raise ValueError("Booking niet gevonden")
+        await self.repo.set_status(booking_id, status)
+        await self.db.commit()
+        await self.db.refresh(booking)
+        return booking
 
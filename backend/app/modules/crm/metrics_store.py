@@ -0,0 +1,649 @@
+"""Materialized per-tenant aggregates backing the CRM dashboard.
+
+The dashboard used to load every lead, deal and automation run of a tenant on
+each request. :class:`CRMMetricsStore` keeps the history-wide figures in a few
+small tables instead (one row per tenant, pipeline stage, lead source and
+automation workflow) and :class:`~app.modules.crm.service.CRMService` updates
+them in the same transaction as the write that changes them. Figures tied to
+the lookback window (recent leads, recently closed deals, the 30 day forecast)
+are read with indexed range queries at request time; acquisition metrics are
+filled in by the service.
+
+A tenant's store is built from its history on first read. Writes that bypass
+the service layer, such as imports or manual status changes, should be
+followed by :meth:`CRMMetricsStore.rebuild`.
+
+A rebuild and the write hooks of one tenant are serialised by a per-tenant
+lock held until commit. A write that runs while the first read rebuilds the
+store is then either committed before the rebuild reads the history, or it
+waits and records its delta into the finished store. On PostgreSQL this is a
+transaction-level advisory lock. SQLite already serialises writers for the
+whole database: the rebuild starts with a write, and the hooks run after the
+write they describe.
+"""
+
+from __future__ import annotations
+
+import hashlib
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+from sqlalchemy import and_, delete, distinct, func, insert, select, text, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from . import models
+
+AUTOMATION_SLA_MINUTES = 10
+LOST_STATUSES = frozenset({"lost", "closed_lost"})
+
+
+@dataclass
+class StageAggregate:
+    stage_id: int
+    stage_name: str
+    order: int
+    deal_count: int = 0
+    total_value: Decimal = Decimal(0)
+    weighted_value: Decimal = Decimal(0)
+    avg_age_days: float | None = None
+
+
+@dataclass
+class WorkflowAggregate:
+    run_count: int = 0
+    failed_runs: int = 0
+    duration_minutes_sum: float = 0.0
+    duration_count: int = 0
+    sla_breaches: int = 0
+
+
+@dataclass
+class SourceAggregate:
+    label: str
+    dimension_type: str
+    lead_count: int = 0
+    deal_count: int = 0
+    won_deal_count: int = 0
+    pipeline_value: Decimal = Decimal(0)
+    won_value: Decimal = Decimal(0)
+
+
+@dataclass
+class AcquisitionSourceAggregate:
+    label: str
+    dimension_type: str
+    sessions: int = 0
+    ga_conversions: int = 0
+    gtm_conversions: int = 0
+    ga_revenue: Decimal = Decimal(0)
+    gtm_revenue: Decimal = Decimal(0)
+
+
+@dataclass
+class AcquisitionAggregate:
+    sessions: int = 0
+    new_users: int = 0
+    engaged_sessions: int = 0
+    ga_conversions: int = 0
+    ga_conversion_value: Decimal = Decimal(0)
+    gtm_conversions: int = 0
+    gtm_conversion_value: Decimal = Decimal(0)
+    sources: dict[str, AcquisitionSourceAggregate] = field(default_factory=dict)
+
+
+@dataclass
+class DashboardAggregates:
+    """Raw dashboard figures, before rounding and ratio calculation."""
+
+    total_leads: int = 0
+    leads_in_window: int = 0
+    leads_with_deals: int = 0
+    total_deals: int = 0
+    open_deals: int = 0
+    total_pipeline_value: Decimal = Decimal(0)
+    weighted_pipeline_value: Decimal = Decimal(0)
+    won_deals_in_window: int = 0
+    lost_deals_in_window: int = 0
+    won_value_in_window: Decimal = Decimal(0)
+    closed_cycle_days_sum: float = 0.0
+    closed_cycle_count: int = 0
+    forecast_next_30_days: Decimal = Decimal(0)
+    stages: list[StageAggregate] = field(default_factory=list)
+    workflows: dict[str, WorkflowAggregate] = field(default_factory=dict)
+    sources: dict[str, SourceAggregate] = field(default_factory=dict)
+    acquisition: AcquisitionAggregate = field(default_factory=AcquisitionAggregate)
+
+
+def lead_source_dimension(source: str | None) -> tuple[str, str, str]:
+    """Return the ``(key, label, dimension_type)`` a lead is counted under."""
+
+    label = source or "Direct/Other"
+    return label.strip().lower(), label, "lead_source"
+
+
+def deal_source_dimension(lead_source: str | None) -> tuple[str, str, str]:
+    """Return the ``(key, label, dimension_type)`` a deal is counted under."""
+
+    if lead_source:
+        return lead_source.strip().lower(), lead_source, "lead_source"
+    return "pipeline", "Pipeline", "internal"
+
+
+def acquisition_source_dimension(source: str | None, channel: str | None) -> tuple[str, str, str]:
+    """Return the ``(key, label, dimension_type)`` of a GA/GTM acquisition row."""
+
+    key = (source or channel or "ga/other").strip().lower()
+    return key, source or channel or "GA Other", "ga_source" if source else "ga_channel"
+
+
+def _epoch(moment: datetime) -> float:
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.timestamp()
+
+
+def _days(delta: timedelta) -> float:
+    return delta.total_seconds() / 86400.0
+
+
+def _weighted(value: Decimal, probability: int | None) -> Decimal:
+    return value * Decimal(probability or 0) / Decimal(100)
+
+
+class CRMMetricsStore:
+    """Read and maintain the materialized dashboard aggregates of one tenant.
+
+    The ``record_*`` hooks only flush; the calling service commits them along
+    with the change they describe. They are no-ops until the tenant's store
+    has been built, because the first read rebuilds it from history. Both
+    paths take the tenant lock first, so that rebuild cannot miss a write
+    whose hook was skipped.
+    """
+
+    def __init__(self, db: Session, tenant_id: str) -> None:
+        self.db = db
+        self.tenant_id = tenant_id
+
+    # Write hooks ---------------------------------------------------------
+    def record_lead(self, lead: models.CRMLead) -> None:
+        if not self._locked_is_built():
+            return
+        self._bump_tenant(total_leads=1)
+        key, label, dimension_type = lead_source_dimension(lead.source)
+        self._bump_source(key, label, dimension_type, lead_count=1)
+
+    def record_deal(self, deal: models.CRMDeal) -> None:
+        """Count a newly flushed deal."""
+
+        if not self._locked_is_built():
+            return
+        lead_source = None
+        first_for_lead = False
+        if deal.lead_id is not None:
+            lead_source = self.db.scalar(
+                select(models.CRMLead.source).where(models.CRMLead.id == deal.lead_id)
+            )
+            first_for_lead = not self.db.scalar(
+                select(
+                    select(models.CRMDeal.id)
+                    .where(models.CRMDeal.lead_id == deal.lead_id, models.CRMDeal.id != deal.id)
+                    .exists()
+                )
+            )
+
+        value = Decimal(deal.value or 0)
+        status = (deal.status or "").lower()
+        tenant_deltas: dict[str, float] = {"total_deals": 1}
+        if first_for_lead:
+            tenant_deltas["leads_with_deals"] = 1
+        if status == "won" or status in LOST_STATUSES:
+            tenant_deltas["closed_cycle_days_sum"] = _days(deal.updated_at - deal.created_at)
+            tenant_deltas["closed_cycle_count"] = 1
+        else:
+            tenant_deltas["open_deals"] = 1
+        self._bump_tenant(**tenant_deltas)
+
+        self._bump_stage(
+            deal.stage_id,
+            deal_count=1,
+            total_value=value,
+            weighted_value=_weighted(value, deal.probability),
+            created_epoch_sum=_epoch(deal.created_at),
+        )
+
+        key, label, dimension_type = deal_source_dimension(lead_source)
+        source_deltas: dict[str, object] = {"deal_count": 1, "pipeline_value": value}
+        if status == "won":
+            source_deltas["won_deal_count"] = 1
+            source_deltas["won_value"] = value
+        self._bump_source(key, label, dimension_type, **source_deltas)
+
+    def record_stage_change(
+        self,
+        deal: models.CRMDeal,
+        *,
+        previous_stage_id: int,
+        previous_updated_at: datetime,
+    ) -> None:
+        """Move a deal between stage rows after :meth:`CRMService.advance_stage`."""
+
+        if not self._locked_is_built():
+            return
+        status = (deal.status or "").lower()
+        if status == "won" or status in LOST_STATUSES:
+            # The cycle length of a closed deal ends at its last update.
+            self._bump_tenant(closed_cycle_days_sum=_days(deal.updated_at - previous_updated_at))
+        if deal.stage_id == previous_stage_id:
+            return
+        value = Decimal(deal.value or 0)
+        weighted = _weighted(value, deal.probability)
+        created = _epoch(deal.created_at)
+        self._bump_stage(
+            previous_stage_id,
+            deal_count=-1,
+            total_value=-value,
+            weighted_value=-weighted,
+            created_epoch_sum=-created,
+        )
+        self._bump_stage(
+            deal.stage_id,
+            deal_count=1,
+            total_value=value,
+            weighted_value=weighted,
+            created_epoch_sum=created,
+        )
+
+    def record_automation_run(self, run: models.CRMAutomationRun) -> None:
+        if not self._locked_is_built():
+            return
+        self._bump(
+            models.CRMMetricWorkflow,
+            {"tenant_id": self.tenant_id, "workflow_id": run.workflow_id},
+            {},
+            **self._workflow_deltas(run.status, run.created_at, run.completed_at),
+        )
+
+    # Reads ---------------------------------------------------------------
+    def aggregates(self, now: datetime, window_start: datetime) -> DashboardAggregates:
+        """Return the dashboard figures for the window ending at ``now``."""
+
+        state = self._ensure_built()
+        result = DashboardAggregates(
+            total_leads=state.total_leads,
+            leads_with_deals=state.leads_with_deals,
+            total_deals=state.total_deals,
+            open_deals=state.open_deals,
+            closed_cycle_days_sum=state.closed_cycle_days_sum,
+            closed_cycle_count=state.closed_cycle_count,
+        )
+
+        stage_rows = self.db.execute(
+            select(
+                models.CRMPipelineStage.id,
+                models.CRMPipelineStage.name,
+                models.CRMPipelineStage.order,
+                models.CRMMetricStage.deal_count,
+                models.CRMMetricStage.total_value,
+                models.CRMMetricStage.weighted_value,
+                models.CRMMetricStage.created_epoch_sum,
+            )
+            .join(models.CRMPipeline, models.CRMPipeline.id == models.CRMPipelineStage.pipeline_id)
+            .outerjoin(
+                models.CRMMetricStage,
+                and_(
+                    models.CRMMetricStage.stage_id == models.CRMPipelineStage.id,
+                    models.CRMMetricStage.tenant_id == self.tenant_id,
+                ),
+            )
+            .where(models.CRMPipeline.tenant_id == self.tenant_id)
+            .order_by(models.CRMPipelineStage.order)
+        ).all()
+        now_epoch = _epoch(now)
+        for row in stage_rows:
+            deal_count = row.deal_count or 0
+            avg_age_days = None
+            if deal_count:
+                avg_age_days = (now_epoch - row.created_epoch_sum / deal_count) / 86400.0
+            result.stages.append(
+                StageAggregate(
+                    stage_id=row.id,
+                    stage_name=row.name,
+                    order=row.order,
+                    deal_count=deal_count,
+                    total_value=Decimal(row.total_value or 0),
+                    weighted_value=Decimal(row.weighted_value or 0),
+                    avg_age_days=avg_age_days,
+                )
+            )
+
+        # Totals span every stage row of the tenant, including deals whose
+        # stage belongs to a pipeline that is not listed above.
+        total_value, weighted_value = self.db.execute(
+            select(
+                func.sum(models.CRMMetricStage.total_value),
+                func.sum(models.CRMMetricStage.weighted_value),
+            ).where(models.CRMMetricStage.tenant_id == self.tenant_id)
+        ).one()
+        result.total_pipeline_value = Decimal(total_value or 0)
+        result.weighted_pipeline_value = Decimal(weighted_value or 0)
+
+        result.leads_in_window = self.db.scalar(
+            select(func.count(models.CRMLead.id)).where(
+                models.CRMLead.tenant_id == self.tenant_id,
+                models.CRMLead.created_at >= window_start,
+            )
+        ) or 0
+
+        status = func.lower(models.CRMDeal.status)
+        closed_rows = self.db.execute(
+            select(status, func.count(models.CRMDeal.id), func.sum(models.CRMDeal.value))
+            .where(
+                models.CRMDeal.tenant_id == self.tenant_id,
+                models.CRMDeal.updated_at >= window_start,
+                status.in_(["won", *LOST_STATUSES]),
+            )
+            .group_by(status)
+        ).all()
+        for deal_status, count, value in closed_rows:
+            if deal_status == "won":
+                result.won_deals_in_window = count
+                result.won_value_in_window = Decimal(value or 0)
+            else:
+                result.lost_deals_in_window += count
+
+        forecast = self.db.scalar(
+            select(func.sum(models.CRMDeal.value * models.CRMDeal.probability)).where(
+                models.CRMDeal.tenant_id == self.tenant_id,
+                models.CRMDeal.expected_close >= now.date(),
+                models.CRMDeal.expected_close <= (now + timedelta(days=30)).date(),
+            )
+        )
+        result.forecast_next_30_days = Decimal(str(forecast or 0)) / Decimal(100)
+
+        for row in self.db.scalars(
+            select(models.CRMMetricWorkflow).where(models.CRMMetricWorkflow.tenant_id == self.tenant_id)
+        ):
+            result.workflows[row.workflow_id] = WorkflowAggregate(
+                run_count=row.run_count,
+                failed_runs=row.failed_runs,
+                duration_minutes_sum=row.duration_minutes_sum,
+                duration_count=row.duration_count,
+                sla_breaches=row.sla_breaches,
+            )
+
+        for row in self.db.scalars(
+            select(models.CRMMetricSource).where(models.CRMMetricSource.tenant_id == self.tenant_id)
+        ):
+            result.sources[row.key] = SourceAggregate(
+                label=row.label,
+                dimension_type=row.dimension_type,
+                lead_count=row.lead_count,
+                deal_count=row.deal_count,
+                won_deal_count=row.won_deal_count,
+                pipeline_value=Decimal(row.pipeline_value or 0),
+                won_value=Decimal(row.won_value or 0),
+            )
+        return result
+
+    # Rebuild -------------------------------------------------------------
+    def rebuild(self) -> models.CRMMetricTenant:
+        """Recompute the tenant's store from its full history and flush it."""
+
+        self._lock_tenant()
+        for model in (
+            models.CRMMetricTenant,
+            models.CRMMetricStage,
+            models.CRMMetricSource,
+            models.CRMMetricWorkflow,
+        ):
+            self.db.execute(delete(model).where(model.tenant_id == self.tenant_id))
+        self.db.expire_all()
+
+        state = models.CRMMetricTenant(
+            tenant_id=self.tenant_id,
+            total_leads=0,
+            leads_with_deals=0,
+            total_deals=0,
+            open_deals=0,
+            closed_cycle_days_sum=0.0,
+            closed_cycle_count=0,
+            rebuilt_at=datetime.utcnow(),
+        )
+        sources: dict[str, dict[str, object]] = {}
+
+        def source_row(key: str, label: str, dimension_type: str) -> dict[str, object]:
+            return sources.setdefault(
+                key,
+                {
+                    "tenant_id": self.tenant_id,
+                    "key": key,
+                    "label": label,
+                    "dimension_type": dimension_type,
+                    "lead_count": 0,
+                    "deal_count": 0,
+                    "won_deal_count": 0,
+                    "pipeline_value": Decimal(0),
+                    "won_value": Decimal(0),
+                },
+            )
+
+        lead_rows = self.db.execute(
+            select(models.CRMLead.source, func.count(models.CRMLead.id))
+            .where(models.CRMLead.tenant_id == self.tenant_id)
+            .group_by(models.CRMLead.source)
+            # Sources differing only in case share a key; label it like the
+            # earliest lead, as the incremental path does.
+            .order_by(func.min(models.CRMLead.id))
+        )
+        for source, count in lead_rows:
+            state.total_leads += count
+            source_row(*lead_source_dimension(source))["lead_count"] += count
+
+        stages: dict[int, dict[str, object]] = {}
+        deal_rows = self.db.execute(
+            select(
+                models.CRMDeal.stage_id,
+                models.CRMDeal.value,
+                models.CRMDeal.probability,
+                models.CRMDeal.status,
+                models.CRMDeal.created_at,
+                models.CRMDeal.updated_at,
+                models.CRMLead.source,
+            )
+            .outerjoin(models.CRMLead, models.CRMLead.id == models.CRMDeal.lead_id)
+            .where(models.CRMDeal.tenant_id == self.tenant_id)
+            .execution_options(yield_per=1000)
+        )
+        for stage_id, raw_value, probability, raw_status, created_at, updated_at, lead_source in deal_rows:
+            value = Decimal(raw_value or 0)
+            status = (raw_status or "").lower()
+            state.total_deals += 1
+            if status == "won" or status in LOST_STATUSES:
+                if updated_at:
+                    state.closed_cycle_days_sum += _days(updated_at - created_at)
+                    state.closed_cycle_count += 1
+            else:
+                state.open_deals += 1
+
+            stage = stages.setdefault(
+                stage_id,
+                {
+                    "tenant_id": self.tenant_id,
+                    "stage_id": stage_id,
+                    "deal_count": 0,
+                    "total_value": Decimal(0),
+                    "weighted_value": Decimal(0),
+                    "created_epoch_sum": 0.0,
+                },
+            )
+            stage["deal_count"] += 1
+            stage["total_value"] += value
+            stage["weighted_value"] += _weighted(value, probability)
+            stage["created_epoch_sum"] += _epoch(created_at)
+
+            source = source_row(*deal_source_dimension(lead_source))
+            source["deal_count"] += 1
+            source["pipeline_value"] += value
+            if status == "won":
+                source["won_deal_count"] += 1
+                source["won_value"] += value
+
+        state.leads_with_deals = self.db.scalar(
+            select(func.count(distinct(models.CRMDeal.lead_id))).where(
+                models.CRMDeal.tenant_id == self.tenant_id,
+                models.CRMDeal.lead_id.is_not(None),
+            )
+        ) or 0
+
+        workflows: dict[str, dict[str, object]] = {}
+        run_rows = self.db.execute(
+            select(
+                models.CRMAutomationRun.workflow_id,
+                models.CRMAutomationRun.status,
+                models.CRMAutomationRun.created_at,
+                models.CRMAutomationRun.completed_at,
+            )
+            .where(models.CRMAutomationRun.tenant_id == self.tenant_id)
+            .execution_options(yield_per=1000)
+        )
+        for workflow_id, status, created_at, completed_at in run_rows:
+            workflow = workflows.setdefault(
+                workflow_id,
+                {
+                    "tenant_id": self.tenant_id,
+                    "workflow_id": workflow_id,
+                    "run_count": 0,
+                    "failed_runs": 0,
+                    "duration_minutes_sum": 0.0,
+                    "duration_count": 0,
+                    "sla_breaches": 0,
+                },
+            )
+            for column, delta in self._workflow_deltas(status, created_at, completed_at).items():
+                workflow[column] += delta
+
+        self.db.add(state)
+        for model, rows in (
+            (models.CRMMetricStage, stages),
+            (models.CRMMetricSource, sources),
+            (models.CRMMetricWorkflow, workflows),
+        ):
+            if rows:
+                self.db.execute(insert(model), list(rows.values()))
+        self.db.flush()
+        return state
+
+    # Internal helpers ----------------------------------------------------
+    def _lock_tenant(self) -> None:
+        """Hold the tenant's metrics lock until the transaction ends (PostgreSQL)."""
+
+        if self.db.get_bind().dialect.name != "postgresql":
+            return
+        digest = hashlib.blake2b(f"crm-metrics:{self.tenant_id}".encode(), digest_size=8).digest()
+        self.db.execute(
+            text("SELECT pg_advisory_xact_lock(:key)"),
+            {"key": int.from_bytes(digest, "big", signed=True)},
+        )
+
+    def _locked_is_built(self) -> bool:
+        self._lock_tenant()
+        return self.db.get(models.CRMMetricTenant, self.tenant_id) is not None
+
+    def _ensure_built(self) -> models.CRMMetricTenant:
+        state = self.db.get(models.CRMMetricTenant, self.tenant_id)
+        if state is not None:
+            return state
+        if self._locked_is_built():
+            # Built by a concurrent request while we waited for the lock.
+            return self.db.get(models.CRMMetricTenant, self.tenant_id)
+        try:
+            state = self.rebuild()
+            self.db.commit()
+        except IntegrityError:
+            # A concurrent request built the store first; use theirs.
+            self.db.rollback()
+            state = self.db.get(models.CRMMetricTenant, self.tenant_id)
+        return state
+
+    @staticmethod
+    def _workflow_deltas(
+        status: str | None, created_at: datetime, completed_at: datetime | None
+    ) -> dict[str, float]:
+        deltas: dict[str, float] = {"run_count": 1}
+        if (status or "").lower() == "failed":
+            deltas["failed_runs"] = 1
+        if completed_at:
+            duration = (completed_at - created_at).total_seconds() / 60.0
+            deltas["duration_minutes_sum"] = duration
+            deltas["duration_count"] = 1
+            if duration > AUTOMATION_SLA_MINUTES:
+                deltas["sla_breaches"] = 1
+        return deltas
+
+    def _bump_tenant(self, **deltas: float) -> None:
+        self.db.execute(
+            update(models.CRMMetricTenant)
+            .where(models.CRMMetricTenant.tenant_id == self.tenant_id)
+            .values(
+                updated_at=datetime.utcnow(),
+                **{
+                    column: getattr(models.CRMMetricTenant, column) + delta
+                    for column, delta in deltas.items()
+                },
+            )
+        )
+
+    def _bump_stage(self, stage_id: int, **deltas: object) -> None:
+        self._bump(
+            models.CRMMetricStage,
+            {"tenant_id": self.tenant_id, "stage_id": stage_id},
+            {},
+            **deltas,
+        )
+
+    def _bump_source(self, key: str, label: str, dimension_type: str, **deltas: object) -> None:
+        self._bump(
+            models.CRMMetricSource,
+            {"tenant_id": self.tenant_id, "key": key},
+            {"label": label, "dimension_type": dimension_type},
+            **deltas,
+        )
+
+    def _bump(self, model, keys: dict[str, object], defaults: dict[str, object], **deltas: object) -> None:
+        """Add ``deltas`` to the row identified by ``keys``, creating it if needed.
+
+        Increments are applied in SQL so concurrent writers cannot lose each
+        other's updates.
+        """
+
+        statement = (
+            update(model)
+            .where(*(getattr(model, column) == value for column, value in keys.items()))
+            .values({column: getattr(model, column) + delta for column, delta in deltas.items()})
+            .execution_options(synchronize_session=False)
+        )
+        if self.db.execute(statement).rowcount:
+            return
+        try:
+            with self.db.begin_nested():
+                self.db.execute(insert(model).values(**keys, **defaults, **deltas))
+        except IntegrityError:
+            self.db.execute(statement)
+
+
+__all__ = [
+    "AUTOMATION_SLA_MINUTES",
+    "AcquisitionAggregate",
+    "AcquisitionSourceAggregate",
+    "CRMMetricsStore",
+    "DashboardAggregates",
+    "LOST_STATUSES",
+    "SourceAggregate",
+    "StageAggregate",
+    "WorkflowAggregate",
+    "acquisition_source_dimension",
+    "deal_source_dimension",
+    "lead_source_dimension",
+]
@@ -9,6 +9,7 @@ from sqlalchemy import (
     CheckConstraint,
     Date,
     DateTime,
+    Float,
     ForeignKey,
     Index,
     Integer,
@@ -42,6 +43,8 @@ class CRMLead(Base):
 
     deals: Mapped[list["CRMDeal"]] = relationship(back_populates="lead", cascade="all, delete-orphan")
 
+    __table_args__ = (Index("ix_crm_leads_tenant_created", "tenant_id", "created_at"),)
+
 
 class CRMPipeline(Base):
     __tablename__ = "crm_pipelines"
@@ -105,6 +108,8 @@ class CRMDeal(Base):
 
     __table_args__ = (
         CheckConstraint("probability BETWEEN 0 AND 100", name="ck_deal_probability"),
+        Index("ix_crm_deals_tenant_updated", "tenant_id", "updated_at"),
+        Index("ix_crm_deals_tenant_expected_close", "tenant_id", "expected_close"),
     )
 
 
@@ -180,3 +185,85 @@ class CRMAcquisitionMetric(Base):
         ),
         Index("ix_crm_acquisition_metrics_tenant_date", "tenant_id", "captured_date"),
     )
+
+
+class CRMMetricTenant(Base):
+    """Materialized dashboard totals for one tenant.
+
+    The row doubles as the marker that the tenant's metric store has been
+    built; see :class:`app.modules.crm.metrics_store.CRMMetricsStore`.
+    """
+
+    __tablename__ = "crm_metric_tenants"
+
+    tenant_id: Mapped[str] = mapped_column(String(100), primary_key=True)
+    total_leads: Mapped[int] = mapped_column(Integer, default=0)
+    leads_with_deals: Mapped[int] = mapped_column(Integer, default=0)
+    total_deals: Mapped[int] = mapped_column(Integer, default=0)
+    open_deals: Mapped[int] = mapped_column(Integer, default=0)
+    closed_cycle_days_sum: Mapped[float] = mapped_column(Float, default=0.0)
+    closed_cycle_count: Mapped[int] = mapped_column(Integer, default=0)
+    rebuilt_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=datetime.utcnow, nullable=False
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False
+    )
+
+
+class CRMMetricStage(Base):
+    """Materialized deal count and value per pipeline stage."""
+
+    __tablename__ = "crm_metric_stages"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    tenant_id: Mapped[str] = mapped_column(String(100))
+    stage_id: Mapped[int] = mapped_column(ForeignKey("crm_pipeline_stages.id", ondelete="CASCADE"))
+    deal_count: Mapped[int] = mapped_column(Integer, default=0)
+    total_value: Mapped[Numeric] = mapped_column(Numeric(16, 2), default=0)
+    weighted_value: Mapped[Numeric] = mapped_column(Numeric(18, 4), default=0)
+    created_epoch_sum: Mapped[float] = mapped_column(Float, default=0.0)
+
+    __table_args__ = (
+        UniqueConstraint("tenant_id", "stage_id", name="uq_metric_stage_tenant_stage"),
+    )
+
+
+class CRMMetricSource(Base):
+    """Materialized lead and deal totals per normalised lead source."""
+
+    __tablename__ = "crm_metric_sources"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    tenant_id: Mapped[str] = mapped_column(String(100))
+    key: Mapped[str] = mapped_column(String(120))
+    label: Mapped[str] = mapped_column(String(120))
+    dimension_type: Mapped[str] = mapped_column(String(30), default="lead_source")
+    lead_count: Mapped[int] = mapped_column(Integer, default=0)
+    deal_count: Mapped[int] = mapped_column(Integer, default=0)
+    won_deal_count: Mapped[int] = mapped_column(Integer, default=0)
+    pipeline_value: Mapped[Numeric] = mapped_column(Numeric(16, 2), default=0)
+    won_value: Mapped[Numeric] = mapped_column(Numeric(16, 2), default=0)
+
+    __table_args__ = (
+        UniqueConstraint("tenant_id", "key", name="uq_metric_source_tenant_key"),
+    )
+
+
+class CRMMetricWorkflow(Base):
+    """Materialized automation run statistics per workflow."""
+
+    __tablename__ = "crm_metric_workflows"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    tenant_id: Mapped[str] = mapped_column(String(100))
+    workflow_id: Mapped[str] = mapped_column(String(120))
+    run_count: Mapped[int] = mapped_column(Integer, default=0)
+    failed_runs: Mapped[int] = mapped_column(Integer, default=0)
+    duration_minutes_sum: Mapped[float] = mapped_column(Float, default=0.0)
+    duration_count: Mapped[int] = mapped_column(Integer, default=0)
+    sla_breaches: Mapped[int] = mapped_column(Integer, default=0)
+
+    __table_args__ = (
+        UniqueConstraint("tenant_id", "workflow_id", name="uq_metric_workflow_tenant_workflow"),
+    )
@@ -15,6 +15,21 @@ from app.core.config import settings
 from app.core.errors import AppError
 
 from . import models
+from .metrics_store import (
+    AUTOMATION_SLA_MINUTES,
+    LOST_STATUSES,
+    AcquisitionAggregate,
+    AcquisitionSourceAggregate,
+    CRMMetricsStore,
+    DashboardAggregates,
+    SourceAggregate,
+    StageAggregate,
+    WorkflowAggregate,
+    acquisition_source_dimension,
+    deal_source_dimension,
+    lead_source_dimension,
+)
+from .sql_metrics import sql_dashboard_aggregates
 from .schemas import (
     ActivityCreate,
     DealCreate,
@@ -45,6 +60,7 @@ class CRMService:
     def __init__(self, db: Session, tenant_id: str) -> None:
         self.db = db
         self.tenant_id = tenant_id
+        self.metrics = CRMMetricsStore(db, tenant_id)
 
     # Lead operations -----------------------------------------------------
     def list_leads(self) -> list[models.CRMLead]:
@@ -58,6 +74,7 @@ class CRMService:
     def create_lead(self, payload: LeadCreate) -> models.CRMLead:
         lead = models.CRMLead(tenant_id=self.tenant_id, **payload.model_dump())
         self.db.add(lead)
+        self.metrics.record_lead(lead)
         self.db.commit()
         self.db.refresh(lead)
         return lead
@@ -73,6 +90,7 @@ class CRMService:
         )
         lead = models.CRMLead(tenant_id=self.tenant_id, **lead_payload.model_dump())
         self.db.add(lead)
+        self.metrics.record_lead(lead)
         self.db.commit()
         self.db.refresh(lead)
 
@@ -114,6 +132,8 @@ class CRMService:
         if stage.pipeline_id != payload.pipeline_id:
             raise AppError("invalid_stage", "Stage does not belong to the specified pipeline")
         self.db.add(deal)
+        self.db.flush()
+        self.metrics.record_deal(deal)
         self.db.commit()
         self.db.refresh(deal)
         return deal
@@ -123,6 +143,8 @@ class CRMService:
         stage = self._stage_for_tenant(stage_id)
         if stage.pipeline_id != deal.pipeline_id:
             raise AppError("invalid_stage", "Stage does not belong to the deal pipeline")
+        previous_stage_id = deal.stage_id
+        previous_updated_at = deal.updated_at
         deal.stage_id = stage_id
         deal.updated_at = datetime.utcnow()
 
@@ -167,6 +189,13 @@ class CRMService:
                 completed_at=completed_at,
             )
             self.db.add(run_log)
+            self.db.flush()
+            self.metrics.record_automation_run(run_log)
+        self.metrics.record_stage_change(
+            deal,
+            previous_stage_id=previous_stage_id,
+            previous_updated_at=previous_updated_at,
+        )
         self.db.commit()
         self.db.refresh(deal)
         return deal, automation
@@ -220,38 +249,49 @@ class CRMService:
 
         now = datetime.utcnow()
         window_start = now - timedelta(days=active_lookback)
+
+        backend = getattr(settings, "CRM_DASHBOARD_BACKEND", "materialized")
+        if backend == "python":
+            aggregates = self._python_aggregates(now, window_start)
+        elif backend == "sql":
+            aggregates = sql_dashboard_aggregates(self.db, self.tenant_id, now, window_start)
+        else:
+            aggregates = CRMMetricsStore(self.db, self.tenant_id).aggregates(now, window_start)
+            aggregates.acquisition = self._python_acquisition(now, window_start)
+        return self._summarize(aggregates, now, active_lookback)
+
+    def _python_aggregates(self, now: datetime, window_start: datetime) -> DashboardAggregates:
+        """Compute the dashboard figures by loading the tenant's full history.
+
+        Kept as the reference implementation for the materialized and SQL backends.
+        """
+
         forecast_end = now + timedelta(days=30)
+        result = DashboardAggregates()
 
-        lead_query = (
+        leads = (
             self.db.query(models.CRMLead)
             .filter(models.CRMLead.tenant_id == self.tenant_id)
+            .order_by(models.CRMLead.id)
+            .all()
         )
-        leads = lead_query.all()
-        total_leads = len(leads)
-        leads_last_30 = sum(1 for lead in leads if lead.created_at >= window_start)
+        result.total_leads = len(leads)
+        result.leads_in_window = sum(1 for lead in leads if lead.created_at >= window_start)
         converted_lead_ids: set[int] = set()
 
         deals = (
             self.db.query(models.CRMDeal)
             .filter(models.CRMDeal.tenant_id == self.tenant_id)
+            .order_by(models.CRMDeal.id)
             .all()
         )
-
-        total_pipeline_value = Decimal(0)
-        weighted_pipeline_value = Decimal(0)
-        won_value_last_30 = Decimal(0)
-        cycle_lengths: list[float] = []
-        open_deals = 0
-        won_deals_last_30 = 0
-        lost_deals_last_30 = 0
-        total_deals = len(deals)
-        forecast_next_30 = Decimal(0)
+        result.total_deals = len(deals)
 
         for deal in deals:
             value = Decimal(deal.value or 0)
             probability = Decimal(deal.probability or 0)
-            total_pipeline_value += value
-            weighted_pipeline_value += (value * probability) / Decimal(100)
+            result.total_pipeline_value += value
+            result.weighted_pipeline_value += (value * probability) / Decimal(100)
 
             if deal.lead_id is not None:
                 converted_lead_ids.add(deal.lead_id)
@@ -260,26 +300,29 @@ class CRMService:
             if status == "won":
                 if deal.updated_at:
                     if deal.updated_at >= window_start:
-                        won_value_last_30 += value
-                        won_deals_last_30 += 1
-                    cycle_lengths.append(
+                        result.won_value_in_window += value
+                        result.won_deals_in_window += 1
+                    result.closed_cycle_days_sum += (
                         (deal.updated_at - deal.created_at).total_seconds() / 86400.0
                     )
-            elif status in {"lost", "closed_lost"}:
+                    result.closed_cycle_count += 1
+            elif status in LOST_STATUSES:
                 if deal.updated_at and deal.updated_at >= window_start:
-                    lost_deals_last_30 += 1
+                    result.lost_deals_in_window += 1
                 if deal.updated_at:
-                    cycle_lengths.append(
+                    result.closed_cycle_days_sum += (
                         (deal.updated_at - deal.created_at).total_seconds() / 86400.0
                     )
+                    result.closed_cycle_count += 1
             else:
-                open_deals += 1
+                result.open_deals += 1
 
             if (
                 deal.expected_close
                 and now.date() <= deal.expected_close <= forecast_end.date()
             ):
-                forecast_next_30 += (value * probability) / Decimal(100)
+                result.forecast_next_30_days += (value * probability) / Decimal(100)
+        result.leads_with_deals = len(converted_lead_ids)
 
         stage_rows = (
             self.db.query(
@@ -291,71 +334,144 @@ class CRMService:
             .filter(models.CRMPipeline.tenant_id == self.tenant_id)
             .all()
         )
-        stage_index = {row.id: {"name": row.name, "order": row.order} for row in stage_rows}
 
         deals_by_stage: dict[int, list[models.CRMDeal]] = defaultdict(list)
         for deal in deals:
             deals_by_stage[deal.stage_id].append(deal)
 
-        pipeline_metrics: list[dict[str, object]] = []
-        for stage_id, info in sorted(stage_index.items(), key=lambda item: item[1]["order"]):
-            stage_deals = deals_by_stage.get(stage_id, [])
-            total_value = sum((Decimal(d.value or 0) for d in stage_deals), Decimal(0))
-            weighted_value = sum(
-                (Decimal(d.value or 0) * Decimal(d.probability or 0) / Decimal(100))
-                for d in stage_deals
-            )
+        for row in sorted(stage_rows, key=lambda item: item.order):
+            stage_deals = deals_by_stage.get(row.id, [])
             avg_age_days = None
             if stage_deals:
                 avg_age_days = sum(
                     (now - d.created_at).total_seconds() / 86400.0 for d in stage_deals
                 ) / len(stage_deals)
-
-            pipeline_metrics.append(
-                {
-                    "stage_id": stage_id,
-                    "stage_name": info["name"],
-                    "deal_count": len(stage_deals),
-                    "total_value": float(total_value),
-                    "weighted_value": float(weighted_value),
-                    "avg_age_days": round(avg_age_days, 2) if avg_age_days is not None else None,
-                }
+            result.stages.append(
+                StageAggregate(
+                    stage_id=row.id,
+                    stage_name=row.name,
+                    order=row.order,
+                    deal_count=len(stage_deals),
+                    total_value=sum((Decimal(d.value or 0) for d in stage_deals), Decimal(0)),
+                    weighted_value=sum(
+                        (
+                            Decimal(d.value or 0) * Decimal(d.probability or 0) / Decimal(100)
+                            for d in stage_deals
+                        ),
+                        Decimal(0),
+                    ),
+                    avg_age_days=avg_age_days,
+                )
             )
 
-        sla_minutes = 10
         automation_runs = (
             self.db.query(models.CRMAutomationRun)
             .filter(models.CRMAutomationRun.tenant_id == self.tenant_id)
             .all()
         )
-        runs_by_workflow: dict[str, dict[str, object]] = defaultdict(
-            lambda: {"run_count": 0, "failed_runs": 0, "durations": [], "sla_breaches": 0}
-        )
         for run in automation_runs:
-            workflow_metrics = runs_by_workflow[run.workflow_id]
-            workflow_metrics["run_count"] += 1
-            status = (run.status or "").lower()
-            if status == "failed":
-                workflow_metrics["failed_runs"] += 1
+            workflow = result.workflows.setdefault(run.workflow_id, WorkflowAggregate())
+            workflow.run_count += 1
+            if (run.status or "").lower() == "failed":
+                workflow.failed_runs += 1
             if run.completed_at:
                 duration = (run.completed_at - run.created_at).total_seconds() / 60.0
-                workflow_metrics["durations"].append(duration)
-                if duration > sla_minutes:
-                    workflow_metrics["sla_breaches"] += 1
+                workflow.duration_minutes_sum += duration
+                workflow.duration_count += 1
+                if duration > AUTOMATION_SLA_MINUTES:
+                    workflow.sla_breaches += 1
+
+        for lead in leads:
+            key, label, dimension_type = lead_source_dimension(lead.source)
+            source = result.sources.setdefault(key, SourceAggregate(label, dimension_type))
+            source.lead_count += 1
+
+        # Resolve lead sources from the leads loaded above rather than the lazy
+        # ``deal.lead`` relationship, which issued one query per deal.
+        lead_sources = {lead.id: lead.source for lead in leads}
+        for deal in deals:
+            lead_source = None
+            if deal.lead_id is not None:
+                if deal.lead_id in lead_sources:
+                    lead_source = lead_sources[deal.lead_id]
+                elif deal.lead is not None:
+                    lead_source = deal.lead.source
+            key, label, dimension_type = deal_source_dimension(lead_source)
+            source = result.sources.setdefault(key, SourceAggregate(label, dimension_type))
+            deal_value = Decimal(deal.value or 0)
+            source.deal_count += 1
+            source.pipeline_value += deal_value
+            if (deal.status or "").lower() == "won":
+                source.won_deal_count += 1
+                source.won_value += deal_value
+
+        result.acquisition = self._python_acquisition(now, window_start)
+        return result
+
+    def _python_acquisition(self, now: datetime, window_start: datetime) -> AcquisitionAggregate:
+        acquisition_rows = (
+            self.db.query(models.CRMAcquisitionMetric)
+            .filter(
+                models.CRMAcquisitionMetric.tenant_id == self.tenant_id,
+                models.CRMAcquisitionMetric.captured_date >= window_start.date(),
+                models.CRMAcquisitionMetric.captured_date <= now.date(),
+            )
+            .order_by(models.CRMAcquisitionMetric.id)
+            .all()
+        )
+
+        result = AcquisitionAggregate(
+            sessions=sum(row.sessions or 0 for row in acquisition_rows),
+            new_users=sum(row.new_users or 0 for row in acquisition_rows),
+            engaged_sessions=sum(row.engaged_sessions or 0 for row in acquisition_rows),
+            ga_conversions=sum(row.ga_conversions or 0 for row in acquisition_rows),
+            ga_conversion_value=sum(
+                (Decimal(row.ga_conversion_value or 0) for row in acquisition_rows), Decimal(0)
+            ),
+            gtm_conversions=sum(row.gtm_conversions or 0 for row in acquisition_rows),
+            gtm_conversion_value=sum(
+                (Decimal(row.gtm_conversion_value or 0) for row in acquisition_rows), Decimal(0)
+            ),
+        )
+        for row in acquisition_rows:
+            key, label, dimension_type = acquisition_source_dimension(row.source, row.channel)
+            source = result.sources.setdefault(key, AcquisitionSourceAggregate(label, dimension_type))
+            source.sessions += row.sessions or 0
+            source.ga_conversions += row.ga_conversions or 0
+            source.gtm_conversions += row.gtm_conversions or 0
+            source.ga_revenue += Decimal(row.ga_conversion_value or 0)
+            source.gtm_revenue += Decimal(row.gtm_conversion_value or 0)
+        return result
+
+    def _summarize(
+        self,
+        aggregates: DashboardAggregates,
+        now: datetime,
+        active_lookback: int,
+    ) -> dict[str, object]:
+        pipeline_metrics: list[dict[str, object]] = [
+            {
+                "stage_id": stage.stage_id,
+                "stage_name": stage.stage_name,
+                "deal_count": stage.deal_count,
+                "total_value": float(stage.total_value),
+                "weighted_value": float(stage.weighted_value),
+                "avg_age_days": round(stage.avg_age_days, 2) if stage.avg_age_days is not None else None,
+            }
+            for stage in aggregates.stages
+        ]
 
         automation_metrics: list[dict[str, object]] = []
         total_run_count = 0
         total_failed_runs = 0
-        for workflow_id in sorted(runs_by_workflow.keys()):
-            metrics = runs_by_workflow[workflow_id]
-            run_count = int(metrics["run_count"])
-            failed_runs = int(metrics["failed_runs"])
-            durations = metrics["durations"]
-            sla_breaches = int(metrics["sla_breaches"])
+        for workflow_id in sorted(aggregates.workflows.keys()):
+            workflow = aggregates.workflows[workflow_id]
+            run_count = workflow.run_count
+            failed_runs = workflow.failed_runs
 
             avg_completion = None
-            if durations:
-                avg_completion = sum(durations) / len(durations)
+            if workflow.duration_count:
+                avg_completion = workflow.duration_minutes_sum / workflow.duration_count
 
             failure_rate = failed_runs / run_count if run_count else 0.0
             automation_metrics.append(
@@ -364,7 +480,7 @@ class CRMService:
                     "run_count": run_count,
                     "failed_runs": failed_runs,
                     "avg_completion_minutes": round(avg_completion, 2) if avg_completion is not None else None,
-                    "sla_breaches": sla_breaches,
+                    "sla_breaches": workflow.sla_breaches,
                     "failure_rate": round(failure_rate, 4),
                 }
             )
@@ -372,27 +488,16 @@ class CRMService:
             total_failed_runs += failed_runs
 
         overall_failure_rate = total_failed_runs / total_run_count if total_run_count else 0.0
-        avg_cycle_days = sum(cycle_lengths) / len(cycle_lengths) if cycle_lengths else None
-
-        acquisition_rows = (
-            self.db.query(models.CRMAcquisitionMetric)
-            .filter(
-                models.CRMAcquisitionMetric.tenant_id == self.tenant_id,
-                models.CRMAcquisitionMetric.captured_date >= window_start.date(),
-                models.CRMAcquisitionMetric.captured_date <= now.date(),
-            )
-            .all()
+        avg_cycle_days = (
+            aggregates.closed_cycle_days_sum / aggregates.closed_cycle_count
+            if aggregates.closed_cycle_count
+            else None
         )
 
-        total_ga_sessions = sum(row.sessions or 0 for row in acquisition_rows)
-        total_ga_new_users = sum(row.new_users or 0 for row in acquisition_rows)
-        total_ga_engaged = sum(row.engaged_sessions or 0 for row in acquisition_rows)
-        total_ga_conversions = sum(row.ga_conversions or 0 for row in acquisition_rows)
-        total_ga_value = sum(Decimal(row.ga_conversion_value or 0) for row in acquisition_rows)
-        total_gtm_conversions = sum(row.gtm_conversions or 0 for row in acquisition_rows)
-        total_gtm_value = sum(
-            Decimal(row.gtm_conversion_value or 0) for row in acquisition_rows
-        )
+        acquisition = aggregates.acquisition
+        total_ga_sessions = acquisition.sessions
+        total_ga_conversions = acquisition.ga_conversions
+        total_gtm_conversions = acquisition.gtm_conversions
         blended_conversion_rate = (
             (total_ga_conversions + total_gtm_conversions) / total_ga_sessions
             if total_ga_sessions
@@ -410,34 +515,38 @@ class CRMService:
         acquisition_metrics = {
             "lookback_days": active_lookback,
             "ga_sessions": total_ga_sessions,
-            "ga_new_users": total_ga_new_users,
-            "ga_engaged_sessions": total_ga_engaged,
+            "ga_new_users": acquisition.new_users,
+            "ga_engaged_sessions": acquisition.engaged_sessions,
             "ga_conversions": total_ga_conversions,
-            "ga_conversion_value": float(total_ga_value),
+            "ga_conversion_value": float(acquisition.ga_conversion_value),
             "gtm_conversions": total_gtm_conversions,
-            "gtm_conversion_value": float(total_gtm_value),
+            "gtm_conversion_value": float(acquisition.gtm_conversion_value),
             "blended_conversion_rate": round(blended_conversion_rate, 4),
             "active_connectors": active_connectors,
         }
 
-        closed_last_30 = won_deals_last_30 + lost_deals_last_30
+        won_deals_last_30 = aggregates.won_deals_in_window
+        closed_last_30 = won_deals_last_30 + aggregates.lost_deals_in_window
         win_rate = won_deals_last_30 / closed_last_30 if closed_last_30 else 0.0
+        total_deals = aggregates.total_deals
         avg_deal_value = (
-            (total_pipeline_value / Decimal(total_deals)) if total_deals else None
+            (aggregates.total_pipeline_value / Decimal(total_deals)) if total_deals else None
         )
         pipeline_velocity = (
-            (won_value_last_30 / Decimal(active_lookback)) if active_lookback else Decimal(0)
+            (aggregates.won_value_in_window / Decimal(active_lookback))
+            if active_lookback
+            else Decimal(0)
         )
 
         sales_metrics = {
-            "open_deals": open_deals,
+            "open_deals": aggregates.open_deals,
             "won_deals_last_30_days": won_deals_last_30,
-            "lost_deals_last_30_days": lost_deals_last_30,
+            "lost_deals_last_30_days": aggregates.lost_deals_in_window,
             "total_deals": total_deals,
             "bookings_last_30_days": won_deals_last_30,
             "win_rate": round(win_rate, 4),
             "avg_deal_value": float(avg_deal_value) if avg_deal_value is not None else None,
-            "forecast_next_30_days": float(forecast_next_30),
+            "forecast_next_30_days": float(aggregates.forecast_next_30_days),
             "pipeline_velocity_per_day": round(float(pipeline_velocity), 2),
         }
 
@@ -459,45 +568,25 @@ class CRMService:
         source_labels: dict[str, str] = {}
         source_types: dict[str, str] = {}
 
-        for lead in leads:
-            key = (lead.source or "Direct/Other").strip().lower()
+        for key, source in aggregates.sources.items():
             metrics = source_metrics[key]
-            metrics["lead_count"] += 1
-            source_labels.setdefault(key, lead.source or "Direct/Other")
-            source_types.setdefault(key, "lead_source")
-
-        for deal in deals:
-            lead_source = (deal.lead.source if deal.lead and deal.lead.source else None)
-            if lead_source:
-                key = lead_source.strip().lower()
-                label = lead_source
-                dimension_type = "lead_source"
-            else:
-                key = "pipeline"
-                label = "Pipeline"
-                dimension_type = "internal"
+            metrics["lead_count"] = source.lead_count
+            metrics["deal_count"] = source.deal_count
+            metrics["won_deal_count"] = source.won_deal_count
+            metrics["pipeline_value"] = source.pipeline_value
+            metrics["won_value"] = source.won_value
+            source_labels[key] = source.label
+            source_types[key] = source.dimension_type
+
+        for key, source in acquisition.sources.items():
             metrics = source_metrics[key]
-            deal_value = Decimal(deal.value or 0)
-            metrics["deal_count"] += 1
-            metrics["pipeline_value"] += deal_value
-            if (deal.status or "").lower() == "won":
-                metrics["won_deal_count"] += 1
-                metrics["won_value"] += deal_value
-            source_labels.setdefault(key, label)
-            source_types.setdefault(key, dimension_type)
-
-        for row in acquisition_rows:
-            key_source = (row.source or row.channel or "ga/other").strip().lower()
-            label = row.source or row.channel or "GA Other"
-            dimension_type = "ga_source" if row.source else "ga_channel"
-            metrics = source_metrics[key_source]
-            metrics["ga_sessions"] += row.sessions or 0
-            metrics["ga_conversions"] += row.ga_conversions or 0
-            metrics["gtm_conversions"] += row.gtm_conversions or 0
-            metrics["ga_revenue"] += Decimal(row.ga_conversion_value or 0)
-            metrics["gtm_revenue"] += Decimal(row.gtm_conversion_value or 0)
-            source_labels.setdefault(key_source, label)
-            source_types.setdefault(key_source, dimension_type)
+            metrics["ga_sessions"] += source.sessions
+            metrics["ga_conversions"] += source.ga_conversions
+            metrics["gtm_conversions"] += source.gtm_conversions
+            metrics["ga_revenue"] += source.ga_revenue
+            metrics["gtm_revenue"] += source.gtm_revenue
+            source_labels.setdefault(key, source.label)
+            source_types.setdefault(key, source.dimension_type)
 
         source_performance: list[dict[str, object]] = []
         for key, metrics in source_metrics.items():
@@ -529,19 +618,20 @@ class CRMService:
         source_performance.sort(key=lambda row: row["label"].lower())
 
         headline = {
-            "total_pipeline_value": float(total_pipeline_value),
-            "weighted_pipeline_value": float(weighted_pipeline_value),
-            "won_value_last_30_days": float(won_value_last_30),
+            "total_pipeline_value": float(aggregates.total_pipeline_value),
+            "weighted_pipeline_value": float(aggregates.weighted_pipeline_value),
+            "won_value_last_30_days": float(aggregates.won_value_in_window),
             "avg_deal_cycle_days": round(avg_cycle_days, 2) if avg_cycle_days is not None else None,
             "automation_failure_rate": round(overall_failure_rate, 4),
             "active_workflows": len(automation_metrics),
         }
 
+        total_leads = aggregates.total_leads
         lead_funnel = {
             "total_leads": total_leads,
-            "leads_last_30_days": leads_last_30,
-            "leads_with_deals": len(converted_lead_ids),
-            "conversion_rate": round(len(converted_lead_ids) / total_leads, 4) if total_leads else 0.0,
+            "leads_last_30_days": aggregates.leads_in_window,
+            "leads_with_deals": aggregates.leads_with_deals,
+            "conversion_rate": round(aggregates.leads_with_deals / total_leads, 4) if total_leads else 0.0,
         }
 
         provenance = {
@@ -0,0 +1,259 @@
+"""Compute CRM dashboard figures with grouped SQL aggregates.
+
+Selected with ``CRM_DASHBOARD_BACKEND=sql``. Every figure is reduced inside the
+database: one row of deal totals (won/lost/open splits via ``CASE``, ``AVG`` of
+the cycle length), one row per stage, workflow, lead source and acquisition
+source. No lead, deal or automation run is materialized as an ORM object, so
+memory stays flat however long the tenant's history is. The results match
+:meth:`CRMService._python_aggregates`, which the parity tests compare against.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from sqlalchemy import and_, case, distinct, func, literal, literal_column, or_, select
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.elements import ColumnElement
+from sqlalchemy.types import DateTime
+
+from . import models
+from .metrics_store import (
+    AUTOMATION_SLA_MINUTES,
+    LOST_STATUSES,
+    AcquisitionSourceAggregate,
+    DashboardAggregates,
+    SourceAggregate,
+    StageAggregate,
+    WorkflowAggregate,
+    acquisition_source_dimension,
+    deal_source_dimension,
+    lead_source_dimension,
+)
+
+
+def _elapsed_seconds(db: Session, start: ColumnElement, end: ColumnElement) -> ColumnElement:
+    """Return ``end - start`` in seconds for the session's dialect."""
+
+    dialect = db.get_bind().dialect.name
+    if dialect == "sqlite":
+        # julianday() is only accurate to tens of microseconds; round to whole
+        # milliseconds so exact durations such as the SLA limit compare equal.
+        return func.round((func.julianday(end) - func.julianday(start)) * 86400000.0) / 1000.0
+    if dialect == "postgresql":
+        return func.extract("epoch", end - start)
+    return func.timestampdiff(literal_column("MICROSECOND"), start, end) / 1e6
+
+
+def _decimal(value: object) -> Decimal:
+    if value is None:
+        return Decimal(0)
+    return value if isinstance(value, Decimal) else Decimal(str(value))
+
+
+def _count_if(condition: ColumnElement) -> ColumnElement:
+    return func.coalesce(func.sum(case((condition, 1), else_=0)), 0)
+
+
+def sql_dashboard_aggregates(
+    db: Session, tenant_id: str, now: datetime, window_start: datetime
+) -> DashboardAggregates:
+    result = DashboardAggregates()
+    deal = models.CRMDeal
+    now_value = literal(now, DateTime())
+    status = func.lower(deal.status)
+    is_won = status == "won"
+    is_closed = or_(is_won, status.in_(LOST_STATUSES))
+    in_window = deal.updated_at >= window_start
+    forecast_window = and_(
+        deal.expected_close >= now.date(),
+        deal.expected_close <= (now + timedelta(days=30)).date(),
+    )
+    weighted = deal.value * deal.probability
+
+    totals = db.execute(
+        select(
+            func.count(deal.id),
+            func.sum(deal.value),
+            func.sum(weighted),
+            _count_if(~is_closed),
+            _count_if(and_(is_won, in_window)),
+            func.sum(case((and_(is_won, in_window), deal.value))),
+            _count_if(and_(status.in_(LOST_STATUSES), in_window)),
+            func.count(case((is_closed, deal.id))),
+            func.avg(case((is_closed, _elapsed_seconds(db, deal.created_at, deal.updated_at)))),
+            func.sum(case((forecast_window, weighted))),
+            func.count(distinct(deal.lead_id)),
+        ).where(deal.tenant_id == tenant_id)
+    ).one()
+    (
+        result.total_deals,
+        total_value,
+        weighted_value,
+        result.open_deals,
+        result.won_deals_in_window,
+        won_value,
+        result.lost_deals_in_window,
+        result.closed_cycle_count,
+        avg_cycle_seconds,
+        forecast,
+        result.leads_with_deals,
+    ) = totals
+    result.total_pipeline_value = _decimal(total_value)
+    result.weighted_pipeline_value = _decimal(weighted_value) / Decimal(100)
+    result.won_value_in_window = _decimal(won_value)
+    result.closed_cycle_days_sum = float(avg_cycle_seconds or 0.0) / 86400.0 * result.closed_cycle_count
+    result.forecast_next_30_days = _decimal(forecast) / Decimal(100)
+
+    result.total_leads, result.leads_in_window = db.execute(
+        select(
+            func.count(models.CRMLead.id),
+            _count_if(models.CRMLead.created_at >= window_start),
+        ).where(models.CRMLead.tenant_id == tenant_id)
+    ).one()
+
+    stage_totals = {
+        row.stage_id: row
+        for row in db.execute(
+            select(
+                deal.stage_id,
+                func.count(deal.id).label("deal_count"),
+                func.sum(deal.value).label("total_value"),
+                func.sum(weighted).label("weighted_value"),
+                func.avg(_elapsed_seconds(db, deal.created_at, now_value)).label("avg_age_seconds"),
+            )
+            .where(deal.tenant_id == tenant_id)
+            .group_by(deal.stage_id)
+        )
+    }
+    stage_rows = db.execute(
+        select(
+            models.CRMPipelineStage.id,
+            models.CRMPipelineStage.name,
+            models.CRMPipelineStage.order,
+        )
+        .join(models.CRMPipeline, models.CRMPipeline.id == models.CRMPipelineStage.pipeline_id)
+        .where(models.CRMPipeline.tenant_id == tenant_id)
+        .order_by(models.CRMPipelineStage.order)
+    )
+    for stage_id, name, order in stage_rows:
+        stage = StageAggregate(stage_id=stage_id, stage_name=name, order=order)
+        totals_row = stage_totals.get(stage_id)
+        if totals_row is not None:
+            stage.deal_count = totals_row.deal_count
+            stage.total_value = _decimal(totals_row.total_value)
+            stage.weighted_value = _decimal(totals_row.weighted_value) / Decimal(100)
+            stage.avg_age_days = float(totals_row.avg_age_seconds) / 86400.0
+        result.stages.append(stage)
+
+    run = models.CRMAutomationRun
+    duration_seconds = _elapsed_seconds(db, run.created_at, run.completed_at)
+    workflow_rows = db.execute(
+        select(
+            run.workflow_id,
+            func.count(run.id),
+            _count_if(func.lower(run.status) == "failed"),
+            func.sum(duration_seconds),
+            func.count(run.completed_at),
+            _count_if(duration_seconds > AUTOMATION_SLA_MINUTES * 60),
+        )
+        .where(run.tenant_id == tenant_id)
+        .group_by(run.workflow_id)
+    )
+    for workflow_id, run_count, failed_runs, duration_sum, duration_count, sla_breaches in workflow_rows:
+        result.workflows[workflow_id] = WorkflowAggregate(
+            run_count=run_count,
+            failed_runs=failed_runs,
+            duration_minutes_sum=float(duration_sum or 0.0) / 60.0,
+            duration_count=duration_count,
+            sla_breaches=sla_breaches,
+        )
+
+    # Raw source spellings are grouped separately and folded together by
+    # normalised key in first-seen order, so labels match the Python path.
+    lead_sources = db.execute(
+        select(models.CRMLead.source, func.count(models.CRMLead.id))
+        .where(models.CRMLead.tenant_id == tenant_id)
+        .group_by(models.CRMLead.source)
+        .order_by(func.min(models.CRMLead.id))
+    )
+    for source, lead_count in lead_sources:
+        key, label, dimension_type = lead_source_dimension(source)
+        result.sources.setdefault(key, SourceAggregate(label, dimension_type)).lead_count += lead_count
+
+    deal_sources = db.execute(
+        select(
+            models.CRMLead.source,
+            func.count(deal.id),
+            func.sum(deal.value),
+            _count_if(is_won),
+            func.sum(case((is_won, deal.value))),
+        )
+        .select_from(deal)
+        .outerjoin(models.CRMLead, models.CRMLead.id == deal.lead_id)
+        .where(deal.tenant_id == tenant_id)
+        .group_by(models.CRMLead.source)
+        .order_by(func.min(deal.id))
+    )
+    for lead_source, deal_count, pipeline_value, won_count, won_value in deal_sources:
+        key, label, dimension_type = deal_source_dimension(lead_source)
+        source = result.sources.setdefault(key, SourceAggregate(label, dimension_type))
+        source.deal_count += deal_count
+        source.pipeline_value += _decimal(pipeline_value)
+        source.won_deal_count += won_count
+        source.won_value += _decimal(won_value)
+
+    metric = models.CRMAcquisitionMetric
+    acquisition_rows = db.execute(
+        select(
+            metric.source,
+            metric.channel,
+            func.coalesce(func.sum(metric.sessions), 0),
+            func.coalesce(func.sum(metric.new_users), 0),
+            func.coalesce(func.sum(metric.engaged_sessions), 0),
+            func.coalesce(func.sum(metric.ga_conversions), 0),
+            func.sum(metric.ga_conversion_value),
+            func.coalesce(func.sum(metric.gtm_conversions), 0),
+            func.sum(metric.gtm_conversion_value),
+        )
+        .where(
+            metric.tenant_id == tenant_id,
+            metric.captured_date >= window_start.date(),
+            metric.captured_date <= now.date(),
+        )
+        .group_by(metric.source, metric.channel)
+        .order_by(func.min(metric.id))
+    )
+    acquisition = result.acquisition
+    for (
+        source_name,
+        channel,
+        sessions,
+        new_users,
+        engaged_sessions,
+        ga_conversions,
+        ga_value,
+        gtm_conversions,
+        gtm_value,
+    ) in acquisition_rows:
+        acquisition.sessions += sessions
+        acquisition.new_users += new_users
+        acquisition.engaged_sessions += engaged_sessions
+        acquisition.ga_conversions += ga_conversions
+        acquisition.ga_conversion_value += _decimal(ga_value)
+        acquisition.gtm_conversions += gtm_conversions
+        acquisition.gtm_conversion_value += _decimal(gtm_value)
+
+        key, label, dimension_type = acquisition_source_dimension(source_name, channel)
+        source = acquisition.sources.setdefault(key, AcquisitionSourceAggregate(label, dimension_type))
+        source.sessions += sessions
+        source.ga_conversions += ga_conversions
+        source.gtm_conversions += gtm_conversions
+        source.ga_revenue += _decimal(ga_value)
+        source.gtm_revenue += _decimal(gtm_value)
+
+    return result
+
+
+__all__ = ["sql_dashboard_aggregates"]
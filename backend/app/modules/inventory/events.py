@@ -0,0 +1,43 @@
+"""Event bus subscribers that fan inventory changes out to Socket.IO clients."""
+
+from __future__ import annotations
+
+from socketio import AsyncServer
+
+from app.core.config import settings
+from app.core.events.bus import EventBus
+from app.core.events.models import EquipmentStatusChanged
+
+EQUIPMENT_STATUS_CHANGED = "EquipmentStatusChanged"
+
+
+def register_event_handlers(event_bus: EventBus, server: AsyncServer) -> None:
+    """Broadcast equipment status changes once per coalescing window.
+
+    Rapid successive changes to the same item collapse into its latest status,
+    and all items changed within the window share one ``equipment_status_batch``
+    frame.
+    """
+
+    event_bus.coalesce(
+        EQUIPMENT_STATUS_CHANGED,
+        interval=settings.INVENTORY_STATUS_COALESCE_MS / 1000,
+        key=lambda event: event.item_id,
+    )
+
+    async def broadcast_status_changes(events: list[EquipmentStatusChanged]) -> None:
+        await server.emit(
+            "equipment_status_batch",
+            {
+                "updates": [
+                    {
+                        "item_id": event.item_id,
+                        "status": event.status,
+                        "timestamp": event.occurred_at.isoformat(),
+                    }
+                    for event in events
+                ]
+            },
+        )
+
+    event_bus.subscribe(EQUIPMENT_STATUS_CHANGED, broadcast_status_changes, batch=True)
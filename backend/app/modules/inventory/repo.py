@@ -2,13 +2,16 @@
 
 from __future__ import annotations
 
+from collections.abc import Iterable, Sequence
 from datetime import date
 
-from sqlalchemy import select, func
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from .models import Bundle, BundleItem, Category, Item, MaintenanceLog
-from app.modules.projects.models import Project, ProjectItem
+from app.modules.projects.availability import AvailabilityEngine, OccupancyProfile
+from app.modules.projects.repo import touch_projects_reserving
 
 
 class InventoryRepo:
@@ -78,6 +81,7 @@ class InventoryRepo:
             return False
 
         self.db.delete(item)
+        self.db.execute(touch_projects_reserving([item_id]))
         self.db.flush()
         return True
 
@@ -122,30 +126,157 @@ class InventoryRepo:
     def calc_available(self, item_id: int, start: date, end: date, *, strict: bool = False) -> int:
         """Return the number of available units for *item_id* in the given window.
 
-        The current implementation only validates the time window and returns the
-        total quantity on record. When ``strict`` is true a missing item results in a
-        :class:`LookupError` instead of silently returning zero.
+        Availability is the total quantity minus the peak number of units
+        reserved on any single day of the window. When ``strict`` is true a
+        missing item results in a :class:`LookupError` instead of silently
+        returning zero.
         """
 
-        if start > end:
-            raise ValueError("The start date must be before or equal to the end date")
+        return self.calc_available_many([(item_id, start, end)], strict=strict)[0]
 
-        item = self.get_item(item_id)
+    def calc_available_many(
+        self, windows: Sequence[tuple[int, date, date]], *, strict: bool = False
+    ) -> list[int]:
+        """Return available units for every ``(item_id, start, end)`` in *windows*.
+
+        Results are returned in request order. Regardless of the number of
+        windows, the items are loaded with one ``IN`` query and the reservations
+        with one grouped query spanning the union of all windows.
+        """
+
+        if not windows:
+            return []
+        for _, start, end in windows:
+            if start > end:
+                raise ValueError("The start date must be before or equal to the end date")
+
+        engine = AvailabilityEngine(self.db)
+        totals = engine.item_totals(item_id for item_id, _, _ in windows)
+        if strict:
+            missing = [item_id for item_id, _, _ in windows if item_id not in totals]
+            if missing:
+                raise LookupError(f"Item with id {missing[0]} was not found")
+
+        union_start = min(start for _, start, _ in windows)
+        union_end = max(end for _, _, end in windows)
+        index = engine.load_index(totals.keys(), union_start, union_end)
+
+        results: list[int] = []
+        for item_id, start, end in windows:
+            if item_id not in totals:
+                results.append(0)
+                continue
+            reserved = index[item_id].peak(start, end)
+            results.append(max(totals[item_id] - reserved, 0))
+        return results
+
+    def occupancy(
+        self, item_ids: Iterable[int], start: date, end: date
+    ) -> dict[int, OccupancyProfile]:
+        """Return the per-day occupancy profile for *item_ids* within the window."""
+
+        return AvailabilityEngine(self.db).occupancy(item_ids, start, end)
+
+
+class AsyncInventoryRepo:
+    """:class:`InventoryRepo` counterpart bound to an :class:`AsyncSession`.
+
+    Plain lookups are issued natively on the async session. The availability
+    calculations reuse the synchronous engine through ``run_sync`` so both request
+    paths share a single implementation.
+    """
+
+    def __init__(self, db: AsyncSession):
+        if db is None:  # pragma: no cover - defensive guard
+            raise ValueError("A database session instance is required")
+        self.db = db
+
+    # ---- Categories ----
+    async def list_categories(self) -> list[Category]:
+        """Return all inventory categories ordered alphabetically."""
+
+        result = await self.db.execute(select(Category).order_by(Category.name))
+        return list(result.scalars().all())
+
+    async def upsert_category(self, name: str) -> Category:
+        """Return the category with *name*, creating it when it does not exist."""
+
+        result = await self.db.execute(select(Category).where(Category.name == name))
+        category = result.scalar_one_or_none()
+        if category:
+            return category
+
+        category = Category(name=name)
+        self.db.add(category)
+        await self.db.flush()
+        return category
+
+    # ---- Items ----
+    async def list_items(self) -> list[Item]:
+        """Return all inventory items ordered alphabetically."""
+
+        result = await self.db.execute(select(Item).order_by(Item.name))
+        return list(result.scalars().all())
+
+    async def get_item(self, item_id: int) -> Item | None:
+        """Retrieve an inventory item by identifier."""
+
+        return await self.db.get(Item, item_id)
+
+    async def add_item(self, item: Item) -> Item:
+        """Persist *item* and ensure the primary key is populated."""
+
+        self.db.add(item)
+        await self.db.flush()
+        return item
+
+    async def delete_item(self, item_id: int, *, raise_if_missing: bool = False) -> bool:
+        """Delete the item with *item_id*; see :meth:`InventoryRepo.delete_item`."""
+
+        item = await self.get_item(item_id)
         if item is None:
-            if strict:
+            if raise_if_missing:
                 raise LookupError(f"Item with id {item_id} was not found")
-            return 0
-
-        reserved_stmt = (
-            select(func.coalesce(func.sum(ProjectItem.qty_reserved), 0))
-            .join(Project, ProjectItem.project_id == Project.id)
-            .where(
-                ProjectItem.item_id == item_id,
-                Project.start_date <= end,
-                Project.end_date >= start,
-            )
+            return False
+
+        await self.db.delete(item)
+        await self.db.execute(touch_projects_reserving([item_id]))
+        await self.db.flush()
+        return True
+
+    # ---- Bundles ----
+    async def list_bundles(self) -> list[Bundle]:
+        """Return all bundle definitions ordered alphabetically."""
+
+        result = await self.db.execute(select(Bundle).order_by(Bundle.name))
+        return list(result.scalars().all())
+
+    async def get_bundle_items(self, bundle_id: int) -> list[BundleItem]:
+        """Return the bundle items belonging to *bundle_id*."""
+
+        result = await self.db.execute(
+            select(BundleItem).where(BundleItem.bundle_id == bundle_id)
         )
-        reserved = self.db.execute(reserved_stmt).scalar_one()
+        return list(result.scalars().all())
 
-        available = int(item.quantity_total) - int(reserved or 0)
-        return max(available, 0)
+    async def add_bundle(self, bundle: Bundle) -> Bundle:
+        """Persist a bundle definition."""
+
+        self.db.add(bundle)
+        await self.db.flush()
+        return bundle
+
+    async def add_bundle_item(self, bundle_item: BundleItem) -> BundleItem:
+        """Persist a link between a bundle and an item."""
+
+        self.db.add(bundle_item)
+        await self.db.flush()
+        return bundle_item
+
+    # ---- Maintenance ----
+    async def log_maintenance(self, log_entry: MaintenanceLog) -> MaintenanceLog:
+        """Store a maintenance log entry."""
+
+        self.db.add(log_entry)
+        await self.db.flush()
+        return log_entry
@@ -1,6 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException, Request
-from sqlalchemy.orm import Session
-from app.modules.auth.deps import get_db, require_role
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.db import get_async_session
+from app.core.events.bus import bus as event_bus
+from app.core.events.models import EquipmentStatusChanged
+from app.modules.auth.deps import require_role_async
 from .schemas import (
     AvailabilityRequest,
     AvailabilityResponse,
@@ -14,50 +17,51 @@ from .schemas import (
     ItemStatusUpdate,
     MaintenanceLogIn,
     MaintenanceLogOut,
+    OccupancyRequest,
+    OccupancyResponse,
 )
 from .models import Category, Item, Bundle, BundleItem, MaintenanceLog
-from .repo import InventoryRepo
+from .repo import AsyncInventoryRepo
 from .usecases import InventoryService
-from datetime import datetime
 
 router = APIRouter()
 
 # ---- Categories ----
 @router.get("/categories", response_model=list[CategoryOut])
-def list_categories(db: Session = Depends(get_db), user=Depends(require_role("admin","planner","warehouse","viewer"))):
-    return InventoryRepo(db).list_categories()
+async def list_categories(db: AsyncSession = Depends(get_async_session), user=Depends(require_role_async("admin","planner","warehouse","viewer"))):
+    return await AsyncInventoryRepo(db).list_categories()
 
 @router.post("/categories", response_model=CategoryOut)
-def create_category(payload: CategoryIn, db: Session = Depends(get_db), user=Depends(require_role("admin","planner"))):
-    c = InventoryRepo(db).upsert_category(payload.name)
-    db.commit()
+async def create_category(payload: CategoryIn, db: AsyncSession = Depends(get_async_session), user=Depends(require_role_async("admin","planner"))):
+    c = await AsyncInventoryRepo(db).upsert_category(payload.name)
+    await db.commit()
     return c
 
 # ---- Items ----
 @router.get("/items", response_model=list[ItemOut])
-def list_items(db: Session = Depends(get_db), user=Depends(require_role("admin","planner","warehouse","viewer"))):
-    return InventoryRepo(db).list_items()
+async def list_items(db: AsyncSession = Depends(get_async_session), user=Depends(require_role_async("admin","planner","warehouse","viewer"))):
+    return await AsyncInventoryRepo(db).list_items()
 
 @router.post("/items", response_model=ItemOut)
-def create_item(payload: ItemIn, db: Session = Depends(get_db), user=Depends(require_role("admin","planner","warehouse"))):
+async def create_item(payload: ItemIn, db: AsyncSession = Depends(get_async_session), user=Depends(require_role_async("admin","planner","warehouse"))):
     it = Item(**payload.model_dump())
-    InventoryRepo(db).add_item(it); db.commit()
+    await AsyncInventoryRepo(db).add_item(it); await db.commit()
     return it
 
 @router.delete("/items/{item_id}")
-def delete_item(item_id: int, db: Session = Depends(get_db), user=Depends(require_role("admin","planner"))):
-    ok = InventoryRepo(db).delete_item(item_id)
+async def delete_item(item_id: int, db: AsyncSession = Depends(get_async_session), user=Depends(require_role_async("admin","planner"))):
+    ok = await AsyncInventoryRepo(db).delete_item(item_id)
     if not ok: raise HTTPException(404, "Item not found")
-    db.commit()
+    await db.commit()
     return {"ok": True}
 
 # ---- Bundles ----
 @router.get("/bundles", response_model=list[BundleOut])
-def list_bundles(db: Session = Depends(get_db), user=Depends(require_role("admin","planner","warehouse","viewer"))):
-    repo = InventoryRepo(db)
+async def list_bundles(db: AsyncSession = Depends(get_async_session), user=Depends(require_role_async("admin","planner","warehouse","viewer"))):
+    repo = AsyncInventoryRepo(db)
     out: list[BundleOut] = []
-    for b in repo.list_bundles():
-        items = repo.get_bundle_items(b.id)
+    for b in await repo.list_bundles():
+        items = await repo.get_bundle_items(b.id)
         out.append(
             BundleOut(
                 id=b.id,
@@ -69,14 +73,14 @@ def list_bundles(db: Session = Depends(get_db), user=Depends(require_role("admin
     return out
 
 @router.post("/bundles", response_model=BundleOut)
-def create_bundle(payload: BundleCreate, db: Session = Depends(get_db), user=Depends(require_role("admin","planner"))):
-    repo = InventoryRepo(db)
+async def create_bundle(payload: BundleCreate, db: AsyncSession = Depends(get_async_session), user=Depends(require_role_async("admin","planner"))):
+    repo = AsyncInventoryRepo(db)
     bundle_data = payload.model_dump(exclude={"items"})
     b = Bundle(**bundle_data)
-    repo.add_bundle(b)
+    await repo.add_bundle(b)
     stored_items: list[BundleItemOut] = []
     for definition in payload.items:
-        link = repo.add_bundle_item(
+        link = await repo.add_bundle_item(
             BundleItem(
                 bundle_id=b.id,
                 item_id=definition.item_id,
@@ -84,51 +88,45 @@ def create_bundle(payload: BundleCreate, db: Session = Depends(get_db), user=Dep
             )
         )
         stored_items.append(BundleItemOut(item_id=link.item_id, quantity=link.quantity))
-    db.commit()
+    await db.commit()
     return BundleOut(id=b.id, name=b.name, active=b.active, items=stored_items)
 
 # ---- Maintenance ----
 @router.post("/maintenance", response_model=MaintenanceLogOut)
-def log_maintenance(payload: MaintenanceLogIn, db: Session = Depends(get_db), user=Depends(require_role("admin","warehouse","planner"))):
+async def log_maintenance(payload: MaintenanceLogIn, db: AsyncSession = Depends(get_async_session), user=Depends(require_role_async("admin","warehouse","planner"))):
     m = MaintenanceLog(**payload.model_dump())
-    InventoryRepo(db).log_maintenance(m); db.commit()
+    await AsyncInventoryRepo(db).log_maintenance(m); await db.commit()
     return m
 
 # ---- Availability ----
 @router.post("/availability", response_model=list[AvailabilityResponse])
-def check_availability(requests: list[AvailabilityRequest], db: Session = Depends(get_db), user=Depends(require_role("admin","planner","warehouse","viewer"))):
-    svc = InventoryService(db)
-    return svc.check_availability(requests)
+async def check_availability(requests: list[AvailabilityRequest], db: AsyncSession = Depends(get_async_session), user=Depends(require_role_async("admin","planner","warehouse","viewer"))):
+    return await db.run_sync(lambda session: InventoryService(session).check_availability(requests))
+
+@router.post("/occupancy", response_model=list[OccupancyResponse])
+async def item_occupancy(payload: OccupancyRequest, db: AsyncSession = Depends(get_async_session), user=Depends(require_role_async("admin","planner","warehouse","viewer"))):
+    if payload.start > payload.end:
+        raise HTTPException(422, "start must be on or before end")
+    return await db.run_sync(lambda session: InventoryService(session).occupancy(payload))
 
 # ---- Real-time Equipment Status Update ----
 @router.patch("/items/{item_id}/status", response_model=ItemOut)
 async def update_item_status(
     item_id: int,
     payload: ItemStatusUpdate,
-    request: Request,
-    db: Session = Depends(get_db),
-    user=Depends(require_role("admin", "warehouse", "crew"))
+    db: AsyncSession = Depends(get_async_session),
+    user=Depends(require_role_async("admin", "warehouse", "crew"))
 ):
-    repo = InventoryRepo(db)
-    item = repo.get_item_by_id(item_id)
+    repo = AsyncInventoryRepo(db)
+    item = await repo.get_item(item_id)
     if not item:
         raise HTTPException(status_code=404, detail="Item not found")
 
     # Update the status
     item.status = payload.status
-    db.commit()
+    await db.commit()
 
-    # Broadcast the update via WebSocket when a server is available
-    sio = getattr(request.app.state, "sio", None)
-    if sio is not None:
-        await sio.emit(
-            "equipment_status_update",
-            {
-                "item_id": item.id,
-                "status": item.status,
-                "timestamp": datetime.now().isoformat(),
-            },
-        )
+    # Socket.IO fan-out happens in inventory.events, batched per coalescing window
+    await event_bus.publish_async(EquipmentStatusChanged(item_id=item.id, status=item.status))
 
     return item
-
@@ -3,7 +3,7 @@ from __future__ import annotations
 from datetime import date
 from typing import Optional
 
-from pydantic import BaseModel, ConfigDict, Field
+from pydantic import BaseModel, ConfigDict, Field, model_validator
 
 class CategoryIn(BaseModel):
     name: str
@@ -102,6 +102,34 @@ class AvailabilityResponse(BaseModel):
     available: int
     ok: bool
 
+# The occupancy matrix holds items x days integers; both axes are bounded.
+MAX_OCCUPANCY_DAYS = 366
+MAX_OCCUPANCY_ITEMS = 1000
+
+
+class OccupancyRequest(BaseModel):
+    item_ids: list[int] = Field(..., min_length=1, max_length=MAX_OCCUPANCY_ITEMS)
+    start: date
+    end: date
+
+    @model_validator(mode="after")
+    def _limit_window(self) -> "OccupancyRequest":
+        if (self.end - self.start).days + 1 > MAX_OCCUPANCY_DAYS:
+            raise ValueError(f"window may span at most {MAX_OCCUPANCY_DAYS} days")
+        return self
+
+class OccupancyDay(BaseModel):
+    day: date
+    reserved: int
+    available: int
+
+class OccupancyResponse(BaseModel):
+    item_id: int
+    total: int
+    peak_reserved: int
+    min_available: int
+    days: list[OccupancyDay]
+
 
 # Real-time Equipment Status Update
 class ItemStatusUpdate(BaseModel):
@@ -1,7 +1,7 @@
 from typing import List
 from sqlalchemy.orm import Session
 from .ports import InventoryPort
-from .schemas import AvailabilityRequest, AvailabilityResponse
+from .schemas import AvailabilityRequest, AvailabilityResponse, OccupancyDay, OccupancyRequest, OccupancyResponse
 from .repo import InventoryRepo
 
 class InventoryService(InventoryPort):
@@ -9,8 +9,26 @@ class InventoryService(InventoryPort):
         self.repo = InventoryRepo(db)
 
     def check_availability(self, requests: List[AvailabilityRequest]) -> List[AvailabilityResponse]:
+        availability = self.repo.calc_available_many([(r.item_id, r.start, r.end) for r in requests])
         res: list[AvailabilityResponse] = []
-        for r in requests:
-            available = self.repo.calc_available(r.item_id, r.start, r.end)
+        for r, available in zip(requests, availability):
             res.append(AvailabilityResponse(item_id=r.item_id, requested=r.quantity, available=available, ok=available >= r.quantity))
         return res
+
+    def occupancy(self, request: OccupancyRequest) -> List[OccupancyResponse]:
+        profiles = self.repo.occupancy(request.item_ids, request.start, request.end)
+        res: list[OccupancyResponse] = []
+        for item_id in dict.fromkeys(request.item_ids):
+            profile = profiles.get(item_id)
+            if profile is None:
+                continue
+            res.append(
+                OccupancyResponse(
+                    item_id=item_id,
+                    total=profile.total,
+                    peak_reserved=profile.peak_reserved,
+                    min_available=profile.min_available,
+                    days=[OccupancyDay(day=day, reserved=reserved, available=available) for day, reserved, available in profile.days()],
+                )
+            )
+        return res
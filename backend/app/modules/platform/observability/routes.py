@@ -1,11 +1,19 @@
 from __future__ import annotations
 
 from datetime import datetime
-from fastapi import APIRouter, Depends, Request
+from fastapi import APIRouter, Depends, Query, Request
+from sqlalchemy.orm import Session
 
+from app.core.events.bus import bus
+from app.core.events.dead_letters import DeadLetterStore
 from app.core.metrics import MetricsTracker
-from app.modules.auth.deps import require_role
-from .schemas import ObservabilityStatusOut, RequestSampleOut
+from app.modules.auth.deps import get_db, require_role
+from .schemas import (
+    DeadLetterOut,
+    DeadLetterReplayOut,
+    ObservabilityStatusOut,
+    RequestSampleOut,
+)
 
 
 router = APIRouter()
@@ -34,6 +42,7 @@ def observability_status(
     snapshot = tracker.snapshot()
 
     uptime_seconds = float(snapshot["uptime_seconds"])
+    percentiles = snapshot["latency_percentiles"]
     recent = [
         RequestSampleOut(
             path=entry["path"],
@@ -51,9 +60,34 @@ def observability_status(
         total_requests=int(snapshot["total_requests"]),
         availability=float(snapshot["availability"]),
         average_latency_ms=float(snapshot["average_latency_seconds"]) * 1000,
+        latency_p50_ms=float(percentiles.get("p50", 0.0)) * 1000,
+        latency_p95_ms=float(percentiles.get("p95", 0.0)) * 1000,
+        latency_p99_ms=float(percentiles.get("p99", 0.0)) * 1000,
         error_count=int(snapshot["error_count"]),
         sample_size=len(recent),
         recent_requests=recent,
         generated_at=datetime.utcnow(),
     )
 
+
+
+@router.get("/observability/dead-letters", response_model=list[DeadLetterOut])
+def list_dead_letters(
+    event_type: str | None = None,
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_db),
+    user=Depends(require_role("admin", "planner")),
+) -> list[DeadLetterOut]:
+    records = DeadLetterStore().pending(event_type=event_type, limit=limit, session=db)
+    return [DeadLetterOut.model_validate(record) for record in records]
+
+
+@router.post("/observability/dead-letters/replay", response_model=DeadLetterReplayOut)
+def replay_dead_letters(
+    event_type: str | None = None,
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_db),
+    user=Depends(require_role("admin")),
+) -> DeadLetterReplayOut:
+    replayed = bus.replay_dead_letters(event_type=event_type, limit=limit, session=db)
+    return DeadLetterReplayOut(replayed=replayed)
@@ -18,8 +18,27 @@ class ObservabilityStatusOut(BaseModel):
     total_requests: int
     availability: float
     average_latency_ms: float
+    latency_p50_ms: float = 0.0
+    latency_p95_ms: float = 0.0
+    latency_p99_ms: float = 0.0
     error_count: int
     sample_size: int
     recent_requests: list[RequestSampleOut]
     generated_at: datetime
 
+
+
+class DeadLetterOut(BaseModel):
+    id: int
+    event_type: str
+    handler: str | None = None
+    reason: str
+    error: str | None = None
+    created_at: datetime
+    replayed_at: datetime | None = None
+
+    model_config = {"from_attributes": True}
+
+
+class DeadLetterReplayOut(BaseModel):
+    replayed: int
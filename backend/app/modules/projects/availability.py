@@ -0,0 +1,276 @@
+"""Reservation availability engine shared by projects and inventory."""
+
+from __future__ import annotations
+
+from bisect import bisect_right
+from collections import defaultdict
+from collections.abc import Iterable
+from dataclasses import dataclass
+from datetime import date, timedelta
+
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from .models import Project, ProjectItem
+from app.modules.inventory.models import Item  # monolith read
+
+
+class ItemReservationIndex:
+    """Step function of the reserved quantity of a single item over time.
+
+    Reservations are stored as ``+qty`` / ``-qty`` boundary events on day
+    ordinals. The sorted boundaries and the running level after every boundary
+    allow the peak concurrent reservation in any window to be answered with a
+    binary search instead of rescanning all reservations.
+    """
+
+    __slots__ = ("_points", "_levels")
+
+    def __init__(self, intervals: Iterable[tuple[date, date, int]] = ()) -> None:
+        deltas: dict[int, int] = defaultdict(int)
+        for start, end, qty in intervals:
+            if end < start or not qty:
+                continue
+            deltas[start.toordinal()] += qty
+            deltas[end.toordinal() + 1] -= qty
+
+        self._points: list[int] = sorted(deltas)
+        self._levels: list[int] = []
+        level = 0
+        for point in self._points:
+            level += deltas[point]
+            self._levels.append(level)
+
+    def __bool__(self) -> bool:
+        return bool(self._points)
+
+    def peak(self, start: date, end: date) -> int:
+        """Return the highest reserved quantity on any day within ``start``..``end``."""
+
+        if start > end or not self._points:
+            return 0
+
+        lo = bisect_right(self._points, start.toordinal()) - 1
+        hi = bisect_right(self._points, end.toordinal())
+        if hi <= 0:
+            return 0
+        # ``lo`` is the level already in effect on ``start``; when it is negative
+        # nothing had been reserved yet and the window starts at zero.
+        peak = max(self._levels[max(lo, 0):hi])
+        if lo < 0:
+            peak = max(peak, 0)
+        return max(peak, 0)
+
+
+@dataclass(frozen=True)
+class OccupancyProfile:
+    """Per-day reserved quantity of one item across a window."""
+
+    item_id: int
+    start: date
+    total: int
+    reserved: np.ndarray
+
+    @property
+    def end(self) -> date:
+        return self.start + timedelta(days=len(self.reserved) - 1)
+
+    @property
+    def peak_reserved(self) -> int:
+        return int(self.reserved.max()) if len(self.reserved) else 0
+
+    @property
+    def min_available(self) -> int:
+        return max(self.total - self.peak_reserved, 0)
+
+    def days(self) -> list[tuple[date, int, int]]:
+        """Return ``(day, reserved, available)`` tuples for every day in the window."""
+
+        return [
+            (self.start + timedelta(days=offset), reserved, max(self.total - reserved, 0))
+            for offset, reserved in enumerate(self.reserved.tolist())
+        ]
+
+
+def occupancy_matrix(
+    rows: Iterable[tuple[int, date, date, int]],
+    item_ids: list[int],
+    start: date,
+    end: date,
+) -> np.ndarray:
+    """Sweep reservations into a ``(len(item_ids), days)`` reserved-quantity matrix.
+
+    Each reservation contributes ``+qty`` on its first day and ``-qty`` on the day
+    after its last day, clipped to the window. A cumulative sum along the day axis
+    then yields the concurrent reservation per item per day.
+    """
+
+    days = (end - start).days + 1
+    matrix = np.zeros((len(item_ids), days + 1), dtype=np.int64)
+    positions = {item_id: index for index, item_id in enumerate(item_ids)}
+
+    item_idx: list[int] = []
+    first: list[int] = []
+    last: list[int] = []
+    qty: list[int] = []
+    for item_id, res_start, res_end, quantity in rows:
+        index = positions.get(item_id)
+        if index is None or not quantity:
+            continue
+        item_idx.append(index)
+        first.append((res_start - start).days)
+        last.append((res_end - start).days)
+        qty.append(quantity)
+
+    if item_idx:
+        rows_arr = np.asarray(item_idx, dtype=np.intp)
+        qty_arr = np.asarray(qty, dtype=np.int64)
+        first_arr = np.clip(np.asarray(first, dtype=np.int64), 0, days)
+        after_arr = np.clip(np.asarray(last, dtype=np.int64) + 1, 0, days)
+        np.add.at(matrix, (rows_arr, first_arr), qty_arr)
+        np.add.at(matrix, (rows_arr, after_arr), -qty_arr)
+
+    return np.cumsum(matrix[:, :days], axis=1)
+
+
+class AvailabilityEngine:
+    """Answer reservation and availability questions for many items at once.
+
+    Every public method issues a fixed number of queries regardless of how many
+    items are requested: one for the overlapping reservations and, when stock
+    levels are needed, one ``IN`` lookup of the inventory items.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def reservation_rows(
+        self,
+        item_ids: Iterable[int],
+        start: date,
+        end: date,
+        *,
+        exclude_project_id: int | None = None,
+    ) -> list[tuple[int, date, date, int]]:
+        """Return ``(item_id, start, end, qty)`` for reservations overlapping the window.
+
+        Reservations of the same item sharing a project window are summed in SQL.
+        """
+
+        wanted = set(item_ids)
+        if not wanted:
+            return []
+
+        stmt = (
+            select(
+                ProjectItem.item_id,
+                Project.start_date,
+                Project.end_date,
+                func.coalesce(func.sum(ProjectItem.qty_reserved), 0),
+            )
+            .join(Project, ProjectItem.project_id == Project.id)
+            .where(
+                ProjectItem.item_id.in_(wanted),
+                Project.start_date <= end,
+                Project.end_date >= start,
+            )
+            .group_by(ProjectItem.item_id, Project.start_date, Project.end_date)
+        )
+        if exclude_project_id:
+            stmt = stmt.where(Project.id != exclude_project_id)
+
+        return [
+            (item_id, res_start, res_end, int(qty or 0))
+            for item_id, res_start, res_end, qty in self.db.execute(stmt)
+        ]
+
+    def load_index(
+        self,
+        item_ids: Iterable[int],
+        start: date,
+        end: date,
+        *,
+        exclude_project_id: int | None = None,
+    ) -> dict[int, ItemReservationIndex]:
+        """Return a reservation index per item covering ``start``..``end``."""
+
+        wanted = set(item_ids)
+        intervals: dict[int, list[tuple[date, date, int]]] = defaultdict(list)
+        for item_id, res_start, res_end, qty in self.reservation_rows(
+            wanted, start, end, exclude_project_id=exclude_project_id
+        ):
+            intervals[item_id].append((res_start, res_end, qty))
+
+        return {item_id: ItemReservationIndex(intervals.get(item_id, ())) for item_id in wanted}
+
+    def peak_reserved(
+        self,
+        item_ids: Iterable[int],
+        start: date,
+        end: date,
+        *,
+        exclude_project_id: int | None = None,
+    ) -> dict[int, int]:
+        """Return the peak concurrently reserved quantity per item in the window."""
+
+        index = self.load_index(item_ids, start, end, exclude_project_id=exclude_project_id)
+        return {item_id: item_index.peak(start, end) for item_id, item_index in index.items()}
+
+    def occupancy(
+        self,
+        item_ids: Iterable[int],
+        start: date,
+        end: date,
+        *,
+        exclude_project_id: int | None = None,
+    ) -> dict[int, OccupancyProfile]:
+        """Return the per-day occupancy profile of every existing item in the window."""
+
+        if start > end:
+            raise ValueError("The start date must be before or equal to the end date")
+
+        totals = self.item_totals(item_ids)
+        ordered = list(totals)
+        rows = self.reservation_rows(ordered, start, end, exclude_project_id=exclude_project_id)
+        matrix = occupancy_matrix(rows, ordered, start, end)
+        return {
+            item_id: OccupancyProfile(
+                item_id=item_id, start=start, total=totals[item_id], reserved=matrix[index]
+            )
+            for index, item_id in enumerate(ordered)
+        }
+
+    def item_totals(self, item_ids: Iterable[int]) -> dict[int, int]:
+        """Return ``quantity_total`` per existing item using a single ``IN`` query."""
+
+        wanted = set(item_ids)
+        if not wanted:
+            return {}
+        rows = self.db.execute(
+            select(Item.id, Item.quantity_total).where(Item.id.in_(wanted))
+        )
+        return {item_id: int(total or 0) for item_id, total in rows}
+
+    def available(
+        self,
+        item_ids: Iterable[int],
+        start: date,
+        end: date,
+        *,
+        exclude_project_id: int | None = None,
+    ) -> dict[int, int]:
+        """Return the number of units still free per item for the whole window.
+
+        Items that do not exist are omitted from the result.
+        """
+
+        wanted = set(item_ids)
+        totals = self.item_totals(wanted)
+        reserved = self.peak_reserved(
+            totals.keys(), start, end, exclude_project_id=exclude_project_id
+        )
+        return {
+            item_id: max(total - reserved.get(item_id, 0), 0)
+            for item_id, total in totals.items()
+        }
@@ -1,9 +1,13 @@
 from sqlalchemy.orm import Mapped, mapped_column
-from sqlalchemy import String, Date, Integer, Numeric, DateTime, func, ForeignKey
+from sqlalchemy import String, Date, Integer, Numeric, DateTime, func, ForeignKey, Index
 from app.core.db import Base
 
 class Project(Base):
     __tablename__ = "prj_projects"
+    __table_args__ = (
+        Index("ix_prj_projects_window", "start_date", "end_date"),
+        Index("ix_prj_projects_updated_at", "updated_at"),
+    )
     id: Mapped[int] = mapped_column(primary_key=True)
     name: Mapped[str] = mapped_column(String(200), index=True)
     client_name: Mapped[str] = mapped_column(String(200))
@@ -12,9 +16,15 @@ class Project(Base):
     notes: Mapped[str] = mapped_column(String(1000), default="")
     created_by: Mapped[int | None] = mapped_column(Integer, nullable=True)
     created_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    updated_at: Mapped[DateTime | None] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=True
+    )
 
 class ProjectItem(Base):
     __tablename__ = "prj_project_items"
+    __table_args__ = (
+        Index("ix_prj_project_items_item_project", "item_id", "project_id"),
+    )
     id: Mapped[int] = mapped_column(primary_key=True)
     project_id: Mapped[int] = mapped_column(ForeignKey("prj_projects.id"))
     item_id: Mapped[int] = mapped_column(Integer)  # inv_items.id
@@ -1,11 +1,14 @@
 from __future__ import annotations
 
-from datetime import date
+from collections.abc import Iterable
+from datetime import date, datetime
 from typing import Optional
 
-from sqlalchemy import select
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
+from .availability import AvailabilityEngine
 from .models import Project, ProjectItem
 from app.modules.inventory.models import Item  # monolith read
 
@@ -14,13 +17,49 @@ def overlaps(a_start, a_end, b_start, b_end) -> bool:
     return not (a_end < b_start or b_end < a_start)
 
 
+def touch_projects_reserving(item_ids: Iterable[int]):
+    """Statement bumping ``updated_at`` of every project reserving one of *item_ids*.
+
+    A project's ``inventory_risk`` depends on the stock of the items it
+    reserves, so changing or removing an item must surface those projects in
+    ``since`` loads as well.
+    """
+
+    reserving = select(ProjectItem.project_id).where(ProjectItem.item_id.in_(set(item_ids)))
+    return (
+        update(Project)
+        .where(Project.id.in_(reserving))
+        .values(updated_at=func.now())
+        .execution_options(synchronize_session=False)
+    )
+
+
 class ProjectsRepo:
     def __init__(self, db: Session):
         self.db = db
 
     # Projects
-    def list(self) -> list[Project]:
-        return self.db.execute(select(Project).order_by(Project.start_date.desc())).scalars().all()
+    def list(
+        self,
+        *,
+        limit: int | None = None,
+        offset: int = 0,
+        since: datetime | None = None,
+    ) -> list[Project]:
+        stmt = select(Project).order_by(Project.start_date.desc(), Project.id.desc())
+        if since is not None:
+            stmt = stmt.where(Project.updated_at >= since)
+        if offset:
+            stmt = stmt.offset(offset)
+        if limit is not None:
+            stmt = stmt.limit(limit)
+        return self.db.execute(stmt).scalars().all()
+
+    def count(self, *, since: datetime | None = None) -> int:
+        stmt = select(func.count(Project.id))
+        if since is not None:
+            stmt = stmt.where(Project.updated_at >= since)
+        return int(self.db.execute(stmt).scalar_one())
 
     def get(self, project_id: int) -> Optional[Project]:
         return self.db.get(Project, project_id)
@@ -38,26 +77,144 @@ class ProjectsRepo:
             .all()
         )
 
+    def list_items_for_projects(self, project_ids: Iterable[int]) -> dict[int, list[ProjectItem]]:
+        """Return the reserved lines of all *project_ids* using a single query."""
+
+        wanted = set(project_ids)
+        grouped: dict[int, list[ProjectItem]] = {project_id: [] for project_id in wanted}
+        if not wanted:
+            return grouped
+        rows = self.db.execute(
+            select(ProjectItem)
+            .where(ProjectItem.project_id.in_(wanted))
+            .order_by(ProjectItem.id)
+        ).scalars()
+        for row in rows:
+            grouped[row.project_id].append(row)
+        return grouped
+
+    def items_by_id(self, item_ids: Iterable[int]) -> dict[int, Item]:
+        """Return inventory items keyed by id using a single ``IN`` query."""
+
+        wanted = set(item_ids)
+        if not wanted:
+            return {}
+        rows = self.db.execute(select(Item).where(Item.id.in_(wanted))).unique().scalars()
+        return {item.id: item for item in rows}
+
     def add_item(self, project_item: ProjectItem) -> ProjectItem:
         self.db.add(project_item)
         self.db.flush()
         return project_item
 
+    def touch(self, project: Project) -> None:
+        """Mark *project* as changed, e.g. after its reservations changed."""
+
+        project.updated_at = func.now()
+
     # Availability composition
     def reserved_qty_for_item(
         self, item_id: int, start: date, end: date, exclude_project_id: int | None = None
     ) -> int:
-        total = 0
-        rows = self.db.execute(select(ProjectItem, Project).join(Project, ProjectItem.project_id == Project.id)).all()
-        for project_item, project in rows:
-            if project_item.item_id != item_id:
-                continue
-            if exclude_project_id and project.id == exclude_project_id:
-                continue
-            if overlaps(project.start_date, project.end_date, start, end):
-                total += project_item.qty_reserved
-        return total
+        reserved = self.reserved_qty_for_items([item_id], start, end, exclude_project_id)
+        return reserved.get(item_id, 0)
+
+    def reserved_qty_for_items(
+        self,
+        item_ids: Iterable[int],
+        start: date,
+        end: date,
+        exclude_project_id: int | None = None,
+    ) -> dict[int, int]:
+        """Return the peak reserved quantity per item within ``start``..``end``."""
+
+        return AvailabilityEngine(self.db).peak_reserved(
+            item_ids, start, end, exclude_project_id=exclude_project_id
+        )
 
     def item_total(self, item_id: int) -> int:
         item = self.db.get(Item, item_id)
         return int(item.quantity_total) if item else 0
+
+    def item_totals(self, item_ids: Iterable[int]) -> dict[int, int]:
+        return AvailabilityEngine(self.db).item_totals(item_ids)
+
+
+class AsyncProjectsRepo:
+    """:class:`ProjectsRepo` counterpart bound to an ``AsyncSession``.
+
+    Availability questions are answered by the shared :class:`AvailabilityEngine`
+    through ``run_sync`` so that sync and async callers see identical results.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    # Projects
+    async def list(
+        self,
+        *,
+        limit: int | None = None,
+        offset: int = 0,
+        since: datetime | None = None,
+    ) -> list[Project]:
+        stmt = select(Project).order_by(Project.start_date.desc(), Project.id.desc())
+        if since is not None:
+            stmt = stmt.where(Project.updated_at >= since)
+        if offset:
+            stmt = stmt.offset(offset)
+        if limit is not None:
+            stmt = stmt.limit(limit)
+        result = await self.db.execute(stmt)
+        return list(result.scalars().all())
+
+    async def count(self, *, since: datetime | None = None) -> int:
+        stmt = select(func.count(Project.id))
+        if since is not None:
+            stmt = stmt.where(Project.updated_at >= since)
+        return int((await self.db.execute(stmt)).scalar_one())
+
+    async def get(self, project_id: int) -> Optional[Project]:
+        return await self.db.get(Project, project_id)
+
+    async def add(self, project: Project) -> Project:
+        self.db.add(project)
+        await self.db.flush()
+        return project
+
+    # Items of a project
+    async def list_items(self, project_id: int) -> list[ProjectItem]:
+        result = await self.db.execute(
+            select(ProjectItem).where(ProjectItem.project_id == project_id)
+        )
+        return list(result.scalars().all())
+
+    async def list_items_for_projects(self, project_ids: Iterable[int]) -> dict[int, list[ProjectItem]]:
+        """Return the reserved lines of all *project_ids* using a single query."""
+
+        wanted = set(project_ids)
+        grouped: dict[int, list[ProjectItem]] = {project_id: [] for project_id in wanted}
+        if not wanted:
+            return grouped
+        rows = await self.db.execute(
+            select(ProjectItem)
+            .where(ProjectItem.project_id.in_(wanted))
+            .order_by(ProjectItem.id)
+        )
+        for row in rows.scalars():
+            grouped[row.project_id].append(row)
+        return grouped
+
+    async def items_by_id(self, item_ids: Iterable[int]) -> dict[int, Item]:
+        """Return inventory items keyed by id using a single ``IN`` query."""
+
+        wanted = set(item_ids)
+        if not wanted:
+            return {}
+        rows = await self.db.execute(select(Item).where(Item.id.in_(wanted)))
+        return {item.id: item for item in rows.unique().scalars()}
+
+    async def add_item(self, project_item: ProjectItem) -> ProjectItem:
+        self.db.add(project_item)
+        await self.db.flush()
+        return project_item
@@ -1,20 +1,18 @@
 from __future__ import annotations
 
-from datetime import date
-from typing import Any
+from collections.abc import Iterable, Mapping, Sequence
+from datetime import date, datetime
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import select
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.modules.auth.deps import get_db, require_role
+from app.core.db import get_async_session
+from app.modules.auth.deps import require_role_async
 from app.modules.inventory.models import Item
-from app.modules.crew.models import Booking, CrewMember
-from app.modules.transport.models import Driver, Route, Vehicle
-from .models import Project
-from .repo import ProjectsRepo
+from .models import Project, ProjectItem
+from .repo import AsyncProjectsRepo
 from .schemas import ProjectDetail, ProjectIn, ProjectItemOut, ProjectOut, ReserveRequest
-from .usecases import ReservationService
+from .usecases import PlannerConflictDetector, ReservationService
 
 router = APIRouter()
 
@@ -28,12 +26,13 @@ def _project_schedule_metadata(project: Project) -> tuple[str, int | None, int |
     return "active", 0, duration
 
 
-def _inventory_health(repo: ProjectsRepo, project: Project) -> tuple[str, list[str]]:
+def _inventory_health(
+    item_rows: Iterable[ProjectItem], items_by_id: Mapping[int, Item]
+) -> tuple[str, list[str]]:
     risk = "ok"
     alerts: list[str] = []
-    item_rows = repo.list_items(project.id)
     for item_row in item_rows:
-        item = repo.db.get(Item, item_row.item_id)
+        item = items_by_id.get(item_row.item_id)
         total_qty = int(item.quantity_total) if item and item.quantity_total is not None else 0
         if total_qty == 0:
             risk = "critical"
@@ -53,74 +52,101 @@ def _inventory_health(repo: ProjectsRepo, project: Project) -> tuple[str, list[s
     return risk, alerts
 
 
-def _serialize_project(repo: ProjectsRepo, project: Project) -> ProjectOut:
-    status, days_until_start, duration = _project_schedule_metadata(project)
-    inventory_risk, alerts = _inventory_health(repo, project)
-    derived_status = "at_risk" if status != "completed" and inventory_risk == "critical" else status
-    return ProjectOut(
-        id=project.id,
-        name=project.name,
-        client_name=project.client_name,
-        start_date=project.start_date,
-        end_date=project.end_date,
-        notes=project.notes,
-        status=derived_status,
-        days_until_start=days_until_start,
-        duration_days=duration,
-        inventory_risk=inventory_risk,
-        inventory_alerts=alerts,
+async def _serialize_projects(repo: AsyncProjectsRepo, projects: Sequence[Project]) -> list[ProjectOut]:
+    """Serialize *projects* with two queries in total for their inventory health."""
+
+    items_by_project = await repo.list_items_for_projects(project.id for project in projects)
+    items_by_id = await repo.items_by_id(
+        row.item_id for rows in items_by_project.values() for row in rows
     )
+    out: list[ProjectOut] = []
+    for project in projects:
+        status, days_until_start, duration = _project_schedule_metadata(project)
+        inventory_risk, alerts = _inventory_health(items_by_project.get(project.id, []), items_by_id)
+        derived_status = "at_risk" if status != "completed" and inventory_risk == "critical" else status
+        out.append(
+            ProjectOut(
+                id=project.id,
+                name=project.name,
+                client_name=project.client_name,
+                start_date=project.start_date,
+                end_date=project.end_date,
+                notes=project.notes,
+                status=derived_status,
+                days_until_start=days_until_start,
+                duration_days=duration,
+                inventory_risk=inventory_risk,
+                inventory_alerts=alerts,
+            )
+        )
+    return out
+
+
+async def _serialize_project(repo: AsyncProjectsRepo, project: Project) -> ProjectOut:
+    return (await _serialize_projects(repo, [project]))[0]
 
 
 @router.get("/projects", response_model=list[ProjectOut])
-def list_projects(
-    db: Session = Depends(get_db),
-    user=Depends(require_role("admin", "planner", "warehouse", "viewer")),
+async def list_projects(
+    response: Response,
+    limit: int | None = Query(None, ge=1, le=500),
+    offset: int = Query(0, ge=0),
+    since: datetime | None = Query(None, description="Alleen projecten gewijzigd sinds dit tijdstip"),
+    db: AsyncSession = Depends(get_async_session),
+    user=Depends(require_role_async("admin", "planner", "warehouse", "viewer")),
 ):
-    repo = ProjectsRepo(db)
-    return [_serialize_project(repo, project) for project in repo.list()]
+    # ``updated_at`` follows edits, reservations and stock changes of reserved
+    # items. Projects cannot be deleted through the API, so ``since`` loads
+    # report no deletions; rows removed directly in the database stay in a
+    # client's cache until its next full load.
+    repo = AsyncProjectsRepo(db)
+    projects = await repo.list(limit=limit, offset=offset, since=since)
+    if limit is not None or offset:
+        response.headers["X-Total-Count"] = str(await repo.count(since=since))
+    return await _serialize_projects(repo, projects)
 
 @router.post("/projects", response_model=ProjectOut)
-def create_project(payload: ProjectIn, db: Session = Depends(get_db), user=Depends(require_role("admin","planner"))):
-    repo = ProjectsRepo(db)
+async def create_project(payload: ProjectIn, db: AsyncSession = Depends(get_async_session), user=Depends(require_role_async("admin","planner"))):
+    repo = AsyncProjectsRepo(db)
     project = Project(**payload.model_dump())
-    repo.add(project)
-    db.commit()
-    db.refresh(project)
-    return _serialize_project(repo, project)
+    await repo.add(project)
+    await db.commit()
+    await db.refresh(project)
+    return await _serialize_project(repo, project)
 
 @router.get("/projects/{project_id}", response_model=ProjectDetail)
-def get_project(
+async def get_project(
     project_id: int,
-    db: Session = Depends(get_db),
-    user=Depends(require_role("admin", "planner", "warehouse", "viewer")),
+    db: AsyncSession = Depends(get_async_session),
+    user=Depends(require_role_async("admin", "planner", "warehouse", "viewer")),
 ):
-    repo = ProjectsRepo(db)
-    project = repo.get(project_id)
+    repo = AsyncProjectsRepo(db)
+    project = await repo.get(project_id)
     if not project:
         raise HTTPException(404, "Project not found")
     items = [
         ProjectItemOut(id=i.id, project_id=i.project_id, item_id=i.item_id, qty_reserved=i.qty_reserved)
-        for i in repo.list_items(project_id)
+        for i in await repo.list_items(project_id)
     ]
-    return ProjectDetail(project=_serialize_project(repo, project), items=items)
+    return ProjectDetail(project=await _serialize_project(repo, project), items=items)
 
 @router.post("/projects/{project_id}/reserve", response_model=list[ProjectItemOut])
-def reserve_items(
+async def reserve_items(
     project_id: int,
     payload: ReserveRequest,
-    db: Session = Depends(get_db),
-    user=Depends(require_role("admin", "planner")),
+    db: AsyncSession = Depends(get_async_session),
+    user=Depends(require_role_async("admin", "planner")),
 ):
-    svc = ReservationService(db)
     try:
-        pis = svc.reserve_items(project_id, payload.items)
+        pis = await db.run_sync(
+            lambda session: ReservationService(session).reserve_items(project_id, payload.items)
+        )
     except ValueError:
         raise HTTPException(404, "Project not found")
     except RuntimeError as e:
         detail = e.args[0] if e.args else {"error": "insufficient_stock"}
         raise HTTPException(409, detail)
-    db.commit()
+    await db.commit()
     return [ProjectItemOut(id=i.id, project_id=i.project_id, item_id=i.item_id, qty_reserved=i.qty_reserved) for i in pis]
 
 class ProjectDatesIn(ProjectIn):
@@ -128,95 +154,30 @@ class ProjectDatesIn(ProjectIn):
     end_date: date
 
 
-def _collect_planner_conflicts(
-    db: Session, project_id: int, start: date, end: date
-) -> dict[str, list[dict[str, Any]]]:
-    """Return crew and transport assignments that would fall outside the new window."""
-
-    crew_conflicts: list[dict[str, Any]] = []
-    bookings = (
-        db.execute(
-            select(Booking).where(
-                Booking.project_id == project_id,
-                Booking.status != "declined",
-            )
-        )
-        .scalars()
-        .all()
-    )
-
-    for booking in bookings:
-        booking_start = booking.start.date()
-        booking_end = booking.end.date()
-        if booking_start < start or booking_end > end:
-            member = db.get(CrewMember, booking.crew_id)
-            crew_conflicts.append(
-                {
-                    "booking_id": booking.id,
-                    "crew_id": booking.crew_id,
-                    "crew_name": getattr(member, "name", None),
-                    "start": booking.start.isoformat(),
-                    "end": booking.end.isoformat(),
-                    "status": booking.status,
-                }
-            )
-
-    transport_conflicts: list[dict[str, Any]] = []
-    routes = (
-        db.execute(
-            select(Route).where(
-                Route.project_id == project_id,
-                Route.status != "cancelled",
-            )
-        )
-        .scalars()
-        .all()
-    )
-
-    for route in routes:
-        if route.date < start or route.date > end:
-            vehicle = db.get(Vehicle, route.vehicle_id)
-            driver = db.get(Driver, route.driver_id)
-            transport_conflicts.append(
-                {
-                    "route_id": route.id,
-                    "vehicle_id": route.vehicle_id,
-                    "vehicle_name": getattr(vehicle, "name", None),
-                    "driver_id": route.driver_id,
-                    "driver_name": getattr(driver, "name", None),
-                    "date": route.date.isoformat(),
-                    "start_time": route.start_time.isoformat(),
-                    "end_time": route.end_time.isoformat(),
-                    "status": route.status,
-                }
-            )
-
-    return {"crew_conflicts": crew_conflicts, "transport_conflicts": transport_conflicts}
-
 @router.put("/projects/{project_id}/dates", response_model=ProjectOut)
-def update_project_dates(
+async def update_project_dates(
     project_id: int,
     payload: ProjectDatesIn,
-    db: Session = Depends(get_db),
-    user=Depends(require_role("admin", "planner")),
+    db: AsyncSession = Depends(get_async_session),
+    user=Depends(require_role_async("admin", "planner")),
 ):
-    repo = ProjectsRepo(db)
-    prj = repo.get(project_id)
+    repo = AsyncProjectsRepo(db)
+    prj = await repo.get(project_id)
     if not prj:
         raise HTTPException(404, "Project not found")
-    # Check availability for all reserved items on new dates
-    svc = ReservationService(db)
-    items = repo.list_items(project_id)
-    reqs = [{"item_id": i.item_id, "qty": i.qty_reserved} for i in items]
-    # Convert to ReserveItemIn objects
-    from .schemas import ReserveItemIn
-    req_models = [ReserveItemIn(item_id=x["item_id"], qty=x["qty"]) for x in reqs]
-    checks = svc.check_items_available(payload.start_date, payload.end_date, req_models, exclude_project_id=project_id)
-    not_ok = [c for c in checks if not c["ok"]]
+    not_ok = await db.run_sync(
+        lambda session: PlannerConflictDetector(session).inventory_conflicts(
+            project_id, payload.start_date, payload.end_date
+        )
+    )
     if not_ok:
         raise HTTPException(409, {"error": "insufficient_stock_on_move", "details": not_ok})
 
-    conflicts = _collect_planner_conflicts(db, project_id, payload.start_date, payload.end_date)
+    conflicts = await db.run_sync(
+        lambda session: PlannerConflictDetector(session).planner_conflicts(
+            project_id, payload.start_date, payload.end_date
+        )
+    )
     if conflicts["crew_conflicts"] or conflicts["transport_conflicts"]:
         raise HTTPException(
             status.HTTP_409_CONFLICT,
@@ -233,6 +194,6 @@ def update_project_dates(
     prj.start_date = payload.start_date
     prj.end_date = payload.end_date
     prj.notes = payload.notes
-    db.commit()
-    db.refresh(prj)
-    return _serialize_project(repo, prj)
+    await db.commit()
+    await db.refresh(prj)
+    return await _serialize_project(repo, prj)
@@ -1,7 +1,10 @@
+from sqlalchemy import or_, select
 from sqlalchemy.orm import Session
-from typing import List
+from typing import Any, List
 from datetime import date
 
+from app.modules.crew.models import Booking, CrewMember
+from app.modules.transport.models import Driver, Route, Vehicle
 from .repo import ProjectsRepo
 from .models import ProjectItem
 from .schemas import ReserveItemIn
@@ -11,10 +14,13 @@ class ReservationService:
         self.repo = ProjectsRepo(db)
 
     def check_items_available(self, start: date, end: date, items: List[ReserveItemIn], exclude_project_id: int | None = None) -> list[dict]:
+        item_ids = {r.item_id for r in items}
+        totals = self.repo.item_totals(item_ids)
+        reserved_by_item = self.repo.reserved_qty_for_items(item_ids, start, end, exclude_project_id)
         result: list[dict] = []
         for r in items:
-            total = self.repo.item_total(r.item_id)
-            reserved = self.repo.reserved_qty_for_item(r.item_id, start, end, exclude_project_id)
+            total = totals.get(r.item_id, 0)
+            reserved = reserved_by_item.get(r.item_id, 0)
             available = max(total - reserved, 0)
             result.append({"item_id": r.item_id, "requested": r.qty, "available": available, "ok": available >= r.qty})
         return result
@@ -27,8 +33,85 @@ class ReservationService:
         not_ok = [c for c in checks if not c["ok"]]
         if not_ok:
             raise RuntimeError({"error": "insufficient_stock", "details": not_ok})
+        # Reservations live in their own table; bump the project for ``since`` loads.
+        self.repo.touch(prj)
         out: list[ProjectItem] = []
         for r in items:
             pi = ProjectItem(project_id=project_id, item_id=r.item_id, qty_reserved=r.qty)
             self.repo.add_item(pi); out.append(pi)
         return out
+
+
+class PlannerConflictDetector:
+    """Set-based detection of everything that blocks moving a project in time.
+
+    Inventory, crew and transport conflicts are each resolved with a fixed number
+    of queries, independent of how many lines, bookings or routes a project has.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.reservations = ReservationService(db)
+
+    def inventory_conflicts(self, project_id: int, start: date, end: date) -> list[dict]:
+        requested: dict[int, int] = {}
+        for line in self.reservations.repo.list_items(project_id):
+            requested[line.item_id] = requested.get(line.item_id, 0) + line.qty_reserved
+        items = [ReserveItemIn(item_id=item_id, qty=qty) for item_id, qty in requested.items()]
+        checks = self.reservations.check_items_available(start, end, items, exclude_project_id=project_id)
+        return [c for c in checks if not c["ok"]]
+
+    def crew_conflicts(self, project_id: int, start: date, end: date) -> list[dict[str, Any]]:
+        rows = self.db.execute(
+            select(Booking, CrewMember.name)
+            .outerjoin(CrewMember, CrewMember.id == Booking.crew_id)
+            .where(Booking.project_id == project_id, Booking.status != "declined")
+            .order_by(Booking.start, Booking.id)
+        ).all()
+        return [
+            {
+                "booking_id": booking.id,
+                "crew_id": booking.crew_id,
+                "crew_name": crew_name,
+                "start": booking.start.isoformat(),
+                "end": booking.end.isoformat(),
+                "status": booking.status,
+            }
+            for booking, crew_name in rows
+            if booking.start.date() < start or booking.end.date() > end
+        ]
+
+    def transport_conflicts(self, project_id: int, start: date, end: date) -> list[dict[str, Any]]:
+        rows = self.db.execute(
+            select(Route, Vehicle.name, Driver.name)
+            .outerjoin(Vehicle, Vehicle.id == Route.vehicle_id)
+            .outerjoin(Driver, Driver.id == Route.driver_id)
+            .where(
+                Route.project_id == project_id,
+                Route.status != "cancelled",
+                or_(Route.date < start, Route.date > end),
+            )
+            .order_by(Route.date, Route.id)
+        ).all()
+        return [
+            {
+                "route_id": route.id,
+                "vehicle_id": route.vehicle_id,
+                "vehicle_name": vehicle_name,
+                "driver_id": route.driver_id,
+                "driver_name": driver_name,
+                "date": route.date.isoformat(),
+                "start_time": route.start_time.isoformat(),
+                "end_time": route.end_time.isoformat(),
+                "status": route.status,
+            }
+            for route, vehicle_name, driver_name in rows
+        ]
+
+    def planner_conflicts(self, project_id: int, start: date, end: date) -> dict[str, list[dict[str, Any]]]:
+        """Return crew and transport assignments that would fall outside the new window."""
+
+        return {
+            "crew_conflicts": self.crew_conflicts(project_id, start, end),
+            "transport_conflicts": self.transport_conflicts(project_id, start, end),
+        }
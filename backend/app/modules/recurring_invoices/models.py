@@ -29,6 +29,7 @@ class RecurringInvoice(Base):
     __table_args__ = (
         Index("ix_recurring_invoices_next_run", "next_run"),
         Index("ix_recurring_invoices_status", "status"),
+        Index("ix_recurring_invoices_status_next_run", "status", "next_run"),
     )
 
     id: Mapped[int] = mapped_column(primary_key=True)
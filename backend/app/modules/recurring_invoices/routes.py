@@ -17,11 +17,17 @@ from .schemas import (
     RecurringInvoiceResponse,
     RecurringInvoiceUpdate,
 )
+from .scheduler import scheduler
 from .utils import CronExpressionError, next_run_from_cron
 
 router = APIRouter(prefix="/recurring-invoices", tags=["Recurring Invoices"])
 
 
+def _notify_scheduler(invoice: RecurringInvoice) -> None:
+    active = invoice.status == RecurringInvoiceStatus.ACTIVE
+    scheduler.notify(invoice.id, invoice.next_run if active else None)
+
+
 def _validate_schedule(expression: str, reference: datetime) -> datetime:
     try:
         return next_run_from_cron(expression, reference)
@@ -48,6 +54,7 @@ def create_recurring_invoice(
     db.add(invoice)
     db.commit()
     db.refresh(invoice)
+    _notify_scheduler(invoice)
     return RecurringInvoiceResponse.model_validate(invoice)
 
 
@@ -93,6 +100,7 @@ def update_recurring_invoice(
     db.add(invoice)
     db.commit()
     db.refresh(invoice)
+    _notify_scheduler(invoice)
     return RecurringInvoiceResponse.model_validate(invoice)
 
 
@@ -117,6 +125,7 @@ def delete_recurring_invoice(
     if not deleted:
         raise HTTPException(status.HTTP_404_NOT_FOUND, "Recurring invoice not found")
     db.commit()
+    scheduler.notify(invoice_id, None)
     return Response(status_code=status.HTTP_200_OK)
 
 
@@ -149,6 +158,7 @@ def trigger_invoice_generation(
 
     db.commit()
     db.refresh(log_entry)
+    _notify_scheduler(invoice)
     return RecurringInvoiceLogResponse.model_validate(log_entry)
 
 
@@ -3,14 +3,19 @@
 from __future__ import annotations
 
 import asyncio
+import heapq
 import logging
+import time
 from contextlib import contextmanager
-from datetime import datetime, timedelta
-from typing import Iterator
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Callable, ContextManager, Iterator, Literal
 
+from sqlalchemy import func, select
 from sqlalchemy.exc import OperationalError
 from sqlalchemy.orm import Session
 
+from app.core.config import settings
 from app.core.db import get_db_session
 
 from .models import RecurringInvoice, RecurringInvoiceLog, RecurringInvoiceStatus
@@ -18,6 +23,12 @@ from .utils import CronExpressionError, next_run_from_cron
 
 logger = logging.getLogger(__name__)
 
+_BUSY_RETRY_SECONDS = 1.0
+# A failed heap-mode tick is retried after this delay, doubled per consecutive
+# failure up to the maximum.
+_ERROR_BACKOFF_SECONDS = 1.0
+_MAX_ERROR_BACKOFF_SECONDS = 60.0
+
 
 @contextmanager
 def _session_scope() -> Iterator[Session]:
@@ -29,20 +40,111 @@ def _session_scope() -> Iterator[Session]:
         generator.close()
 
 
+def _naive_utc(value: datetime) -> datetime:
+    if value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _due(now: datetime):
+    return (
+        RecurringInvoice.next_run <= now,
+        RecurringInvoice.status == RecurringInvoiceStatus.ACTIVE,
+    )
+
+
+@dataclass
+class SchedulerStats:
+    """Counters and gauges describing how far the scheduler lags behind."""
+
+    last_tick_at: datetime | None = None
+    last_tick_seconds: float = 0.0
+    oldest_due_at: datetime | None = None
+    lag_seconds: float = 0.0
+    processed_total: int = 0
+    failures_total: int = 0
+    chunks_total: int = 0
+    errors_total: int = 0
+
+    def prometheus_lines(self) -> list[str]:
+        oldest = self.oldest_due_at
+        if oldest is not None and oldest.tzinfo is None:
+            oldest = oldest.replace(tzinfo=timezone.utc)
+        oldest_ts = oldest.timestamp() if oldest is not None else 0
+        return [
+            "# HELP rentguy_recurring_invoice_lag_seconds Age of the oldest due invoice.",
+            "# TYPE rentguy_recurring_invoice_lag_seconds gauge",
+            f"rentguy_recurring_invoice_lag_seconds {self.lag_seconds}",
+            "# HELP rentguy_recurring_invoice_oldest_due_timestamp_seconds Oldest due next_run.",
+            "# TYPE rentguy_recurring_invoice_oldest_due_timestamp_seconds gauge",
+            f"rentguy_recurring_invoice_oldest_due_timestamp_seconds {oldest_ts}",
+            "# HELP rentguy_recurring_invoice_tick_seconds Duration of the last scheduler tick.",
+            "# TYPE rentguy_recurring_invoice_tick_seconds gauge",
+            f"rentguy_recurring_invoice_tick_seconds {self.last_tick_seconds}",
+            "# HELP rentguy_recurring_invoices_processed_total Recurring invoices processed.",
+            "# TYPE rentguy_recurring_invoices_processed_total counter",
+            f"rentguy_recurring_invoices_processed_total {self.processed_total}",
+            "# HELP rentguy_recurring_invoice_failures_total Recurring invoices that failed.",
+            "# TYPE rentguy_recurring_invoice_failures_total counter",
+            f"rentguy_recurring_invoice_failures_total {self.failures_total}",
+            "# HELP rentguy_recurring_invoice_scheduler_errors_total Scheduler ticks that failed.",
+            "# TYPE rentguy_recurring_invoice_scheduler_errors_total counter",
+            f"rentguy_recurring_invoice_scheduler_errors_total {self.errors_total}",
+        ]
+
+
 class RecurringInvoiceScheduler:
-    """Minimal asyncio-based scheduler used during tests and development."""
+    """Asyncio scheduler that processes due recurring invoices in chunks.
 
-    def __init__(self, interval_seconds: int = 60) -> None:
+    Each chunk is claimed with ``SELECT ... FOR UPDATE SKIP LOCKED`` (a no-op on
+    SQLite) and committed on its own, so several app workers can share the
+    backlog without double-processing. All database work runs in a worker
+    thread, keeping the event loop free.
+
+    In ``"poll"`` mode the scheduler checks for due invoices every ``interval``
+    seconds. In ``"heap"`` mode it keeps the ``heap_size`` earliest active
+    ``next_run`` values in a min-heap and sleeps until the first of them. The
+    routes call :meth:`notify` after every change, so a new or rescheduled
+    invoice wakes it early. The heap is reloaded after each run and every
+    ``resync_seconds``, which also picks up changes made by other workers.
+    """
+
+    def __init__(
+        self,
+        interval_seconds: int = 60,
+        *,
+        batch_size: int = 100,
+        mode: Literal["poll", "heap"] = "poll",
+        heap_size: int = 1000,
+        resync_seconds: float = 300.0,
+        session_scope: Callable[[], ContextManager[Session]] = _session_scope,
+    ) -> None:
         self.interval = interval_seconds
+        self.batch_size = batch_size
+        self.mode = mode
+        self.heap_size = heap_size
+        self.resync_seconds = resync_seconds
+        self._session_scope = session_scope
+        self.stats = SchedulerStats()
         self._task: asyncio.Task[None] | None = None
         self._running = False
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._wakeup: asyncio.Event | None = None
+        self._heap: list[tuple[datetime, int]] = []
+        self._next_runs: dict[int, datetime] = {}
+        # ``next_run`` of the last loaded invoice when the heap was full; later
+        # invoices are not tracked until the next reload.
+        self._horizon: datetime | None = None
 
     async def start(self) -> None:
         if self._running:
             return
         self._running = True
-        self._task = asyncio.create_task(self._runner())
-        logger.info("Recurring invoice scheduler started")
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        runner = self._heap_runner() if self.mode == "heap" else self._runner()
+        self._task = asyncio.create_task(runner)
+        logger.info("Recurring invoice scheduler started", extra={"mode": self.mode})
 
     async def shutdown(self) -> None:
         if not self._running:
@@ -58,38 +160,189 @@ class RecurringInvoiceScheduler:
 
     async def _runner(self) -> None:
         while self._running:
-            await self.process_invoices()
+            try:
+                await self.process_invoices()
+            except Exception:
+                self._tick_failed()
             await asyncio.sleep(self.interval)
 
-    async def process_invoices(self) -> None:
-        """Process invoices that are due for execution."""
+    def _tick_failed(self) -> None:
+        # Any database error between chunks lands here; the runner must survive
+        # it, since nothing restarts the task.
+        self.stats.errors_total += 1
+        logger.exception("Recurring invoice scheduler tick failed")
+
+    def notify(self, invoice_id: int, next_run: datetime | None) -> None:
+        """Record that an invoice now runs at ``next_run`` (``None``: never).
+
+        Safe to call from route handlers running in the thread pool. Does
+        nothing unless the scheduler runs in heap mode.
+        """
 
-        with _session_scope() as session:
-            now = datetime.utcnow()
+        loop = self._loop
+        if self.mode != "heap" or not self._running or loop is None or loop.is_closed():
+            return
+        loop.call_soon_threadsafe(self._track, invoice_id, next_run)
+
+    def _track(self, invoice_id: int, next_run: datetime | None) -> None:
+        if next_run is None:
+            self._next_runs.pop(invoice_id, None)
+            return
+        next_run = _naive_utc(next_run)
+        if self._horizon is not None and next_run > self._horizon:
+            self._next_runs.pop(invoice_id, None)
+            return
+        self._next_runs[invoice_id] = next_run
+        heapq.heappush(self._heap, (next_run, invoice_id))
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def _earliest(self) -> datetime | None:
+        """Drop stale heap entries and return the earliest tracked ``next_run``."""
+
+        while self._heap:
+            next_run, invoice_id = self._heap[0]
+            if self._next_runs.get(invoice_id) == next_run:
+                return next_run
+            heapq.heappop(self._heap)
+        return None
+
+    def _load_upcoming(self) -> list[tuple[datetime, int]] | None:
+        with self._session_scope() as session:
             try:
-                invoices = (
-                    session.query(RecurringInvoice)
-                    .filter(
-                        RecurringInvoice.next_run <= now,
-                        RecurringInvoice.status == RecurringInvoiceStatus.ACTIVE,
-                    )
-                    .all()
+                rows = session.execute(
+                    select(RecurringInvoice.next_run, RecurringInvoice.id)
+                    .where(RecurringInvoice.status == RecurringInvoiceStatus.ACTIVE)
+                    .order_by(RecurringInvoice.next_run, RecurringInvoice.id)
+                    .limit(self.heap_size)
+                ).all()
+            except OperationalError:
+                session.rollback()
+                return None
+        return [(_naive_utc(next_run), invoice_id) for next_run, invoice_id in rows]
+
+    async def _reload(self) -> None:
+        upcoming = await asyncio.to_thread(self._load_upcoming)
+        if upcoming is None:
+            logger.debug(
+                "Recurring invoice tables unavailable; skipping tick until setup completes"
+            )
+            upcoming = []
+        self._heap = list(upcoming)
+        heapq.heapify(self._heap)
+        self._next_runs = {invoice_id: next_run for next_run, invoice_id in upcoming}
+        full = len(upcoming) >= self.heap_size
+        self._horizon = upcoming[-1][0] if full else None
+
+    async def _heap_runner(self) -> None:
+        assert self._wakeup is not None
+        resync_at = 0.0
+        errors = 0
+        while self._running:
+            try:
+                resync_at = await self._heap_tick(resync_at)
+                errors = 0
+            except Exception:
+                self._tick_failed()
+                errors += 1
+                await asyncio.sleep(
+                    min(_ERROR_BACKOFF_SECONDS * 2 ** (errors - 1), _MAX_ERROR_BACKOFF_SECONDS)
+                )
+                resync_at = 0.0  # the heap may be stale; reload before trusting it
+
+    async def _heap_tick(self, resync_at: float) -> float:
+        """Run due invoices or wait for the next one; return the next resync time."""
+
+        assert self._wakeup is not None
+        if time.monotonic() >= resync_at or (
+            self._horizon is not None and self._earliest() is None
+        ):
+            await self._reload()
+            resync_at = time.monotonic() + self.resync_seconds
+
+        earliest = self._earliest()
+        if earliest is not None and earliest <= datetime.utcnow():
+            if not await self.process_invoices():
+                # Claimed by another worker or not processable yet; don't spin.
+                await asyncio.sleep(_BUSY_RETRY_SECONDS)
+            await self._reload()
+            return time.monotonic() + self.resync_seconds
+
+        timeout = resync_at - time.monotonic()
+        if earliest is not None:
+            timeout = min(timeout, (earliest - datetime.utcnow()).total_seconds())
+        self._wakeup.clear()
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout=max(timeout, 0.0))
+        except asyncio.TimeoutError:
+            pass
+        return resync_at
+
+    async def process_invoices(self) -> int:
+        """Process invoices that are due for execution and return how many were handled."""
+
+        now = datetime.utcnow()
+        began = time.perf_counter()
+        processed = await asyncio.to_thread(self._process_due, now)
+        self.stats.last_tick_at = now
+        self.stats.last_tick_seconds = time.perf_counter() - began
+        return processed
+
+    def _process_due(self, now: datetime) -> int:
+        with self._session_scope() as session:
+            try:
+                oldest = session.scalar(
+                    select(func.min(RecurringInvoice.next_run)).where(*_due(now))
                 )
             except OperationalError:
                 session.rollback()
                 logger.debug(
                     "Recurring invoice tables unavailable; skipping tick until setup completes"
                 )
-                return
+                return 0
+        self._record_lag(oldest, now)
 
-            for invoice in invoices:
-                await self._process_single_invoice(session, invoice, now)
+        processed = 0
+        while True:
+            with self._session_scope() as session:
+                invoices = list(
+                    session.scalars(
+                        select(RecurringInvoice)
+                        .where(*_due(now))
+                        .order_by(RecurringInvoice.next_run, RecurringInvoice.id)
+                        .limit(self.batch_size)
+                        .with_for_update(skip_locked=True)
+                    )
+                )
+                if not invoices:
+                    break
+                failures = sum(
+                    not self._process_single_invoice(session, invoice, now) for invoice in invoices
+                )
+                session.commit()
+            processed += len(invoices)
+            self.stats.processed_total += len(invoices)
+            self.stats.failures_total += failures
+            self.stats.chunks_total += 1
+            if len(invoices) < self.batch_size:
+                break
+        return processed
 
-            session.commit()
+    def _record_lag(self, oldest: datetime | None, now: datetime) -> None:
+        self.stats.oldest_due_at = oldest
+        if oldest is None:
+            self.stats.lag_seconds = 0.0
+            return
+        if oldest.tzinfo is not None:
+            oldest = oldest.astimezone(timezone.utc).replace(tzinfo=None)
+        self.stats.lag_seconds = max((now - oldest).total_seconds(), 0.0)
 
-    async def _process_single_invoice(
+    def prometheus_payload(self) -> str:
+        return "\n".join(self.stats.prometheus_lines()) + "\n"
+
+    def _process_single_invoice(
         self, session: Session, invoice: RecurringInvoice, reference_time: datetime
-    ) -> None:
+    ) -> bool:
         try:
             log_entry = RecurringInvoiceLog(
                 recurring_invoice_id=invoice.id,
@@ -100,6 +353,7 @@ class RecurringInvoiceScheduler:
 
             invoice.next_run = next_run_from_cron(invoice.schedule, reference_time)
             session.add(invoice)
+            return True
         except CronExpressionError as exc:  # pragma: no cover - defensive
             logger.exception("Failed to process invoice %s", invoice.id)
             log_entry = RecurringInvoiceLog(
@@ -120,8 +374,14 @@ class RecurringInvoiceScheduler:
             session.add(log_entry)
             invoice.next_run = reference_time + timedelta(minutes=5)
             session.add(invoice)
+        return False
 
 
-scheduler = RecurringInvoiceScheduler()
+scheduler = RecurringInvoiceScheduler(
+    batch_size=settings.RECURRING_INVOICE_BATCH_SIZE,
+    mode=settings.RECURRING_INVOICE_SCHEDULER_MODE,
+    heap_size=settings.RECURRING_INVOICE_HEAP_SIZE,
+    resync_seconds=settings.RECURRING_INVOICE_RESYNC_SECONDS,
+)
 
-__all__ = ["RecurringInvoiceScheduler", "scheduler"]
+__all__ = ["RecurringInvoiceScheduler", "SchedulerStats", "scheduler"]
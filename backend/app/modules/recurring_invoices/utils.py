@@ -2,8 +2,11 @@
 
 from __future__ import annotations
 
+import calendar
+from bisect import bisect_left
 from dataclasses import dataclass
 from datetime import datetime, timedelta
+from functools import lru_cache
 from typing import Optional, Set
 
 DAY_NAME_MAP = {
@@ -118,62 +121,128 @@ def parse_cron_expression(expression: str) -> CronFields:
     return CronFields(minute, hour, day_of_month, month, day_of_week)
 
 
-def next_run_from_cron(expression: str, reference: datetime) -> datetime:
-    fields = parse_cron_expression(expression)
-    candidate = reference.replace(second=0, microsecond=0) + timedelta(minutes=1)
-
-    # Search up to one year ahead which covers all practical cases for the app.
-    for _ in range(525600):
-        if not _value_matches(candidate.minute, fields.minute):
-            candidate += timedelta(minutes=1)
-            continue
-        if not _value_matches(candidate.hour, fields.hour):
-            candidate += timedelta(minutes=60)
-            candidate = candidate.replace(minute=0)
-            continue
-        if not _value_matches(candidate.month, fields.month):
-            candidate = (candidate.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
-            continue
-
-        dom_match = _value_matches(candidate.day, fields.day_of_month)
-        dow_match = _value_matches(candidate.weekday(), fields.day_of_week)
-        if fields.day_of_month_matches_any or fields.day_of_week_matches_any:
-            if not (dom_match and dow_match):
-                if not dom_match and not fields.day_of_month_matches_any:
-                    candidate += timedelta(days=1)
-                    candidate = candidate.replace(hour=0, minute=0)
-                    continue
-                if not dow_match and not fields.day_of_week_matches_any:
-                    candidate += timedelta(days=1)
-                    candidate = candidate.replace(hour=0, minute=0)
-                    continue
-        else:
-            if not (dom_match or dow_match):
-                candidate += timedelta(days=1)
-                candidate = candidate.replace(hour=0, minute=0)
-                continue
+# Feb 29 can be eight years away (2096 -> 2104); anything rarer never fires.
+MAX_SEARCH_YEARS = 8
+
 
-        return candidate
+def _sorted(values: Optional[Set[int]], minimum: int, maximum: int) -> tuple[int, ...]:
+    return tuple(sorted(values)) if values is not None else tuple(range(minimum, maximum + 1))
 
-    raise CronExpressionError("Unable to compute next run within one year")
+
+@dataclass(frozen=True)
+class CompiledCron:
+    """A parsed cron expression with every field expanded to a sorted tuple.
+
+    Finding the next run jumps from one allowed value to the next, month by
+    month, day by day and so on, instead of testing every minute in between.
+    Day of week follows cron: ``0`` (or ``7``) is Sunday. When both day fields
+    are restricted a day matches if either does.
+    """
+
+    expression: str
+    minutes: tuple[int, ...]
+    hours: tuple[int, ...]
+    days_of_month: Optional[frozenset[int]]
+    months: tuple[int, ...]
+    days_of_week: Optional[frozenset[int]]
+
+    @classmethod
+    def from_fields(cls, expression: str, fields: CronFields) -> "CompiledCron":
+        return cls(
+            expression=expression,
+            minutes=_sorted(fields.minute, 0, 59),
+            hours=_sorted(fields.hour, 0, 23),
+            days_of_month=frozenset(fields.day_of_month) if fields.day_of_month else None,
+            months=_sorted(fields.month, 1, 12),
+            days_of_week=frozenset(fields.day_of_week) if fields.day_of_week else None,
+        )
+
+    def _days(self, year: int, month: int, first_day: int) -> list[int]:
+        last_day = calendar.monthrange(year, month)[1]
+        if self.days_of_month is None and self.days_of_week is None:
+            return list(range(first_day, last_day + 1))
+        # ``weekday()`` counts from Monday, cron from Sunday.
+        first_dow = (calendar.weekday(year, month, 1) + 1) % 7
+        return [
+            day
+            for day in range(first_day, last_day + 1)
+            if self._day_matches(day, (first_dow + day - 1) % 7)
+        ]
+
+    def _day_matches(self, day: int, day_of_week: int) -> bool:
+        if self.days_of_month is None:
+            return self.days_of_week is None or day_of_week in self.days_of_week
+        if self.days_of_week is None:
+            return day in self.days_of_month
+        return day in self.days_of_month or day_of_week in self.days_of_week
+
+    def next_run(self, reference: datetime) -> datetime:
+        """Return the first matching minute strictly after ``reference``."""
+
+        start = reference.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        for year in range(start.year, start.year + MAX_SEARCH_YEARS + 1):
+            first_month = start.month if year == start.year else 1
+            for month in self.months[bisect_left(self.months, first_month) :]:
+                same_month = year == start.year and month == start.month
+                for day in self._days(year, month, start.day if same_month else 1):
+                    same_day = same_month and day == start.day
+                    first_hour = start.hour if same_day else 0
+                    for hour in self.hours[bisect_left(self.hours, first_hour) :]:
+                        first_minute = start.minute if same_day and hour == start.hour else 0
+                        index = bisect_left(self.minutes, first_minute)
+                        if index < len(self.minutes):
+                            return start.replace(
+                                year=year,
+                                month=month,
+                                day=day,
+                                hour=hour,
+                                minute=self.minutes[index],
+                            )
+        raise CronExpressionError(
+            f"Unable to compute next run within {MAX_SEARCH_YEARS} years"
+        )
+
+    def next_runs(self, reference: datetime, count: int) -> list[datetime]:
+        """Return the next ``count`` runs after ``reference`` in order."""
+
+        runs: list[datetime] = []
+        current = reference
+        for _ in range(count):
+            current = self.next_run(current)
+            runs.append(current)
+        return runs
+
+
+@lru_cache(maxsize=1024)
+def compile_cron(expression: str) -> CompiledCron:
+    """Parse ``expression`` once; later calls return the cached compiled form."""
+
+    return CompiledCron.from_fields(expression, parse_cron_expression(expression))
+
+
+def next_run_from_cron(expression: str, reference: datetime) -> datetime:
+    return compile_cron(expression).next_run(reference)
 
 
-def _value_matches(value: int, allowed: Optional[Set[int]]) -> bool:
-    return allowed is None or value in allowed
+def next_n_runs(expression: str, reference: datetime, count: int) -> list[datetime]:
+    return compile_cron(expression).next_runs(reference, count)
 
 
 def is_valid_cron(expression: str) -> bool:
     try:
-        parse_cron_expression(expression)
+        compile_cron(expression)
         return True
     except CronExpressionError:
         return False
 
 
 __all__ = [
+    "CompiledCron",
     "CronExpressionError",
     "CronFields",
+    "compile_cron",
     "is_valid_cron",
+    "next_n_runs",
     "next_run_from_cron",
     "parse_cron_expression",
 ]
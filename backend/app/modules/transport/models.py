@@ -1,5 +1,5 @@
 from sqlalchemy.orm import Mapped, mapped_column
-from sqlalchemy import Integer, String, Boolean, Date, Time, DateTime, Numeric, ForeignKey, func, Index, UniqueConstraint
+from sqlalchemy import Integer, String, Boolean, Date, Time, DateTime, Float, Numeric, ForeignKey, func, Index, UniqueConstraint
 from app.core.db import Base
 
 class Vehicle(Base):
@@ -55,3 +55,5 @@ class RouteStop(Base):
     contact_phone: Mapped[str] = mapped_column(String(60))
     eta: Mapped[DateTime] = mapped_column(DateTime(timezone=True))
     etd: Mapped[DateTime] = mapped_column(DateTime(timezone=True))
+    latitude: Mapped[float | None] = mapped_column(Float, nullable=True)
+    longitude: Mapped[float | None] = mapped_column(Float, nullable=True)
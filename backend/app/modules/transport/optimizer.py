@@ -0,0 +1,316 @@
+"""Route-stop sequencing: nearest neighbour construction plus 2-opt/Or-opt.
+
+Distances are great-circle (haversine) kilometres held in a NumPy matrix, and
+travel times assume a constant average speed. Every stop may carry a time
+window. Arriving before it opens means waiting; arriving after it closes
+counts as lateness, which costs ``late_penalty_km`` per minute. The optimizer
+therefore only accepts a detour when it saves lateness.
+
+The path starts at an optional depot and ends at the last stop. Without a
+depot the first stop is free to choose, which is modelled as a depot at zero
+distance from every stop.
+
+Improvement moves are scored by their distance delta, vectorised over all
+candidate positions. Only the moves that shorten the route are re-checked
+against the time windows. When stops are late, relocating a late stop earlier
+is tried as well, even if that lengthens the route.
+"""
+
+from __future__ import annotations
+
+import math
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Sequence
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0088
+_EPS = 1e-9
+
+
+class RouteOptimizationError(ValueError):
+    """Raised when a route cannot be optimised, e.g. stops without coordinates."""
+
+
+@dataclass(frozen=True)
+class StopInput:
+    latitude: float
+    longitude: float
+    earliest: datetime | None = None
+    latest: datetime | None = None
+
+
+@dataclass(frozen=True)
+class OptimizationResult:
+    order: list[int]
+    arrivals: list[datetime]
+    distance_km: float
+    travel_minutes: float
+    lateness_minutes: float
+    initial_distance_km: float
+    initial_lateness_minutes: float
+
+
+def haversine_matrix(latitudes: Sequence[float], longitudes: Sequence[float]) -> np.ndarray:
+    """Pairwise great-circle distances in kilometres."""
+
+    lat = np.radians(np.asarray(latitudes, dtype=float))
+    lon = np.radians(np.asarray(longitudes, dtype=float))
+    dlat = lat[:, None] - lat[None, :]
+    dlon = lon[:, None] - lon[None, :]
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat)[:, None] * np.cos(lat)[None, :] * np.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def _offset_minutes(value: datetime | None, start: datetime, default: float) -> float:
+    if value is None:
+        return default
+    if (value.tzinfo is None) != (start.tzinfo is None):
+        # Stored windows and the route start may differ in tz-awareness;
+        # both are wall-clock times of the same day.
+        value = value.replace(tzinfo=start.tzinfo)
+    return (value - start).total_seconds() / 60
+
+
+class RouteOptimizer:
+    """Reorder stops to minimise distance plus penalised time-window lateness."""
+
+    def __init__(
+        self,
+        *,
+        speed_kmh: float = 50.0,
+        service_minutes: float = 15.0,
+        late_penalty_km: float = 10.0,
+        time_limit: float = 0.8,
+    ) -> None:
+        self.speed_kmh = speed_kmh
+        self.service_minutes = service_minutes
+        self.late_penalty_km = late_penalty_km
+        self.time_limit = time_limit
+
+    def optimize(
+        self,
+        stops: Sequence[StopInput],
+        *,
+        start: datetime,
+        depot: tuple[float, float] | None = None,
+    ) -> OptimizationResult:
+        """Return the best order found as indices into ``stops``."""
+
+        problem = _Problem(self, stops, start, depot)
+        initial = list(range(1, len(stops) + 1))
+        order = problem.improve(problem.nearest_neighbour())
+        if problem.cost(initial) < problem.cost(order):
+            order = min(order, problem.improve(initial), key=problem.cost)
+        arrivals, lateness = problem.schedule(order)
+        return OptimizationResult(
+            order=[node - 1 for node in order],
+            arrivals=[start + timedelta(minutes=minutes) for minutes in arrivals],
+            distance_km=problem.distance(order),
+            travel_minutes=problem.distance(order) / self.speed_kmh * 60,
+            lateness_minutes=lateness,
+            initial_distance_km=problem.distance(initial),
+            initial_lateness_minutes=problem.schedule(initial)[1],
+        )
+
+
+class _Problem:
+    """Matrices and move evaluation for one optimisation run; node 0 is the depot."""
+
+    def __init__(
+        self,
+        optimizer: RouteOptimizer,
+        stops: Sequence[StopInput],
+        start: datetime,
+        depot: tuple[float, float] | None,
+    ) -> None:
+        self.optimizer = optimizer
+        self.deadline = time.perf_counter() + optimizer.time_limit
+        latitudes = [depot[0] if depot else 0.0] + [stop.latitude for stop in stops]
+        longitudes = [depot[1] if depot else 0.0] + [stop.longitude for stop in stops]
+        self.dist = haversine_matrix(latitudes, longitudes)
+        if depot is None:
+            self.dist[0, :] = 0.0
+            self.dist[:, 0] = 0.0
+        self.travel = (self.dist / optimizer.speed_kmh * 60).tolist()
+        self.earliest = [-math.inf] + [
+            _offset_minutes(stop.earliest, start, -math.inf) for stop in stops
+        ]
+        self.latest = [math.inf] + [_offset_minutes(stop.latest, start, math.inf) for stop in stops]
+        self.has_windows = any(math.isfinite(value) for value in self.latest[1:]) or any(
+            math.isfinite(value) for value in self.earliest[1:]
+        )
+
+    # -- evaluation -------------------------------------------------------
+
+    def schedule(self, order: Sequence[int]) -> tuple[list[float], float]:
+        """Arrival minutes after the start for each stop, and total lateness."""
+
+        service = self.optimizer.service_minutes
+        clock = 0.0
+        previous = 0
+        lateness = 0.0
+        arrivals: list[float] = []
+        for node in order:
+            clock += self.travel[previous][node]
+            arrivals.append(clock)
+            if clock > self.latest[node]:
+                lateness += clock - self.latest[node]
+            clock = max(clock, self.earliest[node]) + service
+            previous = node
+        return arrivals, lateness
+
+    def distance(self, order: Sequence[int]) -> float:
+        path = np.fromiter([0, *order], dtype=np.intp)
+        return float(self.dist[path[:-1], path[1:]].sum())
+
+    def cost(self, order: Sequence[int]) -> float:
+        cost = self.distance(order)
+        if self.has_windows:
+            cost += self.optimizer.late_penalty_km * self.schedule(order)[1]
+        return cost
+
+    def _expired(self) -> bool:
+        return time.perf_counter() > self.deadline
+
+    # -- construction -----------------------------------------------------
+
+    def nearest_neighbour(self) -> list[int]:
+        """Greedy tour picking the stop that can be served soonest, then closest."""
+
+        service = self.optimizer.service_minutes
+        penalty = self.optimizer.late_penalty_km * self.optimizer.speed_kmh / 60
+        unvisited = set(range(1, len(self.earliest)))
+        order: list[int] = []
+        current, clock = 0, 0.0
+        while unvisited:
+            best, best_score, best_arrival = -1, math.inf, 0.0
+            for node in unvisited:
+                arrival = clock + self.travel[current][node]
+                begin = max(arrival, self.earliest[node])
+                late = max(0.0, arrival - self.latest[node])
+                # Everything in minutes: time until service can start, plus lateness.
+                score = (begin - clock) + penalty * late
+                if score < best_score - _EPS or (
+                    abs(score - best_score) <= _EPS and node < best
+                ):
+                    best, best_score, best_arrival = node, score, begin
+            order.append(best)
+            unvisited.remove(best)
+            current, clock = best, best_arrival + service
+        return order
+
+    # -- improvement ------------------------------------------------------
+
+    def improve(self, order: list[int]) -> list[int]:
+        current = self.cost(order)
+        improved = True
+        while improved and not self._expired():
+            improved = False
+            for move in (self._two_opt, self._or_opt, self._relocate_late):
+                candidate = move(order, current)
+                if candidate is not None:
+                    order, current = candidate
+                    improved = True
+        return order
+
+    def _accept(self, candidate: list[int], delta: float, current: float):
+        if not self.has_windows:
+            return candidate, current + delta
+        cost = self.cost(candidate)
+        if cost < current - _EPS:
+            return candidate, cost
+        return None
+
+    def _two_opt(self, order: list[int], current: float):
+        path = np.fromiter([0, *order], dtype=np.intp)
+        last = len(path) - 1
+        dist = self.dist
+        for i in range(1, last):
+            if self._expired():
+                return None
+            j = np.arange(i + 1, last + 1)
+            delta = dist[path[i - 1], path[j]] - dist[path[i - 1], path[i]]
+            inner = j < last
+            closing = np.zeros(len(j))
+            closing[inner] = (
+                dist[path[i], path[j[inner] + 1]] - dist[path[j[inner]], path[j[inner] + 1]]
+            )
+            delta += closing
+            for index in np.argsort(delta)[:5]:
+                if delta[index] >= -_EPS:
+                    break
+                end = int(j[index])
+                candidate = order[: i - 1] + order[i - 1 : end][::-1] + order[end:]
+                accepted = self._accept(candidate, float(delta[index]), current)
+                if accepted is not None:
+                    return accepted
+        return None
+
+    def _or_opt(self, order: list[int], current: float):
+        dist = self.dist
+        size = len(order)
+        for length in (1, 2, 3):
+            for i in range(size - length + 1):
+                if self._expired():
+                    return None
+                segment = order[i : i + length]
+                rest = order[:i] + order[i + length :]
+                before = order[i - 1] if i > 0 else 0
+                after = order[i + length] if i + length < size else None
+                head, tail = segment[0], segment[-1]
+                removed = dist[before, head]
+                if after is not None:
+                    removed += dist[tail, after] - dist[before, after]
+
+                nodes = np.fromiter([0, *rest], dtype=np.intp)
+                left, right = nodes[:-1], nodes[1:]
+                forward = np.append(
+                    dist[left, head] + dist[tail, right] - dist[left, right], dist[nodes[-1], head]
+                )
+                backward = np.append(
+                    dist[left, tail] + dist[head, right] - dist[left, right], dist[nodes[-1], tail]
+                )
+                for deltas, piece in ((forward, segment), (backward, segment[::-1])):
+                    deltas = deltas - removed
+                    deltas[i] = np.inf  # re-inserting where it came from
+                    for position in np.argsort(deltas)[:3]:
+                        if deltas[position] >= -_EPS:
+                            break
+                        candidate = rest[:position] + piece + rest[position:]
+                        accepted = self._accept(candidate, float(deltas[position]), current)
+                        if accepted is not None:
+                            return accepted
+        return None
+
+    def _relocate_late(self, order: list[int], current: float):
+        """Move a late stop earlier even if the route gets longer."""
+
+        if not self.has_windows:
+            return None
+        arrivals, lateness = self.schedule(order)
+        if lateness <= _EPS:
+            return None
+        for index, node in enumerate(order):
+            if arrivals[index] <= self.latest[node]:
+                continue
+            rest = order[:index] + order[index + 1 :]
+            for position in range(index):
+                if self._expired():
+                    return None
+                candidate = rest[:position] + [node] + rest[position:]
+                cost = self.cost(candidate)
+                if cost < current - _EPS:
+                    return candidate, cost
+        return None
+
+
+__all__ = [
+    "OptimizationResult",
+    "RouteOptimizationError",
+    "RouteOptimizer",
+    "StopInput",
+    "haversine_matrix",
+]
@@ -3,6 +3,17 @@ from reportlab.lib.pagesizes import A4
 from reportlab.pdfgen import canvas
 from io import BytesIO
 from datetime import datetime
+from types import SimpleNamespace
+import hashlib
+import json
+
+# Bump when the layout changes so cached documents are regenerated.
+LAYOUT_VERSION = 1
+
+_ROUTE_FIELDS = ("id", "project_id", "date", "status")
+_VEHICLE_FIELDS = ("name", "plate", "capacity_kg", "volume_m3")
+_DRIVER_FIELDS = ("name", "license_types", "phone")
+_STOP_FIELDS = ("sequence", "address", "contact_name", "contact_phone", "eta", "etd")
 
 
 def _header(c: canvas.Canvas, route, vehicle, driver) -> None:
@@ -65,13 +76,66 @@ def _signature_block(c: canvas.Canvas, y: float) -> None:
     c.drawString(25, y, "Handtekening klant:     _____________________________ Datum: ____________")
 
 
-def build_transport_pdf(route, stops, vehicle, driver):
-    buf = BytesIO()
-    c = canvas.Canvas(buf, pagesize=A4)
+def _draw_manifest(c: canvas.Canvas, route, stops, vehicle, driver) -> None:
     _header(c, route, vehicle, driver)
     y = _stops_table(c, stops, route, vehicle, driver)
     _signature_block(c, y)
     c.showPage()
+
+
+def build_transport_pdf(route, stops, vehicle, driver):
+    buf = BytesIO()
+    c = canvas.Canvas(buf, pagesize=A4)
+    _draw_manifest(c, route, stops, vehicle, driver)
     c.save()
     buf.seek(0)
     return buf.getvalue()
+
+
+def _fields(obj, names) -> dict:
+    # Everything ends up in f-strings, so ``str`` keeps the rendered text identical.
+    return {name: "-" if obj is None else str(getattr(obj, name)) for name in names}
+
+
+def manifest_snapshot(route, stops, vehicle, driver) -> dict:
+    """Plain, picklable copy of everything a transport PDF shows."""
+
+    return {
+        "route": _fields(route, _ROUTE_FIELDS),
+        "stops": [_fields(stop, _STOP_FIELDS) for stop in stops],
+        "vehicle": _fields(vehicle, _VEHICLE_FIELDS),
+        "driver": _fields(driver, _DRIVER_FIELDS),
+    }
+
+
+def manifest_key(snapshot: dict) -> str:
+    """Content hash of a manifest snapshot, used as cache key and ETag."""
+
+    payload = json.dumps([LAYOUT_VERSION, snapshot], sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _manifest_args(snapshot: dict) -> tuple:
+    return (
+        SimpleNamespace(**snapshot["route"]),
+        [SimpleNamespace(**stop) for stop in snapshot["stops"]],
+        SimpleNamespace(**snapshot["vehicle"]),
+        SimpleNamespace(**snapshot["driver"]),
+    )
+
+
+def render_manifest(snapshot: dict) -> bytes:
+    """Render a snapshot; runs in worker processes, so keep it module level."""
+
+    return build_transport_pdf(*_manifest_args(snapshot))
+
+
+def render_manifest_bundle(snapshots: list[dict]) -> bytes:
+    """Render several manifests into one document, each starting on a new page."""
+
+    buf = BytesIO()
+    c = canvas.Canvas(buf, pagesize=A4)
+    for snapshot in snapshots:
+        _draw_manifest(c, *_manifest_args(snapshot))
+    c.save()
+    return buf.getvalue()
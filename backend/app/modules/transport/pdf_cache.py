@@ -0,0 +1,177 @@
+"""Content-addressed disk cache and process pool for transport PDFs.
+
+A transport PDF only depends on its manifest: route, stops, vehicle and
+driver. :func:`~app.modules.transport.pdf.manifest_key` hashes that snapshot,
+and the hash names the cached file and doubles as the HTTP ``ETag``. Unchanged
+routes are served from disk, or answered with ``304 Not Modified`` before the
+cache is even read.
+
+Misses are rendered in a process pool, so ReportLab's CPU work neither blocks
+the event loop nor competes with request threads for the GIL. Concurrent
+requests for the same manifest share one render. The cache evicts the least
+recently used files once it grows beyond ``max_bytes``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Any, Callable
+
+from .pdf import manifest_key, render_manifest, render_manifest_bundle
+
+logger = logging.getLogger(__name__)
+
+
+class PdfDiskCache:
+    """LRU cache of rendered PDFs stored as ``<key>.pdf`` files."""
+
+    def __init__(self, directory: str | Path, *, max_bytes: int) -> None:
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, int] | None = None
+        self._size = 0
+
+    def _index(self) -> OrderedDict[str, int]:
+        # Loaded lazily; file mtimes carry the LRU order across restarts.
+        if self._entries is None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            files = sorted(
+                (entry.stat().st_mtime, entry.name[:-4], entry.stat().st_size)
+                for entry in os.scandir(self.directory)
+                if entry.is_file() and entry.name.endswith(".pdf")
+            )
+            self._entries = OrderedDict((key, size) for _, key, size in files)
+            self._size = sum(self._entries.values())
+        return self._entries
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.pdf"
+
+    def get(self, key: str) -> bytes | None:
+        with self._lock:
+            entries = self._index()
+            if key not in entries:
+                return None
+            path = self._path(key)
+            try:
+                data = path.read_bytes()
+                os.utime(path)
+            except FileNotFoundError:
+                self._size -= entries.pop(key)
+                return None
+            entries.move_to_end(key)
+            return data
+
+    def put(self, key: str, data: bytes) -> None:
+        with self._lock:
+            entries = self._index()
+            path = self._path(key)
+            handle, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(handle, "wb") as fh:
+                fh.write(data)
+            os.replace(tmp, path)
+            self._size += len(data) - entries.pop(key, 0)
+            entries[key] = len(data)
+            while self._size > self.max_bytes and len(entries) > 1:
+                old_key, old_size = entries.popitem(last=False)
+                self._path(old_key).unlink(missing_ok=True)
+                self._size -= old_size
+
+    @property
+    def size(self) -> int:
+        with self._lock:
+            self._index()
+            return self._size
+
+
+class TransportPdfRenderer:
+    """Serve transport PDFs from the disk cache, rendering misses in a process pool.
+
+    ``workers=0`` renders on a worker thread instead, which is what tests and
+    single-core deployments use.
+    """
+
+    def __init__(self, cache: PdfDiskCache, *, workers: int = 2) -> None:
+        self.cache = cache
+        self.workers = workers
+        self._pool: Executor | None = None
+        self._inflight: dict[str, asyncio.Future[bytes]] = {}
+
+    def _executor(self) -> Executor | None:
+        if self.workers <= 0:
+            return None
+        if self._pool is None:
+            # ``spawn`` avoids forking a process that runs threads and an event loop.
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._pool
+
+    async def render(self, snapshot: dict, key: str | None = None) -> bytes:
+        """Return the PDF for ``snapshot``, from cache when possible."""
+
+        return await self._cached(key or manifest_key(snapshot), render_manifest, snapshot)
+
+    async def render_bundle(self, snapshots: list[dict]) -> bytes:
+        """Return one PDF holding every manifest in ``snapshots``, in order."""
+
+        key = manifest_key({"bundle": [manifest_key(snapshot) for snapshot in snapshots]})
+        return await self._cached(key, render_manifest_bundle, snapshots)
+
+    async def _cached(self, key: str, render: Callable[[Any], bytes], payload: Any) -> bytes:
+        cached = await asyncio.to_thread(self.cache.get, key)
+        if cached is not None:
+            return cached
+
+        pending = self._inflight.get(key)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        future: asyncio.Future[bytes] = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            data = await self._render(render, payload)
+            await asyncio.to_thread(self.cache.put, key, data)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as exc:
+            future.set_exception(exc)
+            # Mark retrieved so an unawaited failure does not log a warning.
+            future.exception()
+            raise
+        else:
+            future.set_result(data)
+            return data
+        finally:
+            self._inflight.pop(key, None)
+
+    async def _render(self, render: Callable[[Any], bytes], payload: Any) -> bytes:
+        loop = asyncio.get_running_loop()
+        executor = self._executor()
+        if executor is None:
+            return await asyncio.to_thread(render, payload)
+        try:
+            return await loop.run_in_executor(executor, render, payload)
+        except BrokenProcessPool:
+            logger.exception("Transport PDF process pool broke; rendering on a thread")
+            self.shutdown()
+            return await asyncio.to_thread(render, payload)
+
+    def shutdown(self) -> None:
+        pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+__all__ = ["PdfDiskCache", "TransportPdfRenderer"]
@@ -1,6 +1,8 @@
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from sqlalchemy import select
-from typing import List
+from datetime import date
+from typing import Collection, List
 from .models import Vehicle, Driver, Route, RouteStop
 
 class TransportRepo:
@@ -30,3 +32,68 @@ class TransportRepo:
         return self.db.get(Route, rid)
     def list_stops(self, rid: int) -> list[RouteStop]:
         return self.db.execute(select(RouteStop).where(RouteStop.route_id==rid).order_by(RouteStop.sequence)).scalars().all()
+
+
+class AsyncTransportRepo:
+    """:class:`TransportRepo` counterpart bound to an ``AsyncSession``."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    # Vehicles
+    async def list_vehicles(self) -> list[Vehicle]:
+        result = await self.db.execute(select(Vehicle).order_by(Vehicle.name))
+        return list(result.scalars().all())
+    async def add_vehicle(self, v: Vehicle) -> Vehicle:
+        self.db.add(v); await self.db.flush(); return v
+    async def get_vehicle(self, vid: int) -> Vehicle | None:
+        return await self.db.get(Vehicle, vid)
+
+    # Drivers
+    async def list_drivers(self) -> list[Driver]:
+        result = await self.db.execute(select(Driver).order_by(Driver.name))
+        return list(result.scalars().all())
+    async def add_driver(self, d: Driver) -> Driver:
+        self.db.add(d); await self.db.flush(); return d
+    async def get_driver(self, did: int) -> Driver | None:
+        return await self.db.get(Driver, did)
+
+    # Routes
+    async def list_routes(self) -> list[Route]:
+        result = await self.db.execute(select(Route).order_by(Route.date.desc()))
+        return list(result.scalars().all())
+    async def add_route(self, r: Route) -> Route:
+        self.db.add(r); await self.db.flush(); return r
+    async def add_stop(self, s: RouteStop) -> RouteStop:
+        self.db.add(s); await self.db.flush(); return s
+    async def get_route(self, rid: int) -> Route | None:
+        return await self.db.get(Route, rid)
+    async def list_stops(self, rid: int) -> list[RouteStop]:
+        result = await self.db.execute(select(RouteStop).where(RouteStop.route_id==rid).order_by(RouteStop.sequence))
+        return list(result.scalars().all())
+
+    # Bulk lookups for day manifests: one query per table, however many routes
+    async def list_routes_on(self, day: date) -> list[Route]:
+        result = await self.db.execute(
+            select(Route).where(Route.date == day).order_by(Route.start_time, Route.id)
+        )
+        return list(result.scalars().all())
+    async def list_stops_for(self, route_ids: Collection[int]) -> list[RouteStop]:
+        if not route_ids:
+            return []
+        result = await self.db.execute(
+            select(RouteStop)
+            .where(RouteStop.route_id.in_(route_ids))
+            .order_by(RouteStop.route_id, RouteStop.sequence)
+        )
+        return list(result.scalars().all())
+    async def get_vehicles(self, ids: Collection[int]) -> dict[int, Vehicle]:
+        if not ids:
+            return {}
+        result = await self.db.execute(select(Vehicle).where(Vehicle.id.in_(ids)))
+        return {vehicle.id: vehicle for vehicle in result.scalars()}
+    async def get_drivers(self, ids: Collection[int]) -> dict[int, Driver]:
+        if not ids:
+            return {}
+        result = await self.db.execute(select(Driver).where(Driver.id.in_(ids)))
+        return {driver.id: driver for driver in result.scalars()}
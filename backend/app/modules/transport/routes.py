@@ -1,42 +1,148 @@
-from fastapi import APIRouter, Depends, HTTPException, Response
-from sqlalchemy.orm import Session
-from app.modules.auth.deps import get_db, require_role
+import asyncio
+import os
+import tempfile
+import zipfile
+from datetime import date
+from typing import AsyncIterator, Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.core.db import get_async_session
+from app.modules.auth.deps import require_role_async
 from .schemas import *
-from .usecases import TransportService
-from .pdf import build_transport_pdf
+from .usecases import AsyncTransportService
+from .pdf import manifest_key, manifest_snapshot
+from .pdf_cache import PdfDiskCache, TransportPdfRenderer
+from .optimizer import RouteOptimizationError
 
 router = APIRouter()
 
+pdf_renderer = TransportPdfRenderer(
+    PdfDiskCache(
+        settings.TRANSPORT_PDF_CACHE_DIR
+        or os.path.join(tempfile.gettempdir(), "rentguy-transport-pdf"),
+        max_bytes=settings.TRANSPORT_PDF_CACHE_MAX_MB * 1024 * 1024,
+    ),
+    workers=settings.TRANSPORT_PDF_WORKERS,
+)
+
+
+_STREAM_CHUNK = 64 * 1024
+
+
+class _ChunkSink:
+    """Write-only file object collecting what ``zipfile`` writes, for streaming."""
+
+    def __init__(self) -> None:
+        self._chunks: list[bytes] = []
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def take(self) -> bytes:
+        data, self._chunks = b"".join(self._chunks), []
+        return data
+
+
+async def _zip_stream(snapshots: list[dict]) -> AsyncIterator[bytes]:
+    # Every route is rendered concurrently in the pool; entries are streamed in
+    # route order as soon as the next one is ready.
+    renders = [asyncio.ensure_future(pdf_renderer.render(snapshot)) for snapshot in snapshots]
+    sink = _ChunkSink()
+    try:
+        with zipfile.ZipFile(sink, "w", zipfile.ZIP_DEFLATED) as archive:
+            for snapshot, render in zip(snapshots, renders):
+                route = snapshot["route"]
+                archive.writestr(f"route-{route['id']}.pdf", await render)
+                yield sink.take()
+        yield sink.take()
+    finally:
+        for render in renders:
+            render.cancel()
+
+
+async def _chunked(data: bytes) -> AsyncIterator[bytes]:
+    for start in range(0, len(data), _STREAM_CHUNK):
+        yield data[start : start + _STREAM_CHUNK]
+
+
+def _etag_matches(header: str | None, etag: str) -> bool:
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return etag in {tag.strip().removeprefix("W/") for tag in header.split(",")}
+
 @router.get("/transport/vehicles", response_model=list[VehicleOut])
-def list_vehicles(db: Session = Depends(get_db), user=Depends(require_role("admin","planner","warehouse","viewer"))):
-    return TransportService(db).list_vehicles()
+async def list_vehicles(db: AsyncSession = Depends(get_async_session), user=Depends(require_role_async("admin","planner","warehouse","viewer"))):
+    return await AsyncTransportService(db).list_vehicles()
 
 @router.post("/transport/vehicles", response_model=VehicleOut)
-def create_vehicle(payload: VehicleIn, db: Session = Depends(get_db), user=Depends(require_role("admin","planner"))):
-    return TransportService(db).create_vehicle(payload)
+async def create_vehicle(payload: VehicleIn, db: AsyncSession = Depends(get_async_session), user=Depends(require_role_async("admin","planner"))):
+    return await AsyncTransportService(db).create_vehicle(payload)
 
 @router.get("/transport/drivers", response_model=list[DriverOut])
-def list_drivers(db: Session = Depends(get_db), user=Depends(require_role("admin","planner","warehouse","viewer"))):
-    return TransportService(db).list_drivers()
+async def list_drivers(db: AsyncSession = Depends(get_async_session), user=Depends(require_role_async("admin","planner","warehouse","viewer"))):
+    return await AsyncTransportService(db).list_drivers()
 
 @router.post("/transport/drivers", response_model=DriverOut)
-def create_driver(payload: DriverIn, db: Session = Depends(get_db), user=Depends(require_role("admin","planner"))):
-    return TransportService(db).create_driver(payload)
+async def create_driver(payload: DriverIn, db: AsyncSession = Depends(get_async_session), user=Depends(require_role_async("admin","planner"))):
+    return await AsyncTransportService(db).create_driver(payload)
 
 @router.get("/transport/routes", response_model=list[RouteOut])
-def list_routes(db: Session = Depends(get_db), user=Depends(require_role("admin","planner","warehouse","viewer"))):
-    return TransportService(db).list_routes()
+async def list_routes(db: AsyncSession = Depends(get_async_session), user=Depends(require_role_async("admin","planner","warehouse","viewer"))):
+    return await AsyncTransportService(db).list_routes()
 
 @router.post("/transport/routes", response_model=RouteOut)
-def create_route(payload: RouteIn, db: Session = Depends(get_db), user=Depends(require_role("admin","planner"))):
-    return TransportService(db).create_route(payload)
+async def create_route(payload: RouteIn, db: AsyncSession = Depends(get_async_session), user=Depends(require_role_async("admin","planner"))):
+    return await AsyncTransportService(db).create_route(payload)
+
+@router.post("/transport/routes/{route_id}/optimize", response_model=RouteOptimizationOut)
+async def optimize_route(route_id: int, payload: RouteOptimizeIn | None = None, db: AsyncSession = Depends(get_async_session), user=Depends(require_role_async("admin","planner"))):
+    try:
+        return await AsyncTransportService(db).optimize_route(route_id, payload or RouteOptimizeIn())
+    except RouteOptimizationError as exc:
+        raise HTTPException(status_code=422, detail=str(exc)) from exc
+    except ValueError as exc:
+        raise HTTPException(status_code=404, detail=str(exc)) from exc
 
 @router.get("/transport/routes/{route_id}/pdf")
-def route_pdf(route_id: int, db: Session = Depends(get_db), user=Depends(require_role("admin","planner","warehouse","viewer"))):
-    service = TransportService(db)
+async def route_pdf(route_id: int, request: Request, db: AsyncSession = Depends(get_async_session), user=Depends(require_role_async("admin","planner","warehouse","viewer"))):
+    service = AsyncTransportService(db)
     try:
-        route, stops, vehicle, driver = service.route_manifest(route_id)
+        route, stops, vehicle, driver = await service.route_manifest(route_id)
     except ValueError as exc:
         raise HTTPException(status_code=404, detail=str(exc)) from exc
-    pdf = build_transport_pdf(route, stops, vehicle, driver)
-    return Response(content=pdf, media_type="application/pdf")
+    snapshot = manifest_snapshot(route, stops, vehicle, driver)
+    key = manifest_key(snapshot)
+    headers = {"ETag": f'"{key}"', "Cache-Control": "private, no-cache"}
+    if _etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    pdf = await pdf_renderer.render(snapshot, key)
+    return Response(content=pdf, media_type="application/pdf", headers=headers)
+
+
+@router.get("/transport/manifests")
+async def day_manifests(
+    day: date = Query(..., alias="date"),
+    format: Literal["pdf", "zip"] = Query("pdf"),
+    db: AsyncSession = Depends(get_async_session),
+    user=Depends(require_role_async("admin","planner","warehouse","viewer")),
+):
+    """All route manifests of a day as one PDF or as a ZIP with a PDF per route."""
+    manifests = await AsyncTransportService(db).day_manifests(day)
+    if not manifests:
+        raise HTTPException(status_code=404, detail="Geen routes op deze datum")
+    snapshots = [manifest_snapshot(*manifest) for manifest in manifests]
+    filename = f"manifests-{day.isoformat()}.{format}"
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+    if format == "zip":
+        return StreamingResponse(_zip_stream(snapshots), media_type="application/zip", headers=headers)
+    pdf = await pdf_renderer.render_bundle(snapshots)
+    return StreamingResponse(_chunked(pdf), media_type="application/pdf", headers=headers)
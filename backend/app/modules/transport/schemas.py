@@ -36,6 +36,8 @@ class RouteStopIn(BaseModel):
     contact_phone: str
     eta: datetime
     etd: datetime
+    latitude: Optional[float] = Field(default=None, ge=-90, le=90)
+    longitude: Optional[float] = Field(default=None, ge=-180, le=180)
 
 class RouteIn(BaseModel):
     project_id: int
@@ -58,3 +60,28 @@ class RouteOut(BaseModel):
     status: str
 
     model_config = ConfigDict(from_attributes=True)
+
+class RouteOptimizeIn(BaseModel):
+    depot_latitude: Optional[float] = Field(default=None, ge=-90, le=90)
+    depot_longitude: Optional[float] = Field(default=None, ge=-180, le=180)
+    average_speed_kmh: float = Field(default=50.0, gt=0, le=200)
+    service_minutes: float = Field(default=15.0, ge=0)
+    apply: bool = True
+
+class OptimizedStopOut(BaseModel):
+    id: int
+    sequence: int
+    address: str
+    eta: datetime
+    etd: datetime
+    estimated_arrival: datetime
+
+class RouteOptimizationOut(BaseModel):
+    route_id: int
+    applied: bool
+    distance_km: float
+    initial_distance_km: float
+    travel_minutes: float
+    lateness_minutes: float
+    initial_lateness_minutes: float
+    stops: list[OptimizedStopOut]
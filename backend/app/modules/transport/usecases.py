@@ -1,14 +1,25 @@
 """Transport module services."""
 from __future__ import annotations
 
+import asyncio
+from datetime import date, datetime
 from typing import Sequence
 
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from .models import Driver, Route, RouteStop, Vehicle
+from .optimizer import RouteOptimizationError, RouteOptimizer, StopInput
 from .ports import TransportServicePort
-from .repo import TransportRepo
-from .schemas import DriverIn, RouteIn, VehicleIn
+from .repo import AsyncTransportRepo, TransportRepo
+from .schemas import (
+    DriverIn,
+    OptimizedStopOut,
+    RouteIn,
+    RouteOptimizationOut,
+    RouteOptimizeIn,
+    VehicleIn,
+)
 
 
 class TransportService(TransportServicePort):
@@ -67,3 +78,144 @@ class TransportService(TransportServicePort):
         driver = self.db.get(Driver, route.driver_id)
         return route, stops, vehicle, driver
 
+
+
+class AsyncTransportService:
+    """Async variant of :class:`TransportService` used by the HTTP routes."""
+
+    def __init__(self, db: AsyncSession) -> None:
+        self.db = db
+        self.repo = AsyncTransportRepo(db)
+
+    async def list_vehicles(self) -> Sequence[Vehicle]:
+        return await self.repo.list_vehicles()
+
+    async def create_vehicle(self, payload: VehicleIn) -> Vehicle:
+        vehicle = Vehicle(**payload.model_dump())
+        await self.repo.add_vehicle(vehicle)
+        await self.db.commit()
+        await self.db.refresh(vehicle)
+        return vehicle
+
+    async def list_drivers(self) -> Sequence[Driver]:
+        return await self.repo.list_drivers()
+
+    async def create_driver(self, payload: DriverIn) -> Driver:
+        driver = Driver(**payload.model_dump())
+        await self.repo.add_driver(driver)
+        await self.db.commit()
+        await self.db.refresh(driver)
+        return driver
+
+    async def list_routes(self) -> Sequence[Route]:
+        return await self.repo.list_routes()
+
+    async def create_route(self, payload: RouteIn) -> Route:
+        route = Route(
+            project_id=payload.project_id,
+            vehicle_id=payload.vehicle_id,
+            driver_id=payload.driver_id,
+            date=payload.date,
+            start_time=payload.start_time,
+            end_time=payload.end_time,
+            status=payload.status,
+        )
+        await self.repo.add_route(route)
+        for stop in payload.stops:
+            await self.repo.add_stop(RouteStop(route_id=route.id, **stop.model_dump()))
+        await self.db.commit()
+        await self.db.refresh(route)
+        return route
+
+    async def route_manifest(
+        self, route_id: int
+    ) -> tuple[Route, Sequence[RouteStop], Vehicle | None, Driver | None]:
+        route = await self.repo.get_route(route_id)
+        if not route:
+            raise ValueError("Route niet gevonden")
+        stops = await self.repo.list_stops(route_id)
+        vehicle = await self.repo.get_vehicle(route.vehicle_id)
+        driver = await self.repo.get_driver(route.driver_id)
+        return route, stops, vehicle, driver
+
+    async def day_manifests(
+        self, day: date
+    ) -> list[tuple[Route, Sequence[RouteStop], Vehicle | None, Driver | None]]:
+        """Manifests of every route on ``day`` in four queries."""
+
+        routes = await self.repo.list_routes_on(day)
+        route_ids = [route.id for route in routes]
+        stops: dict[int, list[RouteStop]] = {route_id: [] for route_id in route_ids}
+        for stop in await self.repo.list_stops_for(route_ids):
+            stops[stop.route_id].append(stop)
+        vehicles = await self.repo.get_vehicles({route.vehicle_id for route in routes})
+        drivers = await self.repo.get_drivers({route.driver_id for route in routes})
+        return [
+            (route, stops[route.id], vehicles.get(route.vehicle_id), drivers.get(route.driver_id))
+            for route in routes
+        ]
+
+    async def optimize_route(
+        self, route_id: int, params: RouteOptimizeIn
+    ) -> RouteOptimizationOut:
+        """Reorder a route's stops for the shortest drive within their eta/etd windows."""
+
+        route = await self.repo.get_route(route_id)
+        if not route:
+            raise ValueError("Route niet gevonden")
+        stops = await self.repo.list_stops(route_id)
+        missing = [
+            stop.sequence for stop in stops if stop.latitude is None or stop.longitude is None
+        ]
+        if missing:
+            raise RouteOptimizationError(f"Stops zonder coördinaten: {missing}")
+        if (params.depot_latitude is None) != (params.depot_longitude is None):
+            raise RouteOptimizationError("Geef zowel depot_latitude als depot_longitude op")
+        depot = (
+            (params.depot_latitude, params.depot_longitude)
+            if params.depot_latitude is not None
+            else None
+        )
+
+        optimizer = RouteOptimizer(
+            speed_kmh=params.average_speed_kmh, service_minutes=params.service_minutes
+        )
+        # The search is CPU-bound for up to its time limit; keep it off the event loop.
+        result = await asyncio.to_thread(
+            optimizer.optimize,
+            [StopInput(stop.latitude, stop.longitude, stop.eta, stop.etd) for stop in stops],
+            start=datetime.combine(route.date, route.start_time),
+            depot=depot,
+        )
+        ordered = [stops[index] for index in result.order]
+        sequences = [stop.sequence for stop in ordered]
+        if params.apply:
+            # Two passes keep ``uq_veh_route_stop_sequence`` satisfied while stops swap places.
+            for offset, stop in enumerate(ordered, start=1):
+                stop.sequence = -offset
+            await self.db.flush()
+            for offset, stop in enumerate(ordered, start=1):
+                stop.sequence = offset
+            await self.db.commit()
+            sequences = list(range(1, len(ordered) + 1))
+
+        return RouteOptimizationOut(
+            route_id=route.id,
+            applied=params.apply,
+            distance_km=round(result.distance_km, 3),
+            initial_distance_km=round(result.initial_distance_km, 3),
+            travel_minutes=round(result.travel_minutes, 1),
+            lateness_minutes=round(result.lateness_minutes, 1),
+            initial_lateness_minutes=round(result.initial_lateness_minutes, 1),
+            stops=[
+                OptimizedStopOut(
+                    id=stop.id,
+                    sequence=sequence,
+                    address=stop.address,
+                    eta=stop.eta,
+                    etd=stop.etd,
+                    estimated_arrival=arrival,
+                )
+                for stop, sequence, arrival in zip(ordered, sequences, result.arrivals)
+            ],
+        )
@@ -1,17 +1,28 @@
 import socketio
 
+from app.core.config import settings
+from app.core.events.bus import bus as event_bus
+from app.core.realtime_managers import create_client_manager
 from app.modules.chat import sockets as chat_sockets
 from app.modules.crew import sockets as crew_sockets
+from app.modules.inventory import events as inventory_events
 
-sio = socketio.AsyncServer(async_mode="asgi", cors_allowed_origins="*")
+sio = socketio.AsyncServer(
+    async_mode="asgi",
+    cors_allowed_origins="*",
+    client_manager=create_client_manager(
+        settings.SOCKETIO_MANAGER_URL, channel=settings.SOCKETIO_CHANNEL
+    ),
+)
 socket_app = socketio.ASGIApp(sio)
 
 crew_sockets.register_socket_server(sio)
 chat_sockets.register_socket_server(sio)
+inventory_events.register_event_handlers(event_bus, sio)
 
 sio.on("connect", crew_sockets.connect)
 sio.on("disconnect", crew_sockets.disconnect)
-sio.on("join_project", crew_sockets.join_project)
+sio.on("join_project", chat_sockets.join_project)
 sio.on("leave_project", crew_sockets.leave_project)
 sio.on("update_location", crew_sockets.update_location)
 sio.on("send_message", chat_sockets.send_message)
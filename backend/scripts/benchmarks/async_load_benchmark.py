@@ -0,0 +1,211 @@
+"""Compare requests per second of threadpool-bound and async inventory routes.
+
+Serves the same ``GET /inventory/items`` query twice from one ASGI app:
+
+* ``/sync``: the previous request path, a ``def`` handler on a synchronous
+  ``Session`` that Starlette runs in its worker threadpool;
+* ``/async``: the production inventory router on ``get_async_session``.
+
+``--clients`` concurrent clients (200 by default) hammer each variant in-process
+through ``httpx.ASGITransport``. The default database is a temporary SQLite file
+on which every statement additionally waits ``--latency-ms`` inside the driver
+thread, standing in for the round trip to a database server; this is where the
+threadpool cap bites. Use ``--latency-ms 0`` for raw local SQLite, or pass
+``--database-url`` with a PostgreSQL URL to measure against a real server.
+
+Usage::
+
+    python scripts/benchmarks/async_load_benchmark.py --clients 200 --requests 4000
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(BACKEND_DIR))
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("JWT_SECRET", "benchmark-secret")
+
+import httpx  # noqa: E402
+from fastapi import FastAPI  # noqa: E402
+from sqlalchemy import create_engine, event, insert  # noqa: E402
+from sqlalchemy.engine import make_url  # noqa: E402
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine  # noqa: E402
+from sqlalchemy.orm import Session, sessionmaker  # noqa: E402
+from sqlalchemy.pool import AsyncAdaptedQueuePool  # noqa: E402
+
+import app.modules.customer_portal.models  # noqa: E402,F401
+import app.modules.jobboard.models  # noqa: E402,F401
+import app.modules.recurring_invoices.models  # noqa: E402,F401
+from app.core.db import Base, _async_drivername, get_async_session  # noqa: E402
+from app.modules.auth.deps import get_current_user, get_current_user_async  # noqa: E402
+from app.modules.inventory.models import Category, Item  # noqa: E402
+from app.modules.inventory.repo import InventoryRepo  # noqa: E402
+from app.modules.inventory.routes import router as inventory_router  # noqa: E402
+from app.modules.inventory.schemas import ItemOut  # noqa: E402
+
+
+class _BenchmarkUser:
+    id = 1
+    email = "bench@rentguy.local"
+    role = "admin"
+
+
+def _simulate_latency(engine, latency_ms: float) -> None:
+    """Delay every SQLite statement in the thread that executes it."""
+
+    delay = latency_ms / 1000
+
+    def trace(_statement: str) -> None:
+        time.sleep(delay)
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection, _record) -> None:
+        if hasattr(dbapi_connection, "run_async"):
+            # aiosqlite runs statements in a per-connection thread; install the
+            # callback there so waiting never blocks the event loop.
+            dbapi_connection.run_async(lambda conn: conn.set_trace_callback(trace))
+        else:
+            dbapi_connection.set_trace_callback(trace)
+
+
+def _build_app(database_url: str, pool_size: int, latency_ms: float) -> FastAPI:
+    url = make_url(database_url)
+    pool_kwargs: dict[str, object] = {"pool_size": pool_size, "max_overflow": 0}
+
+    sync_engine = create_engine(url, **pool_kwargs)
+    SyncSession = sessionmaker(bind=sync_engine, autoflush=False)
+    async_engine = create_async_engine(
+        url.set(drivername=_async_drivername(url)),
+        # aiosqlite defaults to a NullPool; pool it like the sync engine so both
+        # variants reuse the same number of connections.
+        poolclass=AsyncAdaptedQueuePool,
+        **pool_kwargs,
+    )
+    AsyncSession = async_sessionmaker(async_engine, expire_on_commit=False)
+    if latency_ms and url.get_backend_name() == "sqlite":
+        _simulate_latency(sync_engine, latency_ms)
+        _simulate_latency(async_engine.sync_engine, latency_ms)
+
+    app = FastAPI()
+
+    @app.get("/sync/items", response_model=list[ItemOut])
+    def list_items_sync():
+        # The session is closed inside the worker thread. With a yield
+        # dependency the teardown needs a second thread, and once every worker
+        # waits for a pooled connection nothing is left to return one.
+        with SyncSession() as db:
+            return [ItemOut.model_validate(item) for item in InventoryRepo(db).list_items()]
+
+    async def get_benchmark_session():
+        async with AsyncSession() as session:
+            yield session
+
+    app.include_router(inventory_router, prefix="/async")
+    app.dependency_overrides[get_async_session] = get_benchmark_session
+    app.dependency_overrides[get_current_user] = lambda: _BenchmarkUser()
+    app.dependency_overrides[get_current_user_async] = lambda: _BenchmarkUser()
+    app.state.engines = (sync_engine, async_engine)
+    return app
+
+
+def _seed(database_url: str, items: int) -> None:
+    engine = create_engine(database_url)
+    Base.metadata.create_all(engine, tables=[Category.__table__, Item.__table__])
+    with Session(engine) as session:
+        session.execute(insert(Category), [{"id": 1, "name": "Benchmark"}])
+        session.execute(
+            insert(Item),
+            [
+                {"name": f"Item {index:04d}", "category_id": 1, "quantity_total": 10}
+                for index in range(items)
+            ],
+        )
+        session.commit()
+    engine.dispose()
+
+
+async def _load(app: FastAPI, path: str, *, clients: int, requests: int) -> tuple[float, list[float]]:
+    transport = httpx.ASGITransport(app=app)
+    latencies: list[float] = []
+    remaining = iter(range(requests))
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+
+        async def worker() -> None:
+            for _ in remaining:
+                began = time.perf_counter()
+                response = await client.get(path)
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - began)
+
+        # Warm up connection pools and the route before measuring.
+        await client.get(path)
+        began = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(clients)))
+        elapsed = time.perf_counter() - began
+    return requests / elapsed, latencies
+
+
+def _report(label: str, rps: float, latencies: list[float]) -> None:
+    ordered = sorted(latencies)
+    p95 = ordered[int(len(ordered) * 0.95) - 1] * 1000
+    print(
+        f"  {label:<28} {rps:8.0f} req/s   p50 {statistics.median(ordered) * 1000:7.1f} ms"
+        f"   p95 {p95:7.1f} ms"
+    )
+
+
+async def _run(args: argparse.Namespace, database_url: str) -> None:
+    app = _build_app(database_url, args.pool_size, args.latency_ms)
+    try:
+        sync_rps, sync_latencies = await _load(
+            app, "/sync/items", clients=args.clients, requests=args.requests
+        )
+        async_rps, async_latencies = await _load(
+            app, "/async/items", clients=args.clients, requests=args.requests
+        )
+    finally:
+        sync_engine, async_engine = app.state.engines
+        sync_engine.dispose()
+        await async_engine.dispose()
+
+    print(
+        f"{args.requests} requests from {args.clients} concurrent clients, {args.items} items,"
+        f" {args.latency_ms:g} ms simulated statement latency"
+    )
+    _report("threadpool (sync Session)", sync_rps, sync_latencies)
+    _report("async (AsyncSession)", async_rps, async_latencies)
+    print(f"  speed-up:                    {async_rps / sync_rps:8.2f}x")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=4_000)
+    parser.add_argument("--items", type=int, default=50)
+    parser.add_argument("--pool-size", type=int, default=20)
+    parser.add_argument("--latency-ms", type=float, default=2.0)
+    parser.add_argument(
+        "--database-url",
+        help="Database to benchmark against; it must be empty. Defaults to a temporary SQLite file.",
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = args.database_url or f"sqlite:///{Path(tmp) / 'benchmark.db'}"
+        _seed(database_url, args.items)
+        asyncio.run(_run(args, database_url))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,107 @@
+"""Benchmark per-request authentication overhead with and without caching.
+
+Replays ``--requests`` bearer tokens from a small pool of planner sessions, the
+pattern produced by the planner UI polling loops, and compares:
+
+* the original path: full HS512 verification plus a ``UserRepo.by_email`` query;
+* the cached path: ``decode_token`` with the verified-token cache and the
+  principal cache used by ``get_current_user``.
+
+Usage::
+
+    python scripts/benchmarks/auth_benchmark.py --requests 10000
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(BACKEND_DIR))
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("JWT_SECRET", "benchmark-secret")
+
+import jwt  # noqa: E402
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+from sqlalchemy.pool import StaticPool  # noqa: E402
+
+import app.modules.customer_portal.models  # noqa: E402,F401
+import app.modules.jobboard.models  # noqa: E402,F401
+import app.modules.recurring_invoices.models  # noqa: E402,F401
+from app.core.config import settings  # noqa: E402
+from app.modules.auth.cache import PrincipalCache  # noqa: E402
+from app.modules.auth.models import User  # noqa: E402
+from app.modules.auth.repo import UserRepo  # noqa: E402
+from app.modules.auth.security import (  # noqa: E402
+    create_access_token,
+    decode_token,
+    token_cache,
+)
+
+
+def _uncached(session: Session, token: str) -> User | None:
+    payload = jwt.decode(token, settings.jwt_secret, algorithms=[settings.JWT_ALG])
+    return UserRepo(session).by_email(payload["sub"])
+
+
+def _cached(session: Session, cache: PrincipalCache, token: str) -> User | None:
+    payload = decode_token(token)
+    user = cache.get(session, payload["sub"], payload["iat"])
+    if user is None:
+        user = UserRepo(session).by_email(payload["sub"])
+        if user is not None:
+            cache.put(payload["sub"], payload["iat"], user, expires_at=payload["exp"])
+    return user
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=10_000)
+    parser.add_argument("--sessions", type=int, default=50)
+    args = parser.parse_args()
+
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    User.__table__.create(engine)
+    with Session(engine) as session:
+        emails = [f"planner{index}@rentguy.demo" for index in range(args.sessions)]
+        session.add_all(
+            [User(email=email, password_hash="x", role="planner") for email in emails]
+        )
+        session.commit()
+    tokens = [create_access_token(email) for email in emails]
+    replay = [tokens[index % len(tokens)] for index in range(args.requests)]
+
+    with Session(engine) as session:
+        began = time.perf_counter()
+        for token in replay:
+            _uncached(session, token)
+            session.expunge_all()
+        before = time.perf_counter() - began
+
+    token_cache.clear()
+    principal_cache = PrincipalCache(ttl_seconds=60, max_entries=1024)
+    with Session(engine) as session:
+        began = time.perf_counter()
+        for token in replay:
+            _cached(session, principal_cache, token)
+            session.expunge_all()
+        after = time.perf_counter() - began
+
+    per_before = before / args.requests * 1e6
+    per_after = after / args.requests * 1e6
+    print(f"{args.requests} requests over {args.sessions} sessions")
+    print(f"  verify + user query:       {per_before:8.1f} µs/request")
+    print(f"  token + principal cache:   {per_after:8.1f} µs/request")
+    print(f"  speed-up:                  {per_before / per_after:8.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,155 @@
+"""Benchmark reservation availability lookups against a large reservation history.
+
+Seeds an SQLite database with ``--reservations`` historical project reservations
+and compares the legacy per-item scan used by ``ProjectsRepo`` with the batched
+:class:`~app.modules.projects.availability.AvailabilityEngine`, then times the
+day-bucket occupancy sweep over a year-long window for every item.
+
+Usage::
+
+    python scripts/benchmarks/availability_benchmark.py --reservations 100000
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(BACKEND_DIR))
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("JWT_SECRET", "benchmark-secret")
+
+from sqlalchemy import create_engine, insert, select  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+from app.core.db import Base  # noqa: E402
+from app.modules.inventory.models import Category, Item  # noqa: E402
+from app.modules.projects.availability import AvailabilityEngine, occupancy_matrix  # noqa: E402
+from app.modules.projects.models import Project, ProjectItem  # noqa: E402
+
+HISTORY_START = date(2020, 1, 1)
+HISTORY_DAYS = 6 * 365
+
+
+def _seed(session: Session, *, reservations: int, items: int, lines_per_project: int) -> None:
+    rng = random.Random(42)
+    session.execute(insert(Category), [{"id": 1, "name": "Benchmark"}])
+    session.execute(
+        insert(Item),
+        [
+            {"id": item_id, "name": f"Item {item_id}", "category_id": 1, "quantity_total": 500}
+            for item_id in range(1, items + 1)
+        ],
+    )
+
+    projects = reservations // lines_per_project
+    project_rows = []
+    for project_id in range(1, projects + 1):
+        start = HISTORY_START + timedelta(days=rng.randrange(HISTORY_DAYS))
+        project_rows.append(
+            {
+                "id": project_id,
+                "name": f"Project {project_id}",
+                "client_name": "Benchmark",
+                "start_date": start,
+                "end_date": start + timedelta(days=rng.randrange(1, 6)),
+                "notes": "",
+            }
+        )
+    session.execute(insert(Project), project_rows)
+
+    line_rows = []
+    for project_id in range(1, projects + 1):
+        for item_id in rng.sample(range(1, items + 1), lines_per_project):
+            line_rows.append(
+                {"project_id": project_id, "item_id": item_id, "qty_reserved": rng.randrange(1, 10)}
+            )
+    session.execute(insert(ProjectItem), line_rows)
+    session.commit()
+
+
+def _legacy_reserved_qty(session: Session, item_id: int, start: date, end: date) -> int:
+    """Copy of the original full-scan implementation, kept for comparison."""
+
+    total = 0
+    rows = session.execute(
+        select(ProjectItem, Project).join(Project, ProjectItem.project_id == Project.id)
+    ).all()
+    for project_item, project in rows:
+        if project_item.item_id != item_id:
+            continue
+        if not (project.end_date < start or end < project.start_date):
+            total += project_item.qty_reserved
+    return total
+
+
+def _timed(func, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        began = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - began)
+    return statistics.median(samples)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--reservations", type=int, default=100_000)
+    parser.add_argument("--items", type=int, default=1_000)
+    parser.add_argument("--request-items", type=int, default=25)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(
+        engine, tables=[Category.__table__, Item.__table__, Project.__table__, ProjectItem.__table__]
+    )
+
+    with Session(engine) as session:
+        began = time.perf_counter()
+        _seed(session, reservations=args.reservations, items=args.items, lines_per_project=5)
+        print(f"seeded {args.reservations} reservations in {time.perf_counter() - began:.2f}s")
+
+        start = HISTORY_START + timedelta(days=HISTORY_DAYS - 30)
+        end = start + timedelta(days=3)
+        item_ids = list(range(1, args.request_items + 1))
+
+        legacy = _timed(
+            lambda: [_legacy_reserved_qty(session, item_id, start, end) for item_id in item_ids[:3]],
+            repeat=1,
+        ) / 3 * len(item_ids)
+        batched = _timed(
+            lambda: AvailabilityEngine(session).available(item_ids, start, end), repeat=args.repeat
+        )
+
+        year_start = HISTORY_START + timedelta(days=HISTORY_DAYS - 365)
+        year_end = year_start + timedelta(days=364)
+        all_items = list(range(1, args.items + 1))
+        rows = AvailabilityEngine(session).reservation_rows(all_items, year_start, year_end)
+        sweep = _timed(
+            lambda: occupancy_matrix(rows, all_items, year_start, year_end), repeat=args.repeat
+        )
+        occupancy = _timed(
+            lambda: AvailabilityEngine(session).occupancy(all_items, year_start, year_end),
+            repeat=args.repeat,
+        )
+
+    print(f"request with {len(item_ids)} items")
+    print(f"  legacy per-item scan (extrapolated): {legacy * 1000:10.1f} ms")
+    print(f"  availability engine:                 {batched * 1000:10.1f} ms")
+    print(f"  speed-up:                            {legacy / batched:10.1f}x")
+    print(f"year-long occupancy for {args.items} items ({len(rows)} reservation rows)")
+    print(f"  day-bucket sweep:                    {sweep * 1000:10.1f} ms")
+    print(f"  including query:                     {occupancy * 1000:10.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,146 @@
+"""Compare CRM dashboard latency and memory across ``CRM_DASHBOARD_BACKEND`` values.
+
+Seeds one tenant with ``--deals`` deals (and as many leads) in a temporary
+SQLite database, then times :meth:`CRMService.dashboard_metrics` for each
+backend and reports the peak Python memory allocated while serving one request.
+The materialized store is built once before measuring, as it would be by the
+first request after deployment.
+
+Usage::
+
+    python scripts/benchmarks/crm_dashboard_benchmark.py --deals 50000
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(BACKEND_DIR))
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("JWT_SECRET", "benchmark-secret")
+
+from sqlalchemy import create_engine, insert  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+import app.modules.customer_portal.models  # noqa: E402,F401
+import app.modules.jobboard.models  # noqa: E402,F401
+import app.modules.recurring_invoices.models  # noqa: E402,F401
+from app.core.config import settings  # noqa: E402
+from app.core.db import Base  # noqa: E402
+from app.modules.crm import models  # noqa: E402
+from app.modules.crm.service import CRMService  # noqa: E402
+
+TENANT_ID = "benchmark"
+BACKENDS = ("python", "sql", "materialized")
+
+
+def _seed(session: Session, deals: int) -> None:
+    now = datetime.utcnow()
+    pipeline = models.CRMPipeline(tenant_id=TENANT_ID, name="Default", is_default=True)
+    pipeline.stages.extend(
+        models.CRMPipelineStage(name=f"Stage {index}", order=index) for index in range(6)
+    )
+    session.add(pipeline)
+    session.flush()
+    stage_ids = [stage.id for stage in pipeline.stages]
+
+    sources = ["website_form", "referral", "instagram", None, "fair"]
+    session.execute(
+        insert(models.CRMLead),
+        [
+            {
+                "id": index + 1,
+                "tenant_id": TENANT_ID,
+                "name": f"Lead {index}",
+                "source": sources[index % len(sources)],
+                "created_at": now - timedelta(hours=index),
+                "updated_at": now - timedelta(hours=index),
+            }
+            for index in range(deals)
+        ],
+    )
+    statuses = ["open", "open", "won", "lost"]
+    session.execute(
+        insert(models.CRMDeal),
+        [
+            {
+                "tenant_id": TENANT_ID,
+                "lead_id": index + 1,
+                "pipeline_id": pipeline.id,
+                "stage_id": stage_ids[index % len(stage_ids)],
+                "title": f"Deal {index}",
+                "value": 500 + index % 4000,
+                "probability": index % 101,
+                "status": statuses[index % len(statuses)],
+                "expected_close": (now + timedelta(days=index % 90)).date(),
+                "created_at": now - timedelta(hours=index * 2),
+                "updated_at": now - timedelta(hours=index),
+            }
+            for index in range(deals)
+        ],
+    )
+    session.commit()
+
+
+def _measure(session: Session, repeat: int) -> tuple[float, float]:
+    service = CRMService(session, TENANT_ID)
+    durations = []
+    for _ in range(repeat):
+        session.expire_all()
+        began = time.perf_counter()
+        service.dashboard_metrics()
+        durations.append(time.perf_counter() - began)
+
+    session.expire_all()
+    tracemalloc.start()
+    service.dashboard_metrics()
+    _current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return statistics.median(durations), peak
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--deals", type=int, default=50_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{Path(tmp) / 'benchmark.db'}")
+        tables = [table for name, table in Base.metadata.tables.items() if name.startswith("crm_")]
+        Base.metadata.create_all(engine, tables=tables)
+        with Session(engine) as session:
+            _seed(session, args.deals)
+            began = time.perf_counter()
+            CRMService(session, TENANT_ID).metrics.rebuild()
+            session.commit()
+            rebuild = time.perf_counter() - began
+
+            results = {}
+            original = settings.CRM_DASHBOARD_BACKEND
+            try:
+                for backend in BACKENDS:
+                    settings.CRM_DASHBOARD_BACKEND = backend
+                    results[backend] = _measure(session, args.repeat)
+            finally:
+                settings.CRM_DASHBOARD_BACKEND = original
+        engine.dispose()
+
+    print(f"dashboard for {args.deals} deals and leads, median of {args.repeat} runs")
+    for backend, (duration, peak) in results.items():
+        print(f"  {backend:<14} {duration * 1000:9.1f} ms   peak {peak / 2**20:8.1f} MiB")
+    print(f"  one-off store rebuild: {rebuild * 1000:9.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,117 @@
+"""Compare compiled cron lookups with the previous minute-by-minute walk.
+
+Both implementations compute the next run for each expression from the same
+reference times. The legacy walk re-parses the expression on every call and
+steps through candidate minutes. The compiled schedule is parsed once, then
+jumps between the sorted values of each field. Pathological expressions (leap
+days, the 31st of sparse months, tiny windows) show the difference.
+
+Usage::
+
+    python scripts/benchmarks/cron_benchmark.py --repeat 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(BACKEND_DIR))
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("JWT_SECRET", "benchmark-secret")
+
+from app.modules.recurring_invoices.utils import (  # noqa: E402
+    CronExpressionError,
+    next_n_runs,
+    next_run_from_cron,
+    parse_cron_expression,
+)
+
+EXPRESSIONS = [
+    "*/5 * * * *",
+    "0 9 * * mon-fri",
+    "0 0 29 2 *",
+    "59 23 31 12 *",
+    "0 0 31 4,6,9,11,12 *",
+    "0 4 1 1 sun",
+]
+
+REFERENCES = [datetime(2025, 3, 1) + timedelta(days=37 * step, minutes=7) for step in range(5)]
+
+
+def _legacy_next_run(expression: str, reference: datetime) -> datetime:
+    """The minute walk ``next_run_from_cron`` used before compilation."""
+
+    fields = parse_cron_expression(expression)
+    candidate = reference.replace(second=0, microsecond=0) + timedelta(minutes=1)
+
+    def matches(value: int, allowed: set[int] | None) -> bool:
+        return allowed is None or value in allowed
+
+    for _ in range(525600):
+        if not matches(candidate.minute, fields.minute):
+            candidate += timedelta(minutes=1)
+            continue
+        if not matches(candidate.hour, fields.hour):
+            candidate = (candidate + timedelta(minutes=60)).replace(minute=0)
+            continue
+        if not matches(candidate.month, fields.month):
+            candidate = (
+                candidate.replace(day=1, hour=0, minute=0) + timedelta(days=32)
+            ).replace(day=1)
+            continue
+        dom_any = fields.day_of_month is None
+        dow_any = fields.day_of_week is None
+        dom_match = matches(candidate.day, fields.day_of_month)
+        dow_match = matches(candidate.weekday(), fields.day_of_week)
+        if (dom_any or dow_any) and not (dom_match and dow_match):
+            candidate = (candidate + timedelta(days=1)).replace(hour=0, minute=0)
+            continue
+        if not (dom_any or dow_any) and not (dom_match or dow_match):
+            candidate = (candidate + timedelta(days=1)).replace(hour=0, minute=0)
+            continue
+        return candidate
+    raise CronExpressionError("Unable to compute next run within one year")
+
+
+def _time(function, expression: str, repeat: int) -> tuple[float, bool]:
+    began = time.perf_counter()
+    found = True
+    for _ in range(repeat):
+        for reference in REFERENCES:
+            try:
+                function(expression, reference)
+            except CronExpressionError:
+                found = False
+    calls = repeat * len(REFERENCES)
+    return (time.perf_counter() - began) / calls, found
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'expression':<24} {'legacy':>12} {'compiled':>12} {'speed-up':>10}")
+    for expression in EXPRESSIONS:
+        legacy, legacy_found = _time(_legacy_next_run, expression, args.repeat)
+        compiled, _ = _time(next_run_from_cron, expression, args.repeat)
+        note = "" if legacy_found else "  (legacy gives up after one year)"
+        print(
+            f"{expression:<24} {legacy * 1e6:9.1f} us {compiled * 1e6:9.1f} us"
+            f" {legacy / compiled:9.0f}x{note}"
+        )
+
+    began = time.perf_counter()
+    next_n_runs("0 0 29 2 *", REFERENCES[0], 100)
+    print(f"next_n_runs('0 0 29 2 *', 100): {(time.perf_counter() - began) * 1000:.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,93 @@
+"""Measure how long ``EventBus.publish`` keeps the caller busy with slow subscribers.
+
+Publishes ``--events`` events to a bus with one subscriber that sleeps for
+``--handler-ms`` milliseconds, standing in for a mail or partner-sync handler.
+It does this once with synchronous delivery and once with the bus started. The
+report gives the publisher-side latency and the time until every event has been
+handled.
+
+Usage::
+
+    python scripts/benchmarks/event_bus_benchmark.py --events 200 --handler-ms 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(BACKEND_DIR))
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("JWT_SECRET", "benchmark-secret")
+
+from app.core.events.bus import EventBus  # noqa: E402
+
+
+def _subscriber(delay: float):
+    def handler(event: dict[str, object]) -> None:
+        time.sleep(delay)
+
+    return handler
+
+
+def _publish(bus: EventBus, events: int) -> list[float]:
+    latencies = []
+    for index in range(events):
+        began = time.perf_counter()
+        bus.publish({"event_type": "benchmark", "seq": index})
+        latencies.append(time.perf_counter() - began)
+    return latencies
+
+
+def _sync(events: int, delay: float) -> tuple[list[float], float]:
+    bus = EventBus()
+    bus.subscribe("benchmark", _subscriber(delay))
+    began = time.perf_counter()
+    latencies = _publish(bus, events)
+    return latencies, time.perf_counter() - began
+
+
+async def _async(events: int, delay: float, workers: int) -> tuple[list[float], float]:
+    bus = EventBus(queue_size=events, workers=workers, concurrency=workers)
+    bus.subscribe("benchmark", _subscriber(delay))
+    await bus.start()
+    try:
+        began = time.perf_counter()
+        latencies = _publish(bus, events)
+        await bus.drain()
+        return latencies, time.perf_counter() - began
+    finally:
+        await bus.stop()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=200)
+    parser.add_argument("--handler-ms", type=float, default=20.0)
+    parser.add_argument("--workers", type=int, default=8)
+    args = parser.parse_args()
+    delay = args.handler_ms / 1000
+
+    results = {
+        "sync": _sync(args.events, delay),
+        "async": asyncio.run(_async(args.events, delay, args.workers)),
+    }
+
+    print(f"{args.events} events, {args.handler_ms:g} ms handler, {args.workers} workers")
+    for mode, (latencies, total) in results.items():
+        p99 = statistics.quantiles(latencies, n=100)[98] if len(latencies) > 1 else latencies[0]
+        print(
+            f"  {mode:<6} publish median {statistics.median(latencies) * 1e6:9.1f} us"
+            f"   p99 {p99 * 1e6:9.1f} us   all handled after {total * 1000:8.1f} ms"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
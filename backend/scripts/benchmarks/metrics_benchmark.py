@@ -0,0 +1,118 @@
+"""Measure the request-recording and scrape cost of :class:`MetricsTracker`.
+
+Compares the sharded histogram tracker with a copy of the original lock-based
+``record`` (one global lock and a ``_RequestSample`` dataclass per request),
+reports memory retained per recorded request, and times a Prometheus scrape
+over ``--routes`` distinct routes.
+
+Usage::
+
+    python scripts/benchmarks/metrics_benchmark.py --requests 200000 --routes 2000
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+from collections import defaultdict, deque
+from dataclasses import dataclass
+from pathlib import Path
+from threading import Lock
+
+BACKEND_DIR = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(BACKEND_DIR))
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("JWT_SECRET", "benchmark-secret")
+
+from app.core.metrics import MetricsTracker  # noqa: E402
+
+
+@dataclass
+class _RequestSample:
+    method: str
+    path: str
+    status: int
+    latency: float
+    timestamp: float
+
+
+class _LegacyTracker:
+    """Copy of the original recording path, kept for comparison."""
+
+    def __init__(self) -> None:
+        self.lock = Lock()
+        self.total_requests = 0
+        self.error_requests = 0
+        self.latency_total = 0.0
+        self.recent = deque(maxlen=50)
+        self.per_path_counts = defaultdict(int)
+        self.per_path_latency = defaultdict(float)
+        self.error_counts = defaultdict(int)
+
+    def record(self, *, method: str, path: str, status_code: int, latency: float) -> float:
+        with self.lock:
+            self.total_requests += 1
+            self.latency_total += latency
+            self.per_path_counts[(method, path, str(status_code))] += 1
+            latency_key = (method, path)
+            self.per_path_latency[latency_key] += latency
+            if status_code >= 500:
+                self.error_requests += 1
+                self.error_counts[latency_key] += 1
+            self.recent.append(
+                _RequestSample(method, path, status_code, latency, time.time())
+            )
+            return 1.0 - (self.error_requests / self.total_requests)
+
+
+def _time_records(tracker, paths: list[str], requests: int) -> float:
+    record = tracker.record
+    began = time.perf_counter()
+    for index in range(requests):
+        record(method="GET", path=paths[index % len(paths)], status_code=200, latency=0.012)
+    return (time.perf_counter() - began) / requests
+
+
+def _retained_bytes(tracker, paths: list[str], requests: int) -> float:
+    _time_records(tracker, paths, len(paths) * 2)  # create every series first
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    _time_records(tracker, paths, requests)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    grown = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    return grown / requests
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200_000)
+    parser.add_argument("--routes", type=int, default=2_000)
+    args = parser.parse_args()
+
+    hot_paths = [f"/api/v1/resource{index}" for index in range(50)]
+    legacy = _time_records(_LegacyTracker(), hot_paths, args.requests)
+    sharded = _time_records(MetricsTracker(), hot_paths, args.requests)
+    retained = _retained_bytes(MetricsTracker(), hot_paths, 20_000)
+
+    scrape_tracker = MetricsTracker()
+    all_paths = [f"/api/v1/resource{index}" for index in range(args.routes)]
+    _time_records(scrape_tracker, all_paths, args.routes * 10)
+    began = time.perf_counter()
+    payload = scrape_tracker.prometheus_payload()
+    scrape = time.perf_counter() - began
+
+    print(f"{args.requests} recorded requests over {len(hot_paths)} routes")
+    print(f"  lock + dataclass record:    {legacy * 1e9:8.0f} ns/request")
+    print(f"  sharded histogram record:   {sharded * 1e9:8.0f} ns/request")
+    print(f"  memory retained:            {retained:8.2f} bytes/request")
+    print(f"scrape of {args.routes} routes ({payload.count(chr(10))} lines)")
+    print(f"  prometheus_payload:         {scrape * 1000:8.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
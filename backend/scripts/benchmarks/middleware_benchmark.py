@@ -0,0 +1,149 @@
+"""Measure per-request overhead of the security-header and metrics middleware.
+
+Drives a minimal Starlette app directly through the ASGI interface, without an
+HTTP client in the way, and compares:
+
+* no middleware, the baseline;
+* the original ``BaseHTTPMiddleware`` security headers plus the
+  ``@app.middleware("http")`` metrics function (copied below for comparison);
+* the pure-ASGI :class:`SecurityHeadersMiddleware` and :class:`MetricsMiddleware`.
+
+Usage::
+
+    python scripts/benchmarks/middleware_benchmark.py --requests 20000
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(BACKEND_DIR))
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("JWT_SECRET", "benchmark-secret")
+
+from starlette.applications import Starlette  # noqa: E402
+from starlette.middleware import Middleware  # noqa: E402
+from starlette.middleware.base import BaseHTTPMiddleware  # noqa: E402
+from starlette.requests import Request  # noqa: E402
+from starlette.responses import PlainTextResponse  # noqa: E402
+from starlette.routing import Route  # noqa: E402
+
+from app.core.metrics import MetricsTracker  # noqa: E402
+from app.core.middleware import MetricsMiddleware, SecurityHeadersMiddleware  # noqa: E402
+
+
+class _LegacySecurityHeaders(BaseHTTPMiddleware):
+    """Copy of the original ``BaseHTTPMiddleware`` implementation."""
+
+    async def dispatch(self, request, call_next):
+        response = await call_next(request)
+        response.headers.setdefault("X-Content-Type-Options", "nosniff")
+        response.headers.setdefault("X-Frame-Options", "DENY")
+        response.headers.setdefault("Referrer-Policy", "no-referrer")
+        response.headers.setdefault("X-XSS-Protection", "1; mode=block")
+        return response
+
+
+async def _legacy_metrics(request: Request, call_next):
+    """Copy of the original ``@app.middleware("http")`` metrics function."""
+
+    route = request.scope.get("route")
+    path_template = getattr(route, "path", request.url.path)
+    start = time.perf_counter()
+    response = await call_next(request)
+    duration = time.perf_counter() - start
+    tracker: MetricsTracker = request.app.state.metrics_tracker
+    availability = tracker.record(
+        method=request.method, path=path_template, status_code=response.status_code, latency=duration
+    )
+    response.headers["X-Process-Time"] = f"{duration:.3f}"
+    response.headers["X-Service-Availability"] = f"{availability:.4f}"
+    return response
+
+
+async def _endpoint(request: Request) -> PlainTextResponse:
+    return PlainTextResponse("ok")
+
+
+def _app(middleware: list[Middleware]) -> Starlette:
+    app = Starlette(routes=[Route("/items/{item_id}", _endpoint)], middleware=middleware)
+    app.state.metrics_tracker = MetricsTracker()
+    return app
+
+
+async def _drive(app: Starlette, requests: int) -> float:
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/items/1",
+        "raw_path": b"/items/1",
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"host", b"bench")],
+        "client": ("127.0.0.1", 1234),
+        "server": ("bench", 80),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        return None
+
+    began = time.perf_counter()
+    for _ in range(requests):
+        await app(dict(scope), receive, send)
+    return (time.perf_counter() - began) / requests
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=20_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    variants = {
+        "no middleware": [],
+        "BaseHTTPMiddleware": [
+            Middleware(BaseHTTPMiddleware, dispatch=_legacy_metrics),
+            Middleware(_LegacySecurityHeaders),
+        ],
+        "pure ASGI": [
+            Middleware(MetricsMiddleware),
+            Middleware(SecurityHeadersMiddleware),
+        ],
+    }
+
+    results: dict[str, float] = {}
+    for label, middleware in variants.items():
+        app = _app(middleware)
+        asyncio.run(_drive(app, 500))  # warm up
+        results[label] = statistics.median(
+            asyncio.run(_drive(app, args.requests)) for _ in range(args.repeat)
+        )
+
+    baseline = results["no middleware"]
+    print(f"{args.requests} requests, median of {args.repeat} runs")
+    for label, per_request in results.items():
+        print(
+            f"  {label:<20} {per_request * 1e6:8.1f} µs/request"
+            f"   overhead {(per_request - baseline) * 1e6:8.1f} µs"
+        )
+    legacy = results["BaseHTTPMiddleware"] - baseline
+    asgi = results["pure ASGI"] - baseline
+    print(f"  overhead saved:      {(legacy - asgi) * 1e6:8.1f} µs/request")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,310 @@
+import asyncio
+import io
+import zipfile
+from datetime import date
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.modules.crew.models import Booking
+from app.modules.projects.models import Project
+from app.modules.transport import routes as transport_routes
+from app.modules.transport.models import Route, RouteStop
+from app.modules.transport.pdf_cache import PdfDiskCache, TransportPdfRenderer
+
+
+@pytest.fixture(autouse=True)
+def pdf_renderer(tmp_path, monkeypatch):
+    renderer = TransportPdfRenderer(PdfDiskCache(tmp_path / "pdf", max_bytes=10**7), workers=0)
+    monkeypatch.setattr(transport_routes, "pdf_renderer", renderer)
+    return renderer
+
+
+def _project(db_session) -> Project:
+    project = Project(
+        name="Festival",
+        client_name="Client",
+        start_date=date(2025, 6, 1),
+        end_date=date(2025, 6, 3),
+        notes="",
+    )
+    db_session.add(project)
+    db_session.commit()
+    return project
+
+
+def test_booking_status_changes_are_persisted(client, db_session):
+    project = _project(db_session)
+
+    member = client.post(
+        "/api/v1/crew", json={"name": "Alex", "email": "Alex@Example.com"}
+    )
+    assert member.status_code == 200
+    crew_id = member.json()["id"]
+
+    booking = client.post(
+        "/api/v1/bookings",
+        json={
+            "project_id": project.id,
+            "crew_id": crew_id,
+            "start": "2025-06-01T08:00:00",
+            "end": "2025-06-01T18:00:00",
+        },
+    )
+    assert booking.status_code == 200
+    assert booking.json()["status"] == "tentative"
+
+    accepted = client.post(f"/api/v1/bookings/{booking.json()['id']}/accept")
+    assert accepted.status_code == 200
+    assert accepted.json()["status"] == "confirmed"
+
+    listed = client.get("/api/v1/me/bookings", params={"crew_id": crew_id})
+    assert [row["status"] for row in listed.json()] == ["confirmed"]
+    assert db_session.get(Booking, booking.json()["id"]).status == "confirmed"
+    assert client.post("/api/v1/bookings/999/decline").status_code == 404
+
+
+def test_route_manifest_pdf_is_rendered_from_async_session(client, db_session):
+    project = _project(db_session)
+    vehicle = client.post(
+        "/api/v1/transport/vehicles", json={"name": "Truck", "plate": "AB-123-C"}
+    ).json()
+    driver = client.post(
+        "/api/v1/transport/drivers",
+        json={"name": "Sam", "phone": "0612345678", "email": "sam@example.com"},
+    ).json()
+
+    route = client.post(
+        "/api/v1/transport/routes",
+        json={
+            "project_id": project.id,
+            "vehicle_id": vehicle["id"],
+            "driver_id": driver["id"],
+            "date": "2025-06-01",
+            "start_time": "07:00:00",
+            "end_time": "19:00:00",
+            "stops": [
+                {
+                    "sequence": 1,
+                    "address": "Dam 1, Amsterdam",
+                    "contact_name": "Venue",
+                    "contact_phone": "020123456",
+                    "eta": "2025-06-01T08:00:00",
+                    "etd": "2025-06-01T09:00:00",
+                }
+            ],
+        },
+    )
+    assert route.status_code == 200
+    assert [row["id"] for row in client.get("/api/v1/transport/routes").json()] == [route.json()["id"]]
+    assert db_session.get(Route, route.json()["id"]).date == date(2025, 6, 1)
+
+    pdf = client.get(f"/api/v1/transport/routes/{route.json()['id']}/pdf")
+    assert pdf.status_code == 200
+    assert pdf.headers["content-type"] == "application/pdf"
+    assert pdf.content.startswith(b"%PDF")
+    assert client.get("/api/v1/transport/routes/999/pdf").status_code == 404
+
+    etag = pdf.headers["etag"]
+    unchanged = client.get(
+        f"/api/v1/transport/routes/{route.json()['id']}/pdf", headers={"If-None-Match": etag}
+    )
+    assert unchanged.status_code == 304
+    assert unchanged.content == b""
+
+    stored = db_session.get(Route, route.json()["id"])
+    stored.status = "dispatched"
+    db_session.commit()
+    changed = client.get(
+        f"/api/v1/transport/routes/{route.json()['id']}/pdf", headers={"If-None-Match": etag}
+    )
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+
+
+def test_day_manifests_export_in_fixed_queries(client, db_session):
+    project = _project(db_session)
+    vehicle = client.post(
+        "/api/v1/transport/vehicles", json={"name": "Truck", "plate": "AB-123-C"}
+    ).json()
+    driver = client.post(
+        "/api/v1/transport/drivers",
+        json={"name": "Sam", "phone": "0612345678", "email": "sam@example.com"},
+    ).json()
+    route_ids = []
+    for index, day in enumerate(["2025-06-01", "2025-06-01", "2025-06-01", "2025-06-02"]):
+        route = client.post(
+            "/api/v1/transport/routes",
+            json={
+                "project_id": project.id,
+                "vehicle_id": vehicle["id"],
+                "driver_id": driver["id"],
+                "date": day,
+                "start_time": f"{7 + index:02d}:00:00",
+                "end_time": "19:00:00",
+                "stops": [
+                    {
+                        "sequence": sequence,
+                        "address": f"Stop {index}.{sequence}",
+                        "contact_name": "Venue",
+                        "contact_phone": "020123456",
+                        "eta": "2025-06-01T08:00:00",
+                        "etd": "2025-06-01T09:00:00",
+                    }
+                    for sequence in (1, 2)
+                ],
+            },
+        )
+        route_ids.append(route.json()["id"])
+
+    statements: list[str] = []
+
+    def record(conn, cursor, statement, *args) -> None:
+        if "veh_" in statement:
+            statements.append(statement)
+
+    event.listen(Engine, "before_cursor_execute", record)
+    try:
+        archive = client.get(
+            "/api/v1/transport/manifests", params={"date": "2025-06-01", "format": "zip"}
+        )
+    finally:
+        event.remove(Engine, "before_cursor_execute", record)
+
+    assert archive.status_code == 200
+    assert archive.headers["content-type"] == "application/zip"
+    assert len(statements) == 4
+    with zipfile.ZipFile(io.BytesIO(archive.content)) as bundle:
+        assert bundle.namelist() == [f"route-{route_id}.pdf" for route_id in route_ids[:3]]
+        assert all(bundle.read(name).startswith(b"%PDF") for name in bundle.namelist())
+
+    combined = client.get("/api/v1/transport/manifests", params={"date": "2025-06-01"})
+    assert combined.status_code == 200
+    assert combined.headers["content-type"] == "application/pdf"
+    assert 'filename="manifests-2025-06-01.pdf"' in combined.headers["content-disposition"]
+    assert combined.content.startswith(b"%PDF")
+    assert combined.content.count(b"/Type /Page\n") >= 3
+
+    empty = client.get("/api/v1/transport/manifests", params={"date": "2025-07-01"})
+    assert empty.status_code == 404
+
+
+def test_optimize_route_resequences_stops(client, db_session, monkeypatch):
+    from app.modules.transport.optimizer import RouteOptimizer
+
+    optimize = RouteOptimizer.optimize
+    on_loop: list[bool] = []
+
+    def recording_optimize(self, *args, **kwargs):
+        try:
+            asyncio.get_running_loop()
+            on_loop.append(True)
+        except RuntimeError:
+            on_loop.append(False)
+        return optimize(self, *args, **kwargs)
+
+    monkeypatch.setattr(RouteOptimizer, "optimize", recording_optimize)
+    project = _project(db_session)
+    vehicle = client.post(
+        "/api/v1/transport/vehicles", json={"name": "Truck", "plate": "AB-123-C"}
+    ).json()
+    driver = client.post(
+        "/api/v1/transport/drivers",
+        json={"name": "Sam", "phone": "0612345678", "email": "sam@example.com"},
+    ).json()
+    # Planned as Amsterdam -> Rotterdam -> Haarlem -> Utrecht, starting from Amsterdam.
+    places = [
+        ("Amsterdam", 52.3791, 4.9003),
+        ("Rotterdam", 51.9244, 4.4690),
+        ("Haarlem", 52.3874, 4.6462),
+        ("Utrecht", 52.0894, 5.1101),
+    ]
+    route = client.post(
+        "/api/v1/transport/routes",
+        json={
+            "project_id": project.id,
+            "vehicle_id": vehicle["id"],
+            "driver_id": driver["id"],
+            "date": "2025-06-01",
+            "start_time": "07:00:00",
+            "end_time": "19:00:00",
+            "stops": [
+                {
+                    "sequence": sequence,
+                    "address": name,
+                    "contact_name": "Venue",
+                    "contact_phone": "020123456",
+                    "eta": "2025-06-01T07:00:00",
+                    "etd": "2025-06-01T18:00:00",
+                    "latitude": latitude,
+                    "longitude": longitude,
+                }
+                for sequence, (name, latitude, longitude) in enumerate(places, start=1)
+            ],
+        },
+    ).json()
+
+    preview = client.post(
+        f"/api/v1/transport/routes/{route['id']}/optimize",
+        json={"depot_latitude": 52.3791, "depot_longitude": 4.9003, "apply": False},
+    )
+    assert preview.status_code == 200
+    body = preview.json()
+    assert body["applied"] is False
+    assert body["distance_km"] < body["initial_distance_km"]
+    assert [stop["address"] for stop in body["stops"]] == [
+        "Amsterdam",
+        "Haarlem",
+        "Utrecht",
+        "Rotterdam",
+    ]
+
+    applied = client.post(
+        f"/api/v1/transport/routes/{route['id']}/optimize",
+        json={"depot_latitude": 52.3791, "depot_longitude": 4.9003},
+    )
+    assert applied.status_code == 200
+    stored = (
+        db_session.query(RouteStop)
+        .filter(RouteStop.route_id == route["id"])
+        .order_by(RouteStop.sequence)
+        .all()
+    )
+    assert [stop.address for stop in stored] == [
+        stop["address"] for stop in applied.json()["stops"]
+    ]
+    assert [stop.sequence for stop in stored] == [1, 2, 3, 4]
+
+    assert client.post("/api/v1/transport/routes/999/optimize").status_code == 404
+    assert on_loop == [False, False]
+
+
+def test_optimize_route_requires_coordinates(client, db_session):
+    project = _project(db_session)
+    route = client.post(
+        "/api/v1/transport/routes",
+        json={
+            "project_id": project.id,
+            "vehicle_id": 1,
+            "driver_id": 1,
+            "date": "2025-06-01",
+            "start_time": "07:00:00",
+            "end_time": "19:00:00",
+            "stops": [
+                {
+                    "sequence": 1,
+                    "address": "Dam 1, Amsterdam",
+                    "contact_name": "Venue",
+                    "contact_phone": "020123456",
+                    "eta": "2025-06-01T08:00:00",
+                    "etd": "2025-06-01T09:00:00",
+                }
+            ],
+        },
+    ).json()
+
+    response = client.post(f"/api/v1/transport/routes/{route['id']}/optimize")
+
+    assert response.status_code == 422
+    assert "coördinaten" in response.json()["detail"]
@@ -45,3 +45,92 @@ def test_create_bundle_with_items_persists_links(client, db_session):
     assert link.bundle_id == payload["id"]
     assert link.item_id == item_id
     assert link.quantity == 2
+
+
+def test_availability_batch_preserves_request_order(client, db_session):
+    from datetime import date
+
+    from app.modules.inventory.models import Category, Item
+    from app.modules.projects.models import Project, ProjectItem
+
+    category = Category(name="Audio")
+    db_session.add(category)
+    db_session.flush()
+    speaker = Item(name="Speaker", category_id=category.id, quantity_total=8)
+    mixer = Item(name="Mixer", category_id=category.id, quantity_total=2)
+    db_session.add_all([speaker, mixer])
+    db_session.flush()
+    project = Project(
+        name="Gala",
+        client_name="ACME",
+        start_date=date(2024, 9, 1),
+        end_date=date(2024, 9, 3),
+        notes="",
+    )
+    db_session.add(project)
+    db_session.flush()
+    db_session.add(ProjectItem(project_id=project.id, item_id=speaker.id, qty_reserved=5))
+    db_session.commit()
+
+    response = client.post(
+        "/api/v1/inventory/availability",
+        json=[
+            {"item_id": mixer.id, "quantity": 1, "start": "2024-09-01", "end": "2024-09-02"},
+            {"item_id": speaker.id, "quantity": 4, "start": "2024-09-02", "end": "2024-09-02"},
+            {"item_id": 9999, "quantity": 1, "start": "2024-09-01", "end": "2024-09-02"},
+            {"item_id": speaker.id, "quantity": 4, "start": "2024-09-10", "end": "2024-09-12"},
+        ],
+    )
+
+    assert response.status_code == 200
+    assert [(row["item_id"], row["available"], row["ok"]) for row in response.json()] == [
+        (mixer.id, 2, True),
+        (speaker.id, 3, False),
+        (9999, 0, False),
+        (speaker.id, 8, True),
+    ]
+
+
+def test_occupancy_endpoint_returns_daily_profile(client, db_session):
+    from app.modules.inventory.models import Category, Item
+
+    category = Category(name="Video")
+    db_session.add(category)
+    db_session.flush()
+    screen = Item(name="LED Wall", category_id=category.id, quantity_total=4)
+    db_session.add(screen)
+    db_session.commit()
+
+    response = client.post(
+        "/api/v1/inventory/occupancy",
+        json={"item_ids": [screen.id, 4242], "start": "2024-10-01", "end": "2024-10-03"},
+    )
+
+    assert response.status_code == 200
+    payload = response.json()
+    assert len(payload) == 1
+    assert payload[0]["min_available"] == 4
+    assert [day["day"] for day in payload[0]["days"]] == ["2024-10-01", "2024-10-02", "2024-10-03"]
+
+    invalid = client.post(
+        "/api/v1/inventory/occupancy",
+        json={"item_ids": [screen.id], "start": "2024-10-03", "end": "2024-10-01"},
+    )
+    assert invalid.status_code == 422
+
+    full_year = client.post(
+        "/api/v1/inventory/occupancy",
+        json={"item_ids": [screen.id], "start": "2024-01-01", "end": "2024-12-31"},
+    )
+    assert full_year.status_code == 200
+
+    too_long = client.post(
+        "/api/v1/inventory/occupancy",
+        json={"item_ids": [screen.id], "start": "2024-01-01", "end": "2025-01-01"},
+    )
+    assert too_long.status_code == 422
+    too_many = client.post(
+        "/api/v1/inventory/occupancy",
+        json={"item_ids": list(range(1, 1002)), "start": "2024-10-01", "end": "2024-10-03"},
+    )
+    assert too_many.status_code == 422
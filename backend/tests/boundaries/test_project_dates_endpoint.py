@@ -132,3 +132,80 @@ def test_update_project_dates_conflict_returns_409(client, db_session: Session):
     assert first_detail['item_id'] == item.id
     assert first_detail['requested'] == 7
     assert first_detail['available'] == 6
+
+
+def test_update_project_dates_reports_crew_and_transport_conflicts(client, db_session: Session):
+    from datetime import datetime, time
+
+    from sqlalchemy import event
+
+    from app.modules.crew.models import Booking, CrewMember
+    from app.modules.transport.models import Driver, Route, Vehicle
+
+    today = date.today()
+    project = seed_project(
+        db_session,
+        name='Corporate Gala',
+        client_name='Contoso',
+        start_date=today + timedelta(days=20),
+        end_date=today + timedelta(days=22),
+        notes='',
+    )
+    member = CrewMember(name='Sanne', role='tech')
+    vehicle = Vehicle(name='Bakwagen', plate='VX-123-B')
+    driver = Driver(name='Kees', phone='0600000000', email='kees@example.com')
+    db_session.add_all([member, vehicle, driver])
+    db_session.flush()
+    for offset in range(5):
+        day = today + timedelta(days=20 + (offset % 3))
+        db_session.add(
+            Booking(
+                project_id=project.id,
+                crew_id=member.id,
+                start=datetime.combine(day, time(9)),
+                end=datetime.combine(day, time(17)),
+                status='confirmed',
+            )
+        )
+        db_session.add(
+            Route(
+                project_id=project.id,
+                vehicle_id=vehicle.id,
+                driver_id=driver.id,
+                date=day,
+                start_time=time(7),
+                end_time=time(9),
+                status='planned',
+            )
+        )
+    db_session.commit()
+
+    statements: list[str] = []
+
+    def _record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    engine = db_session.get_bind()
+    event.listen(engine, 'before_cursor_execute', _record)
+    try:
+        response = client.put(
+            f'/api/v1/projects/{project.id}/dates',
+            json={
+                'name': 'Corporate Gala',
+                'client_name': 'Contoso',
+                'start_date': (today + timedelta(days=21)).isoformat(),
+                'end_date': (today + timedelta(days=21)).isoformat(),
+                'notes': '',
+            },
+        )
+    finally:
+        event.remove(engine, 'before_cursor_execute', _record)
+
+    assert response.status_code == 409
+    detail = response.json()['detail']
+    assert detail['error'] == 'planner_conflict'
+    assert len(detail['crew_conflicts']) == 3
+    assert {c['crew_name'] for c in detail['crew_conflicts']} == {'Sanne'}
+    assert len(detail['transport_conflicts']) == 3
+    assert {(c['vehicle_name'], c['driver_name']) for c in detail['transport_conflicts']} == {('Bakwagen', 'Kees')}
+    assert len([s for s in statements if s.lstrip().upper().startswith('SELECT')]) <= 4
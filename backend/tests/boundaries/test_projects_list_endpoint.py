@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta, timezone
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.modules.inventory.models import Category, Item
+from app.modules.projects.models import Project, ProjectItem
+
+
+def seed_projects(session: Session, count: int) -> list[Project]:
+    category = Category(name='Rigging')
+    session.add(category)
+    session.flush()
+    truss = Item(name='Truss 3m', category_id=category.id, quantity_total=4)
+    motor = Item(name='Chain Hoist', category_id=category.id, quantity_total=0)
+    session.add_all([truss, motor])
+    session.flush()
+
+    today = date.today()
+    projects = []
+    for index in range(count):
+        project = Project(
+            name=f'Show {index}',
+            client_name='Sevensa Events',
+            start_date=today + timedelta(days=index),
+            end_date=today + timedelta(days=index + 1),
+            notes='',
+        )
+        session.add(project)
+        session.flush()
+        session.add_all(
+            [
+                ProjectItem(project_id=project.id, item_id=truss.id, qty_reserved=3),
+                ProjectItem(project_id=project.id, item_id=motor.id, qty_reserved=1),
+            ]
+        )
+        projects.append(project)
+    session.commit()
+    return projects
+
+
+def test_list_projects_uses_constant_number_of_queries(client, db_session: Session):
+    seed_projects(db_session, 12)
+    statements: list[str] = []
+
+    def _record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    engine = db_session.get_bind()
+    event.listen(engine, 'before_cursor_execute', _record)
+    try:
+        response = client.get('/api/v1/projects')
+    finally:
+        event.remove(engine, 'before_cursor_execute', _record)
+
+    assert response.status_code == 200
+    payload = response.json()
+    assert len(payload) == 12
+    assert all(project['inventory_risk'] == 'critical' for project in payload)
+    assert any('75%' in alert for alert in payload[0]['inventory_alerts'])
+    assert len([s for s in statements if s.lstrip().upper().startswith('SELECT')]) <= 3
+
+
+def test_list_projects_paginates_and_filters_since(client, db_session: Session):
+    projects = seed_projects(db_session, 5)
+
+    page = client.get('/api/v1/projects', params={'limit': 2, 'offset': 1})
+    assert page.status_code == 200
+    assert page.headers['X-Total-Count'] == '5'
+    assert [project['id'] for project in page.json()] == [projects[3].id, projects[2].id]
+
+    future = datetime.now(timezone.utc) + timedelta(days=1)
+    empty = client.get('/api/v1/projects', params={'since': future.isoformat()})
+    assert empty.status_code == 200
+    assert empty.json() == []
+
+    past = datetime.now(timezone.utc) - timedelta(days=1)
+    recent = client.get('/api/v1/projects', params={'since': past.isoformat()})
+    assert len(recent.json()) == 5
+
+
+def test_since_reports_reservation_and_stock_changes(client, db_session: Session):
+    projects = seed_projects(db_session, 3)
+    truss_id = db_session.query(Item).filter_by(name='Truss 3m').one().id
+    old = datetime(2020, 1, 1, tzinfo=timezone.utc)
+    since = {'since': datetime(2021, 1, 1, tzinfo=timezone.utc).isoformat()}
+
+    def age_projects() -> None:
+        db_session.query(Project).update({Project.updated_at: old})
+        db_session.commit()
+
+    age_projects()
+    assert client.get('/api/v1/projects', params=since).json() == []
+
+    reserved = client.post(
+        f'/api/v1/projects/{projects[0].id}/reserve',
+        json={'items': [{'item_id': truss_id, 'qty': 1}]},
+    )
+    assert reserved.status_code == 200
+    assert [project['id'] for project in client.get('/api/v1/projects', params=since).json()] == [
+        projects[0].id
+    ]
+
+    age_projects()
+    assert client.delete(f'/api/v1/inventory/items/{truss_id}').status_code == 200
+    assert len(client.get('/api/v1/projects', params=since).json()) == 3
+
+
+def test_total_count_header_is_exposed_to_cross_origin_clients(client):
+    from app.core.config import settings
+
+    origin = settings.ALLOWED_ORIGINS[0]
+    response = client.get('/api/v1/projects', params={'limit': 1}, headers={'Origin': origin})
+    assert 'X-Total-Count' in response.headers['Access-Control-Expose-Headers']
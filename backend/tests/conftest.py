@@ -11,8 +11,9 @@ import types
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import Session, sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import NullPool, StaticPool
 from sqlalchemy.types import UserDefinedType
 
 ROOT = Path(__file__).resolve().parents[1]
@@ -105,6 +106,11 @@ def _install_otel_stubs() -> None:
 def _install_aiosqlite_stub() -> None:
     if 'aiosqlite' in sys.modules:
         return
+    try:  # Prefer the real driver so async routes can be exercised end-to-end.
+        import aiosqlite  # noqa: F401
+        return
+    except ImportError:
+        pass
 
     import sqlite3
 
@@ -298,6 +304,7 @@ os.environ.setdefault('MRDJ_LEAD_CAPTURE_CAPTCHA_ENDPOINT', 'https://captcha.tes
 os.environ.setdefault('MRDJ_LEAD_CAPTURE_CAPTCHA_SECRET', 'dummy-secret')
 
 # Ensure models are imported so metadata is populated before accessing the FastAPI app
+import app.core.events.dead_letters  # noqa: F401
 import app.modules.auth.models  # noqa: F401
 import app.modules.chat.models  # noqa: F401
 import app.modules.billing.models  # noqa: F401
@@ -310,21 +317,24 @@ import app.modules.projects.models  # noqa: F401
 import app.modules.platform.secrets.models  # noqa: F401
 import app.modules.crm.models  # noqa: F401
 import app.modules.recurring_invoices.models  # noqa: F401
+import app.modules.transport.models  # noqa: F401
 
 from app.core.db import Base
 
 
-def create_test_engine():
+def create_test_engine(url: str = 'sqlite://'):
     return create_engine(
-        'sqlite://',
+        url,
         connect_args={'check_same_thread': False},
         poolclass=StaticPool,
     )
 
 
 @pytest.fixture()
-def db_session() -> Generator[Session, None, None]:
-    engine = create_test_engine()
+def db_session(tmp_path: Path) -> Generator[Session, None, None]:
+    # A file-backed database lets the async routes open their own connections
+    # against the same data the test seeds through this session.
+    engine = create_test_engine(f"sqlite:///{tmp_path / 'rentguy.db'}")
     TestingSessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False)
     Base.metadata.create_all(bind=engine)
     session = TestingSessionLocal()
@@ -345,6 +355,7 @@ class DummyUser:
 
 @pytest.fixture()
 def client(db_session: Session) -> Generator[TestClient, None, None]:
+    from app.core.db import get_async_session
     from app.main import app
     from app.modules.auth import deps as auth_deps
     from app.modules.auth.models import User
@@ -355,8 +366,22 @@ def client(db_session: Session) -> Generator[TestClient, None, None]:
         finally:
             db_session.rollback()
 
+    async_engine = create_async_engine(
+        db_session.get_bind().url.set(drivername='sqlite+aiosqlite'), poolclass=NullPool
+    )
+    AsyncTestingSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False)
+
+    async def override_get_async_session():
+        async with AsyncTestingSessionLocal() as session:
+            yield session
+        # Rows written by async routes must be visible to assertions made
+        # through the synchronous fixture session.
+        db_session.expire_all()
+
     app.dependency_overrides[auth_deps.get_db] = override_get_db
+    app.dependency_overrides[get_async_session] = override_get_async_session
     app.dependency_overrides[auth_deps.get_current_user] = lambda: DummyUser(role='admin')
+    app.dependency_overrides[auth_deps.get_current_user_async] = lambda: DummyUser(role='admin')
 
     if not db_session.query(User).filter_by(id=1).first():
         db_session.add(
@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from app.modules.chat import sockets as chat_sockets
+from app.modules.chat.history import RecentMessages
+from app.modules.chat.models import Message
+from app.modules.chat.repo import ChatRepo
+from app.modules.chat.schemas import MessageOut
+from app.modules.crew import sockets as crew_sockets
+
+BASE = datetime(2025, 10, 24, 9, 0, tzinfo=timezone.utc)
+
+
+def _add_messages(session, project_id: int, count: int, *, same_second: bool = False) -> None:
+    for index in range(count):
+        offset = timedelta(0) if same_second else timedelta(minutes=index)
+        session.add(
+            Message(
+                project_id=project_id,
+                user_id=1,
+                content=f"msg {index}",
+                timestamp=BASE + offset,
+            )
+        )
+    session.commit()
+
+
+def _out(message_id: int, minute: int, project_id: int = 5) -> MessageOut:
+    return MessageOut(
+        id=message_id,
+        project_id=project_id,
+        user_id=1,
+        content=f"msg {message_id}",
+        timestamp=BASE + timedelta(minutes=minute),
+    )
+
+
+def test_keyset_pages_walk_history_without_gaps(db_session):
+    _add_messages(db_session, 5, 7)
+    _add_messages(db_session, 6, 2)
+    repo = ChatRepo(db_session)
+
+    seen: list[str] = []
+    page = repo.get_messages_by_project(5, 3)
+    while page:
+        seen.extend(message.content for message in page)
+        oldest = page[-1]
+        page = repo.get_messages_by_project(
+            5, 3, before_id=oldest.id, before_ts=oldest.timestamp
+        )
+
+    assert seen == [f"msg {index}" for index in reversed(range(7))]
+
+
+def test_before_id_alone_resolves_ties_on_timestamp(db_session):
+    _add_messages(db_session, 5, 4, same_second=True)
+    repo = ChatRepo(db_session)
+
+    first = repo.get_messages_by_project(5, 2)
+    second = repo.get_messages_by_project(5, 2, before_id=first[-1].id)
+
+    assert [message.content for message in first + second] == [
+        "msg 3",
+        "msg 2",
+        "msg 1",
+        "msg 0",
+    ]
+
+
+def test_ring_buffer_keeps_last_messages_and_merges_unwritten_ones():
+    recent = RecentMessages(3, max_rooms=2)
+    recent.append(_out(10, 10))
+    assert recent.get(5) is None
+
+    seeded = recent.seed(5, [_out(8, 8), _out(9, 9), _out(7, 7)])
+    assert [message.id for message in seeded] == [8, 9, 10]
+
+    recent.append(_out(11, 11))
+    recent.discard(5, 10)
+    assert [message.id for message in recent.get(5)] == [9, 11]
+
+    recent.seed(6, [])
+    recent.seed(7, [])
+    assert recent.get(5) is None
+
+
+@pytest.fixture()
+def socket_server(db_session, monkeypatch):
+    factory = sessionmaker(bind=db_session.bind, autocommit=False, autoflush=False)
+    monkeypatch.setattr(chat_sockets, "SessionLocal", factory)
+    monkeypatch.setattr(chat_sockets, "chat_pipeline", chat_sockets.create_chat_pipeline())
+    monkeypatch.setattr(chat_sockets, "recent_messages", RecentMessages(3))
+    server = AsyncMock()
+    chat_sockets.register_socket_server(server)
+    crew_sockets.register_socket_server(server)
+    return server
+
+
+def _history_calls(server: AsyncMock) -> list[list[str]]:
+    return [
+        [message["content"] for message in call.args[1]["messages"]]
+        for call in server.emit.await_args_list
+        if call.args[0] == "chat_history"
+    ]
+
+
+def test_join_replays_history_from_cache_after_first_load(socket_server, db_session, monkeypatch):
+    _add_messages(db_session, 5, 4)
+
+    asyncio.run(chat_sockets.join_project("sid-1", {"project_id": 5}))
+    socket_server.enter_room.assert_awaited_once_with("sid-1", "project_5")
+
+    def no_database(*args, **kwargs):
+        raise AssertionError("history should come from memory")
+
+    monkeypatch.setattr(chat_sockets, "_load_history", no_database)
+    asyncio.run(
+        chat_sockets.send_message("sid-1", {"project_id": 5, "user_id": 2, "content": "nieuw"})
+    )
+    asyncio.run(chat_sockets.join_project("sid-2", {"project_id": 5}))
+
+    assert _history_calls(socket_server) == [
+        ["msg 1", "msg 2", "msg 3"],
+        ["msg 2", "msg 3", "nieuw"],
+    ]
+
+
+def test_join_with_invalid_project_skips_history(socket_server):
+    asyncio.run(chat_sockets.join_project("sid-1", {"project_id": "abc"}))
+
+    assert _history_calls(socket_server) == []
+    assert socket_server.emit.await_args_list[0].args[0] == "error"
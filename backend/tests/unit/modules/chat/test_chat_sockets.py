@@ -4,6 +4,7 @@ import asyncio
 from unittest.mock import AsyncMock
 
 import pytest
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.orm import sessionmaker
 
 from app.modules.chat import sockets as chat_sockets
@@ -14,6 +15,7 @@ from app.modules.chat.models import Message
 def chat_session_factory(db_session, monkeypatch):
     testing_session_local = sessionmaker(bind=db_session.bind, autocommit=False, autoflush=False)
     monkeypatch.setattr(chat_sockets, "SessionLocal", testing_session_local)
+    monkeypatch.setattr(chat_sockets, "chat_pipeline", chat_sockets.create_chat_pipeline())
     yield testing_session_local
 
 
@@ -68,3 +70,54 @@ def test_send_message_rejects_invalid_payload(chat_server, chat_session_factory)
     assert error_call.args[0] == "error"
     assert error_call.kwargs["room"] == "sid-3"
     assert error_call.args[1]["message"] == "Invalid message payload"
+
+
+def test_running_pipeline_broadcasts_before_batched_write(chat_server, chat_session_factory):
+    pipeline = chat_sockets.chat_pipeline
+
+    async def scenario() -> list[int]:
+        await pipeline.start()
+        try:
+            for index in range(5):
+                await chat_sockets.send_message(
+                    "sid-3", {"project_id": 5, "user_id": 9, "content": f"bericht {index}"}
+                )
+            assert chat_server.emit.await_count == 5
+            with chat_session_factory() as session:
+                assert session.query(Message).count() == 0
+            await pipeline.writer.flush()
+        finally:
+            await pipeline.stop()
+        return [call.args[1]["id"] for call in chat_server.emit.await_args_list]
+
+    broadcast_ids = asyncio.run(scenario())
+
+    assert broadcast_ids == sorted(broadcast_ids)
+    with chat_session_factory() as session:
+        stored = session.query(Message).order_by(Message.id).all()
+        assert [message.id for message in stored] == broadcast_ids
+        assert [message.content for message in stored] == [f"bericht {i}" for i in range(5)]
+
+
+def test_failed_write_notifies_room_and_sender(chat_server, chat_session_factory, monkeypatch):
+    writer = chat_sockets.chat_pipeline.writer
+
+    def broken_insert(batch) -> None:
+        raise OperationalError("INSERT", {}, Exception("database is locked"))
+
+    monkeypatch.setattr(writer, "_insert", broken_insert)
+
+    asyncio.run(
+        chat_sockets.send_message("sid-3", {"project_id": 5, "user_id": 9, "content": "Hoi"})
+    )
+
+    events = [(call.args[0], call.kwargs["room"]) for call in chat_server.emit.await_args_list]
+    assert events == [
+        ("new_message", "project_5"),
+        ("message_failed", "project_5"),
+        ("error", "sid-3"),
+    ]
+    message_id = chat_server.emit.await_args_list[0].args[1]["id"]
+    assert chat_server.emit.await_args_list[1].args[1] == {"id": message_id, "project_id": 5}
+    with chat_session_factory() as session:
+        assert session.query(Message).count() == 0
@@ -1,13 +1,19 @@
 from __future__ import annotations
 
 import asyncio
+from datetime import datetime, timezone
 from unittest.mock import AsyncMock
 
 import pytest
+from sqlalchemy import text
 from sqlalchemy.orm import sessionmaker
 
+from app.modules.auth.models import User
+
 from app.modules.crew import sockets as crew_sockets
+from app.modules.crew.location_buffer import LocationWriteBehind
 from app.modules.crew.models import Location
+from app.modules.crew.schemas import LocationBroadcast
 
 
 @pytest.fixture()
@@ -81,3 +87,175 @@ def test_update_location_persists_and_broadcasts(crew_server, crew_session_facto
 
     rooms = {call.kwargs["room"] for call in crew_server.emit.await_args_list if call.args[0] == "location_update"}
     assert rooms == {"project_10", "managers"}
+
+
+def test_update_location_buffers_latest_position_per_user(
+    crew_server, crew_session_factory, monkeypatch
+):
+    buffer = LocationWriteBehind(crew_session_factory, interval=60)
+    monkeypatch.setattr(crew_sockets, "location_buffer", buffer)
+    pings = [
+        {"user_id": 7, "latitude": 52.0, "longitude": 4.0, "project_id": 10},
+        {"user_id": 8, "latitude": 51.0, "longitude": 5.0},
+        {"user_id": 7, "latitude": 52.5, "longitude": 4.5, "project_id": 10},
+    ]
+
+    async def scenario() -> int:
+        await buffer.start()
+        try:
+            for ping in pings:
+                await crew_sockets.update_location("sid-3", ping)
+            with crew_session_factory() as session:
+                assert session.query(Location).count() == 0
+            assert buffer.pending == 2
+            return await buffer.flush()
+        finally:
+            await buffer.stop()
+
+    assert asyncio.run(scenario()) == 2
+
+    broadcasts = [call for call in crew_server.emit.await_args_list if call.args[0] == "location_update"]
+    assert len(broadcasts) == 5
+
+    with crew_session_factory() as session:
+        stored = {location.user_id: location.geom for location in session.query(Location)}
+    assert stored == {7: "POINT(4.5 52.5)", 8: "POINT(5.0 51.0)"}
+
+
+def test_flush_upserts_existing_positions(crew_server, crew_session_factory, monkeypatch):
+    monkeypatch.setattr(crew_sockets, "location_buffer", LocationWriteBehind(crew_session_factory))
+
+    for latitude in (50.0, 51.0):
+        asyncio.run(
+            crew_sockets.update_location(
+                "sid-4", {"user_id": 9, "latitude": latitude, "longitude": 4.0}
+            )
+        )
+
+    with crew_session_factory() as session:
+        stored = session.query(Location).one()
+        assert stored.geom == "POINT(4.0 51.0)"
+
+
+def test_flush_drops_positions_rejected_by_foreign_keys(db_session):
+    db_session.add(User(id=21, email="driver@rentguy.demo", password_hash="x", role="crew"))
+    db_session.commit()
+    factory = sessionmaker(bind=db_session.bind, autocommit=False, autoflush=False)
+
+    def strict_session():
+        session = factory()
+        session.execute(text("PRAGMA foreign_keys=ON"))
+        return session
+
+    buffer = LocationWriteBehind(strict_session)
+    buffer.put(_position(21, 52.0, 4.0))
+    buffer.put(_position(999, 51.0, 5.0))
+
+    assert asyncio.run(buffer.flush()) == 1
+    assert buffer.pending == 0
+
+    buffer.put(_position(21, 52.5, 4.5))
+    assert asyncio.run(buffer.flush()) == 1
+    with factory() as session:
+        assert [location.geom for location in session.query(Location)] == ["POINT(4.5 52.5)"]
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _position(user_id: int, latitude: float, longitude: float, **extra) -> LocationBroadcast:
+    return LocationBroadcast(
+        user_id=user_id,
+        latitude=latitude,
+        longitude=longitude,
+        timestamp=datetime(2025, 1, 1, tzinfo=timezone.utc),
+        **extra,
+    )
+
+
+def test_scheduler_batches_positions_into_one_frame_per_room(crew_server):
+    scheduler = crew_sockets.LocationBroadcastScheduler()
+    scheduler.offer(_position(1, 52.0, 4.0, project_id=10))
+    scheduler.offer(_position(2, 52.1, 4.1, project_id=10))
+    scheduler.offer(_position(3, 52.2, 4.2))
+
+    assert asyncio.run(scheduler.tick()) == 3
+
+    frames = {
+        call.kwargs["room"]: call.args[1]["positions"]
+        for call in crew_server.emit.await_args_list
+        if call.args[0] == "location_batch"
+    }
+    assert {room: [entry["user_id"] for entry in entries] for room, entries in frames.items()} == {
+        "project_10": [1, 2],
+        "managers": [1, 2, 3],
+    }
+
+
+def test_scheduler_throttles_and_suppresses_small_moves():
+    clock = _Clock()
+    scheduler = crew_sockets.LocationBroadcastScheduler(
+        max_user_hz=1.0, min_distance_m=10.0, min_heading_deg=20.0, clock=clock
+    )
+    scheduler.offer(_position(1, 52.0, 4.0, heading=90))
+    assert scheduler.collect()["managers"][0]["latitude"] == 52.0
+
+    clock.now = 0.5
+    scheduler.offer(_position(1, 52.001, 4.0, heading=90))
+    assert scheduler.collect() == {}
+
+    clock.now = 1.0
+    assert scheduler.collect()["managers"][0]["latitude"] == 52.001
+
+    clock.now = 2.0
+    scheduler.offer(_position(1, 52.00101, 4.0, heading=95))
+    assert scheduler.collect() == {}
+
+    clock.now = 3.0
+    scheduler.offer(_position(1, 52.00101, 4.0, heading=130))
+    assert scheduler.collect()["managers"][0]["heading"] == 130
+
+
+def test_scheduler_delta_encodes_between_keyframes():
+    clock = _Clock()
+    scheduler = crew_sockets.LocationBroadcastScheduler(
+        delta_encoding=True, keyframe_every=3, clock=clock
+    )
+    entries = []
+    for step, latitude in enumerate([52.0, 52.00002, 52.00005, 52.0001]):
+        clock.now = float(step)
+        scheduler.offer(_position(1, latitude, 4.0))
+        entries.append(scheduler.collect()["managers"][0])
+
+    assert entries[0]["latitude"] == 52.0
+    assert (entries[1]["dlat"], entries[1]["dlon"]) == (20, 0)
+    assert (entries[2]["dlat"], entries[2]["dlon"]) == (30, 0)
+    assert "dlat" not in entries[3] and entries[3]["latitude"] == 52.0001
+
+
+def test_update_location_hands_positions_to_running_scheduler(
+    crew_server, crew_session_factory, monkeypatch
+):
+    scheduler = crew_sockets.LocationBroadcastScheduler()
+    monkeypatch.setattr(crew_sockets, "location_broadcaster", scheduler)
+    monkeypatch.setattr(crew_sockets, "location_buffer", LocationWriteBehind(crew_session_factory))
+
+    async def scenario() -> int:
+        await scheduler.start()
+        try:
+            await crew_sockets.update_location(
+                "sid-5", {"user_id": 4, "latitude": 52.0, "longitude": 4.0}
+            )
+            assert crew_server.emit.await_count == 0
+            return await scheduler.tick()
+        finally:
+            await scheduler.stop()
+
+    assert asyncio.run(scenario()) == 1
+    crew_server.emit.assert_awaited_once()
+    assert crew_server.emit.await_args.args[0] == "location_batch"
@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+import asyncio
+from unittest.mock import AsyncMock
+
+from app.core.events.bus import EventBus
+from app.core.events.models import EquipmentStatusChanged
+from app.modules.inventory import events as inventory_events
+
+
+def test_status_changes_are_broadcast_once_per_window() -> None:
+    server = AsyncMock()
+    bus = EventBus()
+    inventory_events.register_event_handlers(bus, server)
+
+    async def scenario() -> None:
+        await bus.start()
+        try:
+            bus.publish_many(
+                [
+                    EquipmentStatusChanged(item_id=1, status="in_use"),
+                    EquipmentStatusChanged(item_id=2, status="maintenance"),
+                    EquipmentStatusChanged(item_id=1, status="available"),
+                ]
+            )
+            await bus.drain()
+        finally:
+            await bus.stop()
+
+    asyncio.run(scenario())
+
+    server.emit.assert_awaited_once()
+    name, payload = server.emit.await_args.args
+    assert name == "equipment_status_batch"
+    assert [(update["item_id"], update["status"]) for update in payload["updates"]] == [
+        (1, "available"),
+        (2, "maintenance"),
+    ]
@@ -159,3 +159,57 @@ def test_bundle_helpers_round_trip(db_session: Session) -> None:
 
     assert link.id is not None
     assert repo.get_bundle_items(bundle.id) == [link]
+
+
+def test_calc_available_many_uses_constant_queries(db_session: Session) -> None:
+    from sqlalchemy import event
+
+    repo = InventoryRepo(db_session)
+    category = _create_category(db_session, "Batch")
+    items = [_create_item(db_session, category, name=f"Item {i}", quantity=3) for i in range(20)]
+    project = Project(
+        name="Quote", client_name="ACME", start_date=date(2024, 8, 1), end_date=date(2024, 8, 2), notes=""
+    )
+    db_session.add(project)
+    db_session.flush()
+    db_session.add(ProjectItem(project_id=project.id, item_id=items[0].id, qty_reserved=2))
+    db_session.flush()
+
+    statements: list[str] = []
+    engine = db_session.get_bind()
+    listener = lambda *args: statements.append(args[2])  # noqa: E731
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        results = repo.calc_available_many(
+            [(item.id, date(2024, 8, 1), date(2024, 8, 5)) for item in reversed(items)]
+        )
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+
+    assert results == [3] * 19 + [1]
+    assert len(statements) == 2
+
+
+def test_calc_available_uses_peak_not_window_sum(db_session: Session) -> None:
+    repo = InventoryRepo(db_session)
+    category = _create_category(db_session, "Peak")
+    item = _create_item(db_session, category, name="Hazer", quantity=5)
+    early = Project(
+        name="Early", client_name="ACME", start_date=date(2024, 3, 1), end_date=date(2024, 3, 5), notes=""
+    )
+    late = Project(
+        name="Late", client_name="ACME", start_date=date(2024, 3, 20), end_date=date(2024, 3, 25), notes=""
+    )
+    db_session.add_all([early, late])
+    db_session.flush()
+    db_session.add_all(
+        [
+            ProjectItem(project_id=early.id, item_id=item.id, qty_reserved=3),
+            ProjectItem(project_id=late.id, item_id=item.id, qty_reserved=4),
+        ]
+    )
+    db_session.flush()
+
+    assert repo.calc_available(item.id, date(2024, 3, 1), date(2024, 3, 31)) == 1
+    profile = repo.occupancy([item.id], date(2024, 3, 1), date(2024, 3, 31))[item.id]
+    assert profile.reserved.tolist()[:6] == [3, 3, 3, 3, 3, 0]
@@ -0,0 +1,103 @@
+"""Unit tests for :mod:`app.modules.projects.availability`."""
+
+from __future__ import annotations
+
+from datetime import date
+
+from sqlalchemy.orm import Session
+
+from app.modules.inventory.models import Category, Item
+from app.modules.projects.availability import AvailabilityEngine, ItemReservationIndex, occupancy_matrix
+from app.modules.projects.models import Project, ProjectItem
+from app.modules.projects.repo import ProjectsRepo
+
+
+def _seed_item(session: Session, name: str, quantity: int) -> Item:
+    category = session.query(Category).filter_by(name="Audio").one_or_none()
+    if category is None:
+        category = Category(name="Audio")
+        session.add(category)
+        session.flush()
+    item = Item(name=name, category_id=category.id, quantity_total=quantity)
+    session.add(item)
+    session.flush()
+    return item
+
+
+def _reserve(session: Session, item: Item, start: date, end: date, qty: int) -> Project:
+    project = Project(name=f"Show {start}", client_name="ACME", start_date=start, end_date=end, notes="")
+    session.add(project)
+    session.flush()
+    session.add(ProjectItem(project_id=project.id, item_id=item.id, qty_reserved=qty))
+    session.flush()
+    return project
+
+
+def test_index_reports_peak_instead_of_window_sum() -> None:
+    index = ItemReservationIndex(
+        [
+            (date(2024, 5, 1), date(2024, 5, 2), 4),
+            (date(2024, 5, 5), date(2024, 5, 6), 3),
+            (date(2024, 5, 6), date(2024, 5, 8), 2),
+        ]
+    )
+
+    assert index.peak(date(2024, 5, 1), date(2024, 5, 10)) == 5
+    assert index.peak(date(2024, 5, 1), date(2024, 5, 4)) == 4
+    assert index.peak(date(2024, 5, 3), date(2024, 5, 4)) == 0
+    assert index.peak(date(2024, 5, 7), date(2024, 5, 30)) == 2
+    assert index.peak(date(2024, 4, 1), date(2024, 4, 30)) == 0
+
+
+def test_engine_evaluates_many_items_and_honours_exclusion(db_session: Session) -> None:
+    speaker = _seed_item(db_session, "Speaker", 10)
+    mixer = _seed_item(db_session, "Mixer", 2)
+    own = _reserve(db_session, speaker, date(2024, 6, 1), date(2024, 6, 3), 6)
+    _reserve(db_session, speaker, date(2024, 6, 4), date(2024, 6, 5), 5)
+    _reserve(db_session, mixer, date(2024, 6, 2), date(2024, 6, 2), 2)
+
+    engine = AvailabilityEngine(db_session)
+    window = (date(2024, 6, 1), date(2024, 6, 5))
+
+    assert engine.peak_reserved([speaker.id, mixer.id], *window) == {speaker.id: 6, mixer.id: 2}
+    assert engine.available([speaker.id, mixer.id, 999], *window) == {speaker.id: 4, mixer.id: 0}
+    assert engine.peak_reserved([speaker.id], *window, exclude_project_id=own.id) == {speaker.id: 5}
+
+
+def test_repo_single_item_lookup_matches_bulk(db_session: Session) -> None:
+    item = _seed_item(db_session, "Truss", 8)
+    _reserve(db_session, item, date(2024, 7, 1), date(2024, 7, 4), 3)
+    _reserve(db_session, item, date(2024, 7, 3), date(2024, 7, 6), 4)
+    repo = ProjectsRepo(db_session)
+
+    single = repo.reserved_qty_for_item(item.id, date(2024, 7, 1), date(2024, 7, 6))
+    bulk = repo.reserved_qty_for_items([item.id], date(2024, 7, 1), date(2024, 7, 6))
+
+    assert single == bulk[item.id] == 7
+
+
+def test_occupancy_matrix_sweeps_and_clips_to_window() -> None:
+    rows = [
+        (1, date(2024, 4, 28), date(2024, 5, 2), 3),
+        (1, date(2024, 5, 2), date(2024, 5, 3), 2),
+        (2, date(2024, 5, 4), date(2024, 5, 9), 1),
+        (3, date(2024, 5, 1), date(2024, 5, 1), 7),
+    ]
+
+    matrix = occupancy_matrix(rows, [1, 2], date(2024, 5, 1), date(2024, 5, 5))
+
+    assert matrix.tolist() == [[3, 5, 2, 0, 0], [0, 0, 0, 1, 1]]
+
+
+def test_engine_occupancy_profile_reports_minimum_availability(db_session: Session) -> None:
+    item = _seed_item(db_session, "Moving Head", 6)
+    _reserve(db_session, item, date(2024, 8, 1), date(2024, 8, 2), 4)
+    _reserve(db_session, item, date(2024, 8, 20), date(2024, 8, 22), 5)
+
+    profile = AvailabilityEngine(db_session).occupancy([item.id], date(2024, 8, 1), date(2024, 8, 31))[item.id]
+
+    assert profile.peak_reserved == 5
+    assert profile.min_available == 1
+    assert profile.end == date(2024, 8, 31)
+    assert profile.days()[0] == (date(2024, 8, 1), 4, 2)
+    assert profile.days()[10] == (date(2024, 8, 11), 0, 6)
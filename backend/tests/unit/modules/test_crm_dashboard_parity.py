@@ -0,0 +1,245 @@
+"""Parity of every ``CRM_DASHBOARD_BACKEND`` with the Python reference implementation."""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.modules.crm import models
+from app.modules.crm.service import CRMService
+
+TENANT_ID = "mrdj"
+OTHER_TENANT = "other"
+
+
+def _pipeline(db: Session, tenant_id: str = TENANT_ID) -> tuple[int, list[int]]:
+    pipeline = models.CRMPipeline(tenant_id=tenant_id, name="Default", is_default=True)
+    pipeline.stages.extend(
+        [
+            models.CRMPipelineStage(name="Intake", order=1),
+            models.CRMPipelineStage(name="Proposal", order=2),
+            models.CRMPipelineStage(name="Empty", order=3),
+        ]
+    )
+    db.add(pipeline)
+    db.flush()
+    return pipeline.id, [stage.id for stage in pipeline.stages]
+
+
+def _lead(db: Session, source: str | None, age_days: float, tenant_id: str = TENANT_ID) -> int:
+    created = datetime.utcnow() - timedelta(days=age_days)
+    lead = models.CRMLead(
+        tenant_id=tenant_id, name="Lead", source=source, created_at=created, updated_at=created
+    )
+    db.add(lead)
+    db.flush()
+    return lead.id
+
+
+def _deal(
+    db: Session,
+    pipeline_id: int,
+    stage_id: int,
+    *,
+    lead_id: int | None = None,
+    value: str = "1000.00",
+    probability: int = 50,
+    status: str = "open",
+    created_days_ago: float = 10,
+    updated_days_ago: float = 1,
+    expected_close_in: int | None = None,
+    tenant_id: str = TENANT_ID,
+) -> None:
+    now = datetime.utcnow()
+    db.add(
+        models.CRMDeal(
+            tenant_id=tenant_id,
+            lead_id=lead_id,
+            pipeline_id=pipeline_id,
+            stage_id=stage_id,
+            title="Deal",
+            value=Decimal(value),
+            probability=probability,
+            status=status,
+            expected_close=(now + timedelta(days=expected_close_in)).date()
+            if expected_close_in is not None
+            else None,
+            created_at=now - timedelta(days=created_days_ago),
+            updated_at=now - timedelta(days=updated_days_ago),
+        )
+    )
+
+
+def _run(
+    db: Session,
+    workflow_id: str,
+    status: str,
+    minutes: float | None,
+    tenant_id: str = TENANT_ID,
+) -> None:
+    created = datetime.utcnow() - timedelta(hours=2)
+    deal_id = db.query(models.CRMDeal.id).filter_by(tenant_id=tenant_id).limit(1).scalar()
+    db.add(
+        models.CRMAutomationRun(
+            tenant_id=tenant_id,
+            deal_id=deal_id,
+            trigger=workflow_id,
+            workflow_id=workflow_id,
+            status=status,
+            created_at=created,
+            completed_at=created + timedelta(minutes=minutes) if minutes is not None else None,
+        )
+    )
+
+
+def _acquisition(
+    db: Session,
+    *,
+    source: str | None,
+    channel: str | None,
+    days_ago: int = 0,
+    sessions: int = 100,
+    tenant_id: str = TENANT_ID,
+) -> None:
+    db.add(
+        models.CRMAcquisitionMetric(
+            tenant_id=tenant_id,
+            source=source,
+            channel=channel,
+            captured_date=(datetime.utcnow() - timedelta(days=days_ago)).date(),
+            sessions=sessions,
+            new_users=sessions // 2,
+            engaged_sessions=sessions // 3,
+            ga_conversions=sessions // 10,
+            ga_conversion_value=Decimal("123.45"),
+            gtm_conversions=sessions // 20,
+            gtm_conversion_value=Decimal("67.89"),
+        )
+    )
+
+
+def _empty_tenant(db: Session) -> None:
+    _pipeline(db)
+
+
+def _no_pipeline(db: Session) -> None:
+    _lead(db, "website_form", 3)
+
+
+def _mixed_history(db: Session) -> None:
+    pipeline_id, (intake, proposal, _empty) = _pipeline(db)
+    referral = _lead(db, "Referral", 2)
+    referral_lower = _lead(db, " referral", 50)
+    website = _lead(db, "website_form", 12)
+    blank = _lead(db, "", 1)
+    unknown = _lead(db, None, 40)
+    _deal(db, pipeline_id, intake, lead_id=referral, value="2500.50", probability=35, expected_close_in=0)
+    _deal(db, pipeline_id, intake, lead_id=referral, status="Won", created_days_ago=40, updated_days_ago=3)
+    _deal(db, pipeline_id, proposal, lead_id=referral_lower, status="won", updated_days_ago=45)
+    _deal(db, pipeline_id, proposal, lead_id=website, status="lost", value="999.99", expected_close_in=30)
+    _deal(db, pipeline_id, proposal, lead_id=blank, status="CLOSED_LOST", updated_days_ago=31)
+    _deal(db, pipeline_id, intake, lead_id=unknown, probability=0, expected_close_in=31)
+    _deal(db, pipeline_id, intake, value="0", probability=100, expected_close_in=-1)
+    _deal(db, pipeline_id, proposal, status="negotiation", probability=100, expected_close_in=5)
+
+
+def _other_tenant_noise(db: Session) -> None:
+    _mixed_history(db)
+    pipeline_id, (intake, *_rest) = _pipeline(db, OTHER_TENANT)
+    other_lead = _lead(db, "Referral", 1, OTHER_TENANT)
+    _deal(db, pipeline_id, intake, lead_id=other_lead, status="won", tenant_id=OTHER_TENANT)
+    _acquisition(db, source="referral", channel="Referral", tenant_id=OTHER_TENANT)
+    db.flush()
+    _run(db, "lead_intake", "failed", None, OTHER_TENANT)
+
+
+def _automation(db: Session) -> None:
+    pipeline_id, (intake, *_rest) = _pipeline(db)
+    _deal(db, pipeline_id, intake)
+    db.flush()
+    _run(db, "lead_intake", "completed", 4)
+    _run(db, "lead_intake", "completed", 25)
+    _run(db, "lead_intake", "FAILED", None)
+    _run(db, "proposal_followup", "queued", None)
+    _run(db, "proposal_followup", "failed", 10)
+
+
+def _acquisition_sources(db: Session) -> None:
+    pipeline_id, (intake, *_rest) = _pipeline(db)
+    _deal(db, pipeline_id, intake, lead_id=_lead(db, "Google", 2))
+    _acquisition(db, source="google", channel="Paid Search")
+    _acquisition(db, source="google", channel="Organic Search", days_ago=3)
+    _acquisition(db, source="Google ", channel="Display", days_ago=4, sessions=7)
+    _acquisition(db, source=None, channel="Email", days_ago=2)
+    _acquisition(db, source=None, channel=None, days_ago=1, sessions=3)
+    _acquisition(db, source="bing", channel="Paid Search", days_ago=60)
+    _acquisition(db, source="future", channel="Paid Search", days_ago=-2)
+
+
+SCENARIOS = {
+    "empty_tenant": _empty_tenant,
+    "no_pipeline": _no_pipeline,
+    "mixed_history": _mixed_history,
+    "other_tenant_noise": _other_tenant_noise,
+    "automation": _automation,
+    "acquisition_sources": _acquisition_sources,
+}
+
+
+def _assert_same(actual: object, expected: object, path: str = "") -> None:
+    if isinstance(expected, dict):
+        assert set(actual) == set(expected), path
+        for key in expected:
+            if key in {"generated_at", "last_refreshed_at"}:
+                continue
+            _assert_same(actual[key], expected[key], f"{path}.{key}")
+    elif isinstance(expected, list):
+        assert len(actual) == len(expected), path
+        for index, (left, right) in enumerate(zip(actual, expected)):
+            _assert_same(left, right, f"{path}[{index}]")
+    elif isinstance(expected, float):
+        assert actual == pytest.approx(expected, rel=1e-9, abs=0.011), path
+    else:
+        assert actual == expected, path
+
+
+def _dashboard(db: Session, backend: str, lookback_days: int | None) -> dict[str, object]:
+    original = settings.CRM_DASHBOARD_BACKEND
+    settings.CRM_DASHBOARD_BACKEND = backend
+    try:
+        db.expire_all()
+        return CRMService(db, TENANT_ID).dashboard_metrics(lookback_days=lookback_days)
+    finally:
+        settings.CRM_DASHBOARD_BACKEND = original
+
+
+@pytest.mark.parametrize("lookback_days", [None, 7, 90])
+@pytest.mark.parametrize("scenario", sorted(SCENARIOS))
+@pytest.mark.parametrize("backend", ["sql", "materialized"])
+def test_backend_matches_python_reference(
+    db_session: Session, backend: str, scenario: str, lookback_days: int | None
+) -> None:
+    SCENARIOS[scenario](db_session)
+    db_session.commit()
+
+    expected = _dashboard(db_session, "python", lookback_days)
+    actual = _dashboard(db_session, backend, lookback_days)
+
+    _assert_same(actual, expected)
+
+
+def test_sql_backend_does_not_load_orm_rows(db_session: Session) -> None:
+    _mixed_history(db_session)
+    db_session.flush()
+    _run(db_session, "lead_intake", "completed", 4)
+    db_session.commit()
+    db_session.expunge_all()
+
+    _dashboard(db_session, "sql", None)
+
+    loaded = {type(instance) for instance in db_session.identity_map.values()}
+    assert not loaded & {models.CRMLead, models.CRMDeal, models.CRMAutomationRun}
@@ -0,0 +1,288 @@
+from __future__ import annotations
+
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.core.config import settings
+from app.modules.crm import models
+from app.modules.crm.metrics_store import CRMMetricsStore
+from app.modules.crm.schemas import ActivityCreate, DealCreate, LeadCreate
+from app.modules.crm.service import CRMService
+
+TENANT_ID = "mrdj"
+
+
+def _seed_pipeline(db: Session) -> tuple[int, int, int]:
+    pipeline = models.CRMPipeline(tenant_id=TENANT_ID, name="Default", is_default=True)
+    intake = models.CRMPipelineStage(name="Intake", order=1)
+    proposal = models.CRMPipelineStage(name="Proposal", order=2, automation_flow="proposal_followup")
+    pipeline.stages.extend([intake, proposal])
+    db.add(pipeline)
+    db.commit()
+    return pipeline.id, intake.id, proposal.id
+
+
+def _seed_history(db: Session, pipeline_id: int, stage_ids: tuple[int, int], deals: int) -> None:
+    now = datetime.utcnow()
+    sources = ["mr-dj.nl", "Referral", None, "referral"]
+    leads = [
+        models.CRMLead(
+            tenant_id=TENANT_ID,
+            name=f"Lead {index}",
+            source=sources[index % len(sources)],
+            created_at=now - timedelta(days=index * 3),
+            updated_at=now - timedelta(days=index * 3),
+        )
+        for index in range(deals)
+    ]
+    db.add_all(leads)
+    db.flush()
+    statuses = ["open", "won", "lost", "closed_lost", "Won"]
+    for index in range(deals):
+        db.add(
+            models.CRMDeal(
+                tenant_id=TENANT_ID,
+                lead_id=leads[index].id if index % 3 else None,
+                pipeline_id=pipeline_id,
+                stage_id=stage_ids[index % 2],
+                title=f"Deal {index}",
+                value=1000 + index * 125,
+                probability=(index * 17) % 101,
+                status=statuses[index % len(statuses)],
+                expected_close=(now + timedelta(days=index % 40)).date(),
+                created_at=now - timedelta(days=index * 2 + 5),
+                updated_at=now - timedelta(days=index),
+            )
+        )
+    db.add(
+        models.CRMAutomationRun(
+            tenant_id=TENANT_ID,
+            deal_id=1,
+            trigger="proposal_followup",
+            workflow_id="proposal_followup",
+            status="completed",
+            created_at=now - timedelta(minutes=20),
+            completed_at=now - timedelta(minutes=5),
+        )
+    )
+    db.commit()
+
+
+def _assert_same(actual: object, expected: object, path: str = "") -> None:
+    if isinstance(expected, dict):
+        assert set(actual) == set(expected), path
+        for key in expected:
+            if key in {"generated_at", "last_refreshed_at"}:
+                continue
+            _assert_same(actual[key], expected[key], f"{path}.{key}")
+    elif isinstance(expected, list):
+        assert len(actual) == len(expected), path
+        for index, (left, right) in enumerate(zip(actual, expected)):
+            _assert_same(left, right, f"{path}[{index}]")
+    elif isinstance(expected, float):
+        assert actual == pytest.approx(expected, rel=1e-9, abs=0.011), path
+    else:
+        assert actual == expected, path
+
+
+def _python_metrics(svc: CRMService, monkeypatch: pytest.MonkeyPatch) -> dict[str, object]:
+    with monkeypatch.context() as patch:
+        patch.setattr(settings, "CRM_DASHBOARD_BACKEND", "python")
+        return svc.dashboard_metrics()
+
+
+def test_store_is_built_from_history_on_first_read(
+    db_session: Session, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    pipeline_id, intake, proposal = _seed_pipeline(db_session)
+    _seed_history(db_session, pipeline_id, (intake, proposal), deals=25)
+    svc = CRMService(db_session, TENANT_ID)
+
+    assert db_session.get(models.CRMMetricTenant, TENANT_ID) is None
+    materialized = svc.dashboard_metrics()
+
+    assert db_session.get(models.CRMMetricTenant, TENANT_ID) is not None
+    _assert_same(materialized, _python_metrics(svc, monkeypatch))
+
+
+def test_service_writes_update_the_store_incrementally(
+    db_session: Session, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    pipeline_id, intake, proposal = _seed_pipeline(db_session)
+    _seed_history(db_session, pipeline_id, (intake, proposal), deals=6)
+    svc = CRMService(db_session, TENANT_ID)
+    svc.dashboard_metrics()  # builds the store
+    rebuilt_at = db_session.get(models.CRMMetricTenant, TENANT_ID).rebuilt_at
+
+    lead = svc.create_lead(LeadCreate(name="New", source="Instagram"))
+    svc.create_lead(LeadCreate(name="Walk-in"))
+    deal = svc.create_deal(
+        DealCreate(
+            title="New deal",
+            lead_id=lead.id,
+            pipeline_id=pipeline_id,
+            stage_id=intake,
+            value=4200,
+            probability=60,
+            expected_close=(datetime.utcnow() + timedelta(days=3)).date(),
+        )
+    )
+    svc.create_deal(
+        DealCreate(title="Second", lead_id=lead.id, pipeline_id=pipeline_id, stage_id=intake, value=800)
+    )
+    svc.create_deal(DealCreate(title="No lead", pipeline_id=pipeline_id, stage_id=proposal, value=50))
+    svc.advance_stage(deal.id, proposal)
+    svc.log_activity(ActivityCreate(deal_id=deal.id, activity_type="call", summary="Called"))
+
+    materialized = svc.dashboard_metrics()
+
+    state = db_session.get(models.CRMMetricTenant, TENANT_ID)
+    assert state.rebuilt_at == rebuilt_at
+    assert materialized["lead_funnel"]["total_leads"] == 8
+    assert materialized["sales"]["total_deals"] == 9
+    _assert_same(materialized, _python_metrics(svc, monkeypatch))
+
+    instagram = {row["key"]: row for row in materialized["source_performance"]}["instagram"]
+    assert instagram["lead_count"] == 1
+    assert instagram["deal_count"] == 2
+    assert instagram["pipeline_value"] == pytest.approx(5000.0)
+
+
+def test_writes_before_the_store_exists_are_picked_up_by_the_rebuild(
+    db_session: Session, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    pipeline_id, intake, _proposal = _seed_pipeline(db_session)
+    svc = CRMService(db_session, TENANT_ID)
+    lead = svc.create_lead(LeadCreate(name="Early", source="fair"))
+    svc.create_deal(DealCreate(title="Early", lead_id=lead.id, pipeline_id=pipeline_id, stage_id=intake, value=10))
+
+    assert db_session.query(models.CRMMetricStage).count() == 0
+    materialized = svc.dashboard_metrics()
+
+    assert materialized["lead_funnel"]["leads_with_deals"] == 1
+    _assert_same(materialized, _python_metrics(svc, monkeypatch))
+
+
+def test_rebuild_replaces_a_stale_store(db_session: Session, monkeypatch: pytest.MonkeyPatch) -> None:
+    pipeline_id, intake, proposal = _seed_pipeline(db_session)
+    _seed_history(db_session, pipeline_id, (intake, proposal), deals=4)
+    svc = CRMService(db_session, TENANT_ID)
+    svc.dashboard_metrics()
+
+    deal = db_session.query(models.CRMDeal).filter_by(status="open").first()
+    deal.status = "won"
+    db_session.commit()
+
+    svc.metrics.rebuild()
+    db_session.commit()
+
+    _assert_same(svc.dashboard_metrics(), _python_metrics(svc, monkeypatch))
+
+
+def test_hooks_and_rebuild_take_the_tenant_lock(
+    db_session: Session, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    calls: list[str] = []
+    lock_tenant = CRMMetricsStore._lock_tenant
+
+    def recording_lock(self) -> None:
+        calls.append(self.tenant_id)
+        lock_tenant(self)
+
+    monkeypatch.setattr(CRMMetricsStore, "_lock_tenant", recording_lock)
+    svc = CRMService(db_session, TENANT_ID)
+
+    svc.create_lead(LeadCreate(name="Before build"))
+    assert calls == [TENANT_ID]  # even though the store does not exist yet
+
+    svc.metrics.rebuild()
+    db_session.commit()
+    assert calls == [TENANT_ID, TENANT_ID]
+
+
+def test_write_during_the_first_rebuild_is_counted(
+    db_session: Session, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    pipeline_id, intake, proposal = _seed_pipeline(db_session)
+    _seed_history(db_session, pipeline_id, (intake, proposal), deals=6)
+    engine = create_engine(
+        db_session.get_bind().url, connect_args={"timeout": 30, "check_same_thread": False}
+    )
+    sessions = sessionmaker(bind=engine)
+
+    rebuilt = threading.Event()
+    written = threading.Event()
+    rebuild = CRMMetricsStore.rebuild
+
+    def slow_rebuild(self):
+        state = rebuild(self)
+        rebuilt.set()
+        # Keep the rebuild uncommitted while the writer runs.
+        written.wait(0.5)
+        return state
+
+    def write() -> None:
+        rebuilt.wait(5)
+        with sessions() as session:
+            CRMService(session, TENANT_ID).create_lead(LeadCreate(name="Racing", source="fair"))
+        written.set()
+
+    writer = threading.Thread(target=write)
+    with monkeypatch.context() as patch:
+        patch.setattr(CRMMetricsStore, "rebuild", slow_rebuild)
+        writer.start()
+        with sessions() as session:
+            CRMService(session, TENANT_ID).dashboard_metrics()
+        writer.join(10)
+    engine.dispose()
+
+    db_session.expire_all()
+    svc = CRMService(db_session, TENANT_ID)
+    materialized = svc.dashboard_metrics()
+    assert materialized["lead_funnel"]["total_leads"] == 7
+    _assert_same(materialized, _python_metrics(svc, monkeypatch))
+
+
+def _count_statements(db: Session):
+    statements: list[str] = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engine = db.get_bind()
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    return statements, lambda: event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+@pytest.mark.parametrize("backend", ["python", "materialized"])
+def test_dashboard_query_count_does_not_grow_with_deals(
+    db_session: Session, monkeypatch: pytest.MonkeyPatch, backend: str
+) -> None:
+    monkeypatch.setattr(settings, "CRM_DASHBOARD_BACKEND", backend)
+    pipeline_id, intake, proposal = _seed_pipeline(db_session)
+    svc = CRMService(db_session, TENANT_ID)
+
+    counts = []
+    for deals in (3, 30):
+        db_session.query(models.CRMActivity).delete()
+        db_session.query(models.CRMAutomationRun).delete()
+        db_session.query(models.CRMDeal).delete()
+        db_session.query(models.CRMLead).delete()
+        db_session.commit()
+        _seed_history(db_session, pipeline_id, (intake, proposal), deals=deals)
+        svc.metrics.rebuild()
+        db_session.commit()
+        db_session.expire_all()
+
+        statements, stop = _count_statements(db_session)
+        try:
+            svc.dashboard_metrics()
+        finally:
+            stop()
+        counts.append(len(statements))
+
+    assert counts[0] == counts[1]
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.modules.recurring_invoices.utils import (
+    CronExpressionError,
+    compile_cron,
+    next_n_runs,
+    next_run_from_cron,
+)
+
+
+def _brute_force(expression: str, reference: datetime, limit_days: int = 400) -> datetime:
+    """Reference implementation: test every minute with plain cron semantics."""
+
+    compiled = compile_cron(expression)
+    candidate = reference.replace(second=0, microsecond=0) + timedelta(minutes=1)
+    for _ in range(limit_days * 24 * 60):
+        dow = candidate.isoweekday() % 7
+        if (
+            candidate.minute in compiled.minutes
+            and candidate.hour in compiled.hours
+            and candidate.month in compiled.months
+            and compiled._day_matches(candidate.day, dow)
+        ):
+            return candidate
+        candidate += timedelta(minutes=1)
+    raise AssertionError("no match in brute force window")
+
+
+@pytest.mark.parametrize(
+    "expression",
+    [
+        "*/15 * * * *",
+        "30 9 * * mon-fri",
+        "0 0 1 * *",
+        "5,35 */6 15 * sun",
+        "0 12 * 2,3 *",
+    ],
+)
+@pytest.mark.parametrize(
+    "reference",
+    [
+        datetime(2025, 1, 31, 23, 59, 30),
+        datetime(2025, 2, 28, 12, 0),
+        datetime(2025, 10, 24, 9, 30, tzinfo=timezone.utc),
+    ],
+)
+def test_next_run_matches_minute_scan(expression: str, reference: datetime) -> None:
+    assert next_run_from_cron(expression, reference) == _brute_force(expression, reference)
+
+
+def test_sparse_schedules_jump_to_the_next_valid_date() -> None:
+    reference = datetime(2025, 3, 1, tzinfo=timezone.utc)
+
+    assert next_run_from_cron("0 0 29 2 *", reference) == datetime(
+        2028, 2, 29, tzinfo=timezone.utc
+    )
+    assert next_run_from_cron("59 23 31 * *", reference) == datetime(
+        2025, 3, 31, 23, 59, tzinfo=timezone.utc
+    )
+    assert next_run_from_cron("0 12 * 1,3,5 *", datetime(2025, 5, 31, 12, 0)) == datetime(
+        2026, 1, 1, 12, 0
+    )
+
+
+def test_day_of_week_counts_from_sunday() -> None:
+    saturday = datetime(2025, 10, 25, 8, 0)
+
+    assert next_run_from_cron("0 9 * * 0", saturday) == datetime(2025, 10, 26, 9, 0)
+    assert next_run_from_cron("0 9 * * 7", saturday) == datetime(2025, 10, 26, 9, 0)
+    assert next_run_from_cron("0 9 * * mon", saturday) == datetime(2025, 10, 27, 9, 0)
+
+
+def test_next_n_runs_and_compilation_cache() -> None:
+    assert compile_cron("0 0 1 */3 *") is compile_cron("0 0 1 */3 *")
+
+    runs = next_n_runs("0 0 1 */3 *", datetime(2025, 2, 10), 4)
+
+    assert runs == [
+        datetime(2025, 4, 1),
+        datetime(2025, 7, 1),
+        datetime(2025, 10, 1),
+        datetime(2026, 1, 1),
+    ]
+
+
+def test_impossible_schedule_raises() -> None:
+    with pytest.raises(CronExpressionError):
+        next_run_from_cron("0 0 31 2 *", datetime(2025, 1, 1))
@@ -0,0 +1,199 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from sqlalchemy import select
+from sqlalchemy.orm import sessionmaker
+
+from app.modules.recurring_invoices.models import (
+    RecurringInvoice,
+    RecurringInvoiceLog,
+    RecurringInvoiceStatus,
+)
+from app.modules.recurring_invoices.scheduler import RecurringInvoiceScheduler
+
+
+def _scheduler(db_session, **kwargs) -> tuple[RecurringInvoiceScheduler, list[int]]:
+    """Build a scheduler whose sessions record commits and the threads they ran on."""
+
+    factory = sessionmaker(bind=db_session.get_bind(), expire_on_commit=False)
+    commits: list[int] = []
+    threads: set[str] = set()
+
+    @contextmanager
+    def scope():
+        threads.add(threading.current_thread().name)
+        with factory() as session:
+            original = session.commit
+
+            def commit() -> None:
+                commits.append(len(session.dirty))
+                original()
+
+            session.commit = commit  # type: ignore[method-assign]
+            yield session
+
+    scheduler = RecurringInvoiceScheduler(session_scope=scope, **kwargs)
+    scheduler.threads = threads  # type: ignore[attr-defined]
+    return scheduler, commits
+
+
+def _add_invoices(
+    db_session, count: int, *, due: bool = True, status=RecurringInvoiceStatus.ACTIVE
+) -> None:
+    now = datetime.utcnow()
+    for index in range(count):
+        offset = -timedelta(hours=index + 1) if due else timedelta(days=1)
+        db_session.add(
+            RecurringInvoice(
+                user_id=1,
+                schedule="0 0 1 * *",
+                next_run=now + offset,
+                template={"amount": index},
+                status=status,
+            )
+        )
+    db_session.commit()
+
+
+def test_due_invoices_are_processed_in_committed_chunks_off_the_loop(db_session):
+    _add_invoices(db_session, 5)
+    _add_invoices(db_session, 2, due=False)
+    _add_invoices(db_session, 1, status=RecurringInvoiceStatus.PAUSED)
+    scheduler, commits = _scheduler(db_session, batch_size=2)
+
+    processed = asyncio.run(scheduler.process_invoices())
+
+    assert processed == 5
+    assert len(commits) == 3
+    assert scheduler.stats.chunks_total == 3
+    assert scheduler.stats.processed_total == 5
+    assert scheduler.stats.lag_seconds >= 5 * 3600
+    assert threading.main_thread().name not in scheduler.threads  # type: ignore[attr-defined]
+
+    db_session.expire_all()
+    now = datetime.utcnow()
+    active_due = db_session.scalars(
+        select(RecurringInvoice).where(
+            RecurringInvoice.status == RecurringInvoiceStatus.ACTIVE,
+            RecurringInvoice.next_run <= now,
+        )
+    ).all()
+    assert active_due == []
+    assert db_session.query(RecurringInvoiceLog).count() == 5
+
+
+def test_idle_tick_reports_no_lag(db_session):
+    _add_invoices(db_session, 1, due=False)
+    scheduler, commits = _scheduler(db_session)
+
+    assert asyncio.run(scheduler.process_invoices()) == 0
+
+    assert commits == []
+    assert scheduler.stats.lag_seconds == 0.0
+    payload = scheduler.prometheus_payload()
+    assert "rentguy_recurring_invoice_lag_seconds 0.0" in payload
+    assert "rentguy_recurring_invoices_processed_total 0" in payload
+
+
+def test_heap_mode_wakes_for_notified_invoices_without_polling(db_session):
+    scheduler, _ = _scheduler(db_session, mode="heap", resync_seconds=3600)
+    loads: list[int] = []
+    load_upcoming = scheduler._load_upcoming
+
+    def counting_load():
+        loads.append(1)
+        return load_upcoming()
+
+    scheduler._load_upcoming = counting_load  # type: ignore[method-assign]
+
+    async def scenario() -> None:
+        await scheduler.start()
+        try:
+            await asyncio.sleep(0.2)
+            assert loads == [1]  # idle: one initial load, no polling
+
+            invoice = RecurringInvoice(
+                user_id=1,
+                schedule="0 0 1 * *",
+                next_run=datetime.utcnow() + timedelta(milliseconds=300),
+                template={},
+                status=RecurringInvoiceStatus.ACTIVE,
+            )
+            db_session.add(invoice)
+            db_session.commit()
+            scheduler.notify(invoice.id, invoice.next_run)
+
+            await asyncio.sleep(0.15)
+            assert scheduler.stats.processed_total == 0
+            await asyncio.sleep(0.45)
+        finally:
+            await scheduler.shutdown()
+
+    asyncio.run(scenario())
+
+    assert scheduler.stats.processed_total == 1
+    assert db_session.query(RecurringInvoiceLog).count() == 1
+
+
+def test_heap_mode_ignores_removed_and_far_future_invoices(db_session):
+    _add_invoices(db_session, 2, due=False)
+    scheduler, _ = _scheduler(db_session, mode="heap", heap_size=1)
+
+    async def scenario() -> tuple[datetime | None, datetime]:
+        await scheduler.start()
+        await asyncio.sleep(0.05)
+        horizon = scheduler._horizon
+        assert horizon is not None
+
+        scheduler._track(99, horizon + timedelta(days=1))
+        scheduler._track(98, horizon - timedelta(hours=1))
+        scheduler._track(98, None)
+        earliest = scheduler._earliest()
+        await scheduler.shutdown()
+        return earliest, horizon
+
+    earliest, horizon = asyncio.run(scenario())
+
+    assert earliest == horizon
+    assert 99 not in scheduler._next_runs
+
+
+def test_runners_survive_failed_ticks(db_session, monkeypatch):
+    from app.modules.recurring_invoices import scheduler as scheduler_module
+
+    monkeypatch.setattr(scheduler_module, "_ERROR_BACKOFF_SECONDS", 0.01)
+    _add_invoices(db_session, 1)
+
+    for mode in ("poll", "heap"):
+        scheduler, _ = _scheduler(db_session, mode=mode, interval_seconds=0)
+        process_due = scheduler._process_due
+        calls: list[int] = []
+
+        def flaky(now, process_due=process_due, calls=calls):
+            calls.append(1)
+            if len(calls) == 1:
+                raise scheduler_module.OperationalError("SELECT", {}, Exception("gone"))
+            return process_due(now)
+
+        scheduler._process_due = flaky  # type: ignore[method-assign]
+
+        async def scenario(scheduler=scheduler) -> None:
+            await scheduler.start()
+            try:
+                for _ in range(100):
+                    if scheduler.stats.processed_total:
+                        break
+                    await asyncio.sleep(0.02)
+            finally:
+                await scheduler.shutdown()
+
+        asyncio.run(scenario())
+
+        assert scheduler.stats.errors_total == 1, mode
+        assert scheduler.stats.processed_total == 1, mode
+        assert "rentguy_recurring_invoice_scheduler_errors_total 1" in scheduler.prometheus_payload()
+        _add_invoices(db_session, 1)
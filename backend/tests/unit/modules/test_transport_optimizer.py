@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import math
+import random
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from app.modules.transport.optimizer import RouteOptimizer, StopInput, haversine_matrix
+
+START = datetime(2025, 6, 1, 7, 0)
+
+
+def test_haversine_matrix_matches_known_distance() -> None:
+    # Amsterdam Centraal -> Rotterdam Centraal is roughly 59 km as the crow flies.
+    matrix = haversine_matrix([52.3791, 51.9244], [4.9003, 4.4690])
+
+    assert matrix.shape == (2, 2)
+    assert np.allclose(np.diag(matrix), 0.0)
+    assert math.isclose(matrix[0, 1], 59.4, abs_tol=1.5)
+    assert matrix[0, 1] == matrix[1, 0]
+
+
+def test_shuffled_ring_is_untangled() -> None:
+    rng = random.Random(7)
+    points = [
+        (52.0 + 0.2 * math.cos(2 * math.pi * k / 30), 5.0 + 0.3 * math.sin(2 * math.pi * k / 30))
+        for k in range(30)
+    ]
+    rng.shuffle(points)
+
+    result = RouteOptimizer().optimize([StopInput(lat, lon) for lat, lon in points], start=START)
+
+    perimeter = sum(
+        haversine_matrix(
+            [52.0 + 0.2 * math.cos(2 * math.pi * k / 30) for k in (i, i + 1)],
+            [5.0 + 0.3 * math.sin(2 * math.pi * k / 30) for k in (i, i + 1)],
+        )[0, 1]
+        for i in range(30)
+    )
+    assert sorted(result.order) == list(range(30))
+    assert result.distance_km < result.initial_distance_km / 3
+    assert result.distance_km <= perimeter + 1e-6
+
+
+def test_time_windows_take_priority_over_distance() -> None:
+    # The far stop only accepts deliveries early, so it must not be left for last.
+    stops = [
+        StopInput(52.00, 5.00, START, START + timedelta(hours=8)),
+        StopInput(52.01, 5.00, START, START + timedelta(hours=8)),
+        StopInput(52.40, 5.00, START, START + timedelta(minutes=60)),
+    ]
+
+    result = RouteOptimizer(speed_kmh=60, service_minutes=10).optimize(
+        stops, start=START, depot=(52.0, 4.99)
+    )
+
+    assert result.order[-1] != 2
+    assert result.lateness_minutes == 0
+    assert result.arrivals[result.order.index(2)] <= START + timedelta(minutes=60)
+    assert result.initial_lateness_minutes > 0
+
+
+def test_hundred_stops_within_a_second() -> None:
+    rng = random.Random(3)
+    stops = [
+        StopInput(
+            51.8 + rng.random() * 0.8,
+            4.3 + rng.random() * 1.2,
+            START + timedelta(minutes=rng.randrange(0, 240)),
+            START + timedelta(minutes=rng.randrange(300, 600)),
+        )
+        for _ in range(100)
+    ]
+
+    began = time.perf_counter()
+    result = RouteOptimizer().optimize(stops, start=START, depot=(52.2, 4.9))
+
+    assert time.perf_counter() - began < 1.0
+    assert sorted(result.order) == list(range(100))
+    assert result.distance_km < result.initial_distance_km
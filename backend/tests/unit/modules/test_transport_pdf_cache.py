@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import asyncio
+from datetime import date, datetime
+from types import SimpleNamespace
+
+import pytest
+
+from app.modules.transport import pdf_cache
+from app.modules.transport.pdf import manifest_key, manifest_snapshot
+from app.modules.transport.pdf_cache import PdfDiskCache, TransportPdfRenderer
+
+
+def _snapshot(address: str = "Dam 1, Amsterdam") -> dict:
+    route = SimpleNamespace(id=1, project_id=2, date=date(2025, 6, 1), status="planned")
+    stop = SimpleNamespace(
+        sequence=1,
+        address=address,
+        contact_name="Venue",
+        contact_phone="020123456",
+        eta=datetime(2025, 6, 1, 8),
+        etd=datetime(2025, 6, 1, 9),
+    )
+    vehicle = SimpleNamespace(name="Truck", plate="AB-123-C", capacity_kg=1000, volume_m3=12)
+    driver = SimpleNamespace(name="Sam", license_types="B", phone="0612345678")
+    return manifest_snapshot(route, [stop], vehicle, driver)
+
+
+def test_manifest_key_tracks_content() -> None:
+    assert manifest_key(_snapshot()) == manifest_key(_snapshot())
+    assert manifest_key(_snapshot()) != manifest_key(_snapshot("Coolsingel 40, Rotterdam"))
+
+
+def test_disk_cache_evicts_least_recently_used(tmp_path) -> None:
+    cache = PdfDiskCache(tmp_path, max_bytes=25)
+    cache.put("a", b"x" * 10)
+    cache.put("b", b"y" * 10)
+    assert cache.get("a") == b"x" * 10
+
+    cache.put("c", b"z" * 10)
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["a.pdf", "c.pdf"]
+    assert PdfDiskCache(tmp_path, max_bytes=25).size == 20
+
+
+def test_renderer_shares_inflight_renders_and_reuses_cache(tmp_path, monkeypatch) -> None:
+    calls: list[str] = []
+    render = pdf_cache.render_manifest
+
+    def counting_render(snapshot: dict) -> bytes:
+        calls.append(snapshot["stops"][0]["address"])
+        return render(snapshot)
+
+    monkeypatch.setattr(pdf_cache, "render_manifest", counting_render)
+    renderer = TransportPdfRenderer(PdfDiskCache(tmp_path, max_bytes=10**7), workers=0)
+
+    async def scenario() -> list[bytes]:
+        first = await asyncio.gather(*(renderer.render(_snapshot()) for _ in range(3)))
+        return [*first, await renderer.render(_snapshot())]
+
+    documents = asyncio.run(scenario())
+
+    assert calls == ["Dam 1, Amsterdam"]
+    assert all(document == documents[0] for document in documents)
+    assert documents[0].startswith(b"%PDF")
+
+
+@pytest.mark.anyio
+async def test_renderer_uses_process_pool(tmp_path) -> None:
+    renderer = TransportPdfRenderer(PdfDiskCache(tmp_path, max_bytes=10**7), workers=1)
+    try:
+        document = await renderer.render(_snapshot())
+    finally:
+        renderer.shutdown()
+
+    assert document.startswith(b"%PDF")
+    assert (tmp_path / f"{manifest_key(_snapshot())}.pdf").read_bytes() == document
@@ -0,0 +1,89 @@
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.modules.auth import deps as auth_deps
+from app.modules.auth.cache import PrincipalCache, principal_cache
+from app.modules.auth.models import User
+from app.modules.auth.security import create_access_token
+
+
+def _count_user_selects(session: Session):
+    statements: list[str] = []
+
+    def _record(conn, cursor, statement, *args):
+        if "FROM auth_users" in statement:
+            statements.append(statement)
+
+    return statements, _record
+
+
+def test_cache_evicts_least_recently_used_and_expired_entries(db_session: Session):
+    cache = PrincipalCache(ttl_seconds=60, max_entries=2)
+    for index in range(3):
+        user = User(id=index + 10, email=f"user{index}@rentguy.demo", password_hash="x", role="viewer")
+        cache.put(user.email, 1, user)
+
+    assert len(cache) == 2
+    assert cache.get(db_session, "user0@rentguy.demo", 1) is None
+    assert cache.get(db_session, "USER2@rentguy.demo", 1).role == "viewer"
+
+    cache.invalidate("user2@rentguy.demo")
+    assert cache.get(db_session, "user2@rentguy.demo", 1) is None
+
+    expired = PrincipalCache(ttl_seconds=0)
+    expired.put("ghost@rentguy.demo", 1, User(id=99, email="ghost@rentguy.demo", password_hash="x", role="viewer"))
+    assert len(expired) == 0
+
+
+def test_repeated_requests_hit_cache_and_role_change_invalidates(client, db_session: Session):
+    principal_cache.clear()
+    user = User(email="pending@rentguy.demo", password_hash="x", role="pending")
+    db_session.add(user)
+    db_session.commit()
+
+    client.app.dependency_overrides.pop(auth_deps.get_current_user, None)
+    headers = {"Authorization": f"Bearer {create_access_token(user.email)}"}
+    statements, listener = _count_user_selects(db_session)
+    engine = db_session.get_bind()
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        assert client.get("/api/v1/auth/me", headers=headers).json()["role"] == "pending"
+        assert client.get("/api/v1/auth/me", headers=headers).json()["role"] == "pending"
+        assert len(statements) == 1
+
+        response = client.post("/api/v1/auth/role", json={"role": "planner"}, headers=headers)
+        assert response.status_code == 200
+
+        assert client.get("/api/v1/auth/me", headers=headers).json()["role"] == "planner"
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+        principal_cache.clear()
+
+    snapshot = client.app.state.metrics_tracker.snapshot()
+    assert snapshot["cache_lookups"][("auth_principal", "hit")] >= 2
+    assert snapshot["cache_lookups"][("auth_principal", "miss")] >= 2
+    assert 'rentguy_cache_lookups_total{cache="auth_principal",result="hit"}' in client.get("/metrics").text
+
+
+def test_async_routes_authenticate_without_the_sync_session(client, db_session: Session):
+    principal_cache.clear()
+    user = User(email="async-planner@rentguy.demo", password_hash="x", role="planner")
+    db_session.add(user)
+    db_session.commit()
+
+    def _no_sync_session():
+        raise AssertionError("async routes must not open a sync session")
+        yield  # pragma: no cover
+
+    client.app.dependency_overrides.pop(auth_deps.get_current_user_async, None)
+    client.app.dependency_overrides[auth_deps.get_db] = _no_sync_session
+    headers = {"Authorization": f"Bearer {create_access_token(user.email)}"}
+    try:
+        assert client.get("/api/v1/inventory/items", headers=headers).status_code == 200
+        assert client.get("/api/v1/inventory/items", headers=headers).status_code == 200
+        assert len(principal_cache) == 1
+
+        unknown = {"Authorization": f"Bearer {create_access_token('ghost@rentguy.demo')}"}
+        assert client.get("/api/v1/inventory/items", headers=unknown).status_code == 401
+    finally:
+        principal_cache.clear()
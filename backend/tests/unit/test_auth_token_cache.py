@@ -0,0 +1,59 @@
+import time
+
+import jwt
+import pytest
+
+from app.modules.auth import security
+from app.modules.auth.security import VerifiedTokenCache, create_access_token, decode_token
+
+
+@pytest.fixture(autouse=True)
+def _clear_token_cache():
+    security.token_cache.clear()
+    yield
+    security.token_cache.clear()
+
+
+def test_decode_token_skips_reverification_for_replayed_tokens(monkeypatch):
+    calls: list[str] = []
+    original = jwt.decode
+
+    def _counting_decode(token, *args, **kwargs):
+        calls.append(token)
+        return original(token, *args, **kwargs)
+
+    monkeypatch.setattr(security.jwt, "decode", _counting_decode)
+    token = create_access_token("planner@rentguy.demo")
+
+    first = decode_token(token)
+    first["sub"] = "mutated"
+    second = decode_token(token)
+
+    assert second["sub"] == "planner@rentguy.demo"
+    assert len(calls) == 1
+
+
+def test_tampered_tokens_are_still_rejected():
+    token = create_access_token("planner@rentguy.demo")
+    decode_token(token)
+
+    header, payload, signature = token.split(".")
+    tampered = ".".join([header, payload, signature[:-2] + ("AA" if signature[-2:] != "AA" else "BB")])
+
+    with pytest.raises(jwt.InvalidTokenError):
+        decode_token(tampered)
+
+
+def test_cache_entries_expire_with_token_and_secret():
+    cache = VerifiedTokenCache(max_entries=2)
+    cache.put("expired", {"sub": "a", "exp": time.time() - 1}, "secret", "HS512")
+    cache.put("valid", {"sub": "b", "exp": time.time() + 60}, "secret", "HS512")
+
+    assert cache.get("expired", "secret", "HS512") is None
+    assert cache.get("valid", "rotated", "HS512") is None
+    assert len(cache) == 0
+
+    for name in ("one", "two", "three"):
+        cache.put(name, {"sub": name, "exp": time.time() + 60}, "secret", "HS512")
+    assert len(cache) == 2
+    assert cache.get("one", "secret", "HS512") is None
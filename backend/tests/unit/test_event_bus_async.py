@@ -0,0 +1,259 @@
+"""Tests for asynchronous dispatch, backpressure and dead-letter replay."""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+
+import pytest
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.core.events.bus import EventBus, EventBusFull, handler_name
+from app.core.events.dead_letters import DeadLetterStore, EventDeadLetter
+from app.core.events.models import InventoryReserved
+
+
+@pytest.mark.anyio
+async def test_publish_returns_before_slow_sync_handler() -> None:
+    bus = EventBus(workers=2)
+    release = threading.Event()
+    handled: list[str] = []
+
+    def slow_handler(event: dict[str, object]) -> None:
+        release.wait(timeout=5)
+        handled.append(threading.current_thread().name)
+
+    bus.subscribe("mail", slow_handler)
+    await bus.start()
+    try:
+        began = time.perf_counter()
+        bus.publish({"event_type": "mail"})
+        assert time.perf_counter() - began < 0.1
+        assert handled == []
+        release.set()
+        await bus.drain()
+    finally:
+        await bus.stop()
+
+    assert len(handled) == 1
+    assert handled[0].startswith("event-bus")
+
+
+@pytest.mark.anyio
+async def test_coroutine_handlers_are_awaited_on_the_loop() -> None:
+    bus = EventBus()
+    received: list[object] = []
+
+    async def handler(event: dict[str, object]) -> None:
+        await asyncio.sleep(0)
+        received.append(event["payload"])
+
+    bus.subscribe("sync", handler)
+    await bus.start()
+    try:
+        await bus.publish_async({"event_type": "sync", "payload": 1})
+        bus.publish({"event_type": "sync", "payload": 2})
+        await bus.drain()
+    finally:
+        await bus.stop()
+
+    assert received == [1, 2]
+
+
+def test_coroutine_handler_runs_without_started_bus() -> None:
+    bus = EventBus()
+    received: list[object] = []
+
+    async def handler(event: dict[str, object]) -> None:
+        received.append(event["payload"])
+
+    bus.subscribe("sync", handler)
+    bus.publish({"event_type": "sync", "payload": "inline"})
+
+    assert received == ["inline"]
+
+
+def test_callable_object_with_async_call_is_awaited() -> None:
+    bus = EventBus()
+    received: list[object] = []
+
+    class Handler:
+        async def __call__(self, event: dict[str, object]) -> None:
+            received.append(event["payload"])
+
+    bus.subscribe("sync", Handler())
+    bus.publish({"event_type": "sync", "payload": "object"})
+
+    assert received == ["object"]
+
+
+@pytest.mark.anyio
+async def test_drop_oldest_dead_letters_the_displaced_event() -> None:
+    bus = EventBus(queue_size=2, backpressure="drop_oldest")
+    received: list[object] = []
+    bus.subscribe("gps", lambda event: received.append(event["seq"]))
+    await bus.start()
+    try:
+        for seq in range(4):
+            bus.publish({"event_type": "gps", "seq": seq})
+        await bus.drain()
+    finally:
+        await bus.stop()
+
+    assert received == [2, 3]
+    dropped = [letter.event["seq"] for letter in bus.dead_letters()]
+    assert dropped == [0, 1]
+    assert {letter.reason for letter in bus.dead_letters()} == {"dropped"}
+
+
+@pytest.mark.anyio
+async def test_reject_raises_when_queue_is_full() -> None:
+    bus = EventBus(queue_size=1, backpressure="reject")
+    bus.subscribe("partner", lambda event: None)
+    await bus.start()
+    try:
+        bus.publish({"event_type": "partner"})
+        with pytest.raises(EventBusFull):
+            bus.publish({"event_type": "partner"})
+    finally:
+        await bus.stop()
+
+
+@pytest.mark.anyio
+async def test_block_waits_for_space_in_publish_async() -> None:
+    bus = EventBus(queue_size=1, backpressure="block")
+    received: list[int] = []
+
+    async def handler(event: dict[str, int]) -> None:
+        await asyncio.sleep(0.01)
+        received.append(event["seq"])
+
+    bus.subscribe("sync", handler)
+    await bus.start()
+    try:
+        for seq in range(5):
+            await bus.publish_async({"event_type": "sync", "seq": seq})
+        with pytest.raises(EventBusFull):
+            bus.publish({"event_type": "sync", "seq": 5})
+            bus.publish({"event_type": "sync", "seq": 6})
+        await bus.drain()
+    finally:
+        await bus.stop()
+
+    assert received[:5] == [0, 1, 2, 3, 4]
+
+
+@pytest.mark.anyio
+async def test_failures_are_persisted_and_replayed_to_the_failing_handler(
+    db_session: Session,
+) -> None:
+    factory = sessionmaker(bind=db_session.get_bind(), expire_on_commit=False)
+    store = DeadLetterStore(factory)
+    bus = EventBus(dead_letter_store=store)
+    attempts: list[int] = []
+    healthy: list[int] = []
+    failing = True
+
+    def flaky(event: InventoryReserved) -> None:
+        attempts.append(event.project_id)
+        if failing:
+            raise RuntimeError("partner sync unavailable")
+
+    bus.subscribe("InventoryReserved", flaky)
+    bus.subscribe("InventoryReserved", lambda event: healthy.append(event.project_id))
+    event = InventoryReserved(project_id=7, item_id=3, qty=2)
+
+    await bus.start()
+    try:
+        bus.publish(event)
+        await bus.drain()
+    finally:
+        await bus.stop()
+
+    pending = store.pending()
+    assert len(pending) == 1
+    assert pending[0].handler == handler_name(flaky)
+    assert pending[0].reason == "handler_failed"
+    assert "partner sync unavailable" in (pending[0].error or "")
+
+    failing = False
+    assert bus.replay_dead_letters() == 1
+
+    assert attempts == [7, 7]
+    assert healthy == [7]
+    assert store.pending() == []
+    with factory() as session:
+        assert session.query(EventDeadLetter).one().replayed_at is not None
+
+
+def test_publish_many_delivers_deduplicated_batch_without_started_bus() -> None:
+    bus = EventBus()
+    batches: list[list[int]] = []
+    singles: list[int] = []
+    bus.coalesce("status", interval=1.0, key=lambda event: event["item"])
+    bus.subscribe("status", lambda events: batches.append([e["seq"] for e in events]), batch=True)
+    bus.subscribe("status", lambda event: singles.append(event["seq"]))
+
+    bus.publish_many(
+        [
+            {"event_type": "status", "item": 1, "seq": 0},
+            {"event_type": "status", "item": 2, "seq": 1},
+            {"event_type": "status", "item": 1, "seq": 2},
+            {"event_type": "other", "item": 1, "seq": 3},
+        ]
+    )
+
+    assert batches == [[2, 1]]
+    assert singles == [0, 1, 2]
+
+
+@pytest.mark.anyio
+async def test_coalescing_window_batches_bursts_by_key() -> None:
+    bus = EventBus()
+    batches: list[list[tuple[int, str]]] = []
+
+    async def broadcast(events: list[dict[str, object]]) -> None:
+        batches.append([(event["item"], event["status"]) for event in events])  # type: ignore[misc]
+
+    bus.coalesce("status", interval=0.05, key=lambda event: event["item"])
+    bus.subscribe("status", broadcast, batch=True)
+    await bus.start()
+    try:
+        bus.publish_many(
+            {"event_type": "status", "item": item, "status": status}
+            for item, status in [(1, "in_use"), (2, "in_use"), (1, "damaged")]
+        )
+        await bus.publish_async({"event_type": "status", "item": 3, "status": "available"})
+        await asyncio.sleep(0.01)
+        assert batches == []
+        await asyncio.sleep(0.1)
+        assert batches == [[(1, "damaged"), (2, "in_use"), (3, "available")]]
+
+        bus.publish({"event_type": "status", "item": 1, "status": "available"})
+        await bus.drain()
+    finally:
+        await bus.stop()
+
+    assert batches[1:] == [[(1, "available")]]
+
+
+@pytest.mark.anyio
+async def test_batch_failures_dead_letter_every_event() -> None:
+    bus = EventBus()
+
+    def broken(events: list[dict[str, object]]) -> None:
+        raise RuntimeError("socket down")
+
+    bus.coalesce("status", interval=0, max_batch=2)
+    bus.subscribe("status", broken, batch=True)
+    await bus.start()
+    try:
+        bus.publish_many({"event_type": "status", "seq": seq} for seq in range(3))
+        await bus.drain()
+    finally:
+        await bus.stop()
+
+    letters = list(bus.dead_letters())
+    assert sorted(letter.event["seq"] for letter in letters) == [0, 1, 2]
+    assert {letter.handler for letter in letters} == {handler_name(broken)}
@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import threading
+
+import pytest
+
+from app.core.metrics import MetricsTracker, histogram_quantile
+
+
+def test_percentiles_are_estimated_from_the_histogram():
+    tracker = MetricsTracker(buckets=(0.1, 0.2, 0.4))
+    for _ in range(90):
+        tracker.record(method="GET", path="/items", status_code=200, latency=0.05)
+    for _ in range(10):
+        tracker.record(method="GET", path="/items", status_code=200, latency=0.3)
+
+    snapshot = tracker.snapshot()
+
+    assert snapshot["latency_percentiles"]["p50"] == pytest.approx(0.1 * 50 / 90)
+    assert snapshot["latency_percentiles"]["p95"] == pytest.approx(0.2 + 0.2 * 5 / 10)
+    assert snapshot["per_path_percentiles"][("GET", "/items")] == snapshot["latency_percentiles"]
+    assert histogram_quantile(0.99, (0.1,), [0, 3]) == 0.1
+    assert histogram_quantile(0.5, (0.1,), [0, 0]) == 0.0
+
+
+def test_counters_from_all_threads_are_merged_on_scrape():
+    tracker = MetricsTracker()
+
+    def worker() -> None:
+        for _ in range(1000):
+            tracker.record(method="GET", path="/projects", status_code=200, latency=0.01)
+        tracker.record(method="POST", path="/projects", status_code=503, latency=0.2)
+        tracker.record_cache_lookup("auth_principal", hit=True)
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    tracker.record_cache_lookup("auth_principal", hit=False)
+
+    snapshot = tracker.snapshot()
+    assert snapshot["total_requests"] == 8 * 1001
+    assert snapshot["error_count"] == 8
+    assert snapshot["per_path_counts"][("GET", "/projects", "200")] == 8000
+    assert snapshot["error_counts"] == {("POST", "/projects"): 8}
+    assert snapshot["per_path_latency"][("POST", "/projects")] == pytest.approx(1.6)
+    assert snapshot["cache_lookups"] == {("auth_principal", "hit"): 8, ("auth_principal", "miss"): 1}
+    assert snapshot["availability"] == pytest.approx(1 - 8 / 8008)
+
+
+def test_record_returns_availability_including_the_current_request():
+    tracker = MetricsTracker()
+
+    assert tracker.record(method="GET", path="/", status_code=200, latency=0.01) == 1.0
+    assert tracker.record(method="GET", path="/", status_code=500, latency=0.01) == 0.5
+    assert tracker.record(method="GET", path="/", status_code=200, latency=0.01) == pytest.approx(2 / 3)
+
+
+def test_recent_requests_keep_the_latest_samples_in_order():
+    tracker = MetricsTracker(max_samples=3)
+    for index in range(5):
+        tracker.record(method="GET", path=f"/p{index}", status_code=200 + index, latency=index / 10)
+
+    recent = tracker.snapshot()["recent_requests"]
+
+    assert [sample["path"] for sample in recent] == ["/p2", "/p3", "/p4"]
+    assert [sample["status_code"] for sample in recent] == [202, 203, 204]
+    assert recent[-1]["latency_seconds"] == pytest.approx(0.4)
+
+
+def test_prometheus_payload_exposes_cumulative_histograms():
+    tracker = MetricsTracker(buckets=(0.1, 0.5))
+    tracker.record(method="GET", path='/a"b', status_code=200, latency=0.05)
+    tracker.record(method="GET", path='/a"b', status_code=200, latency=0.3)
+    tracker.record(method="GET", path='/a"b', status_code=200, latency=2.0)
+
+    payload = tracker.prometheus_payload()
+
+    assert "# TYPE rentguy_request_duration_seconds histogram" in payload
+    labels = 'method="GET",path="/a\\"b"'
+    assert f'rentguy_request_duration_seconds_bucket{{{labels},le="0.1"}} 1' in payload
+    assert f'rentguy_request_duration_seconds_bucket{{{labels},le="0.5"}} 2' in payload
+    assert f'rentguy_request_duration_seconds_bucket{{{labels},le="+Inf"}} 3' in payload
+    assert f"rentguy_request_duration_seconds_count{{{labels}}} 3" in payload
+    assert f'rentguy_request_total{{{labels},status_code="200"}} 3' in payload
+
+
+def test_shards_of_exited_threads_are_retired():
+    tracker = MetricsTracker()
+
+    def work(index: int) -> None:
+        tracker.record(method="GET", path="/items", status_code=200 if index % 2 else 500, latency=0.01)
+        tracker.record_cache_lookup("auth_principal", hit=bool(index % 2))
+
+    for batch in range(10):
+        threads = [threading.Thread(target=work, args=(batch * 50 + i,)) for i in range(50)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    assert len(tracker._shards) <= 1
+    snapshot = tracker.snapshot()
+    assert snapshot["cache_lookups"][("auth_principal", "hit")] == 250
+    assert snapshot["cache_lookups"][("auth_principal", "miss")] == 250
+    assert 'rentguy_request_total{method="GET",path="/items",status_code="500"} 250' in (
+        tracker.prometheus_payload()
+    )
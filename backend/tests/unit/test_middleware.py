@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
+from fastapi.testclient import TestClient
+
+from app.core.metrics import MetricsTracker
+from app.core.middleware import MetricsMiddleware, SecurityHeadersMiddleware
+
+
+def _app() -> FastAPI:
+    app = FastAPI()
+    app.state.metrics_tracker = MetricsTracker()
+
+    @app.get("/items/{item_id}")
+    def read_item(item_id: int):
+        return PlainTextResponse("ok", headers={"X-Frame-Options": "SAMEORIGIN"})
+
+    @app.get("/boom")
+    def boom():
+        raise RuntimeError("boom")
+
+    @app.get("/metrics")
+    def metrics():
+        return PlainTextResponse("")
+
+    app.add_middleware(SecurityHeadersMiddleware, hsts_enabled=True)
+    app.add_middleware(MetricsMiddleware)
+    return app
+
+
+def test_security_headers_are_added_without_overriding_the_response():
+    client = TestClient(_app(), base_url="https://testserver")
+
+    response = client.get("/items/1")
+
+    assert response.headers["x-content-type-options"] == "nosniff"
+    assert response.headers["x-frame-options"] == "SAMEORIGIN"
+    assert response.headers["referrer-policy"] == "no-referrer"
+    assert response.headers["strict-transport-security"].startswith("max-age=")
+    assert "strict-transport-security" not in TestClient(_app()).get("/items/1").headers
+
+
+def test_metrics_are_recorded_per_route_template():
+    app = _app()
+    client = TestClient(app)
+
+    first = client.get("/items/1")
+    client.get("/items/2")
+    client.get("/metrics")
+
+    snapshot = app.state.metrics_tracker.snapshot()
+    assert snapshot["per_path_counts"] == {("GET", "/items/{item_id}", "200"): 2}
+    assert snapshot["total_requests"] == 2
+    assert float(first.headers["x-service-availability"]) == 1.0
+    assert float(first.headers["x-process-time"]) >= 0
+
+
+@pytest.mark.anyio
+async def test_streaming_bodies_are_forwarded_without_buffering():
+    events: list[str] = []
+
+    async def streaming_app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        for index in range(3):
+            events.append(f"produced-{index}")
+            await send({"type": "http.response.body", "body": b"x", "more_body": index < 2})
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            events.append("start")
+            assert (b"x-content-type-options", b"nosniff") in message["headers"]
+        else:
+            events.append("sent")
+
+    state = FastAPI().state
+    state.metrics_tracker = MetricsTracker()
+    app = MetricsMiddleware(SecurityHeadersMiddleware(streaming_app))
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": "/stream",
+        "scheme": "http",
+        "headers": [],
+        "app": type("App", (), {"state": state})(),
+    }
+
+    await app(scope, None, send)
+
+    assert events == ["start", "produced-0", "sent", "produced-1", "sent", "produced-2", "sent"]
+    assert state.metrics_tracker.snapshot()["per_path_counts"] == {("GET", "/stream", "200"): 1}
+
+
+def test_unhandled_errors_are_recorded_as_server_errors():
+    app = _app()
+    client = TestClient(app)
+
+    with pytest.raises(RuntimeError):
+        client.get("/boom")
+
+    snapshot = app.state.metrics_tracker.snapshot()
+    assert snapshot["error_count"] == 1
+    assert snapshot["per_path_counts"] == {("GET", "/boom", "500"): 1}
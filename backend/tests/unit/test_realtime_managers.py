@@ -0,0 +1,70 @@
+"""Cross-worker Socket.IO fan-out through the local pub/sub stand-in."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+from unittest.mock import AsyncMock
+
+import pytest
+import socketio
+
+from app.core.realtime_managers import (
+    LocalPubSubBroker,
+    LocalPubSubManager,
+    create_client_manager,
+)
+
+
+def _worker(broker: LocalPubSubBroker) -> tuple[socketio.AsyncServer, AsyncMock]:
+    server = socketio.AsyncServer(
+        async_mode="asgi", client_manager=LocalPubSubManager(broker, channel="test")
+    )
+    sent = AsyncMock()
+    server._send_eio_packet = sent  # type: ignore[method-assign]
+    server.manager.initialize()
+    return server, sent
+
+
+async def _connect(server: socketio.AsyncServer, eio_sid: str, room: str) -> str:
+    sid = await server.manager.connect(eio_sid, "/")
+    await server.enter_room(sid, room)
+    return sid
+
+
+def _events(sent: AsyncMock) -> list[tuple[str, object]]:
+    events = []
+    for call in sent.await_args_list:
+        _eio_sid, eio_packet = call.args
+        name, data = json.loads(eio_packet.data[1:])
+        events.append((name, data))
+    return events
+
+
+@pytest.mark.anyio
+async def test_room_emit_reaches_members_on_other_workers() -> None:
+    broker = LocalPubSubBroker()
+    worker_a, sent_a = _worker(broker)
+    worker_b, sent_b = _worker(broker)
+    try:
+        await _connect(worker_a, "eio-a", "project_1")
+        await _connect(worker_b, "eio-b", "project_1")
+        await _connect(worker_b, "eio-c", "project_2")
+
+        await worker_a.emit("location_batch", {"positions": [1]}, room="project_1")
+        await asyncio.sleep(0.05)
+    finally:
+        for server in (worker_a, worker_b):
+            server.manager.thread.cancel()
+
+    assert _events(sent_a) == [("location_batch", {"positions": [1]})]
+    assert _events(sent_b) == [("location_batch", {"positions": [1]})]
+    assert [call.args[0] for call in sent_b.await_args_list] == ["eio-b"]
+
+
+def test_create_client_manager_selects_backend() -> None:
+    assert type(create_client_manager(None)) is socketio.AsyncManager
+    assert type(create_client_manager("memory://")) is socketio.AsyncManager
+    assert isinstance(create_client_manager("local://", channel="c"), LocalPubSubManager)
+    with pytest.raises(ValueError):
+        create_client_manager("kafka://broker:9092")
@@ -15,6 +15,10 @@ interface StatusUpdate {
   timestamp: string;
 }
 
+interface StatusBatch {
+  updates: StatusUpdate[];
+}
+
 interface EquipmentStatusPanelProps {
   token: string;
 }
@@ -48,17 +52,19 @@ export const EquipmentStatusPanel: React.FC<EquipmentStatusPanelProps> = ({ toke
   useEffect(() => {
     if (!socket || !isConnected) return;
 
-    // Listen for real-time status updates
-    socket.on('equipment_status_update', (update: StatusUpdate) => {
+    // Listen for real-time status updates, batched per broadcast window
+    socket.on('equipment_status_batch', ({ updates }: StatusBatch) => {
+      const latest = new Map(updates.map((update) => [update.item_id, update.status]));
       setEquipment((prev) =>
-        prev.map((item) =>
-          item.id === update.item_id ? { ...item, status: update.status } : item
-        )
+        prev.map((item) => {
+          const status = latest.get(item.id);
+          return status ? { ...item, status } : item;
+        })
       );
     });
 
     return () => {
-      socket.off('equipment_status_update');
+      socket.off('equipment_status_batch');
     };
   }, [socket, isConnected]);
 
@@ -1,7 +1,12 @@
 import React, { useState, useEffect } from 'react';
 import { MapContainer, TileLayer, Marker, Popup, useMap } from 'react-leaflet';
 import { Icon, LatLngExpression } from 'leaflet';
-import { useRealtime, LocationUpdate } from '../hooks/useRealtime';
+import {
+  useRealtime,
+  decodeLocationBatch,
+  LocationBatch,
+  LocationUpdate,
+} from '../hooks/useRealtime';
 import 'leaflet/dist/leaflet.css';
 
 interface CrewLocation {
@@ -50,39 +55,43 @@ export const LocationMap: React.FC<LocationMapProps> = ({ projectId, token }) =>
       socket.emit('join_project', { project_id: projectId });
     }
 
-    // Listen for location updates
-    socket.on('location_update', (update: LocationUpdate) => {
+    const applyUpdates = (updates: LocationUpdate[]) => {
       setCrewLocations((prev) => {
-        const existingIndex = prev.findIndex((loc) => loc.user_id === update.user_id);
-        if (existingIndex >= 0) {
-          // Update existing location
-          const updated = [...prev];
-          updated[existingIndex] = {
+        const next = [...prev];
+        for (const update of updates) {
+          const location: CrewLocation = {
             user_id: update.user_id,
             latitude: update.latitude,
             longitude: update.longitude,
             timestamp: update.timestamp,
             project_id: update.project_id,
           };
-          return updated;
-        } else {
-          // Add new location
-          return [
-            ...prev,
-            {
-              user_id: update.user_id,
-              latitude: update.latitude,
-              longitude: update.longitude,
-              timestamp: update.timestamp,
-              project_id: update.project_id,
-            },
-          ];
+          const existingIndex = next.findIndex((loc) => loc.user_id === update.user_id);
+          if (existingIndex >= 0) {
+            // Update existing location
+            next[existingIndex] = location;
+          } else {
+            // Add new location
+            next.push(location);
+          }
         }
+        return next;
       });
+    };
+
+    // Listen for location updates: single updates and batched (possibly delta-encoded) frames
+    const known = new Map<number, LocationUpdate>();
+    socket.on('location_update', (update: LocationUpdate) => {
+      known.set(update.user_id, update);
+      applyUpdates([update]);
+    });
+    socket.on('location_batch', (batch: LocationBatch) => {
+      applyUpdates(decodeLocationBatch(batch, known));
     });
 
     return () => {
       socket.off('location_update');
+      socket.off('location_batch');
       if (projectId) {
         socket.emit('leave_project', { project_id: projectId });
       }
@@ -15,9 +15,22 @@ interface ProjectChatProps {
   currentUserId: number;
 }
 
+// Message ids are only ordered per server worker; the server timestamp decides
+// the order, with the id as tie-breaker (as in the history endpoints).
+const compareMessages = (a: Message, b: Message): number =>
+  Date.parse(a.timestamp) - Date.parse(b.timestamp) || a.id - b.id;
+
+const insertMessage = (messages: Message[], message: Message): Message[] => {
+  if (messages.some((existing) => existing.id === message.id)) return messages;
+  let index = messages.length;
+  while (index > 0 && compareMessages(messages[index - 1], message) > 0) index -= 1;
+  return [...messages.slice(0, index), message, ...messages.slice(index)];
+};
+
 export const ProjectChat: React.FC<ProjectChatProps> = ({ projectId, token, currentUserId }) => {
   const [messages, setMessages] = useState<Message[]>([]);
   const [inputValue, setInputValue] = useState('');
+  const [hasOlder, setHasOlder] = useState(true);
   const messagesEndRef = useRef<HTMLDivElement>(null);
   const { isConnected, socket } = useRealtime(token);
 
@@ -27,23 +40,27 @@ export const ProjectChat: React.FC<ProjectChatProps> = ({ projectId, token, curr
     // Join the project room
     socket.emit('join_project', { project_id: projectId });
 
+    // The server replays the latest messages when we join the room
+    socket.on('chat_history', (data: { project_id: number; messages: Message[] }) => {
+      if (data.project_id !== projectId) return;
+      setMessages(data.messages);
+      setHasOlder(data.messages.length > 0);
+    });
+
     // Listen for new messages
     socket.on('new_message', (message: Message) => {
-      setMessages((prev) => [...prev, message]);
+      setMessages((prev) => insertMessage(prev, message));
     });
 
-    // Fetch message history from REST API
-    fetch(`/api/v1/projects/${projectId}/chat`, {
-      headers: {
-        'Authorization': `Bearer ${token}`,
-      },
-    })
-      .then((res) => res.json())
-      .then((data) => setMessages(data.reverse()))
-      .catch((err) => console.error('Failed to fetch chat history:', err));
+    // Messages that could not be stored are withdrawn
+    socket.on('message_failed', (data: { id: number }) => {
+      setMessages((prev) => prev.filter((message) => message.id !== data.id));
+    });
 
     return () => {
+      socket.off('chat_history');
       socket.off('new_message');
+      socket.off('message_failed');
       socket.emit('leave_project', { project_id: projectId });
     };
   }, [socket, isConnected, projectId, token]);
@@ -53,6 +70,27 @@ export const ProjectChat: React.FC<ProjectChatProps> = ({ projectId, token, curr
     messagesEndRef.current?.scrollIntoView({ behavior: 'smooth' });
   }, [messages]);
 
+  const loadOlderMessages = () => {
+    const oldest = messages[0];
+    if (!oldest) return;
+
+    const params = new URLSearchParams({
+      before_id: String(oldest.id),
+      before_ts: oldest.timestamp,
+    });
+    fetch(`/api/v1/projects/${projectId}/chat?${params}`, {
+      headers: {
+        'Authorization': `Bearer ${token}`,
+      },
+    })
+      .then((res) => res.json())
+      .then((data: Message[]) => {
+        setHasOlder(data.length > 0);
+        setMessages((prev) => [...data.reverse(), ...prev]);
+      })
+      .catch((err) => console.error('Failed to fetch chat history:', err));
+  };
+
   const handleSendMessage = () => {
     if (!inputValue.trim() || !socket || !isConnected) return;
 
@@ -86,6 +124,14 @@ export const ProjectChat: React.FC<ProjectChatProps> = ({ projectId, token, curr
 
       {/* Message List */}
       <div className="flex-1 overflow-y-auto p-4 space-y-4">
+        {hasOlder && messages.length > 0 && (
+          <button
+            onClick={loadOlderMessages}
+            className="w-full text-sm text-gray-400 hover:text-gray-200"
+          >
+            Load older messages
+          </button>
+        )}
         {messages.map((message) => (
           <div
             key={message.id}
@@ -10,6 +10,55 @@ export interface LocationUpdate {
   project_id: number | null;
 }
 
+// Batched crew positions; delta-encoded entries carry dlat/dlon instead of coordinates
+export interface LocationBatchEntry {
+  user_id: number;
+  latitude?: number;
+  longitude?: number;
+  dlat?: number;
+  dlon?: number;
+  timestamp: string;
+  project_id: number | null;
+}
+
+export interface LocationBatch {
+  positions: LocationBatchEntry[];
+  encoding?: 'delta';
+  scale?: number;
+}
+
+// Resolve a location_batch frame against the last known position per user.
+// Delta entries for users without a keyframe yet are skipped.
+export const decodeLocationBatch = (
+  batch: LocationBatch,
+  known: Map<number, LocationUpdate>
+): LocationUpdate[] => {
+  const scale = batch.scale ?? 1_000_000;
+  const decoded: LocationUpdate[] = [];
+  for (const entry of batch.positions) {
+    const previous = known.get(entry.user_id);
+    // A socket in several rooms receives the same entry once per room
+    if (previous && previous.timestamp === entry.timestamp) continue;
+    let latitude = entry.latitude;
+    let longitude = entry.longitude;
+    if (latitude === undefined || longitude === undefined) {
+      if (!previous) continue;
+      latitude = (Math.round(previous.latitude * scale) + (entry.dlat ?? 0)) / scale;
+      longitude = (Math.round(previous.longitude * scale) + (entry.dlon ?? 0)) / scale;
+    }
+    const update: LocationUpdate = {
+      user_id: entry.user_id,
+      latitude,
+      longitude,
+      timestamp: entry.timestamp,
+      project_id: entry.project_id,
+    };
+    known.set(entry.user_id, update);
+    decoded.push(update);
+  }
+  return decoded;
+};
+
 // Define the structure for the hook's return value
 export interface RealtimeState {
   isConnected: boolean;
@@ -64,10 +113,21 @@ export const useRealtime = (token: string | null): RealtimeState => {
       setError(err.message);
     });
 
+    // Last position per user on this connection, the base for delta-encoded batches
+    const knownPositions = new Map<number, LocationUpdate>();
+
     newSocket.on('location_update', (data: LocationUpdate) => {
+      knownPositions.set(data.user_id, data);
       setLatestLocationUpdate(data);
     });
 
+    newSocket.on('location_batch', (batch: LocationBatch) => {
+      const decoded = decodeLocationBatch(batch, knownPositions);
+      if (decoded.length > 0) {
+        setLatestLocationUpdate(decoded[decoded.length - 1]);
+      }
+    });
+
     newSocket.on('error', (data: { message: string }) => {
       console.error('Realtime server error:', data.message);
       setError(data.message);